@@ -11,7 +11,7 @@ import os
 import logging
 import time
 import threading
-from typing import List, Any
+from typing import List, Any, Dict
 from .core import BaseManagerEventHandler
 from ..globalData import ManagerObjOption, ManagerObjNode, ManagerObjSensor, ManagerObjManager, \
     ManagerObjAlert, ManagerObjAlertLevel, ManagerObjSensorAlert, ManagerObjProfile
@@ -97,6 +97,27 @@ class ManagerEventHandler(BaseManagerEventHandler):
 
         return result
 
+    def status_update_delta(self,
+                            server_time: int,
+                            options: List[ManagerObjOption],
+                            nodes: List[ManagerObjNode],
+                            sensors: List[ManagerObjSensor],
+                            managers: List[ManagerObjManager],
+                            alerts: List[ManagerObjAlert],
+                            deleted: Dict[str, List[Any]]) -> bool:
+
+        result = super().status_update_delta(server_time,
+                                             options,
+                                             nodes,
+                                             sensors,
+                                             managers,
+                                             alerts,
+                                             deleted)
+
+        self._update_db_data_non_blocking()
+
+        return result
+
     def sensor_alert(self,
                      server_time: int,
                      sensor_alert: ManagerObjSensorAlert) -> bool:
@@ -7,7 +7,7 @@
 #
 # Licensed under the GNU Affero General Public License, version 3.
 
-from typing import List, Any
+from typing import List, Any, Dict
 from .core import BaseManagerEventHandler
 from ..globalData import ManagerObjOption, ManagerObjNode, ManagerObjSensor, ManagerObjManager, ManagerObjAlert, \
     ManagerObjAlertLevel, ManagerObjSensorAlert, ManagerObjProfile, SensorDataType
@@ -44,6 +44,28 @@ class ManagerEventHandler(BaseManagerEventHandler):
 
         return result
 
+    def status_update_delta(self,
+                            server_time: int,
+                            options: List[ManagerObjOption],
+                            nodes: List[ManagerObjNode],
+                            sensors: List[ManagerObjSensor],
+                            managers: List[ManagerObjManager],
+                            alerts: List[ManagerObjAlert],
+                            deleted: Dict[str, List[Any]]) -> bool:
+
+        result = super().status_update_delta(server_time,
+                                             options,
+                                             nodes,
+                                             sensors,
+                                             managers,
+                                             alerts,
+                                             deleted)
+
+        # DEVELOPERS: add your code here
+        print("ManagerEventHandler: status_update_delta")
+
+        return result
+
     def sensor_alert(self,
                      server_time: int,
                      sensor_alert: ManagerObjSensorAlert) -> bool:
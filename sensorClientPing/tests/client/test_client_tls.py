@@ -0,0 +1 @@
+../../../shared_code/clients_all/tests/client/test_client_tls.py
\ No newline at end of file
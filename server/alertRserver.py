@@ -10,13 +10,14 @@
 import sys
 import os
 from lib import ConnectionWatchdog, CSVWatchdog
-from lib import ServerSession, ThreadedTCPServer
+from lib import ServerSession, ThreadedTCPServer, SelectorTCPServer
 from lib import VersionInformerSensor
 from lib import SensorAlertExecuter
 from lib import ManagerUpdateExecuter
 from lib import OptionExecuter
 from lib import GlobalData
 from lib import SurveyExecuter
+from lib import MetricsExporter
 from lib import parse_config
 import time
 import threading
@@ -65,7 +66,16 @@ if __name__ == '__main__':
     # start server process
     while True:
         try:
-            server = ThreadedTCPServer(globalData, ('0.0.0.0', globalData.server_port), ServerSession)
+            if globalData.server_engine == "selector":
+                globalData.logger.info("[%s] Using selector server engine with %d workers."
+                                       % (fileName, globalData.server_engine_workers))
+                server = SelectorTCPServer(globalData,
+                                           ('0.0.0.0', globalData.server_port),
+                                           ServerSession,
+                                           globalData.server_engine_workers)
+
+            else:
+                server = ThreadedTCPServer(globalData, ('0.0.0.0', globalData.server_port), ServerSession)
             break
 
         except Exception as e:
@@ -113,6 +123,20 @@ if __name__ == '__main__':
         surveyExecuter.daemon = True
         surveyExecuter.start()
 
+    # Serve the metrics if the user activated them.
+    if globalData.metrics is not None:
+        globalData.logger.info("[%s] Starting metrics exporter thread." % fileName)
+        try:
+            metricsExporter = MetricsExporter(globalData)
+            # set thread to daemon
+            # => threads terminates when main thread terminates
+            metricsExporter.daemon = True
+            metricsExporter.start()
+
+        except Exception as e:
+            globalData.logger.exception("[%s]: Starting metrics exporter failed." % fileName)
+            sys.exit(1)
+
     # Finalize internal sensors
     # (do it last in order to resolve problems with objects not available during configuration).
     globalData.logger.info("[%s] Initializing internal sensors." % fileName)
@@ -8,7 +8,7 @@
 # Licensed under the GNU Affero General Public License, version 3.
 
 from .watchdogs import ConnectionWatchdog, CSVWatchdog
-from .server import ServerSession, ThreadedTCPServer, AsynchronousSender
+from .server import ServerSession, ThreadedTCPServer, SelectorTCPServer, AsynchronousSender
 from .storage import Sqlite
 from .alert import SensorAlertExecuter
 from .localObjects import SensorDataType, Sensor, AlertLevel
@@ -19,4 +19,6 @@ from .manager import ManagerUpdateExecuter
 from .option import OptionExecuter
 from .update import Updater
 from .globalData import GlobalData
+from .profileState import ProfileState
 from .survey import SurveyExecuter
+from .metrics import MetricsExporter
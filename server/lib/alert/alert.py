@@ -7,13 +7,14 @@
 #
 # Licensed under the GNU Affero General Public License, version 3.
 
+import heapq
 import logging
 import threading
 import os
 import time
 from typing import List, Tuple, Optional, Any, Dict
 from .instrumentation import Instrumentation, InstrumentationPromise
-from ..server import AsynchronousSender
+from .instrumentationPool import InstrumentationPool
 from ..localObjects import SensorAlert, AlertLevel
 from ..globalData import GlobalData
 from ..internalSensors import AlertLevelInstrumentationErrorSensor
@@ -35,10 +36,16 @@ class SensorAlertState:
 
     def __init__(self,
                  sensor_alert: SensorAlert,
-                 alert_levels: List[AlertLevel]):
+                 alert_levels: List[AlertLevel],
+                 time_received: Optional[float] = None):
 
         self._init_sensor_alert = sensor_alert
 
+        # Exact time the sensor alert was received (the sensor alert object only holds it in seconds).
+        self._time_received = time_received
+        if self._time_received is None:
+            self._time_received = sensor_alert.timeReceived
+
         # Consider all alert levels of the sensor alert initially as suitable.
         self._suitable_alert_levels = list()  # type: List[AlertLevel]
         for alert_level in alert_levels:
@@ -46,7 +53,7 @@ class SensorAlertState:
                 self._suitable_alert_levels.append(alert_level)
 
         # Calculate initial time when the sensor alert should be triggered.
-        self._time_valid = sensor_alert.timeReceived + sensor_alert.alertDelay
+        self._time_valid = self._time_received + sensor_alert.alertDelay
 
         # State information needed for sensor alert instrumentation.
         self._uses_instrumentation = False
@@ -133,13 +140,22 @@ class SensorAlertState:
         else:
             return self._init_sensor_alert
 
+    @property
+    def time_received(self) -> float:
+        return self._time_received
+
+    @property
+    def time_valid(self) -> float:
+        return self._time_valid
+
     def is_alert_delay_passed(self) -> bool:
-        return int(time.time()) >= self._time_valid
+        return time.time() >= self._time_valid
 
 
 class SensorAlertExecuter(threading.Thread):
     """
-    This class is woken up if a sensor alert is received and executes all necessary steps
+    This class is woken up if a sensor alert is received, an instrumentation finished or an alert delay passed
+    and executes all necessary steps
     """
 
     def __init__(self,
@@ -151,8 +167,10 @@ class SensorAlertExecuter(threading.Thread):
         self._logger = self._global_data.logger
         self._manager_update_executer = self._global_data.managerUpdateExecuter
         self._storage = self._global_data.storage
+        self._profile_state = self._global_data.profile_state
         self._alert_levels = self._global_data.alertLevels  # type: List[AlertLevel]
         self._server_sessions = self._global_data.serverSessions
+        self._metrics = self._global_data.metrics
 
         # file nme of this file (used for logging)
         self._log_tag = os.path.basename(__file__)
@@ -161,9 +179,17 @@ class SensorAlertExecuter(threading.Thread):
         self._sensor_alert_event = threading.Event()
         self._sensor_alert_event.clear()
 
-        self._sensor_alert_queue = []
+        self._sensor_alert_queue = []  # type: List[Tuple[SensorAlert, float]]
         self._sensor_alert_queue_lock = threading.Lock()
 
+        # Sensor alert states that wait for their alert delay, ordered by the time they become valid
+        # (the counter keeps the order of states with the same time).
+        self._delayed_states = []  # type: List[Tuple[float, int, SensorAlertState]]
+        self._delayed_counter = 0
+
+        # Sensor alert states that wait for their instrumentation to finish.
+        self._instrumented_states = []  # type: List[SensorAlertState]
+
         self._exit_flag = False
 
         # Get instance of the internal alert level instrumentation error sensor (if exists).
@@ -172,6 +198,11 @@ class SensorAlertExecuter(threading.Thread):
             if isinstance(internal_sensor, AlertLevelInstrumentationErrorSensor):
                 self._internal_sensor = internal_sensor
 
+        # Pool that limits the number of concurrently running instrumentation processes.
+        self._instrumentation_pool = InstrumentationPool(self._global_data.instrumentationMaxProcesses,
+                                                         self._logger,
+                                                         self._global_data.instrumentationMaxOutput)
+
     def _filter_sensor_alerts(self, sensor_alert_states: List[SensorAlertState]) -> Tuple[List[SensorAlertState],
                                                                                           List[SensorAlert]]:
         """
@@ -289,7 +320,9 @@ class SensorAlertExecuter(threading.Thread):
                     new_sensor_alert = SensorAlert().deepcopy(base_sensor_alert_state.sensor_alert)
                     del new_sensor_alert.triggeredAlertLevels[:]
 
-                    new_sensor_alert_state = SensorAlertState(new_sensor_alert, [alert_level])
+                    new_sensor_alert_state = SensorAlertState(new_sensor_alert,
+                                                              [alert_level],
+                                                              base_sensor_alert_state.time_received)
                     new_sensor_alert_state.uses_instrumentation = True
                     new_sensor_alert_states.append(new_sensor_alert_state)
                 else:
@@ -319,37 +352,21 @@ class SensorAlertExecuter(threading.Thread):
                                    % self._log_tag)
             return
 
-        # Send sensor alert to all manager and alert clients.
-        for server_session in self._server_sessions:
-            # Ignore sessions which do not exist yet and that are not alert or manager clients.
-            if server_session.clientComm is None:
-                continue
-            if (server_session.clientComm.nodeType != "manager"
-               and server_session.clientComm.nodeType != "alert"):
-                continue
-            if not server_session.clientComm.clientInitialized:
+        # Send sensor alert to all manager and alert clients that handle a triggered alert level
+        # (the routing table only contains initialized manager and alert clients).
+        for client_comm in self._server_sessions.get_alert_level_routes(sensor_alert.triggeredAlertLevels):
+            if not client_comm.clientInitialized:
                 continue
 
-            # Only send a sensor alert to a client that actually handles a triggered alert level.
-            client_alert_levels = server_session.clientComm.clientAlertLevels
-            at_least_one = any(al in client_alert_levels
-                               for al in sensor_alert_state.sensor_alert.triggeredAlertLevels)
-            if not at_least_one:
-                continue
-
-            # Sending sensor alert to manager/alert node via a thread to not block the sensor alert executer.
-            sensor_alert_process = AsynchronousSender(self._global_data, server_session.clientComm)
-            # set thread to daemon
-            # => threads terminates when main thread terminates
-            sensor_alert_process.daemon = True
-            sensor_alert_process.sendSensorAlert = True
-            sensor_alert_process.sensorAlert = sensor_alert
-
+            # Queue sensor alert for the writer of the manager/alert node to not block the sensor alert executer.
             self._logger.debug("[%s]: Sending Sensor Alert to manager/alert (%s:%d)."
                                % (self._log_tag,
-                                  server_session.clientComm.clientAddress,
-                                  server_session.clientComm.clientPort))
-            sensor_alert_process.start()
+                                  client_comm.clientAddress,
+                                  client_comm.clientPort))
+            client_comm.queueSensorAlert(sensor_alert)
+
+        if self._metrics is not None:
+            self._metrics.dispatch_latency.observe(max(0.0, time.time() - sensor_alert_state.time_valid))
 
     def _update_suitable_alert_levels(self, sensor_alert_states: List[SensorAlertState]):
         """
@@ -358,11 +375,10 @@ class SensorAlertExecuter(threading.Thread):
         :param sensor_alert_states:
         """
 
-        option = self._storage.get_option_by_type("profile")
-        if option is None:
-            self._logger.error("[%s]: Unable to get 'profile' option from database." % self._log_tag)
+        curr_profile_id = self._profile_state.get_profile_id(self._logger)
+        if curr_profile_id is None:
+            self._logger.error("[%s]: Unable to get current profile." % self._log_tag)
             return
-        curr_profile_id = option.value
 
         for sensor_alert_state in sensor_alert_states:
 
@@ -461,7 +477,8 @@ class SensorAlertExecuter(threading.Thread):
             sensor_alert_state.instrumentation = Instrumentation(alert_level,
                                                                  sensor_alert_state.init_sensor_alert,
                                                                  self._logger,
-                                                                 self._internal_sensor)
+                                                                 self._internal_sensor,
+                                                                 self._instrumentation_pool)
             sensor_alert_state.instrumentation_promise = sensor_alert_state.instrumentation.execute()
 
     def add_sensor_alert(self,
@@ -492,10 +509,11 @@ class SensorAlertExecuter(threading.Thread):
         if logger is None:
             logger = self._logger
 
+        time_received = time.time()
         sensor_alert = SensorAlert()
         sensor_alert.sensorId = sensor_id
         sensor_alert.nodeId = node_id
-        sensor_alert.timeReceived = int(time.time())
+        sensor_alert.timeReceived = int(time_received)
         sensor_alert.state = state
         sensor_alert.changeState = change_state
         sensor_alert.hasLatestData = has_latest_data
@@ -517,17 +535,62 @@ class SensorAlertExecuter(threading.Thread):
         sensor_alert.alertLevels = sensor.alertLevels
 
         with self._sensor_alert_queue_lock:
-            self._sensor_alert_queue.append(sensor_alert)
+            self._sensor_alert_queue.append((sensor_alert, time_received))
 
         self._sensor_alert_event.set()
         return True
 
+    def _get_states_to_process(self) -> List[SensorAlertState]:
+        """
+        Gets the sensor alert states that were received, whose alert delay passed or whose instrumentation finished
+        since the last processing.
+        :return: list of sensor alert states to process
+        """
+        sensor_alert_states = list()
+
+        # Apply a processing state to each sensor alert from the queue.
+        with self._sensor_alert_queue_lock:
+            sensor_alert_queue = self._sensor_alert_queue
+            self._sensor_alert_queue = list()
+        for sensor_alert, time_received in sensor_alert_queue:
+            sensor_alert_states.append(SensorAlertState(sensor_alert, self._alert_levels, time_received))
+
+        now = time.time()
+        while self._delayed_states and self._delayed_states[0][0] <= now:
+            sensor_alert_states.append(heapq.heappop(self._delayed_states)[2])
+
+        instrumented_states = list()
+        for sensor_alert_state in self._instrumented_states:
+            if sensor_alert_state.instrumentation_finished:
+                sensor_alert_states.append(sensor_alert_state)
+            else:
+                instrumented_states.append(sensor_alert_state)
+        self._instrumented_states = instrumented_states
+
+        return sensor_alert_states
+
+    def _schedule_sensor_alert_states(self, sensor_alert_states: List[SensorAlertState]):
+        """
+        Sets the sensor alert states that still need handling aside until their instrumentation finished
+        or their alert delay passed.
+        :param sensor_alert_states:
+        """
+        for sensor_alert_state in sensor_alert_states:
+            if not sensor_alert_state.instrumentation_processed:
+                # Wake up this thread as soon as the instrumentation finished.
+                self._instrumented_states.append(sensor_alert_state)
+                sensor_alert_state.instrumentation_promise.add_finished_callback(self._sensor_alert_event.set)
+
+            else:
+                self._delayed_counter += 1
+                heapq.heappush(self._delayed_states,
+                               (sensor_alert_state.time_valid, self._delayed_counter, sensor_alert_state))
+
     def run(self):
         """
         This function starts the endless loop of the alert executer thread.
         """
 
-        curr_sensor_alert_states = list()  # type: List[SensorAlertState]
         while True:
 
             # check if thread should terminate
@@ -539,13 +602,7 @@ class SensorAlertExecuter(threading.Thread):
             if self._manager_update_executer is None:
                 self._manager_update_executer = self._global_data.managerUpdateExecuter
 
-            # Apply a processing state to each sensor alert from the queue.
-            while self._sensor_alert_queue:
-                with self._sensor_alert_queue_lock:
-                    sensor_alert = self._sensor_alert_queue.pop(0)
-
-                sensor_alert_state = SensorAlertState(sensor_alert, self._alert_levels)
-                curr_sensor_alert_states.append(sensor_alert_state)
+            curr_sensor_alert_states = self._get_states_to_process()
 
             # Update timestamp of last state updated of alert level instrumentation error sensor
             # to not let it timeout (state never changes of this sensor hence we have to do it artificially).
@@ -561,36 +618,67 @@ class SensorAlertExecuter(threading.Thread):
                                        % self._log_tag
                                        + "instrumentation error sensor.")
 
-            # Wait if we do not have any sensor alerts to process.
-            if not curr_sensor_alert_states:
-                # Timeout after 10 seconds to make sure we see an exit flag change.
-                self._sensor_alert_event.wait(10)
-                self._sensor_alert_event.clear()
-                continue
+            if curr_sensor_alert_states:
+
+                # Split sensor alert states into separated states for instrumented alert levels
+                # NOTE: does not update triggered alert levels of sensor alert object, hence performed in the beginning.
+                curr_sensor_alert_states = self._separate_instrumentation_alert_levels(curr_sensor_alert_states)
 
-            # Split sensor alert states into separated states for instrumented alert levels
-            # NOTE: does not update triggered alert levels of sensor alert object, hence performed in the beginning.
-            curr_sensor_alert_states = self._separate_instrumentation_alert_levels(curr_sensor_alert_states)
+                # Update suitable alert levels as well as triggered alert leves of sensor alert object.
+                self._update_suitable_alert_levels(curr_sensor_alert_states)
 
-            # Update suitable alert levels as well as triggered alert leves of sensor alert object.
-            self._update_suitable_alert_levels(curr_sensor_alert_states)
+                # Execute instrumentation of alert levels (if they have any).
+                self._update_instrumentation(curr_sensor_alert_states)
 
-            # Execute instrumentation of alert levels (if they have any).
-            self._update_instrumentation(curr_sensor_alert_states)
+                # Filter out sensor alert states that can no longer satisfy trigger condition
+                # (no suitable alert levels, instrumentation suppresses them, ...)
+                curr_sensor_alert_states, dropped_sensor_alerts = self._filter_sensor_alerts(curr_sensor_alert_states)
 
-            # Filter out sensor alert states that can no longer satisfy trigger condition
-            # (no suitable alert levels, instrumentation suppresses them, ...)
-            curr_sensor_alert_states, dropped_sensor_alerts = self._filter_sensor_alerts(curr_sensor_alert_states)
+                curr_sensor_alert_states = self._process_sensor_alert(curr_sensor_alert_states)
 
-            curr_sensor_alert_states = self._process_sensor_alert(curr_sensor_alert_states)
+                # Queue dropped sensor alerts for state/data updates to manager clients.
+                self._queue_manager_update(dropped_sensor_alerts)
 
-            # Queue dropped sensor alerts for state/data updates to manager clients.
-            self._queue_manager_update(dropped_sensor_alerts)
+                self._schedule_sensor_alert_states(curr_sensor_alert_states)
 
-            time.sleep(0.5)
+            # Wait until a sensor alert is received, an instrumentation finished or the next alert delay passed.
+            # Timeout after 10 seconds to make sure we see an exit flag change.
+            timeout = 10.0
+            if self._delayed_states:
+                timeout = min(timeout, max(0.0, self._delayed_states[0][0] - time.time()))
+            self._sensor_alert_event.wait(timeout)
+            self._sensor_alert_event.clear()
+
+    def get_queue_statistics(self) -> Dict[str, int]:
+        """
+        Gets the number of sensor alerts waiting in this executer.
+        :return: dictionary with the number of received sensor alerts that are not processed yet in "queued",
+        the sensor alerts waiting for their alert delay in "delayed" and for their instrumentation in "instrumented"
+        """
+        with self._sensor_alert_queue_lock:
+            queued = len(self._sensor_alert_queue)
+        return {"queued": queued,
+                "delayed": len(self._delayed_states),
+                "instrumented": len(self._instrumented_states)}
+
+    def get_instrumentation_statistics(self) -> Dict[str, Any]:
+        """
+        Gets the statistics of the instrumentation pool and the execution times of the instrumentations
+        by alert level.
+        :return: dictionary with "queued", "running", the histograms of the alert levels in "alert_levels"
+        and the statistics of the instrumentation cache in "cache"
+        """
+        return self._instrumentation_pool.get_statistics()
+
+    def clear_instrumentation_cache(self):
+        """
+        Removes all cached instrumentation results (has to be called if the alert level configuration changes).
+        """
+        self._instrumentation_pool.decision_cache.clear()
 
     def exit(self):
         """
         sets the exit flag to shut down the thread
         """
         self._exit_flag = True
+        self._instrumentation_pool.close()
@@ -7,16 +7,24 @@
 #
 # Licensed under the GNU Affero General Public License, version 3.
 
+import collections
 import json
 import logging
 import os
+import selectors
 import subprocess
 import threading
 import time
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple, Callable, List
 from ..localObjects import AlertLevel, SensorAlert, SensorDataType
 from ..internalSensors import AlertLevelInstrumentationErrorSensor
 
+# Default maximum number of bytes of the output of an instrumentation script that is captured.
+MAX_OUTPUT_SIZE = 65536
+
+# Default maximum number of decisions held by the instrumentation cache.
+MAX_CACHE_ENTRIES = 1024
+
 
 class PromiseState:
     SUCCESS = 1
@@ -37,6 +45,14 @@ class InstrumentationPromise:
         self._state = PromiseState.PENDING
         self._creation_time = int(time.time())
 
+        # Wall time of the instrumentation execution (set once it finished).
+        self._start_time = None  # type: Optional[float]
+        self._execution_time = None  # type: Optional[float]
+
+        # Functions called once the instrumentation finished.
+        self._finished_callbacks = list()  # type: List[Callable[[], None]]
+        self._finished_lock = threading.Lock()
+
     @property
     def new_sensor_alert(self) -> Optional[SensorAlert]:
         """
@@ -55,6 +71,13 @@ class InstrumentationPromise:
     def alert_level(self) -> AlertLevel:
         return self._alert_level
 
+    @property
+    def execution_time(self) -> Optional[float]:
+        """
+        :return: seconds the instrumentation took or none if it did not finish yet
+        """
+        return self._execution_time
+
     @property
     def orig_sensor_alert(self) -> SensorAlert:
         return self._orig_sensor_alert
@@ -70,13 +93,38 @@ class InstrumentationPromise:
 
         return self._state != PromiseState.PENDING
 
+    def _set_finished(self, state: int):
+        with self._finished_lock:
+            if self._start_time is not None:
+                self._execution_time = time.time() - self._start_time
+            self._state = state
+            self._finished_event.set()
+            finished_callbacks = self._finished_callbacks
+            self._finished_callbacks = list()
+
+        for callback in finished_callbacks:
+            callback()
+
+    def add_finished_callback(self, callback: Callable[[], None]):
+        """
+        Adds a function that is called once the instrumentation finished (or immediately if it already finished).
+        :param callback:
+        """
+        with self._finished_lock:
+            if self._state == PromiseState.PENDING:
+                self._finished_callbacks.append(callback)
+                return
+
+        callback()
+
+    def set_started(self):
+        self._start_time = time.time()
+
     def set_failed(self):
-        self._state = PromiseState.FAILED
-        self._finished_event.set()
+        self._set_finished(PromiseState.FAILED)
 
     def set_success(self):
-        self._state = PromiseState.SUCCESS
-        self._finished_event.set()
+        self._set_finished(PromiseState.SUCCESS)
 
     def was_success(self) -> bool:
         if self._state == PromiseState.SUCCESS:
@@ -89,13 +137,272 @@ class InstrumentationPromise:
             raise ValueError("Instrumentation not finished.")
 
 
+class InstrumentationWorkerExited(Exception):
+
+    def __init__(self, exit_code: Optional[int]):
+        super().__init__("Instrumentation worker exited with exit code '%s'." % str(exit_code))
+        self.exit_code = exit_code
+
+
+class InstrumentationOutputTooLarge(Exception):
+    pass
+
+
+class PersistentInstrumentationWorker:
+    """
+    Long-running instrumentation process of an alert level. The process is started once without arguments,
+    reads one sensor alert per line in json format from stdin and writes the result for it as one line to stdout.
+    The process is started again for the next sensor alert if it exited or did not answer in time.
+    """
+
+    def __init__(self,
+                 alert_level: AlertLevel,
+                 logger: logging.Logger,
+                 max_output: int = MAX_OUTPUT_SIZE):
+        self._log_tag = os.path.basename(__file__)
+        self._logger = logger
+        self._alert_level = alert_level
+        self._max_output = max_output
+        self._process = None  # type: Optional[subprocess.Popen]
+        self._buffer = b""
+
+        # Only one sensor alert is processed by the worker at a time.
+        self._lock = threading.Lock()
+
+    def _log_stderr(self, process: subprocess.Popen):
+        """
+        Internal function that logs the stderr output of the worker process until it exits.
+        :param process:
+        """
+        try:
+            for line in process.stderr:
+                self._logger.error("[%s]: Instrumentation for Alert Level '%d' stderr: %s"
+                                   % (self._log_tag, self._alert_level.level, line.decode("ascii").strip()))
+
+        except Exception:
+            pass
+
+    def _start(self):
+        """
+        Internal function that starts the worker process. The lock has to be held by the caller.
+        """
+        self._logger.debug("[%s]: Starting persistent instrumentation '%s' for Alert Level '%d'."
+                           % (self._log_tag, self._alert_level.instrumentation_cmd, self._alert_level.level))
+
+        self._process = subprocess.Popen([self._alert_level.instrumentation_cmd],
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE,
+                                         bufsize=0,
+                                         close_fds=True)
+        self._buffer = b""
+
+        stderr_thread = threading.Thread(target=self._log_stderr, args=(self._process, ))
+        stderr_thread.daemon = True
+        stderr_thread.start()
+
+    def _stop(self) -> Optional[int]:
+        """
+        Internal function that stops the worker process. The lock has to be held by the caller.
+        :return: exit code of the process
+        """
+        process = self._process
+        self._process = None
+        if process is None:
+            return None
+
+        for stream in [process.stdin, process.stdout]:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+        try:
+            process.terminate()
+            return process.wait(1)
+
+        except subprocess.TimeoutExpired:
+            process.kill()
+            return process.wait()
+
+        except Exception:
+            return process.poll()
+
+    def process(self, request: str, timeout: float) -> str:
+        """
+        Hands the given request over to the worker process and waits for its answer.
+        :param request: sensor alert in json format (without line break)
+        :param timeout: seconds to wait for the answer
+        :return: answer of the worker process (without line break)
+        :raises subprocess.TimeoutExpired: if the worker did not answer in time
+        :raises InstrumentationWorkerExited: if the worker exited before answering
+        :raises InstrumentationOutputTooLarge: if the answer is larger than the maximum output size
+        :raises OSError: if the worker could not be started
+        """
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._stop()
+                self._start()
+
+            try:
+                self._process.stdin.write(request.encode("ascii") + b"\n")
+                self._process.stdin.flush()
+
+            except (BrokenPipeError, OSError):
+                exit_code = self._stop()
+                raise InstrumentationWorkerExited(exit_code)
+
+            end_time = time.time() + timeout
+            while b"\n" not in self._buffer:
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    # The answer can not be matched to a request anymore, hence the worker is started again.
+                    self._stop()
+                    raise subprocess.TimeoutExpired(self._alert_level.instrumentation_cmd, timeout)
+
+                with selectors.DefaultSelector() as selector:
+                    selector.register(self._process.stdout, selectors.EVENT_READ)
+                    if not selector.select(remaining):
+                        continue
+
+                data = os.read(self._process.stdout.fileno(), 4096)
+                if not data:
+                    exit_code = self._stop()
+                    raise InstrumentationWorkerExited(exit_code)
+                self._buffer += data
+
+                if len(self._buffer) > self._max_output and b"\n" not in self._buffer:
+                    self._stop()
+                    raise InstrumentationOutputTooLarge()
+
+            line, self._buffer = self._buffer.split(b"\n", 1)
+            if len(line) > self._max_output:
+                raise InstrumentationOutputTooLarge()
+            return line.decode("ascii").strip()
+
+    def close(self):
+        """
+        Stops the worker process.
+        """
+        with self._lock:
+            self._stop()
+
+
+class InstrumentationCache:
+    """
+    Holds the results of successful instrumentations for the alert levels that have a cache time to live set.
+    Results are looked up by alert level, sensor, state, data and the configured optional data keys of the
+    sensor alert. The least recently used results are removed if the maximum number of entries is reached.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHE_ENTRIES):
+        self._max_entries = max_entries
+
+        # Key -> (time the entry expires, sensor alert dictionary or None if suppressed).
+        self._entries = collections.OrderedDict()  # type: collections.OrderedDict
+        self._lock = threading.Lock()
+
+        # Alert level -> [hits, misses]
+        self._counters = dict()  # type: Dict[int, List[int]]
+
+    @staticmethod
+    def _get_key(alert_level: AlertLevel, sensor_alert: SensorAlert) -> Tuple:
+        optional_data = dict()
+        if sensor_alert.hasOptionalData and sensor_alert.optionalData:
+            for key in alert_level.instrumentation_cache_keys:
+                optional_data[key] = sensor_alert.optionalData.get(key)
+
+        return (alert_level.level,
+                alert_level.instrumentation_cmd,
+                sensor_alert.sensorId,
+                sensor_alert.state,
+                json.dumps(sensor_alert.data.copy_to_dict(), sort_keys=True),
+                json.dumps(optional_data, sort_keys=True))
+
+    def clear(self):
+        """
+        Removes all results (e.g., after the alert level configuration changed).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def get(self,
+            alert_level: AlertLevel,
+            sensor_alert: SensorAlert) -> Tuple[bool, Optional[SensorAlert]]:
+        """
+        Gets the cached result of the instrumentation of the given sensor alert.
+        :param alert_level:
+        :param sensor_alert:
+        :return: tuple with the flag if a result was cached and the new sensor alert object (or none
+        if the instrumentation suppressed the sensor alert)
+        """
+        key = InstrumentationCache._get_key(alert_level, sensor_alert)
+        with self._lock:
+            counters = self._counters.setdefault(alert_level.level, [0, 0])
+
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                counters[1] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            counters[0] += 1
+            sensor_alert_dict = entry[1]
+
+        if sensor_alert_dict is None:
+            return True, None
+
+        # Values that the instrumentation is not allowed to change are taken from the current sensor alert.
+        new_sensor_alert = SensorAlert.convert_from_dict(json.loads(sensor_alert_dict))
+        new_sensor_alert.nodeId = sensor_alert.nodeId
+        new_sensor_alert.description = sensor_alert.description
+        new_sensor_alert.timeReceived = sensor_alert.timeReceived
+        new_sensor_alert.alertDelay = sensor_alert.alertDelay
+        new_sensor_alert.alertLevels = list(sensor_alert.alertLevels)
+        return True, new_sensor_alert
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        :return: dictionary with the number of cached results in "entries" and the hits and misses
+        by alert level in "alert_levels"
+        """
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "alert_levels": {level: {"hits": counters[0], "misses": counters[1]}
+                                     for level, counters in self._counters.items()}}
+
+    def put(self,
+            alert_level: AlertLevel,
+            sensor_alert: SensorAlert,
+            new_sensor_alert: Optional[SensorAlert]):
+        """
+        Stores the result of a successful instrumentation of the given sensor alert.
+        :param alert_level:
+        :param sensor_alert: sensor alert given to the instrumentation
+        :param new_sensor_alert: sensor alert created by the instrumentation or none if it was suppressed
+        """
+        key = InstrumentationCache._get_key(alert_level, sensor_alert)
+        sensor_alert_dict = None
+        if new_sensor_alert is not None:
+            sensor_alert_dict = json.dumps(new_sensor_alert.convert_to_dict())
+
+        with self._lock:
+            self._entries[key] = (time.time() + alert_level.instrumentation_cache_ttl, sensor_alert_dict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
 class Instrumentation:
 
     def __init__(self,
                  alert_level: AlertLevel,
                  sensor_alert: SensorAlert,
                  logger: logging.Logger,
-                 internal_sensor: Optional[AlertLevelInstrumentationErrorSensor] = None):
+                 internal_sensor: Optional[AlertLevelInstrumentationErrorSensor] = None,
+                 pool=None):
         self._log_tag = os.path.basename(__file__)
         self._logger = logger
         self._alert_level = alert_level
@@ -104,11 +411,26 @@ class Instrumentation:
         self._thread = None  # type: Optional[threading.Thread]
         self._internal_sensor = internal_sensor
 
-    def _execute(self) -> InstrumentationPromise:
+        # Instrumentation pool the execution is queued in (executed in an own thread if not set).
+        self._pool = pool
+        self._submitted = False
+
+        # Maximum number of bytes captured from stdout and stderr of the instrumentation script.
+        self._max_output = pool.max_output if pool is not None else MAX_OUTPUT_SIZE
+
+    @property
+    def persistent_alert_level(self) -> Optional[int]:
         """
-        Execute instrumentation script with sensor alert as first argument in json format and
-        process output of instrumentation script.
-        :return: promise which contains the results after instrumentation finished execution.
+        :return: alert level if the instrumentation is handed over to the persistent worker of the pool, else None
+        """
+        if self._alert_level.instrumentation_persistent and self._pool is not None:
+            return self._alert_level.level
+        return None
+
+    def _create_argument(self) -> str:
+        """
+        Creates the sensor alert argument for the instrumentation script in json format.
+        :return: json string
         """
         arg = self._sensor_alert.convert_to_dict()
 
@@ -116,7 +438,122 @@ class Instrumentation:
         arg["instrumentationAlertLevel"] = self._alert_level.level
         del arg["triggeredAlertLevels"]
 
-        temp_execute = [self._alert_level.instrumentation_cmd, json.dumps(arg)]
+        return json.dumps(arg)
+
+    def _capture_output(self, process: subprocess.Popen) -> Tuple[bool, bytes, bytes, bool]:
+        """
+        Reads stdout and stderr of the instrumentation script while it runs (so it does not block on a full pipe)
+        and waits for it to exit. Output exceeding the maximum size is discarded.
+        :param process:
+        :return: tuple with the flag if the script exited in time, stdout, stderr and the flag if stdout
+        was truncated
+        """
+        outputs = {process.stdout.fileno(): bytearray(),
+                   process.stderr.fileno(): bytearray()}
+        truncated = set()
+        end_time = time.time() + self._alert_level.instrumentation_timeout
+
+        # A selector is used instead of select.select() since the file descriptors of the pipes
+        # can exceed FD_SETSIZE on a server with many connections.
+        with selectors.DefaultSelector() as selector:
+            for fd in outputs.keys():
+                selector.register(fd, selectors.EVENT_READ)
+
+            while selector.get_map():
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    return False, bytes(), bytes(), False
+
+                for key, _ in selector.select(remaining):
+                    fd = key.fd
+                    data = os.read(fd, 4096)
+                    if not data:
+                        selector.unregister(fd)
+                        continue
+
+                    output = outputs[fd]
+                    free_space = self._max_output - len(output)
+                    if len(data) > free_space:
+                        truncated.add(fd)
+                        data = data[:free_space]
+                    output += data
+
+        try:
+            process.wait(max(0.0, end_time - time.time()))
+
+        except subprocess.TimeoutExpired:
+            return False, bytes(), bytes(), False
+
+        return (True,
+                bytes(outputs[process.stdout.fileno()]),
+                bytes(outputs[process.stderr.fileno()]),
+                process.stdout.fileno() in truncated)
+
+    def _execute(self) -> InstrumentationPromise:
+        """
+        Execute instrumentation script with sensor alert as first argument in json format and
+        process output of instrumentation script.
+        :return: promise which contains the results after instrumentation finished execution.
+        """
+        self._promise.set_started()
+
+        if self._alert_level.instrumentation_persistent and self._pool is not None:
+            self._execute_persistent()
+
+        else:
+            self._execute_process()
+
+        if self._pool is not None and self._promise.is_finished():
+            self._pool.record_execution(self._alert_level.level,
+                                        self._promise.execution_time,
+                                        self._promise.was_success())
+
+            if self._alert_level.instrumentation_cache_ttl > 0 and self._promise.was_success():
+                self._pool.decision_cache.put(self._alert_level, self._sensor_alert, self._promise.new_sensor_alert)
+
+        return self._promise
+
+    def _set_execution_failed(self):
+        """
+        Marks the instrumentation as failed after its execution raised an unexpected exception
+        (does nothing if the promise already finished).
+        """
+        if self._promise.is_finished():
+            return
+
+        # Raise sensor alert (if internal sensor configured).
+        if self._internal_sensor is not None:
+            self._internal_sensor.raise_sensor_alert_execution_error(self._alert_level)
+
+        self._promise.set_failed()
+
+    def _use_cached_result(self) -> bool:
+        """
+        Sets the result of the promise from the instrumentation cache (if the alert level uses it).
+        :return: True if a cached result was used
+        """
+        if self._pool is None or self._alert_level.instrumentation_cache_ttl <= 0:
+            return False
+
+        was_cached, new_sensor_alert = self._pool.decision_cache.get(self._alert_level, self._sensor_alert)
+        if not was_cached:
+            return False
+
+        self._logger.debug("[%s]: Using cached instrumentation result for Alert Level '%d'."
+                           % (self._log_tag, self._alert_level.level))
+
+        self._promise.set_started()
+        if new_sensor_alert is not None:
+            self._promise.new_sensor_alert = new_sensor_alert
+        self._promise.set_success()
+        return True
+
+    def _execute_process(self) -> InstrumentationPromise:
+        """
+        Execute instrumentation script for the sensor alert and process its output.
+        :return: promise which contains the results after instrumentation finished execution.
+        """
+        temp_execute = [self._alert_level.instrumentation_cmd, self._create_argument()]
         self._logger.debug("[%s]: Executing command '%s'." % (self._log_tag, " ".join(temp_execute)))
 
         process = None
@@ -124,6 +561,7 @@ class Instrumentation:
             process = subprocess.Popen(temp_execute,
                                        stdout=subprocess.PIPE,
                                        stderr=subprocess.PIPE,
+                                       bufsize=0,
                                        close_fds=True)
 
         except Exception:
@@ -151,9 +589,39 @@ class Instrumentation:
             return self._promise
 
         try:
-            process.wait(self._alert_level.instrumentation_timeout)
+            exited, output, err, output_truncated = self._capture_output(process)
 
-        except subprocess.TimeoutExpired:
+        except Exception:
+            self._logger.exception("[%s]: Reading output of instrumentation for Alert Level '%d' failed."
+                                   % (self._log_tag, self._alert_level.level))
+
+            # Do not leave the process running or unreaped.
+            try:
+                process.kill()
+                process.wait()
+            except Exception:
+                pass
+
+            # Raise sensor alert (if internal sensor configured).
+            if self._internal_sensor is not None:
+                self._internal_sensor.raise_sensor_alert_execution_error(self._alert_level)
+
+            # Set result.
+            self._promise.set_failed()
+
+            try:
+                process.stdout.close()
+            except Exception:
+                pass
+
+            try:
+                process.stderr.close()
+            except Exception:
+                pass
+
+            return self._promise
+
+        if not exited:
             self._logger.error("[%s]: Instrumentation for Alert Level '%d' timed out."
                                % (self._log_tag, self._alert_level.level))
 
@@ -194,50 +662,24 @@ class Instrumentation:
             return self._promise
 
         exit_code = process.poll()
-        output, err = process.communicate()
         output = output.decode("ascii").strip()
         err = err.decode("ascii").strip()
 
-        if exit_code == 0:
-
-            # Sensor Alert is suppressed if no output is given by instrumentation script.
-            if output == "":
-                self._logger.error("[%s]: No output for instrumentation for Alert Level '%d'."
-                                   % (self._log_tag, self._alert_level.level))
-                self._logger.error("[%s]: Instrumentation for Alert Level '%d' stderr: %s"
-                                   % (self._log_tag, self._alert_level.level, err))
-
-                # Raise sensor alert (if internal sensor configured).
-                if self._internal_sensor is not None:
-                    self._internal_sensor.raise_sensor_alert_output_empty(self._alert_level)
-
-                # Set result.
-                self._promise.set_failed()
-
-            # Parse output of instrumentation script if it exists to create new Sensor Alert object.
-            else:
-
-                was_success, new_sensor_alert = self._process_output(output)
-
-                if was_success:
-                    # Set result.
-                    self._promise.new_sensor_alert = new_sensor_alert
-                    self._promise.set_success()
+        if exit_code == 0 and output_truncated:
+            self._logger.error("[%s]: Output of instrumentation for Alert Level '%d' exceeds %d bytes."
+                               % (self._log_tag, self._alert_level.level, self._max_output))
+            self._logger.error("[%s]: Instrumentation for Alert Level '%d' stderr: %s"
+                               % (self._log_tag, self._alert_level.level, err))
 
-                else:
-                    self._logger.error("[%s]: Unable to process output from instrumentation for Alert Level '%d'."
-                                       % (self._log_tag, self._alert_level.level))
-                    self._logger.error("[%s]: Instrumentation for Alert Level '%d' stdout: %s"
-                                       % (self._log_tag, self._alert_level.level, output))
-                    self._logger.error("[%s]: Instrumentation for Alert Level '%d' stderr: %s"
-                                       % (self._log_tag, self._alert_level.level, err))
+            # Raise sensor alert (if internal sensor configured).
+            if self._internal_sensor is not None:
+                self._internal_sensor.raise_sensor_alert_invalid_output(self._alert_level)
 
-                    # Raise sensor alert (if internal sensor configured).
-                    if self._internal_sensor is not None:
-                        self._internal_sensor.raise_sensor_alert_invalid_output(self._alert_level)
+            # Set result.
+            self._promise.set_failed()
 
-                    # Set result.
-                    self._promise.set_failed()
+        elif exit_code == 0:
+            self._handle_output(output, err)
 
         else:
             self._logger.error("[%s]: Instrumentation for Alert Level '%d' exited with exit code '%d'."
@@ -266,6 +708,111 @@ class Instrumentation:
 
         return self._promise
 
+    def _execute_persistent(self) -> InstrumentationPromise:
+        """
+        Hands the sensor alert over to the persistent instrumentation worker of the alert level and
+        process its answer.
+        :return: promise which contains the results after instrumentation finished execution.
+        """
+        worker = self._pool.get_persistent_worker(self._alert_level)
+
+        try:
+            output = worker.process(self._create_argument(), self._alert_level.instrumentation_timeout)
+
+        except subprocess.TimeoutExpired:
+            self._logger.error("[%s]: Instrumentation for Alert Level '%d' timed out."
+                               % (self._log_tag, self._alert_level.level))
+
+            # Raise sensor alert (if internal sensor configured).
+            if self._internal_sensor is not None:
+                self._internal_sensor.raise_sensor_alert_timeout(self._alert_level)
+
+            self._promise.set_failed()
+            return self._promise
+
+        except InstrumentationWorkerExited as e:
+            self._logger.error("[%s]: Instrumentation for Alert Level '%d' exited with exit code '%s'."
+                               % (self._log_tag, self._alert_level.level, str(e.exit_code)))
+
+            # Raise sensor alert (if internal sensor configured).
+            if self._internal_sensor is not None:
+                self._internal_sensor.raise_sensor_alert_exit_code(self._alert_level,
+                                                                   e.exit_code if e.exit_code is not None else -1)
+
+            self._promise.set_failed()
+            return self._promise
+
+        except InstrumentationOutputTooLarge:
+            self._logger.error("[%s]: Output of instrumentation for Alert Level '%d' exceeds %d bytes."
+                               % (self._log_tag, self._alert_level.level, self._max_output))
+
+            # Raise sensor alert (if internal sensor configured).
+            if self._internal_sensor is not None:
+                self._internal_sensor.raise_sensor_alert_invalid_output(self._alert_level)
+
+            self._promise.set_failed()
+            return self._promise
+
+        except Exception:
+            self._logger.exception("[%s]: Executing instrumentation for Alert Level '%d' failed."
+                                   % (self._log_tag, self._alert_level.level))
+
+            # Raise sensor alert (if internal sensor configured).
+            if self._internal_sensor is not None:
+                self._internal_sensor.raise_sensor_alert_execution_error(self._alert_level)
+
+            self._promise.set_failed()
+            return self._promise
+
+        self._handle_output(output, "")
+        return self._promise
+
+    def _handle_output(self, output: str, err: str):
+        """
+        Sets the result of the promise for the output of a successfully exited instrumentation script.
+        :param output: stdout of instrumentation script
+        :param err: stderr of instrumentation script
+        """
+
+        # Sensor Alert is suppressed if no output is given by instrumentation script.
+        if output == "":
+            self._logger.error("[%s]: No output for instrumentation for Alert Level '%d'."
+                               % (self._log_tag, self._alert_level.level))
+            self._logger.error("[%s]: Instrumentation for Alert Level '%d' stderr: %s"
+                               % (self._log_tag, self._alert_level.level, err))
+
+            # Raise sensor alert (if internal sensor configured).
+            if self._internal_sensor is not None:
+                self._internal_sensor.raise_sensor_alert_output_empty(self._alert_level)
+
+            # Set result.
+            self._promise.set_failed()
+
+        # Parse output of instrumentation script if it exists to create new Sensor Alert object.
+        else:
+
+            was_success, new_sensor_alert = self._process_output(output)
+
+            if was_success:
+                # Set result.
+                self._promise.new_sensor_alert = new_sensor_alert
+                self._promise.set_success()
+
+            else:
+                self._logger.error("[%s]: Unable to process output from instrumentation for Alert Level '%d'."
+                                   % (self._log_tag, self._alert_level.level))
+                self._logger.error("[%s]: Instrumentation for Alert Level '%d' stdout: %s"
+                                   % (self._log_tag, self._alert_level.level, output))
+                self._logger.error("[%s]: Instrumentation for Alert Level '%d' stderr: %s"
+                                   % (self._log_tag, self._alert_level.level, err))
+
+                # Raise sensor alert (if internal sensor configured).
+                if self._internal_sensor is not None:
+                    self._internal_sensor.raise_sensor_alert_invalid_output(self._alert_level)
+
+                # Set result.
+                self._promise.set_failed()
+
     def _process_output(self, output: str) -> Tuple[bool, Optional[SensorAlert]]:
         """
         Process output of instrumentation script.
@@ -335,7 +882,13 @@ class Instrumentation:
         NOTE: class/function is not thread safe.
         :return: promise which contains the results after instrumentation finished execution.
         """
-        if self._thread is None:
+        if self._pool is not None:
+            if not self._submitted:
+                self._submitted = True
+                if not self._use_cached_result():
+                    self._pool.submit(self)
+
+        elif self._thread is None:
             self._thread = threading.Thread(target=self._execute)
             self._thread.daemon = True
             self._thread.start()
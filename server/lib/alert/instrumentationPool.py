@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: https://h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import collections
+import logging
+import os
+import threading
+from typing import Any, Deque, Dict, List, Optional, Set
+from .instrumentation import Instrumentation, InstrumentationCache, PersistentInstrumentationWorker, MAX_OUTPUT_SIZE
+from ..localObjects import AlertLevel
+
+
+class ExecutionHistogram:
+    """
+    Collects the execution times of the instrumentation of an alert level. The bucket counts are cumulative
+    (each bucket counts the executions that took at most its upper bound in seconds).
+    """
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * len(ExecutionHistogram.BUCKETS)
+        self._count = 0
+        self._failed = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def record(self, execution_time: float, success: bool):
+        with self._lock:
+            self._count += 1
+            if not success:
+                self._failed += 1
+            self._sum += execution_time
+            self._max = max(self._max, execution_time)
+            for i in range(len(ExecutionHistogram.BUCKETS)):
+                if execution_time <= ExecutionHistogram.BUCKETS[i]:
+                    self._bucket_counts[i] += 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"count": self._count,
+                    "failed": self._failed,
+                    "sum": self._sum,
+                    "max": self._max,
+                    "buckets": list(zip(ExecutionHistogram.BUCKETS, self._bucket_counts))}
+
+
+class InstrumentationPool:
+    """
+    Executes queued instrumentations with a fixed number of worker threads. Since each worker thread runs
+    one instrumentation process at a time, the number of concurrently running instrumentation processes
+    is limited to the number of worker threads. The worker threads are started with the first instrumentation.
+    Instrumentations of a persistent worker that is in use stay queued, so they do not occupy worker threads
+    that other alert levels could use.
+    """
+
+    def __init__(self,
+                 max_processes: int,
+                 logger: logging.Logger,
+                 max_output: int = MAX_OUTPUT_SIZE):
+        self._log_tag = os.path.basename(__file__)
+        self._logger = logger
+        self._max_processes = max_processes
+
+        # Maximum number of bytes captured from the output of an instrumentation script.
+        self.max_output = max_output
+
+        self._queue = collections.deque()  # type: Deque[Instrumentation]
+        self._queue_cond = threading.Condition()
+        self._threads = list()  # type: List[threading.Thread]
+        self._running = 0
+        self._exit_flag = False
+
+        # Alert levels whose persistent instrumentation worker is in use by a worker thread.
+        self._busy_persistent_levels = set()  # type: Set[int]
+
+        # Persistent instrumentation workers by alert level.
+        self._persistent_workers = dict()  # type: Dict[int, PersistentInstrumentationWorker]
+        self._persistent_workers_lock = threading.Lock()
+
+        # Execution times by alert level.
+        self._histograms = dict()  # type: Dict[int, ExecutionHistogram]
+        self._histograms_lock = threading.Lock()
+
+        # Results of instrumentations reused for identical sensor alerts.
+        self.decision_cache = InstrumentationCache()
+
+    @property
+    def queued(self) -> int:
+        """
+        :return: number of instrumentations waiting for a free worker thread
+        """
+        with self._queue_cond:
+            return len(self._queue)
+
+    @property
+    def running(self) -> int:
+        """
+        :return: number of currently executed instrumentations
+        """
+        with self._queue_cond:
+            return self._running
+
+    def _pop_runnable(self) -> Optional[Instrumentation]:
+        """
+        Internal function that removes the first queued instrumentation that can be executed right away
+        (instrumentations whose persistent worker is in use are skipped). The lock has to be held by the caller.
+        :return: instrumentation or None if no queued instrumentation can be executed
+        """
+        for i in range(len(self._queue)):
+            instrumentation = self._queue[i]
+            level = instrumentation.persistent_alert_level
+            if level is not None:
+                if level in self._busy_persistent_levels:
+                    continue
+                self._busy_persistent_levels.add(level)
+
+            del self._queue[i]
+            return instrumentation
+
+        return None
+
+    def _run_worker(self):
+        """
+        Internal function that executes the queued instrumentations.
+        """
+        while True:
+            with self._queue_cond:
+                while True:
+                    if self._exit_flag:
+                        return
+
+                    instrumentation = self._pop_runnable()
+                    if instrumentation is not None:
+                        break
+
+                    self._queue_cond.wait()
+
+                self._running += 1
+
+            try:
+                # noinspection PyProtectedMember
+                instrumentation._execute()
+
+            except Exception:
+                self._logger.exception("[%s]: Executing instrumentation failed." % self._log_tag)
+
+                # Finish the promise so the sensor alert executer does not wait for it forever.
+                try:
+                    # noinspection PyProtectedMember
+                    instrumentation._set_execution_failed()
+
+                except Exception:
+                    self._logger.exception("[%s]: Setting instrumentation as failed failed." % self._log_tag)
+
+            finally:
+                with self._queue_cond:
+                    self._running -= 1
+
+                    # Instrumentations waiting for the persistent worker can be executed now.
+                    level = instrumentation.persistent_alert_level
+                    if level is not None:
+                        self._busy_persistent_levels.discard(level)
+                        self._queue_cond.notify_all()
+
+    def get_persistent_worker(self, alert_level: AlertLevel) -> PersistentInstrumentationWorker:
+        """
+        Gets the persistent instrumentation worker of the given alert level.
+        :param alert_level:
+        :return:
+        """
+        with self._persistent_workers_lock:
+            worker = self._persistent_workers.get(alert_level.level)
+            if worker is None:
+                worker = PersistentInstrumentationWorker(alert_level, self._logger, self.max_output)
+                self._persistent_workers[alert_level.level] = worker
+            return worker
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Gets the statistics of the pool and the execution times of the instrumentations by alert level.
+        :return: dictionary with "queued", "running", the histograms of the alert levels in "alert_levels"
+        and the statistics of the instrumentation cache in "cache"
+        """
+        with self._histograms_lock:
+            histograms = dict(self._histograms)
+
+        with self._queue_cond:
+            statistics = {"queued": len(self._queue),
+                          "running": self._running}
+
+        statistics["alert_levels"] = {level: histogram.get_statistics() for level, histogram in histograms.items()}
+        statistics["cache"] = self.decision_cache.get_statistics()
+        return statistics
+
+    def record_execution(self, alert_level: int, execution_time: float, success: bool):
+        """
+        Records the execution time of an instrumentation.
+        :param alert_level:
+        :param execution_time: seconds the execution took
+        :param success:
+        """
+        with self._histograms_lock:
+            histogram = self._histograms.get(alert_level)
+            if histogram is None:
+                histogram = ExecutionHistogram()
+                self._histograms[alert_level] = histogram
+
+        histogram.record(execution_time, success)
+
+    def submit(self, instrumentation: Instrumentation):
+        """
+        Queues the given instrumentation for execution.
+        :param instrumentation:
+        """
+        with self._queue_cond:
+            if not self._threads:
+                for _ in range(self._max_processes):
+                    thread = threading.Thread(target=self._run_worker)
+                    thread.daemon = True
+                    thread.start()
+                    self._threads.append(thread)
+
+            self._queue.append(instrumentation)
+            self._queue_cond.notify()
+
+    def close(self):
+        """
+        Stops the worker threads and the persistent instrumentation workers.
+        """
+        with self._queue_cond:
+            self._exit_flag = True
+            self._queue_cond.notify_all()
+
+        with self._persistent_workers_lock:
+            for worker in self._persistent_workers.values():
+                worker.close()
+
+        self.decision_cache.clear()
@@ -15,9 +15,10 @@ import time
 import xml.etree.ElementTree
 import logging
 from ..users import CSVBackend
-from ..storage import Sqlite
+from ..storage import Sqlite, CachedStorage, WriteBehindStorage
 from ..globalData import GlobalData
 from ..localObjects import AlertLevel, Profile, SensorDataInt
+from ..metrics import Metrics
 from ..internalSensors import NodeTimeoutSensor, SensorTimeoutSensor, ProfileChangeSensor, VersionInformerSensor, \
     AlertLevelInstrumentationErrorSensor
 
@@ -113,6 +114,9 @@ def parse_main_config(configRoot: xml.etree.ElementTree.Element, global_data: Gl
     if not configure_user_backend(configRoot, global_data):
         return False
 
+    if not configure_metrics(configRoot, global_data):
+        return False
+
     if not configure_storage(configRoot, global_data):
         return False
 
@@ -183,12 +187,84 @@ def configure_user_backend(configRoot: xml.etree.ElementTree.Element, global_dat
     return True
 
 
+def configure_metrics(configRoot: xml.etree.ElementTree.Element, global_data: GlobalData) -> bool:
+
+    # Metrics are optional and deactivated if not configured.
+    try:
+        global_data.logger.debug("[%s]: Parsing metrics configuration." % log_tag)
+        metrics_element = configRoot.find("general").find("metrics")
+        if metrics_element is None or str(metrics_element.attrib["activated"]).upper() != "TRUE":
+            return True
+
+        if "host" in metrics_element.attrib:
+            global_data.metricsHost = str(metrics_element.attrib["host"])
+        if "port" in metrics_element.attrib:
+            global_data.metricsPort = int(metrics_element.attrib["port"])
+
+        if not 0 < global_data.metricsPort < 65536:
+            global_data.logger.error("[%s]: Metrics port '%d' not valid." % (log_tag, global_data.metricsPort))
+            return False
+
+        global_data.metrics = Metrics()
+
+    except Exception:
+        global_data.logger.exception("[%s]: Configuring metrics failed." % log_tag)
+        return False
+
+    return True
+
+
 def configure_storage(configRoot: xml.etree.ElementTree.Element, global_data: GlobalData) -> bool:
 
     # Configure storage backend.
     try:
         global_data.logger.debug("[%s]: Initializing storage backend." % log_tag)
-        global_data.storage = Sqlite(global_data.storageBackendSqliteFile, global_data)
+
+        # Storage settings are optional and fall back to the default values.
+        storage_element = configRoot.find("general").find("storage")
+        if storage_element is not None and "cache" in storage_element.attrib:
+            global_data.storageCache = (str(storage_element.attrib["cache"]).upper() == "TRUE")
+        if storage_element is not None and "wal" in storage_element.attrib:
+            global_data.storageWal = (str(storage_element.attrib["wal"]).upper() == "TRUE")
+        if storage_element is not None and "readConnections" in storage_element.attrib:
+            global_data.storageReadConnections = int(storage_element.attrib["readConnections"])
+        if storage_element is not None and "writeBehind" in storage_element.attrib:
+            global_data.storageWriteBehind = (str(storage_element.attrib["writeBehind"]).upper() == "TRUE")
+        if storage_element is not None and "writeBehindInterval" in storage_element.attrib:
+            global_data.storageWriteBehindInterval = int(storage_element.attrib["writeBehindInterval"])
+        if storage_element is not None and "writeBehindMaxUpdates" in storage_element.attrib:
+            global_data.storageWriteBehindMaxUpdates = int(storage_element.attrib["writeBehindMaxUpdates"])
+
+        if global_data.storageReadConnections < 0:
+            global_data.logger.error("[%s]: Number of read connections of storage backend not valid."
+                                     % log_tag)
+            return False
+
+        if global_data.storageReadConnections > 0 and not global_data.storageWal:
+            global_data.logger.error("[%s]: Read connections of storage backend need WAL journal mode."
+                                     % log_tag)
+            return False
+
+        if global_data.storageWriteBehindInterval <= 0 or global_data.storageWriteBehindMaxUpdates <= 0:
+            global_data.logger.error("[%s]: Write behind settings of storage backend not valid." % log_tag)
+            return False
+
+        global_data.storage = Sqlite(global_data.storageBackendSqliteFile,
+                                     global_data,
+                                     wal=global_data.storageWal,
+                                     readConnections=global_data.storageReadConnections)
+        if global_data.storageWriteBehind:
+            global_data.logger.info("[%s]: Queuing sensor updates for storage backend (%d ms, %d updates)."
+                                    % (log_tag,
+                                       global_data.storageWriteBehindInterval,
+                                       global_data.storageWriteBehindMaxUpdates))
+            global_data.storage = WriteBehindStorage(global_data.storage,
+                                                     global_data,
+                                                     global_data.storageWriteBehindInterval / 1000.0,
+                                                     global_data.storageWriteBehindMaxUpdates)
+        if global_data.storageCache:
+            global_data.logger.info("[%s]: Using in-memory cache for storage backend." % log_tag)
+            global_data.storage = CachedStorage(global_data.storage, global_data)
 
     except Exception:
         global_data.logger.exception("[%s]: Configuring storage backend failed." % log_tag)
@@ -238,6 +314,47 @@ def configure_server(configRoot: xml.etree.ElementTree.Element, global_data: Glo
         global_data.logger.debug("[%s]: Parsing server configuration." % log_tag)
         global_data.server_port = int(configRoot.find("general").find("server").attrib["port"])
 
+        # Engine settings are optional and fall back to the default values.
+        server_attrib = configRoot.find("general").find("server").attrib
+        if "engine" in server_attrib:
+            global_data.server_engine = str(server_attrib["engine"]).lower()
+        if "engineWorkers" in server_attrib:
+            global_data.server_engine_workers = int(server_attrib["engineWorkers"])
+        if "outboundQueueSize" in server_attrib:
+            global_data.outboundQueueSize = int(server_attrib["outboundQueueSize"])
+        if "outboundQueuePolicy" in server_attrib:
+            global_data.outboundQueuePolicy = str(server_attrib["outboundQueuePolicy"]).lower()
+        if "stateChangeWindow" in server_attrib:
+            global_data.managerStateChangeWindow = float(int(server_attrib["stateChangeWindow"])) / 1000
+        if "stateChangeQueueSize" in server_attrib:
+            global_data.managerStateChangeQueueSize = int(server_attrib["stateChangeQueueSize"])
+
+        if global_data.server_engine not in ["threaded", "selector"]:
+            global_data.logger.error("[%s]: Server engine '%s' does not exist."
+                                     % (log_tag, global_data.server_engine))
+            return False
+
+        if global_data.server_engine_workers <= 0:
+            global_data.logger.error("[%s]: Number of server engine workers has to be greater than 0." % log_tag)
+            return False
+
+        if global_data.outboundQueueSize <= 0:
+            global_data.logger.error("[%s]: Outbound queue size has to be greater than 0." % log_tag)
+            return False
+
+        if global_data.outboundQueuePolicy not in ["coalesce", "drop"]:
+            global_data.logger.error("[%s]: Outbound queue policy '%s' does not exist."
+                                     % (log_tag, global_data.outboundQueuePolicy))
+            return False
+
+        if global_data.managerStateChangeWindow < 0:
+            global_data.logger.error("[%s]: State change window must not be negative." % log_tag)
+            return False
+
+        if global_data.managerStateChangeQueueSize <= 0:
+            global_data.logger.error("[%s]: State change queue size has to be greater than 0." % log_tag)
+            return False
+
     except Exception:
         global_data.logger.exception("[%s]: Configuring server failed." % log_tag)
         return False
@@ -349,6 +466,23 @@ def configure_alert_levels(configRoot: xml.etree.ElementTree.Element, global_dat
 
     # parse all alert levels
     try:
+        # Instrumentation settings are optional and fall back to the default values.
+        instrumentation_element = configRoot.find("general").find("instrumentation")
+        if instrumentation_element is not None and "maxProcesses" in instrumentation_element.attrib:
+            global_data.instrumentationMaxProcesses = int(instrumentation_element.attrib["maxProcesses"])
+        if instrumentation_element is not None and "maxOutput" in instrumentation_element.attrib:
+            global_data.instrumentationMaxOutput = int(instrumentation_element.attrib["maxOutput"])
+
+        if global_data.instrumentationMaxProcesses <= 0:
+            global_data.logger.error("[%s]: Maximum number of instrumentation processes has to be greater than 0."
+                                     % log_tag)
+            return False
+
+        if global_data.instrumentationMaxOutput <= 0:
+            global_data.logger.error("[%s]: Maximum output size of instrumentation has to be greater than 0."
+                                     % log_tag)
+            return False
+
         global_data.logger.debug("[%s]: Parsing alert levels configuration." % log_tag)
         for item in configRoot.find("alertLevels").iterfind("alertLevel"):
 
@@ -367,6 +501,14 @@ def configure_alert_levels(configRoot: xml.etree.ElementTree.Element, global_dat
             if alertLevel.instrumentation_active:
                 alertLevel.instrumentation_cmd = str(item.find("instrumentation").attrib["cmd"])
                 alertLevel.instrumentation_timeout = int(item.find("instrumentation").attrib["timeout"])
+                if "persistent" in item.find("instrumentation").attrib:
+                    alertLevel.instrumentation_persistent = (str(item.find("instrumentation").attrib[
+                                                                     "persistent"]).upper() == "TRUE")
+                if "cacheTtl" in item.find("instrumentation").attrib:
+                    alertLevel.instrumentation_cache_ttl = int(item.find("instrumentation").attrib["cacheTtl"])
+                if "cacheOptionalDataKeys" in item.find("instrumentation").attrib:
+                    alertLevel.instrumentation_cache_keys = [x.strip() for x in str(item.find(
+                        "instrumentation").attrib["cacheOptionalDataKeys"]).split(",") if x.strip()]
 
             alertLevel.profiles = list()
             for profile_xml in item.iterfind("profile"):
@@ -394,6 +536,11 @@ def configure_alert_levels(configRoot: xml.etree.ElementTree.Element, global_dat
                                          % (log_tag, alertLevel.level))
                 return False
 
+            if alertLevel.instrumentation_active is True and alertLevel.instrumentation_cache_ttl < 0:
+                global_data.logger.error("[%s]: Alert Level '%d' instrumentation cache time must not be negative."
+                                         % (log_tag, alertLevel.level))
+                return False
+
             # Check profile settings.
             if not alertLevel.profiles:
                 global_data.logger.error("[%s]: Alert Level '%d' needs at least one profile configured."
@@ -475,8 +622,26 @@ def configure_internal_sensors(configRoot: xml.etree.ElementTree.Element, global
         dbSensors = list()
         dbInitialStateList = list()
 
-        # Parse sensor timeout sensor (if activated).
+        # Parse timeouts of single sensors (used even if the sensor timeout sensor is not activated).
         item = internalSensorsCfg.find("sensorTimeout")
+        for sensorXml in item.iterfind("sensor"):
+            username = str(sensorXml.attrib["username"])
+            clientSensorId = int(sensorXml.attrib["clientSensorId"])
+            timeout = int(sensorXml.attrib["timeout"])
+
+            if timeout <= 0:
+                global_data.logger.error("[%s]: Timeout of sensor %d of node '%s' has to be greater than 0."
+                                         % (log_tag, clientSensorId, username))
+                return False
+
+            if (username, clientSensorId) in global_data.sensorTimeouts:
+                global_data.logger.error("[%s]: Timeout of sensor %d of node '%s' is set multiple times."
+                                         % (log_tag, clientSensorId, username))
+                return False
+
+            global_data.sensorTimeouts[(username, clientSensorId)] = timeout
+
+        # Parse sensor timeout sensor (if activated).
         if str(item.attrib["activated"]).upper() == "TRUE":
 
             sensor = SensorTimeoutSensor(global_data)
@@ -609,12 +774,12 @@ def configure_internal_sensors(configRoot: xml.etree.ElementTree.Element, global
 
             # Set initial state of the internal sensor to the state
             # of the alert system.
-            option = global_data.storage.get_option_by_type("profile")
-            if option is None:
-                global_data.logger.error("[%s]: Unable to get 'profile' option from database." % log_tag)
+            profile_id = global_data.profile_state.get_profile_id()
+            if profile_id is None:
+                global_data.logger.error("[%s]: Unable to get current profile." % log_tag)
                 return False
 
-            sensor.data = SensorDataInt(option.value, "")
+            sensor.data = SensorDataInt(profile_id, "")
 
             # Create sensor dictionary element for database interaction.
             temp = dict()
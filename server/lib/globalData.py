@@ -10,16 +10,17 @@
 import os
 import threading
 import ssl
-from typing import Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from .profileState import ProfileState
 
 
-# Class implements an iterator that iterates over a copy of the
+# Class implements an iterator that iterates over a snapshot of the
 # server sessions.
 class ServerSessionsIterator(object):
 
-    def __init__(self, server_sessions):
+    def __init__(self, server_sessions: Tuple[object, ...]):
         self.idx = 0
-        self.server_sessions = list(server_sessions)
+        self.server_sessions = server_sessions
 
     def __next__(self):
         if self.idx >= len(self.server_sessions):
@@ -35,16 +36,134 @@ class ServerSessionsIterator(object):
 class ServerSessions(object):
 
     def __init__(self):
-        self._server_sessions = list()
+        # The server sessions are replaced instead of modified (copy-on-write), hence, iterating over them only
+        # needs the current tuple and not a copy.
+        self._server_sessions = tuple()  # type: Tuple[object, ...]
         self._server_sessions_lock = threading.Lock()
 
+        # Index from the node id to the server session of each initialized client and the ids of these nodes
+        # (replaced on change like the server sessions).
+        self._node_sessions = dict()  # type: Dict[int, object]
+        self._connected_node_ids = frozenset()  # type: FrozenSet[int]
+
+        # Routing table from an alert level to the client communications of the initialized alert and manager
+        # clients that handle it (dicts are used as ordered sets).
+        self._alert_level_routes = dict()  # type: Dict[int, Dict[object, None]]
+        self._routed_alert_levels = dict()  # type: Dict[object, Set[int]]
+
+    def _remove_alert_level_routes(self, client_comm):
+        """
+        Internal function that removes the given client communication from the routing table.
+        The lock has to be held by the caller.
+        :param client_comm:
+        """
+        for alert_level in self._routed_alert_levels.pop(client_comm, set()):
+            routes = self._alert_level_routes.get(alert_level)
+            if routes is None:
+                continue
+            routes.pop(client_comm, None)
+            if not routes:
+                del self._alert_level_routes[alert_level]
+
+    def _remove_node_session(self, server_session):
+        """
+        Internal function that removes the given server session from the node index.
+        The lock has to be held by the caller.
+        :param server_session:
+        """
+        node_id = server_session.clientComm.nodeId
+        if node_id is None or self._node_sessions.get(node_id) is not server_session:
+            return
+        del self._node_sessions[node_id]
+        self._connected_node_ids = frozenset(self._node_sessions)
+
     def append(self, server_session):
         with self._server_sessions_lock:
-            self._server_sessions.append(server_session)
+            self._server_sessions = self._server_sessions + (server_session,)
 
     def remove(self, server_session):
         with self._server_sessions_lock:
-            self._server_sessions.remove(server_session)
+            server_sessions = list(self._server_sessions)
+            server_sessions.remove(server_session)
+            self._server_sessions = tuple(server_sessions)
+            if server_session.clientComm is not None:
+                self._remove_alert_level_routes(server_session.clientComm)
+                self._remove_node_session(server_session)
+
+    def add_node_session(self, client_comm):
+        """
+        Adds the server session of the given initialized client communication to the node index.
+        :param client_comm:
+        """
+        with self._server_sessions_lock:
+            for server_session in self._server_sessions:
+                if server_session.clientComm is client_comm:
+                    self._node_sessions[client_comm.nodeId] = server_session
+                    self._connected_node_ids = frozenset(self._node_sessions)
+                    break
+
+    def remove_node_session(self, client_comm):
+        """
+        Removes the server session of the given client communication from the node index.
+        :param client_comm:
+        """
+        with self._server_sessions_lock:
+            server_session = self._node_sessions.get(client_comm.nodeId)
+            if server_session is not None and server_session.clientComm is client_comm:
+                self._remove_node_session(server_session)
+
+    def get_node_session(self, node_id: int) -> Optional[object]:
+        """
+        Gets the server session of the initialized client with the given node id.
+        :param node_id:
+        :return: server session or None if the node is not connected
+        """
+        with self._server_sessions_lock:
+            return self._node_sessions.get(node_id)
+
+    def get_connected_node_ids(self) -> FrozenSet[int]:
+        """
+        Gets the ids of all nodes with an initialized client connected to this server.
+        :return: set of node ids
+        """
+        return self._connected_node_ids
+
+    def add_alert_level_routes(self, client_comm, alert_levels: Iterable[int]):
+        """
+        Adds the client communication of an initialized alert or manager client to the routing table
+        for the alert levels it handles (replaces its former routes).
+        :param client_comm:
+        :param alert_levels:
+        """
+        with self._server_sessions_lock:
+            self._remove_alert_level_routes(client_comm)
+            alert_levels = set(alert_levels)
+            self._routed_alert_levels[client_comm] = alert_levels
+            for alert_level in alert_levels:
+                self._alert_level_routes.setdefault(alert_level, dict())[client_comm] = None
+
+    def remove_alert_level_routes(self, client_comm):
+        """
+        Removes the client communication from the routing table.
+        :param client_comm:
+        """
+        with self._server_sessions_lock:
+            self._remove_alert_level_routes(client_comm)
+
+    def get_alert_level_routes(self, alert_levels: Iterable[int]) -> List[object]:
+        """
+        Gets the client communications of all alert and manager clients that handle at least one of the
+        given alert levels (each client only once).
+        :param alert_levels:
+        :return: list of client communication objects
+        """
+        recipients = dict()
+        with self._server_sessions_lock:
+            for alert_level in alert_levels:
+                routes = self._alert_level_routes.get(alert_level)
+                if routes is not None:
+                    recipients.update(routes)
+        return list(recipients)
 
     def __iter__(self):
         with self._server_sessions_lock:
@@ -64,7 +183,7 @@ class GlobalData:
         self.rev = 0  # type: int
 
         # Used database layout version.
-        self.dbVersion = 5  # type: int
+        self.dbVersion = 6  # type: int
 
         # name of this server
         self.name = "AlertR Server"  # type: str
@@ -90,6 +209,9 @@ class GlobalData:
         # Object that handles option message processing.
         self.option_executer = None
 
+        # Currently used system profile (published by the option executer).
+        self.profile_state = ProfileState(self)
+
         # this is the time in seconds when the client times out
         self.connectionTimeout = 90
 
@@ -100,10 +222,22 @@ class GlobalData:
         # The time a reminder of timed out sensors is raised.
         self.timeoutReminderTime = 86400
 
+        # Timeouts in seconds of sensors that should not use the default sensor timeout
+        # (1.5 times the grace period) by (username of the node, clientSensorId).
+        self.sensorTimeouts = dict()  # type: Dict[Tuple[str, int], int]
+
         # this is the interval in seconds in which the managers
         # are sent updates of the clients (at least)
         self.managerUpdateInterval = 60.0
 
+        # Time window in seconds in which state changes are collected before they are sent to the managers
+        # (only the last state change of a sensor in the window is sent).
+        self.managerStateChangeWindow = 0.1  # type: float
+
+        # Maximum number of sensors with queued state changes (a full status update is sent to the managers
+        # instead if more sensors change within a time window).
+        self.managerStateChangeQueueSize = 10000  # type: int
+
         # This is the interval in seconds in which the configuration
         # files that can be reloaded during runtime are checked
         # for changes and reloaded if changed.
@@ -127,6 +261,20 @@ class GlobalData:
                                                      "config",
                                                      "database.db")
 
+        # Keep the data of the storage backend in memory and only write changes through to the storage backend.
+        self.storageCache = False  # type: bool
+
+        # Use the WAL journal mode for the storage backend and the number of read-only connections that allow
+        # reading without waiting for writes (0 reads with the single connection).
+        self.storageWal = False  # type: bool
+        self.storageReadConnections = 0  # type: int
+
+        # Queue sensor state, data and time updates and write them in one transaction every interval (in
+        # milliseconds) or as soon as the maximal number of updates is queued.
+        self.storageWriteBehind = False  # type: bool
+        self.storageWriteBehindInterval = 200  # type: int
+        self.storageWriteBehindMaxUpdates = 500  # type: int
+
         # location of the certifiacte file
         self.serverCertFile = None  # type: Optional[str]
 
@@ -151,6 +299,33 @@ class GlobalData:
         # Port the server is listening on.
         self.server_port = None  # type: Optional[int]
 
+        # Engine that handles the client connections ("threaded" uses a thread per connection,
+        # "selector" uses a single selector thread and a pool of worker threads).
+        self.server_engine = "threaded"  # type: str
+
+        # Number of worker threads used by the "selector" engine.
+        self.server_engine_workers = 16  # type: int
+
+        # Maximum number of messages queued for sending to a single client (sensor alerts are never dropped).
+        self.outboundQueueSize = 1000  # type: int
+
+        # Policy for clients that do not keep up with the queued messages ("coalesce" replaces queued
+        # status updates, state changes and profile changes by newer ones, "drop" only drops messages
+        # if the queue is full).
+        self.outboundQueuePolicy = "coalesce"  # type: str
+
+        # Maximum number of concurrently running instrumentation processes (further instrumentations are queued).
+        self.instrumentationMaxProcesses = 8  # type: int
+
+        # Maximum number of bytes captured from the output of an instrumentation script.
+        self.instrumentationMaxOutput = 65536  # type: int
+
+        # Metrics recorded while handling messages (None if the metrics are not activated) and the
+        # address the metrics are served on via HTTP.
+        self.metrics = None
+        self.metricsHost = "127.0.0.1"  # type: str
+        self.metricsPort = 12346  # type: int
+
         # a list of all alert levels that are configured on this server
         self.alertLevels = list()
 
@@ -445,6 +445,14 @@ class AlertLevel:
         self.instrumentation_cmd = None  # type: Optional[str]
         self.instrumentation_timeout = None  # type: Optional[int]
 
+        # Flag if the instrumentation is a long-running process that reads the sensor alerts from stdin.
+        self.instrumentation_persistent = False  # type: bool
+
+        # Seconds the result of an instrumentation is reused for sensor alerts of the same sensor with the same
+        # state, data and values of the given optional data keys (0 disables the cache).
+        self.instrumentation_cache_ttl = 0  # type: int
+        self.instrumentation_cache_keys = list()  # type: List[str]
+
         # List of profile ids for which this alert level triggers a sensor alert.
         # Meaning the system has to use one of the profiles in this list before the alert level triggers a sensor alert.
         self.profiles = list()  # type: List[int]
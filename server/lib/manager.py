@@ -10,11 +10,24 @@
 import threading
 import os
 import time
+import json
 import collections
-from typing import Optional
-from .server import AsynchronousSender
+from typing import Optional, List, Dict, Any, Tuple
 from .globalData import GlobalData
-from .localObjects import SensorData
+from .localObjects import SensorData, Option, Node, Sensor, Manager, Alert
+
+
+# Object lists of the status message that are sent incrementally to manager clients
+# and the key that identifies an object of the list.
+STATUS_DELTA_OBJECTS = [("options", "type"),
+                        ("nodes", "nodeId"),
+                        ("sensors", "sensorId"),
+                        ("managers", "managerId"),
+                        ("alerts", "alertId")]
+
+# Number of past revisions a delta status update can be built for
+# (manager clients with an older revision get a full status update).
+STATUS_DELTA_REVISIONS = 100
 
 
 # this class is woken up if a sensor alert or state change is received
@@ -50,9 +63,44 @@ class ManagerUpdateExecuter(threading.Thread):
         # the manager clients (ignoring the time interval)
         self._force_status_update = False
 
-        # this is a queue that is used to signalize the state changes
-        # that should be sent to the manager clients
-        self._queue_state_change = collections.deque()
+        # State changes that should be sent to the manager clients by sensor id (only the last state change of
+        # a sensor is kept). The queued state changes are sent at most once per time window.
+        self._queue_state_change = collections.OrderedDict()  # type: Dict[int, Tuple[int, Optional[SensorData]]]
+        self._queue_state_change_lock = threading.Lock()
+        self._state_change_window = self.globalData.managerStateChangeWindow
+        self._state_change_queue_size = self.globalData.managerStateChangeQueueSize
+        self._last_state_change_flush = 0.0
+
+        # number of queued state changes, state changes replaced by a newer one of the same sensor,
+        # state changes sent to the manager clients and times the queue was full
+        self.state_changes_queued = 0
+        self.state_changes_coalesced = 0
+        self.state_changes_sent = 0
+        self.state_change_overflows = 0
+
+        # encoded payload of the status message shared by all manager clients
+        # and the change generation of the storage it was built from
+        self._status_payload = None  # type: Optional[str]
+        self._status_generation = None  # type: Optional[int]
+        self._status_lock = threading.Lock()
+
+        # revision of the status data (increased each time an object changed), the objects of the
+        # last status payload with the revision they were changed the last time, the revisions
+        # deleted objects were removed in and the oldest revision a delta can be built for
+        self._status_revision = 0
+        self._status_objects = dict()  # type: Dict[str, Dict[Any, Dict[str, Any]]]
+        self._status_object_revisions = dict()  # type: Dict[str, Dict[Any, int]]
+        self._status_deleted = dict()  # type: Dict[str, Dict[Any, int]]
+        self._status_oldest_revision = 0
+
+        # encoded delta payloads for the current revision (key: base revision)
+        self._status_deltas = dict()  # type: Dict[int, str]
+
+        # number of times the status payload was built (instead of reused)
+        self.status_payload_builds = 0
+
+        # Build the status payload anew after the profile changed.
+        self.globalData.profile_state.add_change_callback(self._profile_changed)
 
     def run(self):
 
@@ -86,7 +134,8 @@ class ManagerUpdateExecuter(threading.Thread):
                 # empty current state queue
                 # (because the state changes are also transmitted
                 # during the full state update)
-                self._queue_state_change.clear()
+                with self._queue_state_change_lock:
+                    self._queue_state_change.clear()
 
                 for serverSession in self.serverSessions:
                     # ignore sessions which do not exist yet
@@ -98,14 +147,9 @@ class ManagerUpdateExecuter(threading.Thread):
                     if not serverSession.clientComm.clientInitialized:
                         continue
 
-                    # sending status update to manager via a thread
+                    # queue status update for the writer of the manager
                     # to not block the manager update executer
-                    statusUpdateProcess = AsynchronousSender(self.globalData, serverSession.clientComm)
-                    # set thread to daemon
-                    # => threads terminates when main thread terminates
-                    statusUpdateProcess.daemon = True
-                    statusUpdateProcess.sendManagerUpdate = True
-                    statusUpdateProcess.start()
+                    serverSession.clientComm.queueManagerUpdate()
 
                 # if status update was sent to manager clients
                 # => ignore state changes (because they are also covered
@@ -113,35 +157,261 @@ class ManagerUpdateExecuter(threading.Thread):
                 continue
 
             # if status change queue is not empty
-            # => send status changes to manager clients
-            while len(self._queue_state_change) != 0:
-                managerStateTuple = self._queue_state_change.popleft()
-                sensorId = managerStateTuple[0]
-                state = managerStateTuple[1]
-                sensorDataObj = managerStateTuple[2]
+            # => send status changes to manager clients once the time window passed
+            # (state changes of the same sensor within the window are combined)
+            if len(self._queue_state_change) != 0:
+                wait_time = self._last_state_change_flush + self._state_change_window - time.time()
+                if wait_time > 0:
+                    time.sleep(wait_time)
+                    continue
 
-                for serverSession in self.serverSessions:
-                    # ignore sessions which do not exist yet
-                    # and that are not managers
-                    if serverSession.clientComm is None:
-                        continue
-                    if serverSession.clientComm.nodeType != "manager":
-                        continue
-                    if not serverSession.clientComm.clientInitialized:
-                        continue
+                self._send_state_changes()
 
-                    # sending status update to manager via a thread
-                    # to not block the manager update executer
-                    stateChangeProcess = AsynchronousSender(self.globalData, serverSession.clientComm)
-                    # set thread to daemon
-                    # => threads terminates when main thread terminates
-                    stateChangeProcess.daemon = True
-                    stateChangeProcess.sendManagerStateChange = True
-                    stateChangeProcess.sendManagerStateChangeSensorId = sensorId
-                    stateChangeProcess.sendManagerStateChangeState = state
-                    stateChangeProcess.sendManagerStateChangeDataType = sensorDataObj.dataType
-                    stateChangeProcess.sendManagerStateChangeData = sensorDataObj.data
-                    stateChangeProcess.start()
+    def _send_state_changes(self):
+        """
+        Internal function that sends the queued state changes to all manager clients.
+        """
+        with self._queue_state_change_lock:
+            state_changes = self._queue_state_change
+            self._queue_state_change = collections.OrderedDict()
+        self._last_state_change_flush = time.time()
+
+        if not state_changes:
+            return
+
+        client_comms = list()
+        for serverSession in self.serverSessions:
+            # ignore sessions which do not exist yet
+            # and that are not managers
+            if serverSession.clientComm is None:
+                continue
+            if serverSession.clientComm.nodeType != "manager":
+                continue
+            if not serverSession.clientComm.clientInitialized:
+                continue
+            client_comms.append(serverSession.clientComm)
+
+        state_changes_list = [(sensorId, state, sensorDataObj.dataType, sensorDataObj.data)
+                              for sensorId, (state, sensorDataObj) in state_changes.items()]
+
+        for client_comm in client_comms:
+            # queue state changes for the writer of the manager
+            # to not block the manager update executer
+            # (clients with protocol version 3 get all state changes in one message)
+            if len(state_changes_list) > 1 and client_comm.protocolVersion >= 3:
+                client_comm.queueManagerStateChanges(state_changes_list)
+                continue
+
+            for state_change in state_changes_list:
+                client_comm.queueManagerStateChange(*state_change)
+        self.state_changes_sent += len(state_changes)
+
+    def _build_status_payload(self) -> Optional[Dict[str, Any]]:
+        """
+        Internal function that builds the payload of the status message from the database.
+
+        :return: payload or None if getting the data from the database failed
+        """
+        # Get a list from database of
+        # list[0] = list(option objects)
+        # list[1] = list(node objects)
+        # list[2] = list(sensor objects)
+        # list[3] = list(manager objects)
+        # list[4] = list(alert objects)
+        # or None
+        alert_system_information = self.storage.getAlertSystemInformation(logger=self.logger)
+        if alert_system_information is None:
+            return None
+        option_list = alert_system_information[0]  # type: List[Option]
+        nodes_list = alert_system_information[1]  # type: List[Node]
+        sensor_list = alert_system_information[2]  # type: List[Sensor]
+        manager_list = alert_system_information[3]  # type: List[Manager]
+        alert_list = alert_system_information[4]  # type: List[Alert]
+
+        # Generating options list (the current profile is held in memory).
+        profile_id = self.globalData.profile_state.get_profile_id(self.logger)
+        options = list()
+        for option_obj in option_list:
+            option_value = option_obj.value
+            if option_obj.type == "profile" and profile_id is not None:
+                option_value = profile_id
+            options.append({"type": option_obj.type,
+                            "value": option_value})
+
+        # Generating nodes list.
+        nodes = list()
+        for node_obj in nodes_list:
+            nodes.append({"nodeId": node_obj.id,
+                          "hostname": node_obj.hostname,
+                          "username": node_obj.username,
+                          "nodeType": node_obj.nodeType,
+                          "instance": node_obj.instance,
+                          "connected": node_obj.connected,
+                          "version": node_obj.version,
+                          "rev": node_obj.rev,
+                          "persistent": node_obj.persistent})
+
+        # Generating sensors list.
+        sensors = list()
+        for sensor_obj in sensor_list:
+            sensors.append({"sensorId": sensor_obj.sensorId,
+                            "nodeId": sensor_obj.nodeId,
+                            "clientSensorId": sensor_obj.clientSensorId,
+                            "description": sensor_obj.description,
+                            "state": sensor_obj.state,
+                            "lastStateUpdated": sensor_obj.lastStateUpdated,
+                            "alertDelay": sensor_obj.alertDelay,
+                            "alertLevels": sensor_obj.alertLevels,
+                            "dataType": sensor_obj.dataType,
+                            "data": sensor_obj.data.copy_to_dict()})
+
+        # Generating managers list.
+        managers = list()
+        for manager_obj in manager_list:
+            managers.append({"managerId": manager_obj.managerId,
+                             "nodeId": manager_obj.nodeId,
+                             "description": manager_obj.description})
+
+        # Generating alerts list.
+        alerts = list()
+        for alert_obj in alert_list:
+            alerts.append({"alertId": alert_obj.alertId,
+                           "nodeId": alert_obj.nodeId,
+                           "clientAlertId": alert_obj.clientAlertId,
+                           "description": alert_obj.description,
+                           "alertLevels": alert_obj.alertLevels})
+
+        # Generating profiles list
+        profiles = list()
+        for profile_obj in self.globalData.profiles:
+            profiles.append({"profileId": profile_obj.profileId,
+                             "name": profile_obj.name})
+
+        # Generating alertLevels list.
+        alert_levels = list()
+        for alert_level in self.globalData.alertLevels:
+            alert_levels.append({"alertLevel": alert_level.level,
+                                 "name": alert_level.name,
+                                 "profiles": alert_level.profiles,
+                                 "instrumentation_active": alert_level.instrumentation_active,
+                                 "instrumentation_cmd": alert_level.instrumentation_cmd,
+                                 "instrumentation_timeout": alert_level.instrumentation_timeout})
+
+        return {"type": "request",
+                "options": options,
+                "profiles": profiles,
+                "nodes": nodes,
+                "sensors": sensors,
+                "managers": managers,
+                "alerts": alerts,
+                "alertLevels": alert_levels}
+
+    def _update_status_revision(self,
+                                payload: Dict[str, Any]):
+        """
+        Internal function that compares the objects of the given status payload with the last one
+        and increases the revision if objects were added, changed or deleted.
+
+        :param payload:
+        """
+        revision = self._status_revision + 1
+        changed = False
+        for object_list, key in STATUS_DELTA_OBJECTS:
+            old_objects = self._status_objects.get(object_list, {})
+            new_objects = {obj[key]: obj for obj in payload[object_list]}
+            object_revisions = self._status_object_revisions.setdefault(object_list, {})
+            deleted = self._status_deleted.setdefault(object_list, {})
+
+            for obj_key, obj in new_objects.items():
+                if old_objects.get(obj_key) != obj:
+                    object_revisions[obj_key] = revision
+                    deleted.pop(obj_key, None)
+                    changed = True
+
+            for obj_key in old_objects.keys() - new_objects.keys():
+                del object_revisions[obj_key]
+                deleted[obj_key] = revision
+                changed = True
+
+            self._status_objects[object_list] = new_objects
+
+        if not changed:
+            return
+
+        self._status_revision = revision
+        self._status_deltas.clear()
+
+        # Forget deleted objects of old revisions.
+        if revision - STATUS_DELTA_REVISIONS > self._status_oldest_revision:
+            self._status_oldest_revision = revision - STATUS_DELTA_REVISIONS
+            for deleted in self._status_deleted.values():
+                for obj_key in [k for k, v in deleted.items() if v <= self._status_oldest_revision]:
+                    del deleted[obj_key]
+
+    def _build_status_delta_payload(self,
+                                    base_revision: int) -> Dict[str, Any]:
+        """
+        Internal function that builds the payload of a status message that only contains the objects
+        added, changed or deleted since the given revision.
+
+        :param base_revision:
+        :return: payload
+        """
+        payload = {"type": "request",
+                   "delta": True,
+                   "baseRevision": base_revision,
+                   "revision": self._status_revision}
+        deleted = dict()
+        for object_list, _ in STATUS_DELTA_OBJECTS:
+            object_revisions = self._status_object_revisions[object_list]
+            payload[object_list] = [obj for obj_key, obj in self._status_objects[object_list].items()
+                                    if object_revisions[obj_key] > base_revision]
+            deleted[object_list] = [obj_key for obj_key, revision in self._status_deleted[object_list].items()
+                                    if revision > base_revision]
+        payload["deleted"] = deleted
+        return payload
+
+    def get_status_payload(self,
+                           base_revision: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """
+        Returns the encoded payload of the status message for the manager clients. The payload is only
+        built again if the data in the database changed since it was built the last time.
+        If a base revision is given and still known, the payload only contains the changes since then.
+
+        :param base_revision: revision of the status data the manager client already has
+        :return: tuple of JSON encoded payload and its revision or None if building it failed
+        """
+        with self._status_lock:
+            # Get the generation before building the payload so that changes during
+            # the build lead to a new build the next time.
+            generation = self.storage.getChangeGeneration(logger=self.logger)
+            if self._status_payload is None or generation != self._status_generation:
+                payload = self._build_status_payload()
+                if payload is None:
+                    return None
+
+                self._update_status_revision(payload)
+                payload["revision"] = self._status_revision
+                self._status_payload = json.dumps(payload)
+                self._status_generation = generation
+                self.status_payload_builds += 1
+
+            if (base_revision is None
+                    or base_revision < self._status_oldest_revision
+                    or base_revision > self._status_revision):
+                return self._status_payload, self._status_revision
+
+            if base_revision not in self._status_deltas:
+                self._status_deltas[base_revision] = json.dumps(self._build_status_delta_payload(base_revision))
+
+            return self._status_deltas[base_revision], self._status_revision
+
+    def _profile_changed(self, _: int):
+        """
+        Internal function that invalidates the status payload after the profile changed.
+        """
+        with self._status_lock:
+            self._status_payload = None
 
     # sets the exit flag to shut down the thread
     def exit(self):
@@ -165,5 +435,17 @@ class ManagerUpdateExecuter(threading.Thread):
         :param state:
         :param sensor_data:
         """
-        self._queue_state_change.append((sensor_id, state, sensor_data))
+        with self._queue_state_change_lock:
+            self.state_changes_queued += 1
+            if sensor_id in self._queue_state_change:
+                self.state_changes_coalesced += 1
+
+            # If the queue is full, the manager clients get a full status update instead
+            # (which contains the states of all sensors).
+            elif len(self._queue_state_change) >= self._state_change_queue_size:
+                self.state_change_overflows += 1
+                self._queue_state_change.clear()
+                self._force_status_update = True
+
+            self._queue_state_change[sensor_id] = (state, sensor_data)
         self._manager_update_event.set()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: https://h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import bisect
+import threading
+from typing import Any, Dict, Tuple
+
+
+# Upper bounds of the histogram buckets in seconds and bytes.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Requests of clients that are counted by their type (all others are counted as "other"
+# to not create a metric for each type a client sends).
+RECEIVED_MESSAGE_TYPES = {"ping", "sensoralert", "statechange", "statechanges", "status", "option"}
+
+
+class Histogram:
+    """
+    Counts observed values in buckets. The statistics contain cumulative bucket counts (each bucket counts
+    the values that are at most its upper bound) like the execution histograms of the instrumentation.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._bucket_counts = [0] * len(buckets)
+        self._count = 0
+        self._sum = 0.0
+
+    def observe(self, value: float):
+        idx = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            if idx < len(self._bucket_counts):
+                self._bucket_counts[idx] += 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            bucket_counts = list(self._bucket_counts)
+            statistics = {"count": self._count,
+                          "sum": self._sum}
+
+        buckets = list()
+        cumulative = 0
+        for i in range(len(self._buckets)):
+            cumulative += bucket_counts[i]
+            buckets.append((self._buckets[i], cumulative))
+        statistics["buckets"] = buckets
+        return statistics
+
+
+class Metrics:
+    """
+    Collects the metrics that are recorded while the server handles messages (message counters, payload sizes
+    and latencies). All other metrics are read from the server components when they are exported.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._messages_received = dict()  # type: Dict[str, int]
+        self._messages_sent = dict()  # type: Dict[str, int]
+        self._payload_sizes = dict()  # type: Dict[str, Histogram]
+
+        # Seconds from sending a request to a client until it acknowledged it (CTS of protocol version 1
+        # or the response of protocol version 2).
+        self.handshake_latency = Histogram(LATENCY_BUCKETS)
+
+        # Seconds from receiving a sensor alert (plus its alert delay) until it was handed over to the clients.
+        self.dispatch_latency = Histogram(LATENCY_BUCKETS)
+
+    def message_received(self, message_type: str):
+        """
+        Counts a request received from a client.
+        :param message_type:
+        """
+        if message_type not in RECEIVED_MESSAGE_TYPES:
+            message_type = "other"
+
+        with self._lock:
+            self._messages_received[message_type] = self._messages_received.get(message_type, 0) + 1
+
+    def message_sent(self, message_type: str, size: int):
+        """
+        Counts a request sent to a client and records its size.
+        :param message_type:
+        :param size: size of the message in bytes
+        """
+        with self._lock:
+            self._messages_sent[message_type] = self._messages_sent.get(message_type, 0) + 1
+            histogram = self._payload_sizes.get(message_type)
+            if histogram is None:
+                histogram = Histogram(SIZE_BUCKETS)
+                self._payload_sizes[message_type] = histogram
+
+        histogram.observe(size)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Gets the collected metrics.
+        :return: dictionary with the message counters by type in "received" and "sent", the payload size
+        histograms by type in "payload_sizes" and the histograms "handshake_latency" and "dispatch_latency"
+        """
+        with self._lock:
+            statistics = {"received": dict(self._messages_received),
+                          "sent": dict(self._messages_sent)}
+            payload_sizes = dict(self._payload_sizes)
+
+        statistics["payload_sizes"] = {k: v.get_statistics() for k, v in payload_sizes.items()}
+        statistics["handshake_latency"] = self.handshake_latency.get_statistics()
+        statistics["dispatch_latency"] = self.dispatch_latency.get_statistics()
+        return statistics
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: https://h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import http.server
+import os
+import socketserver
+import threading
+from typing import Any, Dict, List, Tuple
+from ..globalData import GlobalData
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join("%s=\"%s\"" % (k, _escape(v)) for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return "%d" % value
+    return repr(float(value))
+
+
+class _MetricsWriter:
+    """
+    Writes metrics in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lines = list()  # type: List[str]
+
+    def add(self,
+            name: str,
+            metric_type: str,
+            description: str,
+            samples: List[Tuple[Dict[str, Any], float]]):
+        """
+        Adds a counter or gauge.
+        :param name:
+        :param metric_type: "counter" or "gauge"
+        :param description:
+        :param samples: list of labels and value
+        """
+        self._lines.append("# HELP %s %s" % (name, description))
+        self._lines.append("# TYPE %s %s" % (name, metric_type))
+        for labels, value in samples:
+            self._lines.append("%s%s %s" % (name, _format_labels(labels), _format_value(value)))
+
+    def add_histogram(self,
+                      name: str,
+                      description: str,
+                      histograms: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+        """
+        Adds a histogram.
+        :param name:
+        :param description:
+        :param histograms: list of labels and histogram statistics (with "count", "sum" and cumulative "buckets")
+        """
+        self._lines.append("# HELP %s %s" % (name, description))
+        self._lines.append("# TYPE %s histogram" % name)
+        for labels, histogram in histograms:
+            for upper_bound, count in histogram["buckets"]:
+                bucket_labels = dict(labels)
+                bucket_labels["le"] = _format_value(upper_bound)
+                self._lines.append("%s_bucket%s %d" % (name, _format_labels(bucket_labels), count))
+            bucket_labels = dict(labels)
+            bucket_labels["le"] = "+Inf"
+            self._lines.append("%s_bucket%s %d" % (name, _format_labels(bucket_labels), histogram["count"]))
+            self._lines.append("%s_sum%s %s" % (name, _format_labels(labels), _format_value(histogram["sum"])))
+            self._lines.append("%s_count%s %d" % (name, _format_labels(labels), histogram["count"]))
+
+    def get_text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def _add_session_metrics(writer: _MetricsWriter, global_data: GlobalData):
+    sessions = dict()  # type: Dict[str, int]
+    outbound = {"sent": 0, "failed": 0, "dropped": 0, "coalesced": 0}
+    queue_depth = 0
+    for server_session in global_data.serverSessions:
+        client_comm = server_session.clientComm
+        if client_comm is None or not client_comm.clientInitialized:
+            node_type = "unregistered"
+        else:
+            node_type = client_comm.nodeType
+        sessions[node_type] = sessions.get(node_type, 0) + 1
+
+        if client_comm is not None:
+            queue_depth += client_comm.outboundQueueDepth
+            outbound["sent"] += client_comm.outboundSent
+            outbound["failed"] += client_comm.outboundFailed
+            outbound["dropped"] += client_comm.outboundDropped
+            outbound["coalesced"] += client_comm.outboundCoalesced
+
+    writer.add("alertr_sessions",
+               "gauge",
+               "Connected sessions by node type.",
+               [({"node_type": k}, v) for k, v in sorted(sessions.items())])
+    writer.add("alertr_outbound_queue_depth",
+               "gauge",
+               "Messages queued for sending to the connected clients.",
+               [({}, queue_depth)])
+    writer.add("alertr_outbound_messages",
+               "gauge",
+               "Queued messages of the connected clients by result.",
+               [({"result": k}, v) for k, v in outbound.items()])
+
+
+def _add_message_metrics(writer: _MetricsWriter, global_data: GlobalData):
+    statistics = global_data.metrics.get_statistics()
+    writer.add("alertr_messages_received_total",
+               "counter",
+               "Requests received from clients by message type.",
+               [({"type": k}, v) for k, v in sorted(statistics["received"].items())])
+    writer.add("alertr_messages_sent_total",
+               "counter",
+               "Requests sent to clients by message type.",
+               [({"type": k}, v) for k, v in sorted(statistics["sent"].items())])
+    writer.add_histogram("alertr_message_payload_bytes",
+                         "Size of the requests sent to clients by message type "
+                         + "(manager updates are of type status, statechange and statechanges).",
+                         [({"type": k}, v) for k, v in sorted(statistics["payload_sizes"].items())])
+    writer.add_histogram("alertr_transaction_handshake_seconds",
+                         "Time until a client acknowledged a request sent to it.",
+                         [({}, statistics["handshake_latency"])])
+    writer.add_histogram("alertr_sensor_alert_dispatch_seconds",
+                         "Time from receiving a sensor alert (plus its alert delay) until it is handed over "
+                         + "to the alert and manager clients.",
+                         [({}, statistics["dispatch_latency"])])
+
+
+def _add_sensor_alert_metrics(writer: _MetricsWriter, global_data: GlobalData):
+    sensor_alert_executer = global_data.sensorAlertExecuter
+    if sensor_alert_executer is None:
+        return
+
+    queue_statistics = sensor_alert_executer.get_queue_statistics()
+    writer.add("alertr_sensor_alert_queue_depth",
+               "gauge",
+               "Sensor alerts waiting in the sensor alert executer by state.",
+               [({"state": k}, v) for k, v in queue_statistics.items()])
+
+    statistics = sensor_alert_executer.get_instrumentation_statistics()
+    writer.add("alertr_instrumentation_pool",
+               "gauge",
+               "Instrumentations waiting for or being executed by the instrumentation pool.",
+               [({"state": "queued"}, statistics["queued"]),
+                ({"state": "running"}, statistics["running"])])
+    alert_levels = sorted(statistics["alert_levels"].items())
+    writer.add_histogram("alertr_instrumentation_seconds",
+                         "Execution time of the instrumentation by alert level.",
+                         [({"alert_level": k}, v) for k, v in alert_levels])
+    writer.add("alertr_instrumentation_failures_total",
+               "counter",
+               "Failed instrumentations by alert level.",
+               [({"alert_level": k}, v["failed"]) for k, v in alert_levels])
+
+    cache_samples = list()
+    for alert_level, cache_statistics in sorted(statistics["cache"]["alert_levels"].items()):
+        cache_samples.append(({"alert_level": alert_level, "result": "hit"}, cache_statistics["hits"]))
+        cache_samples.append(({"alert_level": alert_level, "result": "miss"}, cache_statistics["misses"]))
+    writer.add("alertr_instrumentation_cache_total",
+               "counter",
+               "Lookups of the instrumentation cache by alert level and result.",
+               cache_samples)
+
+
+def _add_manager_metrics(writer: _MetricsWriter, global_data: GlobalData):
+    manager_update_executer = global_data.managerUpdateExecuter
+    if manager_update_executer is None:
+        return
+
+    writer.add("alertr_manager_state_changes_total",
+               "counter",
+               "State changes of sensors for the manager clients by result.",
+               [({"result": "queued"}, manager_update_executer.state_changes_queued),
+                ({"result": "coalesced"}, manager_update_executer.state_changes_coalesced),
+                ({"result": "sent"}, manager_update_executer.state_changes_sent),
+                ({"result": "overflow"}, manager_update_executer.state_change_overflows)])
+
+
+def _add_storage_metrics(writer: _MetricsWriter, global_data: GlobalData):
+    storage = global_data.storage
+    if storage is None:
+        return
+
+    methods = sorted(storage.getMethodLockStatistics().items())
+    writer.add("alertr_storage_lock_acquisitions_total",
+               "counter",
+               "Accesses to the database by storage method.",
+               [({"method": k}, v["count"]) for k, v in methods])
+    writer.add("alertr_storage_lock_wait_seconds_total",
+               "counter",
+               "Time the storage methods waited for the database lock (or a read connection).",
+               [({"method": k}, v["waitTotal"]) for k, v in methods])
+    writer.add("alertr_storage_lock_hold_seconds_total",
+               "counter",
+               "Time the storage methods held the database lock (or a read connection).",
+               [({"method": k}, v["holdTotal"]) for k, v in methods])
+    writer.add("alertr_storage_lock_wait_seconds_max",
+               "gauge",
+               "Longest time a storage method waited for the database lock (or a read connection).",
+               [({"method": k}, v["waitMax"]) for k, v in methods])
+    writer.add("alertr_storage_lock_hold_seconds_max",
+               "gauge",
+               "Longest time a storage method held the database lock (or a read connection).",
+               [({"method": k}, v["holdMax"]) for k, v in methods])
+
+
+def export_metrics(global_data: GlobalData) -> str:
+    """
+    Gets the metrics of the server in the Prometheus text exposition format.
+    :param global_data:
+    :return: metrics
+    """
+    writer = _MetricsWriter()
+    _add_session_metrics(writer, global_data)
+    _add_message_metrics(writer, global_data)
+    _add_sensor_alert_metrics(writer, global_data)
+    _add_manager_metrics(writer, global_data)
+    _add_storage_metrics(writer, global_data)
+    return writer.get_text()
+
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        try:
+            data = export_metrics(self.server.global_data).encode("utf-8")
+
+        except Exception:
+            self.server.global_data.logger.exception("[%s]: Exporting metrics failed." % self.server.log_tag)
+            self.send_error(500)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args):
+        self.server.global_data.logger.debug("[%s]: %s - %s"
+                                             % (self.server.log_tag, self.address_string(), format % args))
+
+
+class _MetricsHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, global_data: GlobalData, server_address: Tuple[str, int]):
+        self.global_data = global_data
+        self.log_tag = os.path.basename(__file__)
+        http.server.HTTPServer.__init__(self, server_address, _MetricsRequestHandler)
+
+
+class MetricsExporter(threading.Thread):
+    """
+    Serves the metrics of the server via HTTP under /metrics.
+    """
+
+    def __init__(self, global_data: GlobalData):
+        threading.Thread.__init__(self)
+        self._global_data = global_data
+        self._logger = self._global_data.logger
+        self._log_tag = os.path.basename(__file__)
+        self._server = _MetricsHTTPServer(self._global_data,
+                                          (self._global_data.metricsHost, self._global_data.metricsPort))
+
+    @property
+    def port(self) -> int:
+        """
+        :return: port the metrics are served on
+        """
+        return self._server.server_address[1]
+
+    def run(self):
+        self._logger.info("[%s]: Serving metrics on %s:%d."
+                          % (self._log_tag, self._global_data.metricsHost, self.port))
+        self._server.serve_forever()
+
+    def exit(self):
+        """
+        Stops serving the metrics.
+        """
+        self._server.shutdown()
+        self._server.server_close()
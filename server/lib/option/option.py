@@ -14,7 +14,6 @@ from typing import Optional
 from ..globalData import GlobalData
 from ..internalSensors import ProfileChangeSensor
 from ..localObjects import Option
-from ..server import AsynchronousSender
 
 
 class OptionExecuter(threading.Thread):
@@ -30,6 +29,7 @@ class OptionExecuter(threading.Thread):
         self._global_data = global_data
         self._logger = self._global_data.logger
         self._storage = self._global_data.storage
+        self._profile_state = self._global_data.profile_state
         self._manager_update_executer = self._global_data.managerUpdateExecuter
         self._server_sessions = self._global_data.serverSessions
         self._profiles = self._global_data.profiles
@@ -77,18 +77,11 @@ class OptionExecuter(threading.Thread):
             if not server_session.clientComm.clientInitialized:
                 continue
 
-            # sending sensor alerts off to alert client
-            # via a thread to not block this one
-            sender = AsynchronousSender(self._global_data, server_session.clientComm)
-            # set thread to daemon
-            # => threads terminates when main thread terminates
-            sender.daemon = True
-            sender.send_profile_change = True
-            sender.profile = curr_profile
+            # queue profile change for the writer of the alert client to not block this one
             self._logger.debug("[%s]: Sending profile change to alert client (%s:%d)."
                                % (self._log_tag, server_session.clientComm.clientAddress,
                                   server_session.clientComm.clientPort))
-            sender.start()
+            server_session.clientComm.queue_profile_change(curr_profile)
 
     def _sensor_profile_change(self, option: Option):
         """
@@ -170,6 +163,7 @@ class OptionExecuter(threading.Thread):
 
                 # Special handling of "profile" options.
                 if option.type == "profile":
+                    self._profile_state.set_profile_id(option.value)
                     self._sensor_profile_change(option)
                     self._send_profile_change(option)
 
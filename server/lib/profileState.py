@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: https://h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import logging
+import os
+import threading
+from typing import Callable, List, Optional
+
+
+class ProfileState:
+    """
+    Holds the currently used system profile in memory. The profile is read once from the storage and afterwards
+    only changed by the option executer, which publishes each profile change it stored. Components that depend
+    on the profile can register a callback that is called with the new profile id after each change.
+    """
+
+    def __init__(self, global_data):
+
+        # NOTE: the storage is not available in the global data when this object is created.
+        self._global_data = global_data
+
+        # file nme of this file (used for logging)
+        self._log_tag = os.path.basename(__file__)
+
+        self._profile_id = None  # type: Optional[int]
+        self._lock = threading.Lock()
+        self._change_callbacks = list()  # type: List[Callable[[int], None]]
+
+    def add_change_callback(self, callback: Callable[[int], None]):
+        """
+        Adds a function that is called with the new profile id each time the profile changes.
+        :param callback:
+        """
+        with self._lock:
+            self._change_callbacks.append(callback)
+
+    def get_profile_id(self, logger: logging.Logger = None) -> Optional[int]:
+        """
+        Gets the id of the currently used system profile.
+        :param logger:
+        :return: profile id or None if it could not be read from the storage
+        """
+        if logger is None:
+            logger = self._global_data.logger
+
+        with self._lock:
+            if self._profile_id is not None:
+                return self._profile_id
+
+            option = self._global_data.storage.get_option_by_type("profile")
+            if option is None:
+                logger.error("[%s]: Unable to get 'profile' option from database." % self._log_tag)
+                return None
+
+            self._profile_id = option.value
+            return self._profile_id
+
+    def set_profile_id(self, profile_id: int):
+        """
+        Sets the id of the currently used system profile (has to be stored in the storage already).
+        :param profile_id:
+        """
+        with self._lock:
+            if self._profile_id == profile_id:
+                return
+            self._profile_id = profile_id
+            change_callbacks = list(self._change_callbacks)
+
+        for callback in change_callbacks:
+            callback(profile_id)
@@ -8,9 +8,13 @@
 # Licensed under the GNU Affero General Public License, version 3.
 
 import ssl
+import select
+import selectors
 import socket
 import threading
 import socketserver
+import concurrent.futures
+import collections
 import time
 import logging
 import os
@@ -19,10 +23,49 @@ import json
 from .localObjects import SensorDataType, Sensor, SensorData, SensorAlert, Option, Alert, Manager, Node, AlertLevel, \
     Profile
 from .globalData import GlobalData
-from typing import Optional, Dict, Tuple, Any, List, Type
+from typing import Optional, Dict, Tuple, Any, List, Type, Union, Deque
 
 BUFSIZE = 4096
 
+# Largest receive buffer a session keeps for reuse (larger messages like registrations of nodes with
+# many sensors are collected as they are received and freed afterwards).
+MAX_RECV_BUFFER_SIZE = 65536
+
+# Highest protocol version supported by the server
+# (1: RTS/CTS handshake for each message, 2: pipelined length-prefixed frames,
+# 3: state changes of multiple sensors in one "statechanges" message).
+PROTOCOL_VERSION = 3
+
+# A frame of protocol version 2 starts with a header of the payload length (8 hex digits), the request id
+# (8 hex digits) and the frame type followed by the payload.
+FRAME_HEADER_SIZE = 17
+FRAME_REQUEST = "Q"
+FRAME_RESPONSE = "R"
+
+# Maximum number of requests sent to a client that wait for their response (protocol version 2).
+MAX_REQUESTS_IN_FLIGHT = 16
+
+
+class OutboundMessage:
+    """
+    Message that is sent to the client by the writer thread of the client communication.
+    """
+
+    def __init__(self,
+                 messageType: str,
+                 args: Tuple = (),
+                 coalesceKey: Optional[Tuple] = None):
+        # RTS message type ("status", "sensoralert", "statechange", "statechanges" or "profilechange")
+        self.messageType = messageType
+        self.args = args
+
+        # Queued messages with the same key are replaced by a newer one
+        # (None if the message can not be coalesced).
+        self.coalesceKey = coalesceKey
+
+        # Flag that is set if a newer message replaced this one in the queue.
+        self.superseded = False
+
 
 # this class handles the communication with the incoming client connection
 class ClientCommunication:
@@ -90,9 +133,23 @@ class ClientCommunication:
         # (only set if the client is of the type "sensor")
         self.sensorCount = 0
 
+        # Flag that indicates if the client supports status updates that only contain the changes since
+        # the revision of the status update sent before (only set if the client is of the type "manager").
+        self.managerStatusDelta = False
+
+        # Revision of the last status update sent to the manager client (None if the client
+        # has to get a full status update).
+        self._managerStatusRevision = None  # type: Optional[int]
+
         # this lock is used to only allow one thread to use the communication
         self.connectionLock = threading.BoundedSemaphore(1)
 
+        # Socket pair used to wake up the thread waiting for data of the client
+        # (e.g., when another thread released the connection or the connection is closed).
+        self._wakeupReceiver, self._wakeupSender = socket.socketpair()
+        self._wakeupReceiver.setblocking(False)
+        self._wakeupSender.setblocking(False)
+
         # a flag that signals that the initialization process
         # of the client is finished
         self.clientInitialized = False
@@ -108,6 +165,45 @@ class ClientCommunication:
         # is of type "sensor").
         self.sensors = list()
 
+        # Queue of messages that are sent to the client by a single writer thread in the order they were queued.
+        # The number of queued messages is limited and the policy decides how a slow client is handled.
+        self._outboundQueue = collections.deque()  # type: Deque[OutboundMessage]
+        self._outboundCoalesce = dict()  # type: Dict[Tuple, OutboundMessage]
+        self._outboundCondition = threading.Condition()
+        self._outboundWriter = None  # type: Optional[threading.Thread]
+        self._outboundExit = False
+        self.outboundQueueSize = self.globalData.outboundQueueSize
+        self.outboundQueuePolicy = self.globalData.outboundQueuePolicy
+
+        # Protocol version used for the communication after the initialization
+        # (the version is negotiated during the authentication).
+        self.protocolVersion = 1
+        self._negotiatedProtocolVersion = 1
+
+        # Received data of protocol version 2 that does not form a complete frame yet.
+        self._recvBuffer = bytearray()
+
+        # Preallocated buffer that is reused for receiving data from the socket.
+        self._recvIntoBuffer = bytearray(BUFSIZE)
+
+        # Id of the request frame that is currently handled (responses are sent with this id).
+        self._requestFrameId = 0
+
+        # Requests sent to the client that wait for their response (frame id -> message type and send time).
+        self._pendingResponses = dict()  # type: Dict[int, Tuple[str, float]]
+        self._pendingCondition = threading.Condition()
+        self._nextFrameId = random.randint(0, 0xffffffff)
+
+        # Metrics of the server (None if not activated).
+        self._metrics = self.globalData.metrics
+
+        # Statistics of the outbound queue.
+        self.outboundQueueDepth = 0
+        self.outboundSent = 0
+        self.outboundFailed = 0
+        self.outboundDropped = 0
+        self.outboundCoalesced = 0
+
         # Needed for logging.
         self.logger = self.globalData.logger
         self.loggerFileHandler = None
@@ -118,20 +214,209 @@ class ClientCommunication:
         """
         self.connectionLock.acquire()
 
-    def _releaseLock(self):
+    def _releaseLock(self, wakeup: bool = True):
         """
         internal function that releases the lock
+
+        :param wakeup: wake up the thread waiting for data of the client
+        (has to be done if another thread than the waiting one used the connection)
         """
         self.connectionLock.release()
+        if wakeup:
+            self.wakeup()
+
+    def _drainWakeup(self):
+        """
+        Internal function that removes all pending wakeup signals.
+        """
+        try:
+            while self._wakeupReceiver.recv(BUFSIZE):
+                pass
+
+        except (BlockingIOError, OSError):
+            pass
 
     def _send(self, data: str):
         """
-        Wrapper around socket send to handle bytes/string encoding.
+        Wrapper around socket send to handle bytes/string encoding
+        (sends the data as response to the currently handled request if protocol version 2 is used).
 
         :param data:
         """
+        if self.protocolVersion >= 2:
+            self._sendFrame(FRAME_RESPONSE, self._requestFrameId, data)
+            return
+
         self.socket.send(data.encode("ascii"))
 
+    def _sendFrame(self,
+                   frameType: str,
+                   frameId: int,
+                   data: str):
+        """
+        Internal function that sends a frame of protocol version 2.
+
+        :param frameType:
+        :param frameId:
+        :param data:
+        """
+        header = "%08x%08x%s" % (len(data), frameId, frameType)
+        self.socket.sendall((header + data).encode("ascii"))
+
+    def _hasBufferedFrame(self) -> bool:
+        """
+        Internal function that checks if a complete frame of protocol version 2 was already received.
+
+        :return:
+        """
+        if len(self._recvBuffer) < FRAME_HEADER_SIZE:
+            return False
+
+        return len(self._recvBuffer) >= FRAME_HEADER_SIZE + int(self._recvBuffer[0:8], 16)
+
+    def _recvFrame(self) -> Optional[Tuple[str, int, str]]:
+        """
+        Internal function that receives a frame of protocol version 2.
+
+        :return: tuple of frame type, frame id and payload or None if the connection was closed
+        """
+        while not self._hasBufferedFrame():
+            with memoryview(self._recvIntoBuffer) as view:
+                count = self.socket.recv_into(view)
+                if count == 0:
+                    return None
+                self._recvBuffer += view[:count]
+
+        frameSize = FRAME_HEADER_SIZE + int(self._recvBuffer[0:8], 16)
+        frameId = int(self._recvBuffer[8:16], 16)
+        frameType = chr(self._recvBuffer[16])
+        with memoryview(self._recvBuffer) as view:
+            data = str(view[FRAME_HEADER_SIZE:frameSize], "ascii")
+        del self._recvBuffer[:frameSize]
+
+        if frameType not in [FRAME_REQUEST, FRAME_RESPONSE]:
+            raise ValueError("Unknown frame type '%s'." % frameType)
+
+        return frameType, frameId, data
+
+    def _sendRequestFrame(self,
+                          messageType: str,
+                          message: str,
+                          acquireLock: bool = True) -> bool:
+        """
+        Internal function that sends a request to the client without waiting for its response
+        (protocol version 2, the response is handled when it is received).
+
+        :param messageType:
+        :param message:
+        :param acquireLock:
+        :return: success or failure
+        """
+        with self._pendingCondition:
+            while len(self._pendingResponses) >= MAX_REQUESTS_IN_FLIGHT:
+                if self._outboundExit or not self._pendingCondition.wait(self.serverReceiveTimeout):
+                    self.logger.error("[%s]: No responses for pending requests received (%s:%d)."
+                                      % (self.fileName, self.clientAddress, self.clientPort))
+                    return False
+
+            frameId = self._nextFrameId
+            self._nextFrameId = (frameId + 1) & 0xffffffff
+            self._pendingResponses[frameId] = (messageType, time.time())
+
+        if acquireLock:
+            self._acquireLock()
+
+        try:
+            self.logger.debug("[%s]: Sending '%s' request %d (%s:%d)."
+                              % (self.fileName, messageType, frameId, self.clientAddress, self.clientPort))
+            self._sendFrame(FRAME_REQUEST, frameId, message)
+            if self._metrics is not None:
+                self._metrics.message_sent(messageType, len(message))
+
+        except Exception as e:
+            self.logger.exception("[%s]: Sending '%s' request failed (%s:%d)."
+                                  % (self.fileName, messageType, self.clientAddress, self.clientPort))
+
+            with self._pendingCondition:
+                self._pendingResponses.pop(frameId, None)
+
+            if acquireLock:
+                self._releaseLock(wakeup=False)
+            return False
+
+        if acquireLock:
+            self._releaseLock(wakeup=False)
+        return True
+
+    def _handleResponse(self,
+                        frameId: int,
+                        data: str) -> bool:
+        """
+        Internal function that handles the response of the client to a request sent with protocol version 2.
+
+        :param frameId:
+        :param data:
+        :return: False if the session has to be closed
+        """
+        with self._pendingCondition:
+            pending = self._pendingResponses.pop(frameId, None)
+            self._pendingCondition.notify_all()
+
+        if pending is None:
+            self.logger.error("[%s]: Received response for unknown request %d (%s:%d)."
+                              % (self.fileName, frameId, self.clientAddress, self.clientPort))
+            return False
+
+        messageType, sentTime = pending
+        if self._metrics is not None:
+            self._metrics.handshake_latency.observe(time.time() - sentTime)
+
+        processed = False
+        try:
+            message = json.loads(data)
+            # check if an error was received
+            if "error" in message.keys():
+                self.logger.error("[%s]: Error received for '%s' request: '%s' (%s:%d)."
+                                  % (self.fileName, messageType, message["error"], self.clientAddress,
+                                     self.clientPort))
+                self.outboundFailed += 1
+
+            # check if the received message type is the correct one
+            elif str(message["message"]).lower() != messageType:
+                self.logger.error("[%s]: %s message expected (%s:%d)."
+                                  % (self.fileName, messageType, self.clientAddress, self.clientPort))
+                self.outboundFailed += 1
+
+            # check if the received type is the correct one
+            elif str(message["payload"]["type"]).upper() != "RESPONSE":
+                self.logger.error("[%s]: response expected (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                self.outboundFailed += 1
+
+            elif str(message["payload"]["result"]).upper() == "EXPIRED":
+                self.logger.warning("[%s]: Client reported '%s' messages as expired." % (self.fileName, messageType))
+
+            elif str(message["payload"]["result"]).upper() != "OK":
+                self.logger.error("[%s]: Result not ok: '%s' (%s:%d)."
+                                  % (self.fileName, message["payload"]["result"], self.clientAddress, self.clientPort))
+                self.outboundFailed += 1
+
+            else:
+                processed = True
+
+        except Exception as e:
+            self.logger.exception("[%s]: Received response not valid: '%s' (%s:%d)."
+                                  % (self.fileName, data, self.clientAddress, self.clientPort))
+            return False
+
+        # The client did not process the status update => next one has to contain everything.
+        if messageType == "status" and not processed:
+            self._managerStatusRevision = None
+
+        self.lastRecv = int(time.time())
+
+        return True
+
     def _recv(self, bufsize: int = BUFSIZE) -> str:
         """
         Wrapper around socket recv to handle bytes/string encoding.
@@ -140,6 +425,40 @@ class ClientCommunication:
         """
         return self.socket.recv(bufsize).decode("ascii")
 
+    def _recvMessage(self, messageSize: int) -> Optional[str]:
+        """
+        Internal function that receives a message of the given size into a preallocated buffer
+        and decodes it once it is complete.
+
+        :param messageSize: size of the message in bytes
+        :return: received message or None if the connection was closed before the message was complete
+        """
+        if len(self._recvIntoBuffer) < messageSize:
+            self._recvIntoBuffer = bytearray(min(messageSize, MAX_RECV_BUFFER_SIZE))
+
+        # Larger messages are only stored as far as they are actually received (the size is stated by
+        # the client, hence, it is not used to allocate memory in advance).
+        if messageSize > len(self._recvIntoBuffer):
+            data = bytearray()
+            with memoryview(self._recvIntoBuffer) as view:
+                while len(data) < messageSize:
+                    count = self.socket.recv_into(view[:min(len(view), messageSize - len(data))])
+                    if count == 0:
+                        return None
+                    data += view[:count]
+
+            return data.decode("ascii")
+
+        with memoryview(self._recvIntoBuffer) as view:
+            received = 0
+            while received < messageSize:
+                count = self.socket.recv_into(view[received:messageSize])
+                if count == 0:
+                    return None
+                received += count
+
+            return str(view[:messageSize], "ascii")
+
     def _checkMsgAlertDelay(self,
                             alertDelay: int,
                             messageType: str) -> bool:
@@ -627,6 +946,9 @@ class ClientCommunication:
                                                messageType):
                 isCorrect = False
 
+            elif "statusDelta" in manager.keys() and not isinstance(manager["statusDelta"], bool):
+                isCorrect = False
+
         if not isCorrect:
             # send error message back
             try:
@@ -917,6 +1239,8 @@ class ClientCommunication:
         # set flag that the initialization process of
         # the client is finished as false
         self.clientInitialized = False
+        self.serverSessions.remove_alert_level_routes(self)
+        self.serverSessions.remove_node_session(self)
 
         # wake up manager update executer
         self.managerUpdateExecuter.force_status_update()
@@ -978,6 +1302,7 @@ class ClientCommunication:
             # generate a random "unique" transaction id
             # for this transaction
             transactionId = random.randint(0, 0xffffffff)
+            rtsTime = time.time()
 
             # send RTS (request to send) message
             self.logger.debug("[%s]: Sending RTS %d message (%s:%d)."
@@ -1049,6 +1374,10 @@ class ClientCommunication:
                 self.logger.debug("[%s]: Initiate transaction succeeded (%s:%d)."
                                   % (self.fileName, self.clientAddress, self.clientPort))
 
+                if self._metrics is not None:
+                    self._metrics.handshake_latency.observe(time.time() - rtsTime)
+                    self._metrics.message_sent(messageType, messageSize)
+
                 # set transaction initiation flag as false so other
                 # threads can try to initiate a transaction with the client
                 self.transactionInitiation = False
@@ -1148,21 +1477,42 @@ class ClientCommunication:
 
         return json.dumps(message)
 
+    def _buildStateChangesMessage(self,
+                                  stateChanges: List[Tuple[int, int, int, Any]]) -> str:
+        """
+        Internal function that builds a message with the state changes of multiple sensors
+        (protocol version 3).
+
+        :param stateChanges: list of tuples of (sensorId, state, dataType, data)
+        :return:
+        """
+        stateChangesList = list()
+        for sensorId, state, dataType, data in stateChanges:
+            stateChangesList.append({"sensorId": sensorId,
+                                     "state": state,
+                                     "dataType": dataType,
+                                     "data": data.copy_to_dict()})
+
+        payload = {"type": "request",
+                   "stateChanges": stateChangesList}
+
+        utc_time = int(time.time())
+        message = {"msgTime": utc_time,
+                   "message": "statechanges",
+                   "payload": payload}
+
+        return json.dumps(message)
+
     def _buildAlertSystemStateMessage(self) -> Optional[str]:
         """
-        Internal function that builds the alert system state message.
+        Internal function that builds the alert system state message
+        (the payload is shared by all manager clients).
 
         :return:
         """
-        # Get a list from database of
-        # list[0] = list(option objects)
-        # list[1] = list(node objects)
-        # list[2] = list(sensor objects)
-        # list[3] = list(manager objects)
-        # list[4] = list(alert objects)
-        # or None
-        alertSystemInformation = self.storage.getAlertSystemInformation(logger=self.logger)
-        if alertSystemInformation is None:
+        baseRevision = self._managerStatusRevision if self.managerStatusDelta else None
+        result = self.managerUpdateExecuter.get_status_payload(baseRevision)
+        if result is None:
             self.logger.error("[%s]: Getting alert system information from database failed (%s:%d)."
                               % (self.fileName, self.clientAddress, self.clientPort))
 
@@ -1176,102 +1526,14 @@ class ClientCommunication:
                 pass
 
             return None
-        optionList = alertSystemInformation[0]  # type: List[Option]
-        nodesList = alertSystemInformation[1]  # type: List[Node]
-        sensorList = alertSystemInformation[2]  # type: List[Sensor]
-        managerList = alertSystemInformation[3]  # type: List[Manager]
-        alertList = alertSystemInformation[4]  # type: List[Alert]
-
-        # Generating options list.
-        options = list()
-        for optionObj in optionList:
-            tempDict = {"type": optionObj.type,
-                        "value": optionObj.value}
-            options.append(tempDict)
-
-        # Generating nodes list.
-        nodes = list()
-        for nodeObj in nodesList:
-            tempDict = {"nodeId": nodeObj.id,
-                        "hostname": nodeObj.hostname,
-                        "username": nodeObj.username,
-                        "nodeType": nodeObj.nodeType,
-                        "instance": nodeObj.instance,
-                        "connected": nodeObj.connected,
-                        "version": nodeObj.version,
-                        "rev": nodeObj.rev,
-                        "persistent": nodeObj.persistent}
-
-            nodes.append(tempDict)
-
-        # Generating sensors list.
-        sensors = list()
-        for sensorObj in sensorList:
-            tempDict = {"sensorId": sensorObj.sensorId,
-                        "nodeId": sensorObj.nodeId,
-                        "clientSensorId": sensorObj.clientSensorId,
-                        "description": sensorObj.description,
-                        "state": sensorObj.state,
-                        "lastStateUpdated": sensorObj.lastStateUpdated,
-                        "alertDelay": sensorObj.alertDelay,
-                        "alertLevels": sensorObj.alertLevels,
-                        "dataType": sensorObj.dataType,
-                        "data": sensorObj.data.copy_to_dict()}
-
-            sensors.append(tempDict)
-
-        # Generating managers list.
-        managers = list()
-        for managerObj in managerList:
-            tempDict = {"managerId": managerObj.managerId,
-                        "nodeId": managerObj.nodeId,
-                        "description": managerObj.description}
-            managers.append(tempDict)
-
-        # Generating alerts list.
-        alerts = list()
-        for alertObj in alertList:
-            tempDict = {"alertId": alertObj.alertId,
-                        "nodeId": alertObj.nodeId,
-                        "clientAlertId": alertObj.clientAlertId,
-                        "description": alertObj.description,
-                        "alertLevels": alertObj.alertLevels}
-            alerts.append(tempDict)
-
-        # Generating profiles list
-        profiles = list()
-        for profile_obj in self.profiles:
-            temp_dict = {"profileId": profile_obj.profileId,
-                         "name": profile_obj.name}
-            profiles.append(temp_dict)
-
-        # Generating alertLevels list.
-        alertLevels = list()
-        for i in range(len(self.alertLevels)):
-            tempDict = {"alertLevel": self.alertLevels[i].level,
-                        "name": self.alertLevels[i].name,
-                        "profiles": self.alertLevels[i].profiles,
-                        "instrumentation_active": self.alertLevels[i].instrumentation_active,
-                        "instrumentation_cmd": self.alertLevels[i].instrumentation_cmd,
-                        "instrumentation_timeout": self.alertLevels[i].instrumentation_timeout}
-            alertLevels.append(tempDict)
+
+        statusPayload, self._managerStatusRevision = result
 
         self.logger.debug("[%s]: Sending status message (%s:%d)." % (self.fileName, self.clientAddress, self.clientPort))
 
-        payload = {"type": "request",
-                   "options": options,
-                   "profiles": profiles,
-                   "nodes": nodes,
-                   "sensors": sensors,
-                   "managers": managers,
-                   "alerts": alerts,
-                   "alertLevels": alertLevels}
+        # Only the message time differs between the status messages of the manager clients.
         utc_time = int(time.time())
-        message = {"msgTime": utc_time,
-                   "message": "status",
-                   "payload": payload}
-
-        return json.dumps(message)
+        return "{\"msgTime\": %d, \"message\": \"status\", \"payload\": %s}" % (utc_time, statusPayload)
 
     def _initializeCommunication(self) -> bool:
         """
@@ -1456,6 +1718,33 @@ class ClientCommunication:
         self.logger.debug("[%s]: Received client version: '%.3f-%d' (%s:%d)."
                           % (self.fileName, self.clientVersion, self.clientRev, self.clientAddress, self.clientPort))
 
+        # Negotiate the protocol version used after the initialization
+        # (clients that do not send a protocol version only support version 1).
+        try:
+            clientProtocolVersion = 1
+            if "protocol" in message["payload"].keys():
+                clientProtocolVersion = int(message["payload"]["protocol"])
+
+            if clientProtocolVersion < 1:
+                raise ValueError("Protocol version %d does not exist." % clientProtocolVersion)
+
+            self._negotiatedProtocolVersion = min(clientProtocolVersion, PROTOCOL_VERSION)
+
+        except Exception as e:
+            self.logger.exception("[%s]: Protocol version not valid (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+
+            # send error message back
+            try:
+                message = {"message": message["message"],
+                           "error": "protocol version not valid"}
+                self._send(json.dumps(message))
+
+            except Exception as e:
+                pass
+
+            return False, 0
+
         # get user credentials
         try:
             self.username = str(message["payload"]["username"])
@@ -1524,7 +1813,8 @@ class ClientCommunication:
             payload = {"type": "response",
                        "result": "ok",
                        "version": self.serverVersion,
-                       "rev": self.serverRev}
+                       "rev": self.serverRev,
+                       "protocol": self._negotiatedProtocolVersion}
             message = {"message": "initialization",
                        "payload": payload}
             self._send(json.dumps(message))
@@ -1546,23 +1836,11 @@ class ClientCommunication:
         """
         # get registration from client
         try:
-            data = ""
-            lastSize = 0
-            while len(data) < messageSize:
-                # NOTE: Receiving should use bytearray as in client implementation. Change during refactor.
-                data += self._recv()
-
-                # Check if the size of the received data has changed.
-                # If not we detected a possible dead lock.
-                if lastSize != len(data):
-                    lastSize = len(data)
-
-                else:
-                    self.logger.error("[%s]: Possible dead lock detected while receiving data. Closing "
-                                      % self.fileName
-                                      + "connection to client (%s:%d)."
-                                      % (self.clientAddress, self.clientPort))
-                    return False
+            data = self._recvMessage(messageSize)
+            if data is None:
+                self.logger.error("[%s]: Connection closed while receiving registration (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
 
             message = json.loads(data)
             # check if an error was received
@@ -1883,6 +2161,9 @@ class ClientCommunication:
 
                     return False
 
+            # Start timeout detection of the registered sensors.
+            self.connectionWatchdog.addSensorDeadlines(self.nodeId, self.username, self.sensors)
+
         # check if the type of the node is alert
         # => register alerts
         elif self.nodeType == "alert":
@@ -2022,6 +2303,7 @@ class ClientCommunication:
             # extraction manager data
             try:
                 description = manager["description"]
+                self.managerStatusDelta = manager.get("statusDelta", False)
 
             except Exception as e:
                 self.logger.exception("[%s]: Manager data invalid (%s:%d)."
@@ -2360,6 +2642,9 @@ class ClientCommunication:
 
                 return False
 
+        self.connectionWatchdog.updateSensorDeadlines([sensor.sensorId for sensor in self.sensors],
+                                                      int(time.time()))
+
         # send status response
         try:
             payload = {"type": "response",
@@ -2566,6 +2851,8 @@ class ClientCommunication:
 
             return False
 
+        self.connectionWatchdog.updateSensorDeadlines([sensor.sensorId], int(time.time()))
+
         if not self.sensorAlertExecuter.add_sensor_alert(self.nodeId,
                                                          sensor.sensorId,
                                                          state,
@@ -2747,19 +3034,131 @@ class ClientCommunication:
 
                 return False
 
-        # get sensorId from database => append to state change queue
-        # => wake up manager update executer
-        sensorId = self.storage.getSensorId(self.nodeId,
-                                            clientSensorId,
-                                            logger=self.logger)
-        if sensorId is None:
-            self.logger.error("[%s]: Not able to get sensorId (%s:%d)."
+        self.connectionWatchdog.updateSensorDeadlines([sensor.sensorId], sensor.lastStateUpdated)
+
+        # send state change response
+        try:
+            payload = {"type": "response",
+                       "result": "ok"}
+            message = {"message": "statechange",
+                       "payload": payload}
+            self._send(json.dumps(message))
+
+        except Exception as e:
+            self.logger.exception("[%s]: Sending state change response failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+            return False
+
+        sensorDataObj = SensorData()
+        sensorDataObj.dataType = sensor.dataType
+        sensorDataObj.data = sensor.data
+
+        # add state change to queue and wake up manager update executer
+        self.managerUpdateExecuter.queue_state_change(sensor.sensorId, sensor.state, sensorDataObj)
+
+        return True
+
+    def _stateChangesHandler(self,
+                             incomingMessage: Dict[str, Any]) -> bool:
+        """
+        this internal function handles received state changes of multiple sensors
+        (updates them in the database in one transaction and wakes up the manager update executer)
+
+        :param incomingMessage:
+        :return:
+        """
+        # Extract state change values (the entries have the same layout as the sensors of a status message).
+        stateList = list()
+        dataList = list()
+        changedSensors = list()
+        try:
+            stateChanges = incomingMessage["payload"]["stateChanges"]
+            if not isinstance(stateChanges, list) or not stateChanges:
+                raise ValueError("State changes list is empty.")
+
+            if not self._checkMsgStatusSensorsList(stateChanges,
+                                                   incomingMessage["message"]):
+                self.logger.error("[%s]: Received state changes invalid (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+            sensorsByClientId = {sensor.clientSensorId: sensor for sensor in self.sensors}
+            utcTimestamp = int(time.time())
+            for stateChange in stateChanges:
+                clientSensorId = stateChange["clientSensorId"]
+                sensorDataType = stateChange["dataType"]
+
+                # Check if client sensor is known.
+                sensor = sensorsByClientId.get(clientSensorId)
+                if sensor is None:
+                    self.logger.error("[%s]: Unknown client sensor id %d (%s:%d)."
+                                      % (self.fileName, clientSensorId, self.clientAddress, self.clientPort))
+
+                    # send error message back
+                    try:
+                        message = {"message": incomingMessage["message"],
+                                   "error": "unknown client sensor id"}
+                        self._send(json.dumps(message))
+
+                    except Exception as e:
+                        pass
+
+                    return False
+
+                # Check if received message contains the correct data type.
+                if sensorDataType != sensor.dataType:
+                    self.logger.error("[%s]: Received sensor data type for client sensor %d invalid (%s:%d)."
+                                      % (self.fileName, clientSensorId, self.clientAddress, self.clientPort))
+
+                    # send error message back
+                    try:
+                        message = {"message": incomingMessage["message"],
+                                   "error": "received sensor data type wrong"}
+                        self._send(json.dumps(message))
+
+                    except Exception as e:
+                        pass
+
+                    return False
+
+                sensor_data_class = SensorDataType.get_sensor_data_class(sensorDataType)
+                sensor_data = sensor_data_class.copy_from_dict(stateChange["data"])
+
+                stateList.append((sensor.sensorId, stateChange["state"], utcTimestamp))
+                if sensorDataType != SensorDataType.NONE:
+                    dataList.append((sensor.sensorId, sensorDataType, sensor_data))
+                changedSensors.append((sensor, stateChange["state"], sensor_data))
+
+        except Exception as e:
+            self.logger.exception("[%s]: Received state changes invalid (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+
+            # send error message back
+            try:
+                message = {"message": incomingMessage["message"],
+                           "error": "received state changes invalid"}
+                self._send(json.dumps(message))
+
+            except Exception as e:
+                pass
+
+            return False
+
+        self.logger.debug("[%s]: State changes for %d client sensors (%s:%d)."
+                          % (self.fileName, len(changedSensors), self.clientAddress, self.clientPort))
+
+        # Update states and data of all sensors in one transaction.
+        if not self.storage.updateSensorValues(stateList,
+                                               dataList,
+                                               [],
+                                               logger=self.logger):
+            self.logger.error("[%s]: Not able to change sensor states (%s:%d)."
                               % (self.fileName, self.clientAddress, self.clientPort))
 
             # send error message back
             try:
                 message = {"message": incomingMessage["message"],
-                           "error": "not able to get sensor id from database"}
+                           "error": "not able to change sensor states in database"}
                 self._send(json.dumps(message))
 
             except Exception as e:
@@ -2767,25 +3166,34 @@ class ClientCommunication:
 
             return False
 
-        # send state change response
+        # Update sensor objects.
+        for sensor, state, sensor_data in changedSensors:
+            sensor.state = state
+            sensor.lastStateUpdated = utcTimestamp
+            sensor.data = sensor_data
+
+        self.connectionWatchdog.updateSensorDeadlines([sensor.sensorId for sensor, _, _ in changedSensors],
+                                                      utcTimestamp)
+
+        # send state changes response
         try:
             payload = {"type": "response",
                        "result": "ok"}
-            message = {"message": "statechange",
+            message = {"message": "statechanges",
                        "payload": payload}
             self._send(json.dumps(message))
 
         except Exception as e:
-            self.logger.exception("[%s]: Sending state change response failed (%s:%d)."
+            self.logger.exception("[%s]: Sending state changes response failed (%s:%d)."
                                   % (self.fileName, self.clientAddress, self.clientPort))
             return False
 
-        sensorDataObj = SensorData()
-        sensorDataObj.dataType = sensor.dataType
-        sensorDataObj.data = sensor.data
-
-        # add state change to queue and wake up manager update executer
-        self.managerUpdateExecuter.queue_state_change(sensor.sensorId, sensor.state, sensorDataObj)
+        # add state changes to queue and wake up manager update executer
+        for sensor, _, _ in changedSensors:
+            sensorDataObj = SensorData()
+            sensorDataObj.dataType = sensor.dataType
+            sensorDataObj.data = sensor.data
+            self.managerUpdateExecuter.queue_state_change(sensor.sensorId, sensor.state, sensorDataObj)
 
         return True
 
@@ -2855,6 +3263,7 @@ class ClientCommunication:
             # check if status message was correctly received
             if str(message["payload"]["result"]).upper() == "EXPIRED":
                 self.logger.warning("[%s]: Client reported 'status' messages as expired." % self.fileName)
+                self._managerStatusRevision = None
 
             elif str(message["payload"]["result"]).upper() != "OK":
                 self.logger.error("[%s]: Result not ok: '%s' (%s:%d)."
@@ -3050,6 +3459,9 @@ class ClientCommunication:
                                                            dataType,
                                                            data)
 
+        if self.protocolVersion >= 2:
+            return self._sendRequestFrame("statechange", stateChangeMessage)
+
         # initiate transaction with client and acquire lock
         if not self._initiateTransaction("statechange",
                                          len(stateChangeMessage),
@@ -3061,6 +3473,26 @@ class ClientCommunication:
         self._releaseLock()
         return returnValue
 
+    def sendManagerStateChanges(self,
+                                stateChanges: List[Tuple[int, int, int, Any]]) -> bool:
+        """
+        function that sends the state changes of multiple sensors to a manager client in one message
+        (clients with a protocol version older than 3 get one message per state change)
+
+        :param stateChanges: list of tuples of (sensorId, state, dataType, data)
+        :return:
+        """
+        if self.protocolVersion < 3:
+            returnValue = True
+            for stateChange in stateChanges:
+                if not self.sendManagerStateChange(*stateChange):
+                    returnValue = False
+            return returnValue
+
+        stateChangesMessage = self._buildStateChangesMessage(stateChanges)
+
+        return self._sendRequestFrame("statechanges", stateChangesMessage)
+
     def send_profile_change(self, profile: Profile) -> bool:
         """
         Function that sends a profile change to an alert client
@@ -3069,6 +3501,9 @@ class ClientCommunication:
         """
         profile_change_msg = self._build_profile_change_message(profile)
 
+        if self.protocolVersion >= 2:
+            return self._sendRequestFrame("profilechange", profile_change_msg)
+
         # initiate transaction with client and acquire lock
         if not self._initiateTransaction("profilechange",
                                          len(profile_change_msg),
@@ -3090,6 +3525,9 @@ class ClientCommunication:
         if not alertSystemStateMessage:
             return False
 
+        if self.protocolVersion >= 2:
+            return self._sendRequestFrame("status", alertSystemStateMessage)
+
         # initiate transaction with client and acquire lock
         if not self._initiateTransaction("status",
                                          len(alertSystemStateMessage),
@@ -3098,6 +3536,10 @@ class ClientCommunication:
 
         returnValue = self._sendManagerAllInformation(alertSystemStateMessage)
 
+        # The client did not process the status update => next one has to contain everything.
+        if not returnValue:
+            self._managerStatusRevision = None
+
         self._releaseLock()
         return returnValue
 
@@ -3111,6 +3553,9 @@ class ClientCommunication:
         """
         sensorAlertMessage = self._buildSensorAlertMessage(sensorAlert)
 
+        if self.protocolVersion >= 2:
+            return self._sendRequestFrame("sensoralert", sensorAlertMessage)
+
         # initiate transaction with client and acquire lock
         if not self._initiateTransaction("sensoralert",
                                          len(sensorAlertMessage),
@@ -3195,12 +3640,230 @@ class ClientCommunication:
         self._releaseLock()
         return True
 
-    def handleCommunication(self):
+    def _handleRequest(self,
+                       data: str) -> bool:
         """
-        this function handles the communication with the client and receives the commands
+        Internal function that handles a single request of the client (RTS/CTS handshake, receiving the
+        request and processing it). The connection lock has to be held by the caller.
+
+        :param data: first data received from the client (has to contain the RTS message)
+        :return: False if the session has to be closed
+        """
+        if not data:
+            return False
+
+        messageSize = 0
+        try:
+            # change timeout of the socket back to configured seconds
+            self.socket.settimeout(self.serverReceiveTimeout)
+
+            data = data.strip()
+            message = json.loads(data)
+            # check if an error was received
+            if "error" in message.keys():
+                self.logger.error("[%s]: Error received: '%s' (%s:%d)."
+                                  % (self.fileName, message["error"], self.clientAddress, self.clientPort))
+                return False
+
+            # check if RTS was received
+            # => acknowledge it
+            if str(message["payload"]["type"]).upper() == "rts".upper():
+                receivedTransactionId = int(message["payload"]["id"])
+                messageSize = int(message["size"])
+
+                # received RTS (request to send) message
+                self.logger.debug("[%s]: Received RTS %d message (%s:%d)."
+                                  % (self.fileName, receivedTransactionId, self.clientAddress, self.clientPort))
+                self.logger.debug("[%s]: Sending CTS %d message (%s:%d)."
+                                  % (self.fileName, receivedTransactionId, self.clientAddress, self.clientPort))
+
+                # send CTS (clear to send) message
+                payload = {"type": "cts",
+                           "id": receivedTransactionId}
+                message = {"message": str(message["message"]),
+                           "payload": payload}
+                self._send(json.dumps(message))
+
+                # After initiating transaction receive actual command.
+                data = self._recvMessage(messageSize)
+                if data is None:
+                    self.logger.error("[%s]: Connection closed while receiving data (%s:%d)."
+                                      % (self.fileName, self.clientAddress, self.clientPort))
+                    return False
+
+            # if no RTS was received
+            # => client does not stick to protocol
+            # => terminate session
+            else:
+                self.logger.error("[%s]: Did not receive RTS. Client sent: '%s' (%s:%d)."
+                                  % (self.fileName, data, self.clientAddress, self.clientPort))
+                return False
+
+        except Exception as e:
+            self.logger.exception("[%s]: Receiving failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+            return False
+
+        return self._dispatchRequest(data)
+
+    def _dispatchRequest(self,
+                         data: str) -> bool:
+        """
+        Internal function that processes a received request of the client and sends the response.
+
+        :param data: received request
+        :return: False if the session has to be closed
+        """
+        # extract message type
+        try:
+            message = json.loads(data)
+            # check if an error was received
+            if "error" in message.keys():
+                self.logger.error("[%s]: Error received: '%s' (%s:%d)."
+                                  % (self.fileName, message["error"], self.clientAddress, self.clientPort))
+                return False
+
+            # check if the received type is the correct one
+            if str(message["payload"]["type"]).upper() != "REQUEST":
+                self.logger.error("[%s]: request expected (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+
+                # send error message back
+                try:
+                    message = {"message": message["message"],
+                               "error": "request expected"}
+                    self._send(json.dumps(message))
+
+                except Exception as e:
+                    pass
+
+                return False
+
+            # extract the command/message type of the message
+            command = str(message["message"]).upper()
+            if self._metrics is not None:
+                self._metrics.message_received(command.lower())
+
+        except Exception as e:
+            self.logger.exception("[%s]: Received data not valid: '%s' (%s:%d)."
+                                  % (self.fileName, data, self.clientAddress, self.clientPort))
+            return False
+
+        # check if PING was received => send PONG back
+        if command == "PING":
+            self.logger.debug("[%s]: Received ping request (%s:%d)."
+                              % (self.fileName, self.clientAddress, self.clientPort))
+            self.logger.debug("[%s]: Sending ping response (%s:%d)."
+                              % (self.fileName, self.clientAddress, self.clientPort))
+
+            try:
+                payload = {"type": "response",
+                           "result": "ok"}
+                message = {"message": "ping",
+                           "payload": payload}
+                self._send(json.dumps(message))
+
+            except Exception as e:
+                self.logger.exception("[%s]: Sending ping response to client failed (%s:%d)."
+                                      % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        # check if SENSORALERT was received
+        # => add to database and wake up alertExecuter
+        elif command == "SENSORALERT" and self.nodeType == "sensor":
+            self.logger.debug("[%s]: Received sensor alert message (%s:%d)."
+                              % (self.fileName, self.clientAddress, self.clientPort))
+
+            if not self._sensorAlertHandler(message):
+                self.logger.error("[%s]: Handling sensor alert failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        # check if STATECHANGE was received
+        # => change state of sensor in database
+        elif command == "STATECHANGE" and self.nodeType == "sensor":
+            self.logger.debug("[%s]: Received state change message (%s:%d)."
+                              % (self.fileName, self.clientAddress, self.clientPort))
+
+            if not self._stateChangeHandler(message):
+                self.logger.error("[%s]: Handling sensor state change failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        # check if STATECHANGES was received (protocol version 3)
+        # => change states of the sensors in database
+        elif command == "STATECHANGES" and self.nodeType == "sensor" and self.protocolVersion >= 3:
+            self.logger.debug("[%s]: Received state changes message (%s:%d)."
+                              % (self.fileName, self.clientAddress, self.clientPort))
+
+            if not self._stateChangesHandler(message):
+                self.logger.error("[%s]: Handling sensor state changes failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        # check if STATUS was received
+        # => add new state to the database
+        elif command == "STATUS" and self.nodeType == "sensor":
+            self.logger.debug("[%s]: Received status message (%s:%d)."
+                              % (self.fileName, self.clientAddress, self.clientPort))
+
+            if not self._statusHandler(message):
+                self.logger.error("[%s]: Handling status failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        # check if OPTION was received (for manager only)
+        # => change option in the database
+        elif command == "OPTION" and self.nodeType == "manager":
+            self.logger.debug("[%s]: Received option message (%s:%d)."
+                              % (self.fileName, self.clientAddress, self.clientPort))
+
+            if not self._optionHandler(message):
+                self.logger.error("[%s]: Handling option failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        # command is unknown => close connection
+        else:
+            self.logger.error("[%s]: Received unknown command. Client sent: '%s' (%s:%d)."
+                              % (self.fileName, data, self.clientAddress, self.clientPort))
+
+            try:
+                message = {"message": message["message"],
+                           "error": "unknown command/message type"}
+                self._send(json.dumps(message))
+
+            except Exception as e:
+                pass
+
+            return False
+
+        self.lastRecv = int(time.time())
+
+        return True
+
+    def _isReadable(self) -> bool:
+        """
+        Internal function that checks without blocking if data of the client is waiting to be received.
 
         :return:
         """
+        # TLS/SSL sockets can hold already decrypted data that is not visible to poll.
+        if isinstance(self.socket, ssl.SSLSocket) and self.socket.pending() > 0:
+            return True
+
+        poller = select.poll()
+        poller.register(self.socket, select.POLLIN)
+        return bool(poller.poll(0))
+
+    def initializeSession(self) -> bool:
+        """
+        This function initializes the session with the client (authentication, version verification,
+        registration and initial status update for managers). It has to succeed before requests
+        of the client are handled.
+
+        :return: success or failure
+        """
         self._acquireLock()
 
         # set timeout of the socket to configured seconds
@@ -3212,7 +3875,10 @@ class ClientCommunication:
             self.logger.error("[%s]: Communication initialization failed (%s:%d)."
                               % (self.fileName, self.clientAddress, self.clientPort))
             self._releaseLock()
-            return
+            return False
+
+        # The negotiated protocol version is used for all messages after the initialization.
+        self.protocolVersion = self._negotiatedProtocolVersion
 
         # Now that the communication is initialized, we can switch to our
         # own logger instance for the client.
@@ -3236,14 +3902,14 @@ class ClientCommunication:
                                   % (self.fileName, self.nodeId))
                 self._releaseLock()
                 self._finalizeLogger()
-                return
+                return False
 
             if self.sensorCount == 0:
                 self.logger.error("[%s]: Getting sensor count failed (%s:%d)."
                                   % (self.fileName, self.clientAddress, self.clientPort))
                 self._releaseLock()
                 self._finalizeLogger()
-                return
+                return False
 
         # mark node as connected in the database
         if not self.storage.markNodeAsConnected(self.nodeId,
@@ -3252,7 +3918,7 @@ class ClientCommunication:
                               % (self.fileName, self.clientAddress, self.clientPort))
             self._releaseLock()
             self._finalizeLogger()
-            return
+            return False
 
         # check if the type of the node is manager
         # => send all current node information to the manager
@@ -3265,27 +3931,37 @@ class ClientCommunication:
                 self._cleanUpSessionForClosing()
                 self._releaseLock()
                 self._finalizeLogger()
-                return
+                return False
+
+            if self.protocolVersion >= 2:
+                if not self._sendRequestFrame("status", alertSystemStateMessage, acquireLock=False):
+                    self.logger.error("[%s]: Not able send status update message (%s:%d)."
+                                      % (self.fileName, self.clientAddress, self.clientPort))
+                    # clean up session before exiting
+                    self._cleanUpSessionForClosing()
+                    self._releaseLock()
+                    self._finalizeLogger()
+                    return False
 
-            if not self._initiateTransaction("status",
-                                             len(alertSystemStateMessage),
-                                             acquireLock=False):
+            elif not self._initiateTransaction("status",
+                                               len(alertSystemStateMessage),
+                                               acquireLock=False):
                 self.logger.error("[%s]: Not able initiate status update message (%s:%d)."
                                   % (self.fileName, self.clientAddress, self.clientPort))
                 # clean up session before exiting
                 self._cleanUpSessionForClosing()
                 self._releaseLock()
                 self._finalizeLogger()
-                return
+                return False
 
-            if not self._sendManagerAllInformation(alertSystemStateMessage):
+            elif not self._sendManagerAllInformation(alertSystemStateMessage):
                 self.logger.error("[%s]: Not able send status update message (%s:%d)."
                                   % (self.fileName, self.clientAddress, self.clientPort))
                 # clean up session before exiting
                 self._cleanUpSessionForClosing()
                 self._releaseLock()
                 self._finalizeLogger()
-                return
+                return False
 
         # if node is no manager
         # => send full status update to all manager clients
@@ -3295,6 +3971,11 @@ class ClientCommunication:
 
         # Set flag that the initialization process of the client is finished.
         self.clientInitialized = True
+        self.serverSessions.add_node_session(self)
+
+        # Route sensor alerts of the handled alert levels to alert and manager clients.
+        if self.nodeType == "alert" or self.nodeType == "manager":
+            self.serverSessions.add_alert_level_routes(self, self.clientAlertLevels)
 
         # If client has registered itself,
         # notify the connection watchdog about the reconnect.
@@ -3302,269 +3983,506 @@ class ClientCommunication:
         # because it could changed its configuration since the last time seen.
         self.connectionWatchdog.removeNodeTimeout(self.nodeId)
 
-        # handle commands
-        while True:
-            messageSize = 0
-            try:
-                # set timeout of the socket to 0.5 seconds
-                self.socket.settimeout(0.5)
+        self._releaseLock()
+        return True
 
-                data = self._recv()
-                if not data:
+    def _handleFrames(self) -> bool:
+        """
+        Internal function that handles the received frames of protocol version 2.
+        The connection lock has to be held by the caller and is released.
 
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+        :return: False if the session was closed and has to be cleaned up
+        """
+        try:
+            # Handle a limited number of frames to give the writer the chance to send.
+            for _ in range(MAX_REQUESTS_IN_FLIGHT):
+                if not self._hasBufferedFrame() and not self._isReadable():
+                    break
 
-                # change timeout of the socket back to configured seconds
                 self.socket.settimeout(self.serverReceiveTimeout)
+                frame = self._recvFrame()
 
-                data = data.strip()
-                message = json.loads(data)
-                # check if an error was received
-                if "error" in message.keys():
-                    self.logger.error("[%s]: Error received: '%s' (%s:%d)."
-                                      % (self.fileName, message["error"], self.clientAddress, self.clientPort))
+                # connection was closed by the client
+                if frame is None:
+                    result = False
+
+                else:
+                    frameType, frameId, data = frame
+                    if frameType == FRAME_REQUEST:
+                        self._requestFrameId = frameId
+                        result = self._dispatchRequest(data)
+
+                    else:
+                        result = self._handleResponse(frameId, data)
+
+                if not result:
                     # clean up session before exiting
                     self._cleanUpSessionForClosing()
-                    self._releaseLock()
+                    self._releaseLock(wakeup=False)
                     self._finalizeLogger()
+                    return False
+
+        except Exception as e:
+            self.logger.exception("[%s]: Receiving failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+
+            # clean up session before exiting
+            self._cleanUpSessionForClosing()
+            self._releaseLock(wakeup=False)
+            self._finalizeLogger()
+            return False
+
+        self._releaseLock(wakeup=False)
+
+        # Already received frames are not signaled by the connection.
+        if self._hasBufferedFrame():
+            self.wakeup()
+
+        return True
+
+    def handleReadable(self) -> bool:
+        """
+        This function handles a single request of the client after its socket was signaled as readable
+        (used by the event driven server engine instead of the blocking handleCommunication() loop).
+
+        :return: False if the session was closed and has to be cleaned up
+        """
+        self._drainWakeup()
+        self._acquireLock()
+
+        if self.protocolVersion >= 2:
+            return self._handleFrames()
+
+        # Another thread could have consumed the data that made the socket readable while
+        # holding the lock (e.g., the CTS message of a server initiated transaction).
+        try:
+            if not self._isReadable():
+                self._releaseLock(wakeup=False)
+                return True
+
+            self.socket.settimeout(self.serverReceiveTimeout)
+            data = self._recv()
+
+        except Exception as e:
+            self.logger.exception("[%s]: Receiving failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+
+            # clean up session before exiting
+            self._cleanUpSessionForClosing()
+            self._releaseLock(wakeup=False)
+            self._finalizeLogger()
+            return False
+
+        if not self._handleRequest(data):
+            # clean up session before exiting
+            self._cleanUpSessionForClosing()
+            self._releaseLock(wakeup=False)
+            self._finalizeLogger()
+            return False
+
+        self._releaseLock(wakeup=False)
+        return True
+
+    def handleCommunication(self):
+        """
+        this function handles the communication with the client and receives the commands
+
+        :return:
+        """
+        if not self.initializeSession():
+            return
+
+        # Wait for data of the client without holding the lock so other threads can
+        # use the connection right away. The wakeup socket signals that another thread released
+        # the connection (which could have left received data in the TLS/SSL buffer).
+        selector = selectors.DefaultSelector()
+
+        # handle commands
+        try:
+            selector.register(self.socket, selectors.EVENT_READ)
+            selector.register(self._wakeupReceiver, selectors.EVENT_READ)
+
+            while True:
+                selector.select()
+
+                if not self.handleReadable():
                     return
 
-                # check if RTS was received
-                # => acknowledge it
-                if str(message["payload"]["type"]).upper() == "rts".upper():
-                    receivedTransactionId = int(message["payload"]["id"])
-                    messageSize = int(message["size"])
-
-                    # received RTS (request to send) message
-                    self.logger.debug("[%s]: Received RTS %d message (%s:%d)."
-                                      % (self.fileName, receivedTransactionId, self.clientAddress, self.clientPort))
-                    self.logger.debug("[%s]: Sending CTS %d message (%s:%d)."
-                                      % (self.fileName, receivedTransactionId, self.clientAddress, self.clientPort))
-
-                    # send CTS (clear to send) message
-                    payload = {"type": "cts",
-                               "id": receivedTransactionId}
-                    message = {"message": str(message["message"]),
-                               "payload": payload}
-                    self._send(json.dumps(message))
+        except Exception as e:
+            self.logger.exception("[%s]: Waiting for data failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+
+            # clean up session before exiting
+            self._cleanUpSessionForClosing()
+            self._finalizeLogger()
+
+        finally:
+            selector.close()
+
+    def _supersedeOutboundMessage(self, message: OutboundMessage):
+        """
+        Internal function that marks a queued message as replaced (has to be called with the outbound condition).
+
+        :param message:
+        """
+        message.superseded = True
+        del self._outboundCoalesce[message.coalesceKey]
+        self.outboundQueueDepth -= 1
+        self.outboundCoalesced += 1
+
+    def _queueOutboundMessage(self, message: OutboundMessage) -> bool:
+        """
+        Internal function that queues a message for the writer thread.
+
+        :param message:
+        :return: False if the message was dropped
+        """
+        with self._outboundCondition:
+            if self._outboundExit:
+                return False
+
+            # Messages that replace queued ones are not dropped (they do not enlarge the queue).
+            coalesced = self.outboundCoalesced
+            if self.outboundQueuePolicy == "coalesce":
+                if message.coalesceKey in self._outboundCoalesce:
+                    self._supersedeOutboundMessage(self._outboundCoalesce[message.coalesceKey])
+
+                # A status update contains the current state of all sensors
+                # => queued state changes are obsolete.
+                if message.messageType == "status":
+                    for queuedMessage in list(self._outboundCoalesce.values()):
+                        if queuedMessage.messageType in ["statechange", "statechanges"]:
+                            self._supersedeOutboundMessage(queuedMessage)
+
+            if self.outboundQueueDepth >= self.outboundQueueSize and self.outboundCoalesced == coalesced:
+
+                # Sensor alerts are never dropped (they are queued beyond the maximum size instead).
+                if message.messageType == "sensoralert":
+                    self.logger.warning("[%s]: Outbound queue full. Queuing '%s' message anyway (%s:%d)."
+                                        % (self.fileName, message.messageType, self.clientAddress, self.clientPort))
+
+                else:
+                    self.outboundDropped += 1
+                    self.logger.warning("[%s]: Outbound queue full. Dropping '%s' message (%s:%d)."
+                                        % (self.fileName, message.messageType, self.clientAddress, self.clientPort))
+                    return False
+
+            # Remove replaced messages from time to time to keep the queue bounded.
+            if len(self._outboundQueue) >= 2 * max(self.outboundQueueSize, self.outboundQueueDepth):
+                self._outboundQueue = collections.deque(m for m in self._outboundQueue if not m.superseded)
+
+            self._outboundQueue.append(message)
+            if self.outboundQueuePolicy == "coalesce" and message.coalesceKey is not None:
+                self._outboundCoalesce[message.coalesceKey] = message
+            self.outboundQueueDepth += 1
+
+            if self._outboundWriter is None:
+                self._outboundWriter = threading.Thread(target=self._outboundWriterLoop, daemon=True)
+                self._outboundWriter.start()
+
+            self._outboundCondition.notify()
+
+        return True
+
+    def _outboundWriterLoop(self):
+        """
+        Internal function that sends the queued messages to the client (run by the writer thread).
+        """
+        while True:
+            with self._outboundCondition:
+                while not self._outboundQueue and not self._outboundExit:
+                    self._outboundCondition.wait()
+
+                if self._outboundExit:
+                    return
+
+                message = self._outboundQueue.popleft()
+                if message.superseded:
+                    continue
+
+                if self._outboundCoalesce.get(message.coalesceKey) is message:
+                    del self._outboundCoalesce[message.coalesceKey]
+                self.outboundQueueDepth -= 1
+
+            try:
+                if self.sendOutboundMessage(message):
+                    self.outboundSent += 1
+                    continue
+
+            except Exception as e:
+                self.logger.exception("[%s]: Sending '%s' message failed (%s:%d)."
+                                      % (self.fileName, message.messageType, self.clientAddress, self.clientPort))
+
+            self.outboundFailed += 1
+
+    def sendOutboundMessage(self, message: OutboundMessage) -> bool:
+        """
+        Function that sends the given message to the client (blocks until the transaction has finished).
+
+        :param message:
+        :return: success or failure
+        """
+        if message.messageType == "status":
+            if self.nodeType != "manager":
+                self.logger.error("[%s]: Sending status update to manager failed. Client is not a "
+                                  % self.fileName
+                                  + "'manager' node (%s:%d)."
+                                  % (self.clientAddress, self.clientPort))
+                return False
+
+            if not self.sendManagerUpdate():
+                self.logger.error("[%s]: Sending status update to manager failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        elif message.messageType == "sensoralert":
+            if self.nodeType != "manager" and self.nodeType != "alert":
+                self.logger.error("[%s]: Sending sensor alert failed. Client is not a 'manager'/'alert' node (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+            if not self.sendSensorAlert(*message.args):
+                self.logger.error("[%s]: Sending sensor alert to manager/alert failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        elif message.messageType == "statechange":
+            if self.nodeType != "manager":
+                self.logger.error("[%s]: Sending state change to manager failed. Client is not a "
+                                  % self.fileName
+                                  + "'manager' node (%s:%d)."
+                                  % (self.clientAddress, self.clientPort))
+                return False
+
+            if not self.sendManagerStateChange(*message.args):
+                self.logger.error("[%s]: Sending state change to manager failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        elif message.messageType == "statechanges":
+            if self.nodeType != "manager":
+                self.logger.error("[%s]: Sending state changes to manager failed. Client is not a "
+                                  % self.fileName
+                                  + "'manager' node (%s:%d)."
+                                  % (self.clientAddress, self.clientPort))
+                return False
+
+            if not self.sendManagerStateChanges(*message.args):
+                self.logger.error("[%s]: Sending state changes to manager failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        elif message.messageType == "profilechange":
+            if self.nodeType != "alert":
+                self.logger.error("[%s]: Sending profile change to alert failed. Client is not a "
+                                  % self.fileName
+                                  + "'alert' node (%s:%d)."
+                                  % (self.clientAddress, self.clientPort))
+                return False
+
+            if not self.send_profile_change(*message.args):
+                self.logger.error("[%s]: Sending profile change to alert client failed (%s:%d)."
+                                  % (self.fileName, self.clientAddress, self.clientPort))
+                return False
+
+        else:
+            self.logger.error("[%s]: Unknown outbound message type '%s' (%s:%d)."
+                              % (self.fileName, message.messageType, self.clientAddress, self.clientPort))
+            return False
+
+        return True
+
+    def queueManagerUpdate(self) -> bool:
+        """
+        Queues a full information update for a manager client.
+
+        :return: False if the message was dropped
+        """
+        return self._queueOutboundMessage(OutboundMessage("status", coalesceKey=("status",)))
+
+    def queueManagerStateChange(self,
+                                sensorId: int,
+                                state: int,
+                                dataType: int,
+                                data: Any) -> bool:
+        """
+        Queues a state change for a manager client.
+
+        :param sensorId:
+        :param state:
+        :param dataType:
+        :param data:
+        :return: False if the message was dropped
+        """
+        return self._queueOutboundMessage(OutboundMessage("statechange",
+                                                          (sensorId, state, dataType, data),
+                                                          ("statechange", sensorId)))
+
+    def queueManagerStateChanges(self,
+                                 stateChanges: List[Tuple[int, int, int, Any]]) -> bool:
+        """
+        Queues the state changes of multiple sensors for a manager client that are sent in one message
+        (a newer message with the state changes of the same sensors replaces a queued one).
+
+        :param stateChanges: list of tuples of (sensorId, state, dataType, data)
+        :return: False if the message was dropped
+        """
+        coalesceKey = ("statechanges",) + tuple(stateChange[0] for stateChange in stateChanges)
+        return self._queueOutboundMessage(OutboundMessage("statechanges",
+                                                          (stateChanges, ),
+                                                          coalesceKey))
+
+    def queueSensorAlert(self, sensorAlert: SensorAlert) -> bool:
+        """
+        Queues a sensor alert for an alert/manager client (sensor alerts are never coalesced).
+
+        :param sensorAlert:
+        :return: False if the message was dropped
+        """
+        return self._queueOutboundMessage(OutboundMessage("sensoralert", (sensorAlert, )))
+
+    def queue_profile_change(self, profile: Profile) -> bool:
+        """
+        Queues a profile change for an alert client.
 
-                    # After initiating transaction receive actual command.
-                    data = ""
-                    lastSize = 0
-                    while len(data) < messageSize:
-                        # NOTE: Receiving should use bytearray as in client implementation. Change during refactor.
-                        data += self._recv(messageSize - len(data))
-
-                        # Check if the size of the received data has changed.
-                        # If not we detected a possible dead lock.
-                        if lastSize != len(data):
-                            lastSize = len(data)
-
-                        else:
-                            self.logger.error("[%s]: Possible dead lock detected while receiving data. Closing "
-                                              % self.fileName
-                                              + "connection to client (%s:%d)."
-                                              % (self.clientAddress, self.clientPort))
-                            # clean up session before exiting
-                            self._cleanUpSessionForClosing()
-                            self._releaseLock()
-                            self._finalizeLogger()
-                            return
-
-                # if no RTS was received
-                # => client does not stick to protocol
-                # => terminate session
-                else:
-                    self.logger.error("[%s]: Did not receive RTS. Client sent: '%s' (%s:%d)."
-                                      % (self.fileName, data, self.clientAddress, self.clientPort))
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+        :param profile:
+        :return: False if the message was dropped
+        """
+        return self._queueOutboundMessage(OutboundMessage("profilechange", (profile, ), ("profilechange",)))
 
-            except socket.timeout as e:
-                # change timeout of the socket back to configured seconds
-                # before releasing the lock
-                self.socket.settimeout(self.serverReceiveTimeout)
+    def close(self):
+        """
+        Closes the resources used by the communication (the connection itself is closed by the server session).
+        """
+        with self._outboundCondition:
+            self._outboundExit = True
+            self._outboundQueue.clear()
+            self._outboundCoalesce.clear()
+            self.outboundQueueDepth = 0
+            self._outboundCondition.notify()
 
-                # release lock and acquire to let other threads send
-                # data to the client
-                # (wait 0.5 seconds in between, because semaphore
-                # are released in random order => other threads could be
-                # unlucky and not be chosen => this has happened when
-                # loglevel was not debug => hdd I/O has slowed this process
-                # down)
-                self._releaseLock()
-                time.sleep(0.5)
-                self._acquireLock()
+        with self._pendingCondition:
+            self._pendingCondition.notify_all()
 
-                # continue receiving
-                continue
+        self._wakeupReceiver.close()
+        self._wakeupSender.close()
 
-            except Exception as e:
-                self.logger.exception("[%s]: Receiving failed (%s:%d)."
-                                      % (self.fileName, self.clientAddress, self.clientPort))
+    @property
+    def wakeupSocket(self) -> socket.socket:
+        """
+        Socket that gets readable as soon as the thread waiting for data of the client has to be woken up.
+        """
+        return self._wakeupReceiver
 
-                # clean up session before exiting
-                self._cleanUpSessionForClosing()
-                self._releaseLock()
-                self._finalizeLogger()
-                return
+    def wakeup(self):
+        """
+        Wakes up the thread waiting for data of the client.
+        """
+        try:
+            self._wakeupSender.send(b"\x00")
 
-            # extract message type
-            try:
-                message = json.loads(data)
-                # check if an error was received
-                if "error" in message.keys():
-                    self.logger.error("[%s]: Error received: '%s' (%s:%d)."
-                                      % (self.fileName, message["error"], self.clientAddress, self.clientPort))
+        # Socket buffer is full (thread is woken up anyway) or communication is already closed.
+        except (BlockingIOError, OSError):
+            pass
 
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
 
-                # check if the received type is the correct one
-                if str(message["payload"]["type"]).upper() != "REQUEST":
-                    self.logger.error("[%s]: request expected (%s:%d)."
-                                      % (self.fileName, self.clientAddress, self.clientPort))
+# this class builds the TLS/SSL context of the server once and reuses it for all connections.
+# The context is only built anew if the certificate files changed on disk. Reusing the context
+# also allows clients to resume their TLS sessions (session tickets and session cache are bound to it).
+class SSLContextCache:
 
-                    # send error message back
-                    try:
-                        message = {"message": message["message"],
-                                   "error": "request expected"}
-                        self._send(json.dumps(message))
+    def __init__(self,
+                 globalData: GlobalData):
 
-                    except Exception as e:
-                        pass
+        # get reference to global data object
+        self.globalData = globalData
+        self.logger = self.globalData.logger
 
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+        # file nme of this file (used for logging)
+        self.fileName = os.path.basename(__file__)
 
-                # extract the command/message type of the message
-                command = str(message["message"]).upper()
+        self._lock = threading.Lock()
+        self._context = None  # type: Optional[ssl.SSLContext]
 
-            except Exception as e:
-                self.logger.exception("[%s]: Received data not valid: '%s' (%s:%d)."
-                                      % (self.fileName, data, self.clientAddress, self.clientPort))
-                # clean up session before exiting
-                self._cleanUpSessionForClosing()
-                self._releaseLock()
-                self._finalizeLogger()
-                return
+        # Modification time and size of the files the context was built from.
+        self._fileStates = None  # type: Optional[List[Tuple[str, Optional[int], Optional[int]]]]
 
-            # check if PING was received => send PONG back
-            if command == "PING":
-                self.logger.debug("[%s]: Received ping request (%s:%d)."
-                                  % (self.fileName, self.clientAddress, self.clientPort))
-                self.logger.debug("[%s]: Sending ping response (%s:%d)."
-                                  % (self.fileName, self.clientAddress, self.clientPort))
+        # Number of times the context was built.
+        self.contextBuilds = 0
 
-                try:
-                    payload = {"type": "response",
-                               "result": "ok"}
-                    message = {"message": "ping",
-                               "payload": payload}
-                    self._send(json.dumps(message))
+    def _getFileStates(self) -> List[Tuple[str, Optional[int], Optional[int]]]:
+        """
+        Internal function that gets the modification time and size of the certificate files.
 
-                except Exception as e:
-                    self.logger.exception("[%s]: Sending ping response to client failed (%s:%d)."
-                                          % (self.fileName, self.clientAddress, self.clientPort))
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+        :return:
+        """
+        files = [self.globalData.serverCertFile, self.globalData.serverKeyFile]
+        if self.globalData.useClientCertificates:
+            files.append(self.globalData.clientCAFile)
 
-            # check if SENSORALERT was received
-            # => add to database and wake up alertExecuter
-            elif command == "SENSORALERT" and self.nodeType == "sensor":
-                self.logger.debug("[%s]: Received sensor alert message (%s:%d)."
-                                  % (self.fileName, self.clientAddress, self.clientPort))
+        fileStates = list()
+        for file in files:
+            try:
+                stat = os.stat(file)
+                fileStates.append((file, stat.st_mtime_ns, stat.st_size))
 
-                if not self._sensorAlertHandler(message):
-                    self.logger.error("[%s]: Handling sensor alert failed (%s:%d)."
-                                      % (self.fileName, self.clientAddress, self.clientPort))
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+            except OSError:
+                fileStates.append((file, None, None))
 
-            # check if STATECHANGE was received
-            # => change state of sensor in database
-            elif command == "STATECHANGE" and self.nodeType == "sensor":
-                self.logger.debug("[%s]: Received state change message (%s:%d)."
-                                  % (self.fileName, self.clientAddress, self.clientPort))
+        return fileStates
 
-                if not self._stateChangeHandler(message):
-                    self.logger.error("[%s]: Handling sensor state change failed (%s:%d)."
-                                      % (self.fileName, self.clientAddress, self.clientPort))
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+    def _buildContext(self) -> ssl.SSLContext:
+        """
+        Internal function that builds the TLS/SSL context from the configuration.
 
-            # check if STATUS was received
-            # => add new state to the database
-            elif command == "STATUS" and self.nodeType == "sensor":
-                self.logger.debug("[%s]: Received status message (%s:%d)."
-                                  % (self.fileName, self.clientAddress, self.clientPort))
+        :return:
+        """
+        sslContext = ssl.SSLContext(self.globalData.sslProtocol)
+        sslContext.load_cert_chain(certfile=self.globalData.serverCertFile,
+                                   keyfile=self.globalData.serverKeyFile)
+        sslContext.set_ciphers(self.globalData.sslCiphers)
 
-                if not self._statusHandler(message):
-                    self.logger.error("[%s]: Handling status failed (%s:%d)."
-                                      % (self.fileName, self.clientAddress, self.clientPort))
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+        # Allow clients to resume their TLS sessions with session tickets.
+        sslContext.options = self.globalData.sslOptions & ~ssl.OP_NO_TICKET
 
-            # check if OPTION was received (for manager only)
-            # => change option in the database
-            elif command == "OPTION" and self.nodeType == "manager":
-                self.logger.debug("[%s]: Received option message (%s:%d)."
-                                  % (self.fileName, self.clientAddress, self.clientPort))
+        # If activated, require a client certificate.
+        if self.globalData.useClientCertificates:
+            sslContext.verify_mode = ssl.CERT_REQUIRED
+            sslContext.load_verify_locations(cafile=self.globalData.clientCAFile)
 
-                if not self._optionHandler(message):
-                    self.logger.error("[%s]: Handling option failed (%s:%d)."
-                                      % (self.fileName, self.clientAddress, self.clientPort))
-                    # clean up session before exiting
-                    self._cleanUpSessionForClosing()
-                    self._releaseLock()
-                    self._finalizeLogger()
-                    return
+        return sslContext
 
-            # command is unknown => close connection
-            else:
-                self.logger.error("[%s]: Received unknown command. Client sent: '%s' (%s:%d)."
-                                  % (self.fileName, data, self.clientAddress, self.clientPort))
+    def getContext(self) -> ssl.SSLContext:
+        """
+        Returns the TLS/SSL context of the server (built anew if the certificate files changed).
 
-                try:
-                    message = {"message": message["message"],
-                               "error": "unknown command/message type"}
-                    self._send(json.dumps(message))
+        :return:
+        """
+        with self._lock:
+            fileStates = self._getFileStates()
+            if self._context is not None and fileStates == self._fileStates:
+                return self._context
 
-                except Exception as e:
-                    pass
+            try:
+                sslContext = self._buildContext()
 
-                # clean up session before exiting
-                self._cleanUpSessionForClosing()
-                self._releaseLock()
-                self._finalizeLogger()
-                return
+            except Exception as e:
+                if self._context is None:
+                    raise
+
+                # Keep the working context until the files change again.
+                self.logger.exception("[%s]: Reloading TLS/SSL context failed. Using old one."
+                                      % self.fileName)
+                self._fileStates = fileStates
+                return self._context
+
+            if self._context is not None:
+                self.logger.info("[%s]: Certificate files changed. Reloaded TLS/SSL context." % self.fileName)
 
-            self.lastRecv = int(time.time())
+            self._context = sslContext
+            self._fileStates = fileStates
+            self.contextBuilds += 1
+            return self._context
 
 
 # this class is used for the threaded tcp server and extends the constructor
@@ -3580,10 +4498,274 @@ class ThreadedTCPServer(socketserver.ThreadingMixIn,
         # get reference to global data object
         self.globalData = globalData
 
+        # TLS/SSL context shared by all connections
+        self.sslContextCache = SSLContextCache(globalData)
+
+        socketserver.TCPServer.__init__(self,
+                                        serverAddress,
+                                        RequestHandlerClass)
+
+    def serveSession(self, serverSession: "ServerSession"):
+        """
+        Handles the communication of the given server session in the thread of the connection
+        (blocks until the connection is closed).
+
+        :param serverSession:
+        """
+        serverSession.clientComm.handleCommunication()
+        serverSession.finishSession()
+
+
+# this class is used for the event driven tcp server. Instead of having a thread per connection,
+# all idle connections are watched by a single selector thread and only connections with
+# received data are handed over to a pool of worker threads
+class SelectorTCPServer(socketserver.TCPServer):
+
+    def __init__(self,
+                 globalData: GlobalData,
+                 serverAddress: Tuple[str, int],
+                 RequestHandlerClass: Type[socketserver.BaseRequestHandler],
+                 workerCount: int = 16):
+
+        # get reference to global data object
+        self.globalData = globalData
+        self.logger = self.globalData.logger
+
+        # file nme of this file (used for logging)
+        self.fileName = os.path.basename(__file__)
+
+        # TLS/SSL context shared by all connections
+        self.sslContextCache = SSLContextCache(globalData)
+
         socketserver.TCPServer.__init__(self,
                                         serverAddress,
                                         RequestHandlerClass)
 
+        # Pool of threads that set up new connections (TLS handshake and initialization) and pool of threads
+        # that process the received requests. New connections are set up by their own pool
+        # so that slow clients do not hold up the established connections.
+        self._setupWorkers = concurrent.futures.ThreadPoolExecutor(max_workers=workerCount)
+        self._workers = concurrent.futures.ThreadPoolExecutor(max_workers=workerCount)
+
+        # Selector that watches all idle connections. The wakeup pipe is used to
+        # interrupt the selector when new connections have to be watched.
+        self._selector = selectors.DefaultSelector()
+        self._wakeupReadFd, self._wakeupWriteFd = os.pipe()
+        os.set_blocking(self._wakeupReadFd, False)
+        os.set_blocking(self._wakeupWriteFd, False)
+        self._selector.register(self._wakeupReadFd, selectors.EVENT_READ)
+
+        # Server sessions and new connections that have to be (re-)added to the selector.
+        # Only the selector thread modifies the selector.
+        self._pendingSessions = collections.deque()
+        self._pendingRequests = collections.deque()
+        self._pendingSessionsLock = threading.Lock()
+
+        # New connections that are watched until the client sends data (idle connections do not block
+        # a worker) with their client address and the time they were accepted.
+        self._waitingRequests = dict()  # type: Dict[socket.socket, Tuple[Tuple[str, int], float]]
+
+        self._exitFlag = False
+
+        self._selectorThread = threading.Thread(target=self._selectorLoop,
+                                                daemon=True)
+        self._selectorThread.start()
+
+    def _processRequest(self,
+                        request: socket.socket,
+                        clientAddress: Tuple[str, int]):
+        """
+        Internal function executed by a worker thread that handles a new connection.
+
+        :param request:
+        :param clientAddress:
+        """
+        try:
+            self.finish_request(request, clientAddress)
+
+        except Exception as e:
+            self.handle_error(request, clientAddress)
+            self.shutdown_request(request)
+
+    def _processSession(self, serverSession: "ServerSession"):
+        """
+        Internal function executed by a worker thread that handles a connection with received data.
+
+        :param serverSession:
+        """
+        try:
+            if serverSession.clientComm.handleReadable():
+                self._watchSession(serverSession)
+                return
+
+        except Exception as e:
+            self.logger.exception("[%s]: Handling connection failed (%s:%d)."
+                                  % (self.fileName, serverSession.clientAddress, serverSession.clientPort))
+
+        serverSession.finishSession()
+
+    def _selectorLoop(self):
+        """
+        Internal function that watches all idle connections and hands them over to the workers
+        as soon as data was received.
+        """
+        while not self._exitFlag:
+
+            with self._pendingSessionsLock:
+                newSessions = list(self._pendingSessions)
+                self._pendingSessions.clear()
+                newRequests = list(self._pendingRequests)
+                self._pendingRequests.clear()
+
+            for request, clientAddress in newRequests:
+                try:
+                    self._selector.register(request,
+                                            selectors.EVENT_READ,
+                                            (request, clientAddress))
+                    self._waitingRequests[request] = (clientAddress, time.time())
+
+                # The connection was closed in the meantime.
+                except Exception as e:
+                    self.shutdown_request(request)
+
+            for serverSession in newSessions:
+                try:
+                    self._selector.register(serverSession.socket,
+                                            selectors.EVENT_READ,
+                                            serverSession)
+                    self._selector.register(serverSession.clientComm.wakeupSocket,
+                                            selectors.EVENT_READ,
+                                            serverSession)
+
+                # The connection was closed in the meantime
+                # => let a worker clean up the session.
+                except Exception as e:
+                    self._unwatchSession(serverSession)
+                    self._workers.submit(self._processSession, serverSession)
+
+            for key, _ in self._selector.select(self._closeIdleRequests()):
+
+                # Wakeup pipe was signaled => drain it and register the new sessions.
+                if key.data is None:
+                    try:
+                        while os.read(self._wakeupReadFd, BUFSIZE):
+                            pass
+
+                    except BlockingIOError:
+                        pass
+                    continue
+
+                # New connection received data => let a worker set it up.
+                if isinstance(key.data, tuple):
+                    request, clientAddress = key.data
+                    self._selector.unregister(request)
+                    del self._waitingRequests[request]
+                    self._setupWorkers.submit(self._processRequest, request, clientAddress)
+                    continue
+
+                # Connection and wakeup socket can be signaled at the same time
+                # => only hand the session over once.
+                if not self._unwatchSession(key.data):
+                    continue
+                self._workers.submit(self._processSession, key.data)
+
+        for request in list(self._waitingRequests.keys()):
+            self.shutdown_request(request)
+        self._waitingRequests.clear()
+
+        self._selector.close()
+        os.close(self._wakeupReadFd)
+        os.close(self._wakeupWriteFd)
+
+    def _closeIdleRequests(self) -> Optional[float]:
+        """
+        Internal function that closes new connections whose client did not send any data within
+        the receive timeout.
+
+        :return: seconds until the next new connection times out or None if no new connection is watched
+        """
+        utcTimestamp = time.time()
+        timeout = None
+        for request, (clientAddress, acceptTime) in list(self._waitingRequests.items()):
+            remaining = acceptTime + self.globalData.serverReceiveTimeout - utcTimestamp
+            if remaining <= 0:
+                self.logger.info("[%s]: Client did not send any data. Closing connection (%s:%d)."
+                                 % (self.fileName, clientAddress[0], clientAddress[1]))
+                self._selector.unregister(request)
+                del self._waitingRequests[request]
+                self.shutdown_request(request)
+
+            elif timeout is None or remaining < timeout:
+                timeout = remaining
+
+        return timeout
+
+    def _unwatchSession(self, serverSession: "ServerSession") -> bool:
+        """
+        Internal function that removes the connection of the given server session from the selector.
+
+        :param serverSession:
+        :return: True if the connection was watched
+        """
+        wasWatched = False
+        for fileObj in [serverSession.socket, serverSession.clientComm.wakeupSocket]:
+            try:
+                self._selector.unregister(fileObj)
+                wasWatched = True
+
+            except (KeyError, ValueError):
+                pass
+
+        return wasWatched
+
+    def _wakeup(self):
+        """
+        Internal function that interrupts the selector thread.
+        """
+        try:
+            os.write(self._wakeupWriteFd, b"\x00")
+
+        # Pipe is full => selector thread is woken up anyway.
+        except BlockingIOError:
+            pass
+
+    def _watchSession(self, serverSession: "ServerSession"):
+        """
+        Internal function that hands the connection of the given server session over to the selector thread.
+
+        :param serverSession:
+        """
+        with self._pendingSessionsLock:
+            self._pendingSessions.append(serverSession)
+        self._wakeup()
+
+    def process_request(self,
+                        request: socket.socket,
+                        clientAddress: Tuple[str, int]):
+        with self._pendingSessionsLock:
+            self._pendingRequests.append((request, clientAddress))
+        self._wakeup()
+
+    def serveSession(self, serverSession: "ServerSession"):
+        """
+        Initializes the communication of the given server session and afterwards hands its connection
+        over to the selector thread (does not block until the connection is closed).
+
+        :param serverSession:
+        """
+        if not serverSession.clientComm.initializeSession():
+            serverSession.finishSession()
+            return
+
+        self._watchSession(serverSession)
+
+    def server_close(self):
+        socketserver.TCPServer.server_close(self)
+        self._exitFlag = True
+        self._wakeup()
+        self._setupWorkers.shutdown(wait=False)
+        self._workers.shutdown(wait=False)
+
 
 # this class is used for incoming client connections
 class ServerSession(socketserver.BaseRequestHandler):
@@ -3591,7 +4773,7 @@ class ServerSession(socketserver.BaseRequestHandler):
     def __init__(self,
                  request: socket,
                  clientAddress: Tuple[str, int],
-                 server: ThreadedTCPServer):
+                 server: Union[ThreadedTCPServer, SelectorTCPServer]):
 
         # file nme of this file (used for logging)
         self.fileName = os.path.basename(__file__)
@@ -3609,18 +4791,7 @@ class ServerSession(socketserver.BaseRequestHandler):
         self.globalData = server.globalData
         self.logger = self.globalData.logger
 
-        # get server certificate/key file
-        self.serverCertFile = self.globalData.serverCertFile
-        self.serverKeyFile = self.globalData.serverKeyFile
-
-        # get client certificate settings
-        self.useClientCertificates = self.globalData.useClientCertificates
-        self.clientCAFile = self.globalData.clientCAFile
-
         # Get TLS/SSL setting.
-        self.sslProtocol = self.globalData.sslProtocol
-        self.sslCiphers = self.globalData.sslCiphers
-        self.sslOptions = self.globalData.sslOptions
         self.sslEnabled = self.globalData.sslEnabled
 
         # add own server session to the global list of server sessions
@@ -3642,26 +4813,25 @@ class ServerSession(socketserver.BaseRequestHandler):
 
         # Set TLS context.
         if self.sslEnabled:
-            ssl_context = ssl.SSLContext(self.sslProtocol)
-            ssl_context.load_cert_chain(certfile=self.serverCertFile,
-                                        keyfile=self.serverKeyFile)
-            ssl_context.set_ciphers(self.sslCiphers)
-            ssl_context.options = self.sslOptions
-
-            # If activated, require a client certificate.
-            if self.useClientCertificates:
-                ssl_context.verify_mode = ssl.CERT_REQUIRED
-                ssl_context.load_verify_locations(cafile=self.clientCAFile)
 
             # try to initiate ssl with client
+            # (a client that does not complete the handshake must not block the connection forever)
             try:
-                self.socket = ssl_context.wrap_socket(self.request,
-                                                      server_side=True)
+                self.request.settimeout(self.globalData.serverReceiveTimeout)
+                self.socket = self.server.sslContextCache.getContext().wrap_socket(self.request,
+                                                                                   server_side=True)
 
             except Exception as e:
                 self.logger.exception("[%s]: Unable to initialize TLS/SSL connection (%s:%d)."
                                       % (self.fileName, self.clientAddress, self.clientPort))
 
+                # Close connection since the event driven server does not do it for us.
+                try:
+                    self.request.close()
+
+                except Exception as e:
+                    pass
+
                 # remove own server session from the global list of server sessions
                 # before closing server session
                 try:
@@ -3677,8 +4847,12 @@ class ServerSession(socketserver.BaseRequestHandler):
                                               self.clientAddress,
                                               self.clientPort,
                                               self.globalData)
-        self.clientComm.handleCommunication()
+        self.server.serveSession(self)
 
+    def finishSession(self):
+        """
+        Closes the connection and cleans up the server session after the communication with the client has ended.
+        """
         try:
             self.socket.close()
 
@@ -3686,6 +4860,8 @@ class ServerSession(socketserver.BaseRequestHandler):
             self.logger.exception("[%s]: Unable to close connection gracefully with %s:%d."
                                   % (self.fileName, self.clientAddress, self.clientPort))
 
+        self.clientComm.close()
+
         # remove own server session from the global list of server sessions
         # before closing server session
         try:
@@ -3710,10 +4886,10 @@ class ServerSession(socketserver.BaseRequestHandler):
         except Exception as e:
             pass
 
-        try:
-            self.socket.close()
-        except Exception as e:
-            pass
+        # The thread handling the connection notices the shutdown and closes it itself
+        # (closing it here would remove it silently from the waiting selector).
+        if self.clientComm is not None:
+            self.clientComm.wakeup()
 
         try:
             self.serverSessions.remove(self)
@@ -3731,6 +4907,8 @@ class ServerSession(socketserver.BaseRequestHandler):
 
 # this class is used to send messages to the client
 # in an asynchronous way to avoid blockings
+# this class sends a single message to the client in its own thread
+# (the server itself uses the outbound queue of the client communication)
 class AsynchronousSender(threading.Thread):
 
     def __init__(self,
@@ -3774,59 +4952,24 @@ class AsynchronousSender(threading.Thread):
 
         # check if a status update to a manager should be send
         if self.sendManagerUpdate:
-            if self.clientComm.nodeType != "manager":
-                self.logger.error("[%s]: Sending status update to manager failed. Client is not a "
-                                  % self.fileName
-                                  + "'manager' node (%s:%d)."
-                                  % (self.clientComm.clientAddress, self.clientComm.clientPort))
-                return
-
-            # sending status update to manager
-            if not self.clientComm.sendManagerUpdate():
-                self.logger.error("[%s]: Sending status update to manager failed (%s:%d)."
-                                  % (self.fileName, self.clientComm.clientAddress, self.clientComm.clientPort))
-                return
+            message = OutboundMessage("status")
 
         # check if a sensor alert to a manager/alert should be send
         elif self.sendSensorAlert:
-            if self.clientComm.nodeType != "manager" and self.clientComm.nodeType != "alert":
-                self.logger.error("[%s]: Sending sensor alert failed. Client is not a 'manager'/'alert' node (%s:%d)."
-                                  % (self.fileName, self.clientComm.clientAddress, self.clientComm.clientPort))
-                return
-
-            if not self.clientComm.sendSensorAlert(self.sensorAlert):
-                self.logger.error("[%s]: Sending sensor alert to manager/alert failed (%s:%d)."
-                                  % (self.fileName, self.clientComm.clientAddress, self.clientComm.clientPort))
+            message = OutboundMessage("sensoralert", (self.sensorAlert, ))
 
         # check if a state change to a manager should be send
         elif self.sendManagerStateChange:
-            if self.clientComm.nodeType != "manager":
-                self.logger.error("[%s]: Sending state change to manager failed. Client is not a "
-                                  % self.fileName
-                                  + "'manager' node (%s:%d)."
-                                  % (self.clientComm.clientAddress, self.clientComm.clientPort))
-                return
-
-            # sending state change to manager
-            if not self.clientComm.sendManagerStateChange(self.sendManagerStateChangeSensorId,
-                                                          self.sendManagerStateChangeState,
-                                                          self.sendManagerStateChangeDataType,
-                                                          self.sendManagerStateChangeData):
-                self.logger.error("[%s]: Sending state change to manager failed (%s:%d)."
-                                  % (self.fileName, self.clientComm.clientAddress, self.clientComm.clientPort))
-                return
+            message = OutboundMessage("statechange", (self.sendManagerStateChangeSensorId,
+                                                      self.sendManagerStateChangeState,
+                                                      self.sendManagerStateChangeDataType,
+                                                      self.sendManagerStateChangeData))
 
         # check if a profile change to an alert client should be send
         elif self.send_profile_change:
-            if self.clientComm.nodeType != "alert":
-                self.logger.error("[%s]: Sending profile change to alert failed. Client is not a "
-                                  % self.fileName
-                                  + "'alert' node (%s:%d)."
-                                  % (self.clientComm.clientAddress, self.clientComm.clientPort))
-                return
+            message = OutboundMessage("profilechange", (self.profile, ))
 
-            # sending profile change to alert client
-            if not self.clientComm.send_profile_change(self.profile):
-                self.logger.error("[%s]: Sending profile change to alert client failed (%s:%d)."
-                                  % (self.fileName, self.clientComm.clientAddress, self.clientComm.clientPort))
-                return
+        else:
+            return
+
+        self.clientComm.sendOutboundMessage(message)
@@ -8,3 +8,5 @@
 # Licensed under the GNU Affero General Public License, version 3.
 
 from .sqlite import Sqlite
+from .cache import CachedStorage
+from .writeBehind import WriteBehindStorage
@@ -0,0 +1,831 @@
+#!/usr/bin/env python3
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: https://h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import os
+import threading
+import time
+import logging
+from typing import Any, Optional, List, Union, Tuple, Dict, Iterable
+from .core import _Storage
+from ..globalData import GlobalData
+from ..localObjects import Node, Alert, Manager, Sensor, Option, SensorData, SensorDataType, _SensorData
+
+
+class CachedStorage(_Storage):
+    """
+    Storage backend that holds the nodes, sensors, alerts, managers and options of the wrapped storage backend
+    in memory. Read requests are answered from memory. Changes are written through to the wrapped storage
+    backend and applied to the memory afterwards. Since the cached data is never read anew from the wrapped
+    storage backend, the server has to be the only one changing the stored data.
+    """
+
+    def __init__(self,
+                 backend: _Storage,
+                 globalData: GlobalData):
+
+        self.globalData = globalData
+        self.logger = self.globalData.logger
+
+        # file nme of this file (used for logging)
+        self.log_tag = os.path.basename(__file__)
+
+        # Storage backend the changes are written to.
+        self._backend = backend
+
+        # Lock for the cached data (only held while the cached data is read or changed).
+        self._cacheLock = threading.Lock()
+
+        # Changes are written through one at a time to apply them to the cached data in the same order
+        # as to the storage backend.
+        self._writeLock = threading.Lock()
+
+        # Counter of changes applied to the cached data.
+        self._changeGeneration = 0
+
+        self._nodes = dict()  # type: Dict[int, Node]
+        self._nodeIdsByUsername = dict()  # type: Dict[str, int]
+        self._sensors = dict()  # type: Dict[int, Sensor]
+        self._sensorIdsByNode = dict()  # type: Dict[int, Dict[int, int]]
+        self._alerts = dict()  # type: Dict[int, Alert]
+        self._alertIdsByNode = dict()  # type: Dict[int, Dict[int, int]]
+        self._managers = dict()  # type: Dict[int, Manager]
+        self._options = dict()  # type: Dict[str, Option]
+
+        if not self._loadAll():
+            raise ValueError("Not able to load data of storage backend into cache.")
+
+    @staticmethod
+    def _copyNode(node: Node) -> Node:
+        nodeCopy = Node()
+        nodeCopy.id = node.id
+        nodeCopy.hostname = node.hostname
+        nodeCopy.username = node.username
+        nodeCopy.nodeType = node.nodeType
+        nodeCopy.instance = node.instance
+        nodeCopy.connected = node.connected
+        nodeCopy.version = node.version
+        nodeCopy.rev = node.rev
+        nodeCopy.persistent = node.persistent
+        return nodeCopy
+
+    @staticmethod
+    def _copyAlert(alert: Alert) -> Alert:
+        alertCopy = Alert()
+        alertCopy.nodeId = alert.nodeId
+        alertCopy.alertId = alert.alertId
+        alertCopy.clientAlertId = alert.clientAlertId
+        alertCopy.alertLevels = list(alert.alertLevels)
+        alertCopy.description = alert.description
+        return alertCopy
+
+    @staticmethod
+    def _copyManager(manager: Manager) -> Manager:
+        managerCopy = Manager()
+        managerCopy.nodeId = manager.nodeId
+        managerCopy.managerId = manager.managerId
+        managerCopy.description = manager.description
+        return managerCopy
+
+    def _loadAll(self,
+                 logger: logging.Logger = None) -> bool:
+        """
+        Internal function that replaces all cached data with the data of the storage backend.
+
+        :param logger:
+        :return: Success or Failure
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        alertSystemInformation = self._backend.getAlertSystemInformation(logger)
+        if alertSystemInformation is None:
+            logger.error("[%s]: Not able to load data of storage backend." % self.log_tag)
+            return False
+
+        optionList, nodeList, sensorList, managerList, alertList = alertSystemInformation
+
+        nodes = dict()  # type: Dict[int, Node]
+        nodeIdsByUsername = dict()  # type: Dict[str, int]
+        for node in nodeList:
+            nodes[node.id] = node
+            nodeIdsByUsername[node.username] = node.id
+
+        sensors = dict()  # type: Dict[int, Sensor]
+        sensorIdsByNode = dict()  # type: Dict[int, Dict[int, int]]
+        for sensor in sensorList:
+            sensors[sensor.sensorId] = sensor
+            sensorIdsByNode.setdefault(sensor.nodeId, dict())[sensor.clientSensorId] = sensor.sensorId
+
+        alerts = dict()  # type: Dict[int, Alert]
+        alertIdsByNode = dict()  # type: Dict[int, Dict[int, int]]
+        for alert in alertList:
+            alerts[alert.alertId] = alert
+            alertIdsByNode.setdefault(alert.nodeId, dict())[alert.clientAlertId] = alert.alertId
+
+        managers = dict()  # type: Dict[int, Manager]
+        for manager in managerList:
+            managers[manager.managerId] = manager
+
+        options = dict()  # type: Dict[str, Option]
+        for option in optionList:
+            options[option.type] = option
+
+        with self._cacheLock:
+            self._nodes = nodes
+            self._nodeIdsByUsername = nodeIdsByUsername
+            self._sensors = sensors
+            self._sensorIdsByNode = sensorIdsByNode
+            self._alerts = alerts
+            self._alertIdsByNode = alertIdsByNode
+            self._managers = managers
+            self._options = options
+            self._changeGeneration += 1
+
+        return True
+
+    def _reloadAfterFailure(self,
+                            logger: logging.Logger = None):
+        """
+        Internal function that loads all data anew after a change failed (the storage backend could have
+        partially applied the change).
+
+        :param logger:
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        logger.warning("[%s]: Change of storage backend failed. Loading cached data anew." % self.log_tag)
+        if not self._loadAll(logger):
+            logger.error("[%s]: Not able to load cached data anew." % self.log_tag)
+
+    def _refreshSensors(self,
+                        sensorIds: Iterable[int],
+                        logger: logging.Logger = None) -> bool:
+        """
+        Internal function that reads the given sensors anew from the storage backend.
+
+        :param sensorIds:
+        :param logger:
+        :return: Success or Failure
+        """
+        sensors = list()
+        for sensorId in sensorIds:
+            sensor = self._backend.getSensorById(sensorId, logger)
+            if sensor is None:
+                return False
+            sensors.append(sensor)
+
+        with self._cacheLock:
+            for sensor in sensors:
+                self._sensors[sensor.sensorId] = sensor
+            self._changeGeneration += 1
+
+        return True
+
+    def _removeNodeObjects(self,
+                           nodeId: int):
+        """
+        Internal function that removes the sensors, alerts and manager of a node from the cached data
+        (has to be called with the cache lock).
+
+        :param nodeId:
+        """
+        for sensorId in self._sensorIdsByNode.pop(nodeId, dict()).values():
+            self._sensors.pop(sensorId, None)
+
+        for alertId in self._alertIdsByNode.pop(nodeId, dict()).values():
+            self._alerts.pop(alertId, None)
+
+        for managerId in [x.managerId for x in self._managers.values() if x.nodeId == nodeId]:
+            del self._managers[managerId]
+
+    def _markNode(self,
+                  nodeId: int,
+                  connected: int,
+                  logger: logging.Logger = None) -> bool:
+        """
+        Internal function that marks a node given by its id as connected or not connected.
+
+        :param nodeId:
+        :param connected:
+        :param logger:
+        :return: Success or Failure
+        """
+        with self._writeLock:
+            if connected == 1:
+                result = self._backend.markNodeAsConnected(nodeId, logger)
+            else:
+                result = self._backend.markNodeAsNotConnected(nodeId, logger)
+
+            if not result:
+                self._reloadAfterFailure(logger)
+                return False
+
+            with self._cacheLock:
+                node = self._nodes.get(nodeId)
+                if node is not None:
+                    node.connected = connected
+                self._changeGeneration += 1
+
+        return True
+
+    def checkVersionAndClearConflict(self,
+                                     logger: logging.Logger = None):
+
+        with self._writeLock:
+            self._backend.checkVersionAndClearConflict(logger)
+            if not self._loadAll(logger):
+                raise ValueError("Not able to load data of storage backend into cache.")
+
+    def addNode(self,
+                username: str,
+                hostname: str,
+                nodeType: str,
+                instance: str,
+                version: float,
+                rev: int,
+                persistent: int,
+                logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.addNode(username,
+                                         hostname,
+                                         nodeType,
+                                         instance,
+                                         version,
+                                         rev,
+                                         persistent,
+                                         logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            nodeId = self._backend.getNodeId(username, logger)
+            node = None
+            if nodeId is not None:
+                node = self._backend.getNodeById(nodeId, logger)
+            if node is None:
+                self._reloadAfterFailure(logger)
+                return True
+
+            with self._cacheLock:
+                # The storage backend deletes the sensors, alerts and manager of a node if its type changes.
+                oldNode = self._nodes.get(nodeId)
+                if oldNode is not None and oldNode.nodeType != node.nodeType:
+                    self._removeNodeObjects(nodeId)
+
+                self._nodes[nodeId] = node
+                self._nodeIdsByUsername[username] = nodeId
+                self._changeGeneration += 1
+
+        return True
+
+    def addSensors(self,
+                   username: str,
+                   sensors: List[Dict[str, Any]],
+                   logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.addSensors(username, sensors, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            # Read the added/updated sensors since the storage backend sets the ids and the time of the last update.
+            nodeId = self._nodeIdsByUsername.get(username)
+            newSensors = list()
+            for sensorDict in sensors:
+                sensor = None
+                if nodeId is not None:
+                    sensorId = self._backend.getSensorId(nodeId, sensorDict["clientSensorId"], logger)
+                    if sensorId is not None:
+                        sensor = self._backend.getSensorById(sensorId, logger)
+
+                if sensor is None:
+                    self._reloadAfterFailure(logger)
+                    return True
+                newSensors.append(sensor)
+
+            with self._cacheLock:
+                # The storage backend deletes all sensors of the node that were not registered anew.
+                newSensorIds = {x.sensorId for x in newSensors}
+                sensorIds = self._sensorIdsByNode.get(nodeId, dict())
+                for sensorId in sensorIds.values():
+                    if sensorId not in newSensorIds:
+                        self._sensors.pop(sensorId, None)
+
+                sensorIds = dict()
+                for sensor in newSensors:
+                    self._sensors[sensor.sensorId] = sensor
+                    sensorIds[sensor.clientSensorId] = sensor.sensorId
+                self._sensorIdsByNode[nodeId] = sensorIds
+                self._changeGeneration += 1
+
+        return True
+
+    def addAlerts(self,
+                  username: str,
+                  alerts: List[Dict[str, Any]],
+                  logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.addAlerts(username, alerts, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            nodeId = self._nodeIdsByUsername.get(username)
+            newAlerts = list()
+            for alertDict in alerts:
+                alert = None
+                if nodeId is not None:
+                    alertId = self._backend.getAlertId(nodeId, int(alertDict["clientAlertId"]), logger)
+                    if alertId is not None:
+                        alert = self._backend.getAlertById(alertId, logger)
+
+                if alert is None:
+                    self._reloadAfterFailure(logger)
+                    return True
+                newAlerts.append(alert)
+
+            with self._cacheLock:
+                # The storage backend deletes all alerts of the node that were not registered anew.
+                newAlertIds = {x.alertId for x in newAlerts}
+                alertIds = self._alertIdsByNode.get(nodeId, dict())
+                for alertId in alertIds.values():
+                    if alertId not in newAlertIds:
+                        self._alerts.pop(alertId, None)
+
+                alertIds = dict()
+                for alert in newAlerts:
+                    self._alerts[alert.alertId] = alert
+                    alertIds[alert.clientAlertId] = alert.alertId
+                self._alertIdsByNode[nodeId] = alertIds
+                self._changeGeneration += 1
+
+        return True
+
+    def addManager(self,
+                   username: str,
+                   manager: Dict[str, Any],
+                   logger: logging.Logger = None) -> bool:
+
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        with self._writeLock:
+            if not self._backend.addManager(username, manager, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            # The storage interface can not look up a manager by its node, hence all data is loaded anew
+            # (managers register rarely).
+            if not self._loadAll(logger):
+                logger.error("[%s]: Not able to load cached data anew." % self.log_tag)
+
+        return True
+
+    def getNodeId(self,
+                  username: str,
+                  logger: logging.Logger = None) -> Optional[int]:
+
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        with self._cacheLock:
+            nodeId = self._nodeIdsByUsername.get(username)
+
+        if nodeId is None:
+            logger.error("[%s]: Not able to get node id." % self.log_tag)
+
+        return nodeId
+
+    def getNodeIds(self,
+                   logger: logging.Logger = None) -> List[int]:
+
+        with self._cacheLock:
+            return list(self._nodes.keys())
+
+    def getSensorCount(self,
+                       nodeId: str,
+                       logger: logging.Logger = None) -> Optional[int]:
+
+        with self._cacheLock:
+            return len(self._sensorIdsByNode.get(nodeId, dict()))
+
+    def getSensorId(self,
+                    nodeId: int,
+                    clientSensorId: int,
+                    logger: logging.Logger = None) -> Optional[int]:
+
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        with self._cacheLock:
+            sensorId = self._sensorIdsByNode.get(nodeId, dict()).get(clientSensorId)
+
+        if sensorId is None:
+            logger.error("[%s]: Not able to get sensorId from cache." % self.log_tag)
+
+        return sensorId
+
+    def getSurveyData(self,
+                      logger: logging.Logger = None) -> Optional[List[Tuple[str, float, int]]]:
+
+        with self._cacheLock:
+            return [(x.instance, x.version, x.rev) for x in self._nodes.values()]
+
+    def getUniqueID(self,
+                    logger: logging.Logger = None) -> Optional[str]:
+        return self._backend.getUniqueID(logger)
+
+    def getAlertId(self,
+                   nodeId: int,
+                   clientAlertId: int,
+                   logger: logging.Logger = None) -> Optional[int]:
+
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        with self._cacheLock:
+            alertId = self._alertIdsByNode.get(nodeId, dict()).get(clientAlertId)
+
+        if alertId is None:
+            logger.error("[%s]: Not able to get alertId from cache." % self.log_tag)
+
+        return alertId
+
+    def getSensorAlertLevels(self,
+                             sensorId: int,
+                             logger: logging.Logger = None) -> Optional[List[int]]:
+
+        with self._cacheLock:
+            sensor = self._sensors.get(sensorId)
+            if sensor is None:
+                return list()
+            return list(sensor.alertLevels)
+
+    def getAlertAlertLevels(self,
+                            alertId: int,
+                            logger: logging.Logger = None) -> Optional[List[int]]:
+
+        with self._cacheLock:
+            alert = self._alerts.get(alertId)
+            if alert is None:
+                return list()
+            return list(alert.alertLevels)
+
+    def getAllAlertsAlertLevels(self,
+                                logger: logging.Logger = None) -> Optional[List[int]]:
+
+        with self._cacheLock:
+            return [alertLevel for alert in self._alerts.values() for alertLevel in alert.alertLevels]
+
+    def getAllSensorsAlertLevels(self,
+                                 logger: logging.Logger = None) -> Optional[List[int]]:
+
+        with self._cacheLock:
+            return [alertLevel for sensor in self._sensors.values() for alertLevel in sensor.alertLevels]
+
+    def getAllConnectedNodeIds(self,
+                               logger: logging.Logger = None) -> Optional[List[int]]:
+
+        with self._cacheLock:
+            return [x.id for x in self._nodes.values() if x.connected == 1]
+
+    def getAllPersistentNodeIds(self,
+                                logger: logging.Logger = None) -> Optional[List[int]]:
+
+        with self._cacheLock:
+            return [x.id for x in self._nodes.values() if x.persistent == 1]
+
+    def getSensorsUpdatedOlderThan(self,
+                                   oldestTimeUpdated: int,
+                                   logger: logging.Logger = None) -> Optional[List[Sensor]]:
+
+        with self._cacheLock:
+            return [Sensor().deepcopy(x) for x in self._sensors.values() if x.lastStateUpdated < oldestTimeUpdated]
+
+    def getAlertById(self,
+                     alertId: int,
+                     logger: logging.Logger = None) -> Optional[Alert]:
+
+        with self._cacheLock:
+            alert = self._alerts.get(alertId)
+            if alert is None:
+                return None
+            return self._copyAlert(alert)
+
+    def getManagerById(self,
+                       managerId: int,
+                       logger: logging.Logger = None) -> Optional[Manager]:
+
+        with self._cacheLock:
+            manager = self._managers.get(managerId)
+            if manager is None:
+                return None
+            return self._copyManager(manager)
+
+    def getNodeById(self,
+                    nodeId: int,
+                    logger: logging.Logger = None) -> Optional[Node]:
+
+        with self._cacheLock:
+            node = self._nodes.get(nodeId)
+            if node is None:
+                return None
+            return self._copyNode(node)
+
+    def getSensorById(self,
+                      sensorId: int,
+                      logger: logging.Logger = None) -> Optional[Sensor]:
+
+        with self._cacheLock:
+            sensor = self._sensors.get(sensorId)
+            if sensor is None:
+                return None
+            return Sensor().deepcopy(sensor)
+
+    def get_option_by_type(self,
+                           option_type: str,
+                           logger: logging.Logger = None) -> Optional[Option]:
+
+        with self._cacheLock:
+            option = self._options.get(option_type)
+            if option is None:
+                return None
+            return Option().deepcopy(option)
+
+    def get_options_list(self, logger: logging.Logger = None) -> Optional[List[Option]]:
+
+        with self._cacheLock:
+            return [Option().deepcopy(x) for x in self._options.values()]
+
+    def getNodes(self,
+                 logger: logging.Logger = None) -> Optional[List[Node]]:
+
+        with self._cacheLock:
+            return [self._copyNode(x) for x in self._nodes.values()]
+
+    def getAlertSystemInformation(self,
+                                  logger: logging.Logger = None) -> Optional[List[List[Union[Option,
+                                                                                             Node,
+                                                                                             Sensor,
+                                                                                             Manager,
+                                                                                             Alert]]]]:
+
+        with self._cacheLock:
+            return [[Option().deepcopy(x) for x in self._options.values()],
+                    [self._copyNode(x) for x in self._nodes.values()],
+                    [Sensor().deepcopy(x) for x in self._sensors.values()],
+                    [self._copyManager(x) for x in self._managers.values()],
+                    [self._copyAlert(x) for x in self._alerts.values()]]
+
+    def getSensorState(self,
+                       sensorId: int,
+                       logger: logging.Logger = None) -> Optional[int]:
+
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        with self._cacheLock:
+            sensor = self._sensors.get(sensorId)
+            if sensor is not None:
+                return sensor.state
+
+        logger.error("[%s]: Sensor was not found." % self.log_tag)
+        return None
+
+    def getSensorData(self,
+                      sensorId: int,
+                      logger: logging.Logger = None) -> Optional[SensorData]:
+
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        with self._cacheLock:
+            sensor = self._sensors.get(sensorId)
+            if sensor is not None:
+                data = SensorData()
+                data.sensorId = sensorId
+                data.dataType = sensor.dataType
+                data.data = SensorDataType.get_sensor_data_class(sensor.dataType).deepcopy(sensor.data)
+                return data
+
+        logger.error("[%s]: Sensor was not found." % self.log_tag)
+        return None
+
+    def markNodeAsNotConnected(self,
+                               nodeId: int,
+                               logger: logging.Logger = None) -> bool:
+        return self._markNode(nodeId, 0, logger)
+
+    def markNodeAsConnected(self,
+                            nodeId: int,
+                            logger: logging.Logger = None) -> bool:
+        return self._markNode(nodeId, 1, logger)
+
+    def deleteNode(self,
+                   nodeId: int,
+                   logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.deleteNode(nodeId, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            with self._cacheLock:
+                self._removeNodeObjects(nodeId)
+                node = self._nodes.pop(nodeId, None)
+                if node is not None:
+                    self._nodeIdsByUsername.pop(node.username, None)
+                self._changeGeneration += 1
+
+        return True
+
+    def delete_option_by_type(self,
+                              option_type: str,
+                              logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.delete_option_by_type(option_type, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            with self._cacheLock:
+                self._options.pop(option_type, None)
+                self._changeGeneration += 1
+
+        return True
+
+    def updateSensorState(self,
+                          nodeId: int,
+                          stateList: List[Tuple[int, int]],
+                          logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            # The storage backend sets the time of the update itself.
+            timeBefore = int(time.time())
+            if not self._backend.updateSensorState(nodeId, stateList, logger):
+                self._reloadAfterFailure(logger)
+                return False
+            timeAfter = int(time.time())
+
+            sensorIds = list()
+            with self._cacheLock:
+                sensorIdsOfNode = self._sensorIdsByNode.get(nodeId, dict())
+                for clientSensorId, state in stateList:
+                    sensor = self._sensors.get(sensorIdsOfNode.get(clientSensorId))
+                    if sensor is None:
+                        sensorIds = None
+                        break
+                    sensor.state = state
+                    sensor.lastStateUpdated = timeBefore
+                    sensorIds.append(sensor.sensorId)
+                self._changeGeneration += 1
+
+            if sensorIds is None:
+                self._reloadAfterFailure(logger)
+
+            # Read the exact time of the update if the second changed while updating.
+            elif timeBefore != timeAfter and not self._refreshSensors(sensorIds, logger):
+                self._reloadAfterFailure(logger)
+
+        return True
+
+    def updateSensorData(self,
+                         nodeId: int,
+                         dataList: List[Tuple[int, _SensorData]],
+                         logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.updateSensorData(nodeId, dataList, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            isConsistent = True
+            with self._cacheLock:
+                sensorIdsOfNode = self._sensorIdsByNode.get(nodeId, dict())
+                for clientSensorId, data in dataList:
+                    sensor = self._sensors.get(sensorIdsOfNode.get(clientSensorId))
+                    if sensor is None:
+                        isConsistent = False
+                        break
+
+                    # The storage backend does not store data for sensors without data.
+                    if sensor.dataType != SensorDataType.NONE:
+                        sensor.data = SensorDataType.get_sensor_data_class(sensor.dataType).deepcopy(data)
+                self._changeGeneration += 1
+
+            if not isConsistent:
+                self._reloadAfterFailure(logger)
+
+        return True
+
+    def updateSensorTime(self,
+                         sensorId: int,
+                         logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            # The storage backend sets the time of the update itself.
+            timeBefore = int(time.time())
+            if not self._backend.updateSensorTime(sensorId, logger):
+                self._reloadAfterFailure(logger)
+                return False
+            timeAfter = int(time.time())
+
+            with self._cacheLock:
+                sensor = self._sensors.get(sensorId)
+                if sensor is not None:
+                    sensor.lastStateUpdated = timeBefore
+                self._changeGeneration += 1
+
+            # Read the exact time of the update if the second changed while updating.
+            if sensor is not None and timeBefore != timeAfter and not self._refreshSensors([sensorId], logger):
+                self._reloadAfterFailure(logger)
+
+        return True
+
+    def updateSensorValues(self,
+                           stateList: List[Tuple[int, int, int]],
+                           dataList: List[Tuple[int, int, _SensorData]],
+                           timeList: List[Tuple[int, int]],
+                           logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.updateSensorValues(stateList, dataList, timeList, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            with self._cacheLock:
+                for sensorId, state, lastStateUpdated in stateList:
+                    sensor = self._sensors.get(sensorId)
+                    if sensor is not None:
+                        sensor.state = state
+                        sensor.lastStateUpdated = lastStateUpdated
+
+                for sensorId, dataType, data in dataList:
+                    sensor = self._sensors.get(sensorId)
+                    if sensor is not None and sensor.dataType == dataType and dataType != SensorDataType.NONE:
+                        sensor.data = SensorDataType.get_sensor_data_class(dataType).deepcopy(data)
+
+                for sensorId, lastStateUpdated in timeList:
+                    sensor = self._sensors.get(sensorId)
+                    if sensor is not None:
+                        sensor.lastStateUpdated = lastStateUpdated
+                self._changeGeneration += 1
+
+        return True
+
+    def getMethodLockStatistics(self) -> Dict[str, Dict[str, float]]:
+        return self._backend.getMethodLockStatistics()
+
+    def getChangeGeneration(self,
+                            logger: logging.Logger = None) -> int:
+        return self._changeGeneration
+
+    def close(self,
+              logger: logging.Logger = None):
+        self._backend.close(logger)
+
+    def update_option(self,
+                      option_type: str,
+                      option_value: int,
+                      logger: logging.Logger = None) -> bool:
+
+        option = Option()
+        option.type = option_type
+        option.value = option_value
+        return self.update_option_by_obj(option, logger)
+
+    def update_option_by_obj(self,
+                             option: Option,
+                             logger: logging.Logger = None) -> bool:
+
+        with self._writeLock:
+            if not self._backend.update_option_by_obj(option, logger):
+                self._reloadAfterFailure(logger)
+                return False
+
+            # Read the option back to hold the value as it was stored.
+            storedOption = self._backend.get_option_by_type(option.type, logger)
+            if storedOption is None:
+                self._reloadAfterFailure(logger)
+                return True
+
+            with self._cacheLock:
+                self._options[storedOption.type] = storedOption
+                self._changeGeneration += 1
+
+        return True
@@ -9,7 +9,7 @@
 
 import logging
 from typing import Any, Optional, List, Union, Tuple, Dict
-from ..localObjects import Node, Alert, Manager, Sensor, Option, SensorData
+from ..localObjects import Node, Alert, Manager, Sensor, Option, SensorData, _SensorData
 
 
 # Internal abstract class for new storage backends.
@@ -460,6 +460,43 @@ class _Storage:
         """
         raise NotImplementedError("Function not implemented yet.")
 
+    def updateSensorValues(self,
+                           stateList: List[Tuple[int, int, int]],
+                           dataList: List[Tuple[int, int, _SensorData]],
+                           timeList: List[Tuple[int, int]],
+                           logger: logging.Logger = None) -> bool:
+        """
+        Updates the states, data and update times of multiple sensors given by their sensorId at once
+        (all changes are applied or none).
+
+        :param stateList: list of tuples of (sensorId, state, lastStateUpdated)
+        :param dataList: list of tuples of (sensorId, dataType, data)
+        :param timeList: list of tuples of (sensorId, lastStateUpdated)
+        :param logger:
+        :return Success or Failure
+        """
+        raise NotImplementedError("Function not implemented yet.")
+
+    def getMethodLockStatistics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Gets how long each storage method waited for and held the access to the database
+        (empty if the metrics are not activated).
+
+        :return: dictionary with the statistics ("count", "waitTotal", "waitMax", "holdTotal", "holdMax")
+        by method name
+        """
+        raise NotImplementedError("Function not implemented yet.")
+
+    def getChangeGeneration(self,
+                            logger: logging.Logger = None) -> int:
+        """
+        Gets a counter that is increased with each change of the stored data.
+
+        :param logger:
+        :return: change generation
+        """
+        raise NotImplementedError("Function not implemented yet.")
+
     def close(self,
               logger: logging.Logger = None):
         """
@@ -8,13 +8,16 @@
 # Licensed under the GNU Affero General Public License, version 3.
 
 import os
+import contextlib
 import threading
 import time
 import socket
 import struct
 import hashlib
 import logging
+import queue
 import sqlite3
+import sys
 from typing import Any, Optional, List, Union, Tuple, Dict
 from .core import _Storage
 from ..globalData import GlobalData
@@ -22,12 +25,62 @@ from ..localObjects import Node, Alert, Manager, Sensor, SensorData, SensorDataT
     SensorDataNone, SensorDataFloat, SensorDataInt, _SensorData
 
 
+class _LockStatistics:
+    """
+    Collects how long accesses to the database waited for and held their lock (or connection).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.waitTotal = 0.0
+        self.waitMax = 0.0
+        self.holdTotal = 0.0
+        self.holdMax = 0.0
+
+    def record(self,
+               waitTime: float,
+               holdTime: float):
+        with self._lock:
+            self.count += 1
+            self.waitTotal += waitTime
+            self.waitMax = max(self.waitMax, waitTime)
+            self.holdTotal += holdTime
+            self.holdMax = max(self.holdMax, holdTime)
+
+    def getStatistics(self) -> Dict[str, float]:
+        with self._lock:
+            return {"count": self.count,
+                    "waitTotal": self.waitTotal,
+                    "waitMax": self.waitMax,
+                    "holdTotal": self.holdTotal,
+                    "holdMax": self.holdMax}
+
+
+# Functions between a storage method and the lock functions that are skipped to get the name of the method.
+_ACCESS_FUNCTIONS = {"_writeAccess", "_readAccess", "__enter__"}
+
+
+def _getStorageMethodName() -> str:
+    """
+    Gets the name of the storage method that acquires the lock (has to be called by the lock functions).
+
+    :return: name of the method
+    """
+    frame = sys._getframe(2)
+    while frame.f_code.co_name in _ACCESS_FUNCTIONS and frame.f_back is not None:
+        frame = frame.f_back
+    return frame.f_code.co_name
+
+
 class Sqlite(_Storage):
 
     def __init__(self,
                  storagePath: str,
                  globalData: GlobalData,
-                 read_only: bool = False):
+                 read_only: bool = False,
+                 wal: bool = False,
+                 readConnections: int = 0):
 
         self.globalData = globalData
         self.logger = self.globalData.logger
@@ -44,8 +97,37 @@ class Sqlite(_Storage):
         self.storagePath = storagePath
 
         # sqlite is not thread safe => use lock
+        # (all writes and, if no read connections are used, all reads are done with the lock)
         self.dbLock = threading.Lock()
 
+        # Time the lock was acquired and the time waited for it (only changed while holding the lock).
+        self._lockAcquired = 0.0
+        self._lockWait = 0.0
+
+        # Pool of read-only connections used by the reading functions (None if reads use the lock).
+        self._readPool = None  # type: Optional[queue.Queue]
+        self._readConnections = list()  # type: List[sqlite3.Connection]
+
+        # Cursor of the read connection used by the current thread and the timings of its usage.
+        self._local = threading.local()
+
+        # Contention of the lock and the read connections.
+        self._writeStatistics = _LockStatistics()
+        self._readStatistics = _LockStatistics()
+
+        # Contention by storage method (only collected if the metrics are activated since it needs
+        # to determine the calling method).
+        self._methodStatistics = None  # type: Optional[Dict[str, _LockStatistics]]
+        if self.globalData.metrics is not None:
+            self._methodStatistics = dict()
+        self._lockMethod = None  # type: Optional[str]
+
+        if readConnections > 0 and (not wal or read_only):
+            raise ValueError("Read connections need a writable database in WAL journal mode.")
+
+        # Counter of committed changes (used to detect if cached data of the database is outdated).
+        self._changeGeneration = 0
+
         mode = ""
         if read_only:
             mode = "?mode=ro"
@@ -61,7 +143,12 @@ class Sqlite(_Storage):
         self.conn = sqlite3.connect(uri,
                                     check_same_thread=False,
                                     uri=True)
-        self.cursor = self.conn.cursor()
+        self._writeCursor = self.conn.cursor()
+
+        # In WAL journal mode reads do not block writes and writes do not block reads.
+        if wal:
+            self.logger.info("[%s]: Using WAL journal mode." % self.log_tag)
+            self._writeCursor.execute("PRAGMA journal_mode=WAL")
 
         if create_new:
             uniqueID = self._generateUniqueId()
@@ -70,6 +157,24 @@ class Sqlite(_Storage):
         # check if the versions are compatible
         self.checkVersionAndClearConflict()
 
+        if readConnections > 0:
+            self.logger.info("[%s]: Using %d read connections." % (self.log_tag, readConnections))
+            self._readPool = queue.Queue()
+            for _ in range(readConnections):
+                readConn = sqlite3.connect("file:" + self.storagePath + "?mode=ro",
+                                           check_same_thread=False,
+                                           uri=True)
+                self._readConnections.append(readConn)
+                self._readPool.put(readConn.cursor())
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        # Threads that read with a connection of the read pool use its cursor.
+        readCursor = getattr(self._local, "cursor", None)
+        if readCursor is not None:
+            return readCursor
+        return self._writeCursor
+
     def _usernameInDb(self,
                       username: str) -> bool:
         """
@@ -403,6 +508,136 @@ class Sqlite(_Storage):
 
         return sensor
 
+    def _getSensors(self,
+                    condition: str = "",
+                    conditionArgs: Tuple[Any, ...] = (),
+                    logger: logging.Logger = None) -> Tuple[List[Sensor], List[int]]:
+        """
+        Internal function that gets all sensors matching the given condition from the database with one query
+        per table (instead of multiple queries for each sensor).
+        No error handling, raises exception if a query fails.
+
+        :param condition: condition for the sensors table (for example "WHERE lastStateUpdated < ?")
+        :param conditionArgs: arguments of the condition
+        :param logger:
+        :return: list of sensor objects and list of ids of the sensors that could not be converted to objects
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        self.cursor.execute("SELECT * FROM sensors " + condition, conditionArgs)
+        sensorTuples = self.cursor.fetchall()
+        if not sensorTuples:
+            return list(), list()
+
+        # Restrict the queries of the other tables to the sensors matching the condition.
+        subCondition = ""
+        if condition:
+            subCondition = "WHERE sensorId IN (SELECT id FROM sensors " + condition + ") "
+
+        alertLevels = dict()  # type: Dict[int, List[int]]
+        self.cursor.execute("SELECT sensorId, alertLevel FROM sensorsAlertLevels "
+                            + subCondition
+                            + "ORDER BY sensorId, alertLevel",
+                            conditionArgs)
+        for sensorId, alertLevel in self.cursor.fetchall():
+            alertLevels.setdefault(sensorId, list()).append(alertLevel)
+
+        sensorsData = {SensorDataType.INT: dict(),
+                       SensorDataType.FLOAT: dict(),
+                       SensorDataType.GPS: dict()}  # type: Dict[int, Dict[int, _SensorData]]
+
+        self.cursor.execute("SELECT sensorId, value, unit FROM sensorsDataInt " + subCondition, conditionArgs)
+        for dataTuple in self.cursor.fetchall():
+            sensorsData[SensorDataType.INT][dataTuple[0]] = SensorDataInt(dataTuple[1], dataTuple[2])
+
+        self.cursor.execute("SELECT sensorId, value, unit FROM sensorsDataFloat " + subCondition, conditionArgs)
+        for dataTuple in self.cursor.fetchall():
+            sensorsData[SensorDataType.FLOAT][dataTuple[0]] = SensorDataFloat(dataTuple[1], dataTuple[2])
+
+        self.cursor.execute("SELECT sensorId, lat, lon, utctime FROM sensorsDataGPS " + subCondition, conditionArgs)
+        for dataTuple in self.cursor.fetchall():
+            sensorsData[SensorDataType.GPS][dataTuple[0]] = SensorDataGPS(dataTuple[1], dataTuple[2], dataTuple[3])
+
+        sensors = list()
+        failedSensorIds = list()
+        for sensorTuple in sensorTuples:
+            sensor = Sensor()
+            sensor.sensorId = sensorTuple[0]
+            sensor.nodeId = sensorTuple[1]
+            sensor.clientSensorId = sensorTuple[2]
+            sensor.description = sensorTuple[3]
+            sensor.state = sensorTuple[4]
+            sensor.lastStateUpdated = sensorTuple[5]
+            sensor.alertDelay = sensorTuple[6]
+            sensor.dataType = sensorTuple[7]
+            sensor.alertLevels = alertLevels.get(sensor.sensorId, list())
+
+            if sensor.dataType == SensorDataType.NONE:
+                sensor.data = SensorDataNone()
+
+            elif sensor.dataType in sensorsData.keys():
+                sensor.data = sensorsData[sensor.dataType].get(sensor.sensorId)
+                if sensor.data is None:
+                    logger.error("[%s]: Sensor data for sensor with id %d was not found."
+                                 % (self.log_tag, sensor.sensorId))
+                    failedSensorIds.append(sensor.sensorId)
+                    continue
+
+            else:
+                logger.error("[%s]: Not able to get sensor with id %d. Data type in database unknown."
+                             % (self.log_tag, sensor.sensorId))
+                failedSensorIds.append(sensor.sensorId)
+                continue
+
+            sensors.append(sensor)
+
+        return sensors, failedSensorIds
+
+    def _getAlerts(self) -> List[Alert]:
+        """
+        Internal function that gets all alerts from the database with one query per table.
+        No error handling, raises exception if a query fails.
+
+        :return: list of alert objects
+        """
+        alertLevels = dict()  # type: Dict[int, List[int]]
+        self.cursor.execute("SELECT alertId, alertLevel FROM alertsAlertLevels ORDER BY alertId, alertLevel")
+        for alertId, alertLevel in self.cursor.fetchall():
+            alertLevels.setdefault(alertId, list()).append(alertLevel)
+
+        alerts = list()
+        self.cursor.execute("SELECT * FROM alerts")
+        for alertTuple in self.cursor.fetchall():
+            alert = Alert()
+            alert.alertId = alertTuple[0]
+            alert.nodeId = alertTuple[1]
+            alert.clientAlertId = alertTuple[2]
+            alert.description = alertTuple[3]
+            alert.alertLevels = alertLevels.get(alert.alertId, list())
+            alerts.append(alert)
+
+        return alerts
+
+    def _getManagers(self) -> List[Manager]:
+        """
+        Internal function that gets all managers from the database.
+        No error handling, raises exception if the query fails.
+
+        :return: list of manager objects
+        """
+        managers = list()
+        self.cursor.execute("SELECT * FROM managers")
+        for managerTuple in self.cursor.fetchall():
+            manager = Manager()
+            manager.managerId = managerTuple[0]
+            manager.nodeId = managerTuple[1]
+            manager.description = managerTuple[2]
+            managers.append(manager)
+
+        return managers
+
     def _getSensorId(self,
                      nodeId: int,
                      clientSensorId: int) -> int:
@@ -499,7 +734,12 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
+        start = time.time()
         self.dbLock.acquire()
+        self._lockAcquired = time.time()
+        self._lockWait = self._lockAcquired - start
+        if self._methodStatistics is not None:
+            self._lockMethod = _getStorageMethodName()
 
     def _releaseLock(self,
                      logger: logging.Logger = None):
@@ -512,8 +752,117 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
+        holdTime = time.time() - self._lockAcquired
+        self._writeStatistics.record(self._lockWait, holdTime)
+        if self._methodStatistics is not None:
+            self._recordMethod(self._lockMethod, self._lockWait, holdTime)
         self.dbLock.release()
 
+    def _acquireReadLock(self,
+                         logger: logging.Logger = None):
+        """
+        Internal function that acquires a connection of the read pool for the current thread
+        (or the lock if no read connections are used). The connection starts a read transaction so that
+        all queries until the connection is given back read the same state of the database.
+
+        :param logger:
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        start = time.time()
+        if self._readPool is None:
+            self.dbLock.acquire()
+        else:
+            self._local.cursor = self._readPool.get()
+
+            # Without an explicit transaction, sqlite3 runs each SELECT in its own transaction
+            # and a write committed between two queries would be seen only by the later one.
+            self._local.cursor.execute("BEGIN")
+        self._local.readAcquired = time.time()
+        self._local.readWait = self._local.readAcquired - start
+        if self._methodStatistics is not None:
+            self._local.readMethod = _getStorageMethodName()
+
+    def _releaseReadLock(self,
+                         logger: logging.Logger = None):
+        """
+        Internal function that gives the connection of the read pool back (or releases the lock if no
+        read connections are used).
+
+        :param logger:
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        holdTime = time.time() - self._local.readAcquired
+        self._readStatistics.record(self._local.readWait, holdTime)
+        if self._methodStatistics is not None:
+            self._recordMethod(self._local.readMethod, self._local.readWait, holdTime)
+        if self._readPool is None:
+            self.dbLock.release()
+        else:
+            readCursor = self._local.cursor
+            self._local.cursor = None
+
+            # End the read transaction started when the connection was acquired
+            # (keeping it open would prevent WAL checkpoints).
+            readCursor.connection.rollback()
+            self._readPool.put(readCursor)
+
+    def _recordMethod(self,
+                      method: str,
+                      waitTime: float,
+                      holdTime: float):
+        """
+        Internal function that records the contention of a storage method.
+
+        :param method:
+        :param waitTime:
+        :param holdTime:
+        """
+        statistics = self._methodStatistics.get(method)
+        if statistics is None:
+            statistics = self._methodStatistics.setdefault(method, _LockStatistics())
+        statistics.record(waitTime, holdTime)
+
+    @contextlib.contextmanager
+    def _readAccess(self,
+                    logger: logging.Logger = None):
+        """
+        Internal context manager for reading functions.
+
+        :param logger:
+        """
+        self._acquireReadLock(logger)
+        try:
+            yield
+        finally:
+            self._releaseReadLock(logger)
+
+    @contextlib.contextmanager
+    def _writeAccess(self,
+                     logger: logging.Logger = None):
+        """
+        Internal context manager for writing functions.
+
+        :param logger:
+        """
+        self._acquireLock(logger)
+        try:
+            yield
+        finally:
+            self._releaseLock(logger)
+
+    def _commit(self):
+        """
+        Internal function that commits all changes (has to be called with the lock).
+        """
+        self.conn.commit()
+        self._changeGeneration += 1
+
     def _createStorage(self,
                        uniqueID: str):
         """
@@ -628,8 +977,60 @@ class Sqlite(_Storage):
                             + "description TEXT NOT NULL, "
                             + "FOREIGN KEY(nodeId) REFERENCES nodes(id))")
 
+        self._createIndexes()
+
         # commit all changes
-        self.conn.commit()
+        self._commit()
+
+    def _createIndexes(self):
+        """
+        Internal function that creates the indexes used by frequent lookups (nodes are looked up by the
+        index of their unique username).
+        No return value but raise exception if it fails.
+        """
+        # Sensors are looked up by their client sensor id on each state change.
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS sensorsNodeIdClientSensorId "
+                            + "ON sensors (nodeId, clientSensorId)")
+
+        # Sensors that timed out are searched periodically.
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS sensorsLastStateUpdated "
+                            + "ON sensors (lastStateUpdated)")
+
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS alertsNodeIdClientAlertId "
+                            + "ON alerts (nodeId, clientAlertId)")
+
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS managersNodeId "
+                            + "ON managers (nodeId)")
+
+    def _migrateStorage(self,
+                        currDbVersion: int,
+                        logger: logging.Logger = None) -> bool:
+        """
+        Internal function that updates the database layout step by step from the given version to the
+        current version while keeping the stored data. Raises an exception if it fails.
+
+        :param currDbVersion:
+        :param logger:
+        :return: True if the database was updated or False if no migration exists for the given version
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        # Functions that update the database layout from the given version to the next one.
+        migrations = {5: self._createIndexes}
+
+        if any(version not in migrations.keys() for version in range(currDbVersion, self.dbVersion)):
+            return False
+
+        for version in range(currDbVersion, self.dbVersion):
+            logger.info("[%s]: Updating database layout version '%d' to '%d'."
+                        % (self.log_tag, version, version + 1))
+            migrations[version]()
+
+        self.cursor.execute("UPDATE internals SET value = ? WHERE type = ?", (self.dbVersion, "dbversion"))
+        self._commit()
+        return True
 
     def _deleteStorage(self):
         """
@@ -655,7 +1056,7 @@ class Sqlite(_Storage):
         self.cursor.execute("DROP TABLE IF EXISTS sensorAlerts")
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
 
     def _deleteAlertsForNodeId(self,
                                nodeId: int,
@@ -686,7 +1087,7 @@ class Sqlite(_Storage):
                 self.cursor.execute("DELETE FROM alerts WHERE id = ?", (alertIdResult[0], ))
 
             # Commit all changes.
-            self.conn.commit()
+            self._commit()
 
         except Exception as e:
             logger.exception("[%s]: Not able to delete alerts for node with id %d." % (self.log_tag, nodeId))
@@ -713,7 +1114,7 @@ class Sqlite(_Storage):
             self.cursor.execute("DELETE FROM managers WHERE nodeId = ?", (nodeId, ))
 
             # Commit all changes.
-            self.conn.commit()
+            self._commit()
 
         except Exception as e:
             logger.exception("[%s]: Not able to delete manager for node with id %d." % (self.log_tag, nodeId))
@@ -764,15 +1165,16 @@ class Sqlite(_Storage):
             self.cursor.execute("SELECT id FROM sensors WHERE nodeId = ? ", (nodeId, ))
             result = self.cursor.fetchall()
 
-            # Delete all data and sensors of this node.
+            # Delete all alert levels, data and sensors of this node.
             for sensorIdResult in result:
+                self.cursor.execute("DELETE FROM sensorsAlertLevels WHERE sensorId = ?", (sensorIdResult[0], ))
                 self.cursor.execute("DELETE FROM sensorsDataInt WHERE sensorId = ?", (sensorIdResult[0], ))
                 self.cursor.execute("DELETE FROM sensorsDataFloat WHERE sensorId = ?", (sensorIdResult[0], ))
                 self.cursor.execute("DELETE FROM sensorsDataGPS WHERE sensorId = ?", (sensorIdResult[0], ))
                 self.cursor.execute("DELETE FROM sensors WHERE id = ?", (sensorIdResult[0], ))
 
             # Commit all changes.
-            self.conn.commit()
+            self._commit()
 
         except Exception as e:
             logger.exception("[%s]: Not able to delete sensors for node with id %d." % (self.log_tag, nodeId))
@@ -956,9 +1358,13 @@ class Sqlite(_Storage):
         else:
             currDbVersion = -1
 
+        # Update the database layout and keep the stored data if a migration exists for the current version.
+        if currDbVersion < self.dbVersion and currDbVersion != -1 and self._migrateStorage(currDbVersion, logger):
+            logger.info("[%s]: Updated database layout to version '%d'." % (self.log_tag, self.dbVersion))
+
         # If the versions are not compatible
         # => update database schema.
-        if currDbVersion < self.dbVersion:
+        elif currDbVersion < self.dbVersion:
 
             logger.info("[%s]: Needed database version '%d' not compatible with current database layout version '%d'. "
                         % (self.log_tag, self.dbVersion, currDbVersion)
@@ -975,7 +1381,7 @@ class Sqlite(_Storage):
             self._createStorage(uniqueID)
 
             # commit all changes
-            self.conn.commit()
+            self._commit()
 
         # Raise an exception if database layout version
         # is newer than the one we need.
@@ -1193,7 +1599,7 @@ class Sqlite(_Storage):
                     return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
 
         self._releaseLock(logger)
         return True
@@ -1511,7 +1917,7 @@ class Sqlite(_Storage):
                 return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -1733,7 +2139,7 @@ class Sqlite(_Storage):
                 return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -1819,7 +2225,7 @@ class Sqlite(_Storage):
                     return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -1831,7 +2237,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         nodeId = None
         try:
@@ -1840,7 +2246,7 @@ class Sqlite(_Storage):
         except Exception as e:
             logger.exception("[%s]: Not able to get node id." % self.log_tag)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
         return nodeId
 
     def getNodeIds(self,
@@ -1850,7 +2256,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         nodeIds = list()
         try:
@@ -1863,7 +2269,7 @@ class Sqlite(_Storage):
         except Exception as e:
             logger.exception("[%s]: Not able to get node ids." % self.log_tag)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
         return nodeIds
 
     def getSensorCount(self,
@@ -1874,7 +2280,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         # get all sensors on this nodes
         sensorCount = None
@@ -1888,7 +2294,7 @@ class Sqlite(_Storage):
         except Exception as e:
             logger.exception("[%s]: Not able to get sensor count." % self.log_tag)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
         return sensorCount
 
     def getSurveyData(self,
@@ -1898,7 +2304,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         surveyData = None
         try:
@@ -1912,7 +2318,7 @@ class Sqlite(_Storage):
         except Exception as e:
             logger.exception("[%s]: Not able to get survey data." % self.log_tag)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
         return surveyData
 
     def getUniqueID(self,
@@ -1922,9 +2328,9 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
         uniqueID = self._getUniqueID()
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         return uniqueID
 
@@ -1968,7 +2374,7 @@ class Sqlite(_Storage):
                 return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -2043,7 +2449,7 @@ class Sqlite(_Storage):
                 return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -2071,7 +2477,77 @@ class Sqlite(_Storage):
             return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
+        self._releaseLock(logger)
+        return True
+
+    def updateSensorValues(self,
+                           stateList: List[Tuple[int, int, int]],
+                           dataList: List[Tuple[int, int, _SensorData]],
+                           timeList: List[Tuple[int, int]],
+                           logger: logging.Logger = None) -> bool:
+
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        dataIntList = list()
+        dataFloatList = list()
+        dataGPSList = list()
+        for sensorId, dataType, data in dataList:
+            if dataType == SensorDataType.INT:
+                dataIntList.append((data.value, data.unit, sensorId))
+
+            elif dataType == SensorDataType.FLOAT:
+                dataFloatList.append((data.value, data.unit, sensorId))
+
+            elif dataType == SensorDataType.GPS:
+                dataGPSList.append((data.lat, data.lon, data.utctime, sensorId))
+
+        self._acquireLock(logger)
+
+        try:
+            self.cursor.executemany("UPDATE sensors SET "
+                                    + "state = ?, "
+                                    + "lastStateUpdated = ? "
+                                    + "WHERE id = ?",
+                                    [(state, lastStateUpdated, sensorId)
+                                     for sensorId, state, lastStateUpdated in stateList])
+
+            self.cursor.executemany("UPDATE sensors SET "
+                                    + "lastStateUpdated = ? "
+                                    + "WHERE id = ?",
+                                    [(lastStateUpdated, sensorId) for sensorId, lastStateUpdated in timeList])
+
+            self.cursor.executemany("UPDATE sensorsDataInt SET "
+                                    + "value = ?, "
+                                    + "unit = ? "
+                                    + "WHERE sensorId = ?",
+                                    dataIntList)
+
+            self.cursor.executemany("UPDATE sensorsDataFloat SET "
+                                    + "value = ?, "
+                                    + "unit = ? "
+                                    + "WHERE sensorId = ?",
+                                    dataFloatList)
+
+            self.cursor.executemany("UPDATE sensorsDataGPS SET "
+                                    + "lat = ?, "
+                                    + "lon = ?, "
+                                    + "utctime = ? "
+                                    + "WHERE sensorId = ?",
+                                    dataGPSList)
+
+        except Exception as e:
+            logger.exception("[%s]: Not able to update sensor values." % self.log_tag)
+
+            # Do not leave a part of the changes for the next commit.
+            self.conn.rollback()
+            self._releaseLock(logger)
+            return False
+
+        # commit all changes
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -2084,17 +2560,17 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         try:
             sensorId = self._getSensorId(nodeId, clientSensorId)
 
         except Exception as e:
             logger.exception("[%s]: Not able to get sensorId from database." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
         return sensorId
 
     def getAlertId(self,
@@ -2106,17 +2582,17 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         try:
             alertId = self._getAlertId(nodeId, clientAlertId)
 
         except Exception as e:
             logger.exception("[%s]: Not able to get alertId from database." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
         return alertId
 
     def getSensorAlertLevels(self,
@@ -2127,11 +2603,11 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         result = self._getSensorAlertLevels(sensorId, logger)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return list of alertLevel
         return result
@@ -2144,11 +2620,11 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         result = self._getAlertAlertLevels(alertId, logger)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return list of alertLevels
         return result
@@ -2211,7 +2687,7 @@ class Sqlite(_Storage):
             return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -2222,9 +2698,9 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        with self.dbLock:
+        with self._writeAccess(logger):
             if self._delete_option_by_type(option_type, logger):
-                self.conn.commit()
+                self._commit()
                 return True
 
         return False
@@ -2236,7 +2712,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         try:
             self.cursor.execute("SELECT alertLevel "
@@ -2245,11 +2721,11 @@ class Sqlite(_Storage):
 
         except Exception as e:
             logger.exception("[%s]: Not able to get all alert levels for alert clients." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             # return None if action failed
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return list alertLevels as integer
         return [x[0] for x in result]
@@ -2261,7 +2737,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         try:
             self.cursor.execute("SELECT alertLevel "
@@ -2270,11 +2746,11 @@ class Sqlite(_Storage):
 
         except Exception as e:
             logger.exception("[%s]: Not able to get all alert levels for sensors." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             # return None if action failed
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return list alertLevels as integer
         return [x[0] for x in result]
@@ -2286,7 +2762,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         # get all connected node ids from database
         try:
@@ -2297,11 +2773,11 @@ class Sqlite(_Storage):
 
         except Exception as e:
             logger.exception("[%s]: Not able to get all connected node ids." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             # return None if action failed
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return list of nodeIds
         return [x[0] for x in result]
@@ -2313,7 +2789,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         # get all persistent node ids from database
         try:
@@ -2324,11 +2800,11 @@ class Sqlite(_Storage):
 
         except Exception as e:
             logger.exception("[%s]: Not able to get all persistent node ids." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             # return None if action failed
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return list of nodeIds
         return [x[0] for x in result]
@@ -2354,7 +2830,7 @@ class Sqlite(_Storage):
             return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -2379,7 +2855,7 @@ class Sqlite(_Storage):
             return False
 
         # commit all changes
-        self.conn.commit()
+        self._commit()
         self._releaseLock(logger)
         return True
 
@@ -2391,30 +2867,21 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
-        sensorList = list()
         try:
-            self.cursor.execute("SELECT id "
-                                + "FROM sensors "
-                                + "WHERE lastStateUpdated < ?",
-                                (oldestTimeUpdated, ))
-
-            results = self.cursor.fetchall()
-
-            for resultTuple in results:
-                sensorId = resultTuple[0]
-                sensor = self._getSensorById(sensorId, logger)
-                if sensor is not None:
-                    sensorList.append(sensor)
+            # Sensors that can not be converted to objects are skipped.
+            sensorList, _ = self._getSensors("WHERE lastStateUpdated < ?",
+                                             (oldestTimeUpdated, ),
+                                             logger)
 
         except Exception as e:
             logger.exception("[%s]: Not able to get sensors from database which update was older than %d."
                              % (self.log_tag, oldestTimeUpdated))
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return list of sensor objects
         return sensorList
@@ -2427,11 +2894,11 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         result = self._getAlertById(alertId, logger)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return an alert object or None
         return result
@@ -2444,11 +2911,11 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         result = self._getManagerById(managerId, logger)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return a manager object or None
         return result
@@ -2461,11 +2928,11 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         result = self._getNodeById(nodeId, logger)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return a node object or None
         return result
@@ -2478,11 +2945,11 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         result = self._getSensorById(sensorId, logger)
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return a sensor object or None
         return result
@@ -2495,7 +2962,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        with self.dbLock:
+        with self._readAccess(logger):
             return self._get_option_by_type(option_type,
                                             logger)
 
@@ -2505,7 +2972,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        with self.dbLock:
+        with self._readAccess(logger):
             return self._get_options_list(logger)
 
     def getNodes(self,
@@ -2515,7 +2982,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         nodes = list()
         try:
@@ -2529,10 +2996,10 @@ class Sqlite(_Storage):
 
         except Exception as e:
             logger.exception("[%s]: Not able to get nodes from database." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # list(node objects)
         return nodes
@@ -2548,7 +3015,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         try:
 
@@ -2573,37 +3040,15 @@ class Sqlite(_Storage):
                 nodeList.append(nodeObj)
 
             # Get all sensors.
-            sensorList = list()
-            self.cursor.execute("SELECT id FROM sensors")
-            results = self.cursor.fetchall()
-            for resultTuple in results:
-                sensorObj = self._getSensorById(resultTuple[0], logger)
-                if sensorObj is None:
-                    raise ValueError("Can not retrieve sensor with id %d." % resultTuple[0])
-
-                sensorList.append(sensorObj)
+            sensorList, failedSensorIds = self._getSensors(logger=logger)
+            if failedSensorIds:
+                raise ValueError("Can not retrieve sensor with id %d." % failedSensorIds[0])
 
             # Get all managers.
-            managerList = list()
-            self.cursor.execute("SELECT id FROM managers")
-            results = self.cursor.fetchall()
-            for resultTuple in results:
-                managerObj = self._getManagerById(resultTuple[0], logger)
-                if managerObj is None:
-                    raise ValueError("Can not retrieve manager with id %d." % resultTuple[0])
-
-                managerList.append(managerObj)
+            managerList = self._getManagers()
 
             # Get all alerts.
-            alertList = list()
-            self.cursor.execute("SELECT id FROM alerts")
-            results = self.cursor.fetchall()
-            for resultTuple in results:
-                alertObj = self._getAlertById(resultTuple[0], logger)
-                if alertObj is None:
-                    raise ValueError("Can not retrieve alert with id %d." % resultTuple[0])
-
-                alertList.append(alertObj)
+            alertList = self._getAlerts()
 
             # Generate a list with system information.
             alertSystemInformation = list()
@@ -2615,10 +3060,10 @@ class Sqlite(_Storage):
 
         except Exception as e:
             logger.exception("[%s]: Not able to get complete system information from database." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return a list of
         # list[0] = list(option objects)
@@ -2636,7 +3081,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         try:
             # get sensor state from database
@@ -2647,17 +3092,17 @@ class Sqlite(_Storage):
             result = self.cursor.fetchall()
             if len(result) != 1:
                 logger.error("[%s]: Sensor was not found." % self.log_tag)
-                self._releaseLock(logger)
+                self._releaseReadLock(logger)
                 return None
 
             state = result[0][0]
 
         except Exception as e:
             logger.exception("[%s]: Not able to get sensor state from database." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
         return state
 
     def getSensorData(self,
@@ -2668,7 +3113,7 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        self._acquireLock(logger)
+        self._acquireReadLock(logger)
 
         try:
             # Get data type from database.
@@ -2679,14 +3124,14 @@ class Sqlite(_Storage):
             result = self.cursor.fetchall()
             if len(result) != 1:
                 logger.error("[%s]: Sensor was not found." % self.log_tag)
-                self._releaseLock(logger)
+                self._releaseReadLock(logger)
                 return None
 
             dataType = result[0][0]
 
         except Exception as e:
             logger.exception("[%s]: Not able to get sensor data type from database." % self.log_tag)
-            self._releaseLock(logger)
+            self._releaseReadLock(logger)
             return None
 
         data = SensorData()
@@ -2705,7 +3150,7 @@ class Sqlite(_Storage):
                 result = self.cursor.fetchall()
                 if len(result) != 1:
                     logger.error("[%s]: Sensor data was not found." % self.log_tag)
-                    self._releaseLock(logger)
+                    self._releaseReadLock(logger)
                     return None
 
                 data.data = SensorDataInt(result[0][0],
@@ -2713,7 +3158,7 @@ class Sqlite(_Storage):
 
             except Exception as e:
                 logger.exception("[%s]: Not able to get sensor data from database." % self.log_tag)
-                self._releaseLock(logger)
+                self._releaseReadLock(logger)
                 return None
 
         elif dataType == SensorDataType.FLOAT:
@@ -2726,7 +3171,7 @@ class Sqlite(_Storage):
                 result = self.cursor.fetchall()
                 if len(result) != 1:
                     logger.error("[%s]: Sensor data was not found." % self.log_tag)
-                    self._releaseLock(logger)
+                    self._releaseReadLock(logger)
                     return None
 
                 data.data = SensorDataFloat(result[0][0],
@@ -2734,7 +3179,7 @@ class Sqlite(_Storage):
 
             except Exception as e:
                 logger.exception("[%s]: Not able to get sensor data from database." % self.log_tag)
-                self._releaseLock(logger)
+                self._releaseReadLock(logger)
                 return None
 
         elif dataType == SensorDataType.GPS:
@@ -2747,7 +3192,7 @@ class Sqlite(_Storage):
                 result = self.cursor.fetchall()
                 if len(result) != 1:
                     logger.error("[%s]: Sensor data was not found." % self.log_tag)
-                    self._releaseLock(logger)
+                    self._releaseReadLock(logger)
                     return None
 
                 data.data = SensorDataGPS(result[0][0],
@@ -2756,14 +3201,33 @@ class Sqlite(_Storage):
 
             except Exception as e:
                 logger.exception("[%s]: Not able to get sensor data from database." % self.log_tag)
-                self._releaseLock(logger)
+                self._releaseReadLock(logger)
                 return None
 
-        self._releaseLock(logger)
+        self._releaseReadLock(logger)
 
         # return a sensor data object or None
         return data
 
+    def getChangeGeneration(self,
+                            logger: logging.Logger = None) -> int:
+        return self._changeGeneration
+
+    def getLockStatistics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Gets the contention of the writing functions (waiting for the lock) and the reading functions
+        (waiting for a read connection or the lock).
+
+        :return: dictionary with statistics for "write" and "read"
+        """
+        return {"write": self._writeStatistics.getStatistics(),
+                "read": self._readStatistics.getStatistics()}
+
+    def getMethodLockStatistics(self) -> Dict[str, Dict[str, float]]:
+        if self._methodStatistics is None:
+            return dict()
+        return {k: v.getStatistics() for k, v in list(self._methodStatistics.items())}
+
     def close(self,
               logger: logging.Logger = None):
 
@@ -2773,9 +3237,13 @@ class Sqlite(_Storage):
 
         self._acquireLock(logger)
 
-        self.cursor.close()
+        self._writeCursor.close()
         self.conn.close()
 
+        if self._readPool is not None:
+            for readConn in self._readConnections:
+                readConn.close()
+
         self._releaseLock(logger)
 
     def update_option(self,
@@ -2791,9 +3259,9 @@ class Sqlite(_Storage):
         option.type = option_type
         option.value = option_value
 
-        with self.dbLock:
+        with self._writeAccess(logger):
             if self._update_option(option, logger):
-                self.conn.commit()
+                self._commit()
                 return True
 
         return False
@@ -2806,9 +3274,9 @@ class Sqlite(_Storage):
         if not logger:
             logger = self.logger
 
-        with self.dbLock:
+        with self._writeAccess(logger):
             if self._update_option(option, logger):
-                self.conn.commit()
+                self._commit()
                 return True
 
         return False
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: https://h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import os
+import threading
+import time
+import logging
+from typing import Any, Optional, List, Union, Tuple, Dict
+from .core import _Storage
+from ..globalData import GlobalData
+from ..localObjects import Node, Alert, Manager, Sensor, Option, SensorData, SensorDataType, _SensorData
+
+
+class WriteBehindStorage(_Storage):
+    """
+    Storage backend that queues the state, data and time updates of sensors instead of writing each of them
+    directly to the wrapped storage backend. Queued updates of the same sensor are coalesced (the last value wins)
+    and written in one transaction every flush interval or as soon as the given number of updates is queued.
+    Reading the state, data or time of sensors and structural changes (nodes and sensors) write the queued
+    updates first. All other requests are passed directly to the wrapped storage backend.
+    """
+
+    def __init__(self,
+                 backend: _Storage,
+                 globalData: GlobalData,
+                 flushInterval: float = 0.2,
+                 maxPendingUpdates: int = 500):
+
+        self.globalData = globalData
+        self.logger = self.globalData.logger
+
+        # file nme of this file (used for logging)
+        self.log_tag = os.path.basename(__file__)
+
+        # Storage backend the queued updates are written to.
+        self._backend = backend
+
+        # Seconds between writing the queued updates and number of queued updates that are written at once.
+        self._flushInterval = flushInterval
+        self._maxPendingUpdates = maxPendingUpdates
+
+        # Lock for the queued updates (only held while they are changed).
+        self._pendingLock = threading.Lock()
+
+        # Queued updates are written by one thread at a time.
+        self._flushLock = threading.Lock()
+
+        # Queued updates by sensor id.
+        self._pendingStates = dict()  # type: Dict[int, Tuple[int, int]]
+        self._pendingData = dict()  # type: Dict[int, Tuple[int, _SensorData]]
+        self._pendingTimes = dict()  # type: Dict[int, int]
+
+        # Sensor id and data type by node id and client sensor id (used to check updates before queuing them).
+        self._sensorKeys = dict()  # type: Dict[Tuple[int, int], Tuple[int, int]]
+
+        # Counter of changes accepted by this storage backend.
+        self._changeGeneration = 0
+
+        # Number of writes of queued updates and number of written updates.
+        self.flushCount = 0
+        self.flushedUpdates = 0
+
+        self._exitFlag = False
+        self._flushEvent = threading.Event()
+        self._flushThread = threading.Thread(target=self._flushLoop, daemon=True)
+        self._flushThread.start()
+
+    def _flushLoop(self):
+        """
+        Internal function of the thread that writes the queued updates.
+        """
+        while not self._exitFlag:
+            self._flushEvent.wait(self._flushInterval)
+            self._flushEvent.clear()
+            self._flush()
+
+    def _flush(self,
+               logger: logging.Logger = None) -> bool:
+        """
+        Internal function that writes all queued updates to the storage backend. If writing fails,
+        the updates are queued again unless newer updates for the same sensors were queued in the meantime.
+
+        :param logger:
+        :return: Success or Failure
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        with self._flushLock:
+            with self._pendingLock:
+                if not self._pendingStates and not self._pendingData and not self._pendingTimes:
+                    return True
+
+                pendingStates = self._pendingStates
+                pendingData = self._pendingData
+                pendingTimes = self._pendingTimes
+                self._pendingStates = dict()
+                self._pendingData = dict()
+                self._pendingTimes = dict()
+
+            stateList = [(sensorId, state, lastStateUpdated)
+                         for sensorId, (state, lastStateUpdated) in pendingStates.items()]
+            dataList = [(sensorId, dataType, data) for sensorId, (dataType, data) in pendingData.items()]
+            timeList = list(pendingTimes.items())
+
+            if not self._backend.updateSensorValues(stateList, dataList, timeList, logger):
+                logger.error("[%s]: Not able to write %d queued sensor updates."
+                             % (self.log_tag, len(stateList) + len(dataList) + len(timeList)))
+
+                with self._pendingLock:
+                    for sensorId, (state, lastStateUpdated) in pendingStates.items():
+                        if sensorId in self._pendingStates:
+                            continue
+                        # A newer time update is merged into the older state update.
+                        lastStateUpdated = self._pendingTimes.pop(sensorId, lastStateUpdated)
+                        self._pendingStates[sensorId] = (state, lastStateUpdated)
+
+                    for sensorId, dataTuple in pendingData.items():
+                        self._pendingData.setdefault(sensorId, dataTuple)
+
+                    for sensorId, lastStateUpdated in pendingTimes.items():
+                        if sensorId not in self._pendingStates:
+                            self._pendingTimes.setdefault(sensorId, lastStateUpdated)
+
+                return False
+
+            self.flushCount += 1
+            self.flushedUpdates += len(stateList) + len(dataList) + len(timeList)
+
+        return True
+
+    def _queued(self):
+        """
+        Internal function that is called after updates were queued (has to be called with the pending lock).
+        """
+        self._changeGeneration += 1
+        if len(self._pendingStates) + len(self._pendingData) + len(self._pendingTimes) >= self._maxPendingUpdates:
+            self._flushEvent.set()
+
+    def _getSensorKey(self,
+                      nodeId: int,
+                      clientSensorId: int,
+                      logger: logging.Logger = None) -> Optional[Tuple[int, int]]:
+        """
+        Internal function that gets the sensor id and data type of a sensor given by its node id and client
+        sensor id.
+
+        :param nodeId:
+        :param clientSensorId:
+        :param logger:
+        :return: tuple of (sensorId, dataType) or None if the sensor does not exist
+        """
+        # Set logger instance to use.
+        if not logger:
+            logger = self.logger
+
+        sensorKey = self._sensorKeys.get((nodeId, clientSensorId))
+        if sensorKey is not None:
+            return sensorKey
+
+        sensorId = self._backend.getSensorId(nodeId, clientSensorId, logger)
+        if sensorId is None:
+            logger.error("[%s]: Sensor does not exist in database." % self.log_tag)
+            return None
+
+        sensor = self._backend.getSensorById(sensorId, logger)
+        if sensor is None:
+            logger.error("[%s]: Sensor does not exist in database." % self.log_tag)
+            return None
+
+        sensorKey = (sensorId, sensor.dataType)
+        self._sensorKeys[(nodeId, clientSensorId)] = sensorKey
+        return sensorKey
+
+    def _changed(self,
+                 result: bool,
+                 clearSensorKeys: bool = False) -> bool:
+        """
+        Internal function that is called after a change was passed to the storage backend.
+
+        :param result: result of the change
+        :param clearSensorKeys: the change can add, change or remove sensors
+        :return: result of the change
+        """
+        with self._pendingLock:
+            if clearSensorKeys:
+                self._sensorKeys.clear()
+            self._changeGeneration += 1
+        return result
+
+    def checkVersionAndClearConflict(self,
+                                     logger: logging.Logger = None):
+        self._flush(logger)
+        self._backend.checkVersionAndClearConflict(logger)
+        self._changed(True, clearSensorKeys=True)
+
+    def addNode(self,
+                username: str,
+                hostname: str,
+                nodeType: str,
+                instance: str,
+                version: float,
+                rev: int,
+                persistent: int,
+                logger: logging.Logger = None) -> bool:
+        self._flush(logger)
+        return self._changed(self._backend.addNode(username,
+                                                   hostname,
+                                                   nodeType,
+                                                   instance,
+                                                   version,
+                                                   rev,
+                                                   persistent,
+                                                   logger),
+                             clearSensorKeys=True)
+
+    def addSensors(self,
+                   username: str,
+                   sensors: List[Dict[str, Any]],
+                   logger: logging.Logger = None) -> bool:
+        self._flush(logger)
+        return self._changed(self._backend.addSensors(username, sensors, logger), clearSensorKeys=True)
+
+    def addAlerts(self,
+                  username: str,
+                  alerts: List[Dict[str, Any]],
+                  logger: logging.Logger = None) -> bool:
+        return self._changed(self._backend.addAlerts(username, alerts, logger))
+
+    def addManager(self,
+                   username: str,
+                   manager: Dict[str, Any],
+                   logger: logging.Logger = None) -> bool:
+        return self._changed(self._backend.addManager(username, manager, logger))
+
+    def getNodeId(self,
+                  username: str,
+                  logger: logging.Logger = None) -> Optional[int]:
+        return self._backend.getNodeId(username, logger)
+
+    def getNodeIds(self,
+                   logger: logging.Logger = None) -> List[int]:
+        return self._backend.getNodeIds(logger)
+
+    def getSensorCount(self,
+                       nodeId: str,
+                       logger: logging.Logger = None) -> Optional[int]:
+        return self._backend.getSensorCount(nodeId, logger)
+
+    def getSensorId(self,
+                    nodeId: int,
+                    clientSensorId: int,
+                    logger: logging.Logger = None) -> Optional[int]:
+        return self._backend.getSensorId(nodeId, clientSensorId, logger)
+
+    def getSurveyData(self,
+                      logger: logging.Logger = None) -> Optional[List[Tuple[str, float, int]]]:
+        return self._backend.getSurveyData(logger)
+
+    def getUniqueID(self,
+                    logger: logging.Logger = None) -> Optional[str]:
+        return self._backend.getUniqueID(logger)
+
+    def getAlertId(self,
+                   nodeId: int,
+                   clientAlertId: int,
+                   logger: logging.Logger = None) -> Optional[int]:
+        return self._backend.getAlertId(nodeId, clientAlertId, logger)
+
+    def getSensorAlertLevels(self,
+                             sensorId: int,
+                             logger: logging.Logger = None) -> Optional[List[int]]:
+        return self._backend.getSensorAlertLevels(sensorId, logger)
+
+    def getAlertAlertLevels(self,
+                            alertId: int,
+                            logger: logging.Logger = None) -> Optional[List[int]]:
+        return self._backend.getAlertAlertLevels(alertId, logger)
+
+    def getAllAlertsAlertLevels(self,
+                                logger: logging.Logger = None) -> Optional[List[int]]:
+        return self._backend.getAllAlertsAlertLevels(logger)
+
+    def getAllSensorsAlertLevels(self,
+                                 logger: logging.Logger = None) -> Optional[List[int]]:
+        return self._backend.getAllSensorsAlertLevels(logger)
+
+    def getAllConnectedNodeIds(self,
+                               logger: logging.Logger = None) -> Optional[List[int]]:
+        return self._backend.getAllConnectedNodeIds(logger)
+
+    def getAllPersistentNodeIds(self,
+                                logger: logging.Logger = None) -> Optional[List[int]]:
+        return self._backend.getAllPersistentNodeIds(logger)
+
+    def getSensorsUpdatedOlderThan(self,
+                                   oldestTimeUpdated: int,
+                                   logger: logging.Logger = None) -> Optional[List[Sensor]]:
+        self._flush(logger)
+        return self._backend.getSensorsUpdatedOlderThan(oldestTimeUpdated, logger)
+
+    def getAlertById(self,
+                     alertId: int,
+                     logger: logging.Logger = None) -> Optional[Alert]:
+        return self._backend.getAlertById(alertId, logger)
+
+    def getManagerById(self,
+                       managerId: int,
+                       logger: logging.Logger = None) -> Optional[Manager]:
+        return self._backend.getManagerById(managerId, logger)
+
+    def getNodeById(self,
+                    nodeId: int,
+                    logger: logging.Logger = None) -> Optional[Node]:
+        return self._backend.getNodeById(nodeId, logger)
+
+    def getSensorById(self,
+                      sensorId: int,
+                      logger: logging.Logger = None) -> Optional[Sensor]:
+        self._flush(logger)
+        return self._backend.getSensorById(sensorId, logger)
+
+    def get_option_by_type(self,
+                           option_type: str,
+                           logger: logging.Logger = None) -> Optional[Option]:
+        return self._backend.get_option_by_type(option_type, logger)
+
+    def get_options_list(self, logger: logging.Logger = None) -> Optional[List[Option]]:
+        return self._backend.get_options_list(logger)
+
+    def getNodes(self,
+                 logger: logging.Logger = None) -> Optional[List[Node]]:
+        return self._backend.getNodes(logger)
+
+    def getAlertSystemInformation(self,
+                                  logger: logging.Logger = None) \
+            -> Optional[List[List[Union[Option, Node, Sensor, Manager, Alert]]]]:
+        self._flush(logger)
+        return self._backend.getAlertSystemInformation(logger)
+
+    def getSensorState(self,
+                       sensorId: int,
+                       logger: logging.Logger = None) -> Optional[int]:
+        self._flush(logger)
+        return self._backend.getSensorState(sensorId, logger)
+
+    def getSensorData(self,
+                      sensorId: int,
+                      logger: logging.Logger = None) -> Optional[SensorData]:
+        self._flush(logger)
+        return self._backend.getSensorData(sensorId, logger)
+
+    def markNodeAsNotConnected(self,
+                               nodeId: int,
+                               logger: logging.Logger = None) -> bool:
+        return self._changed(self._backend.markNodeAsNotConnected(nodeId, logger))
+
+    def markNodeAsConnected(self,
+                            nodeId: int,
+                            logger: logging.Logger = None) -> bool:
+        return self._changed(self._backend.markNodeAsConnected(nodeId, logger))
+
+    def deleteNode(self,
+                   nodeId: int,
+                   logger: logging.Logger = None) -> bool:
+        self._flush(logger)
+        return self._changed(self._backend.deleteNode(nodeId, logger), clearSensorKeys=True)
+
+    def delete_option_by_type(self,
+                              option_type: str,
+                              logger: logging.Logger = None) -> bool:
+        return self._changed(self._backend.delete_option_by_type(option_type, logger))
+
+    def updateSensorState(self,
+                          nodeId: int,
+                          stateList: List[Tuple[int, int]],
+                          logger: logging.Logger = None) -> bool:
+
+        # Check all sensors before queuing any update.
+        sensorKeys = list()
+        for clientSensorId, _ in stateList:
+            sensorKey = self._getSensorKey(nodeId, clientSensorId, logger)
+            if sensorKey is None:
+                return False
+            sensorKeys.append(sensorKey)
+
+        utcTimestamp = int(time.time())
+        with self._pendingLock:
+            for (sensorId, _), (_, state) in zip(sensorKeys, stateList):
+                self._pendingStates[sensorId] = (state, utcTimestamp)
+                self._pendingTimes.pop(sensorId, None)
+            self._queued()
+
+        return True
+
+    def updateSensorData(self,
+                         nodeId: int,
+                         dataList: List[Tuple[int, _SensorData]],
+                         logger: logging.Logger = None) -> bool:
+
+        # Check all sensors before queuing any update.
+        sensorKeys = list()
+        for clientSensorId, _ in dataList:
+            sensorKey = self._getSensorKey(nodeId, clientSensorId, logger)
+            if sensorKey is None:
+                return False
+            sensorKeys.append(sensorKey)
+
+        with self._pendingLock:
+            for (sensorId, dataType), (_, data) in zip(sensorKeys, dataList):
+                # The storage backend does not store data for sensors without data.
+                if dataType != SensorDataType.NONE:
+                    dataCopy = SensorDataType.get_sensor_data_class(dataType).deepcopy(data)
+                    self._pendingData[sensorId] = (dataType, dataCopy)
+            self._queued()
+
+        return True
+
+    def updateSensorTime(self,
+                         sensorId: int,
+                         logger: logging.Logger = None) -> bool:
+
+        utcTimestamp = int(time.time())
+        with self._pendingLock:
+            if sensorId in self._pendingStates:
+                self._pendingStates[sensorId] = (self._pendingStates[sensorId][0], utcTimestamp)
+            else:
+                self._pendingTimes[sensorId] = utcTimestamp
+            self._queued()
+
+        return True
+
+    def updateSensorValues(self,
+                           stateList: List[Tuple[int, int, int]],
+                           dataList: List[Tuple[int, int, _SensorData]],
+                           timeList: List[Tuple[int, int]],
+                           logger: logging.Logger = None) -> bool:
+
+        # The values are queued like the single updates and written with the next flush
+        # (the given sensor ids were already resolved by the caller).
+        with self._pendingLock:
+            for sensorId, state, lastStateUpdated in stateList:
+                self._pendingStates[sensorId] = (state, lastStateUpdated)
+                self._pendingTimes.pop(sensorId, None)
+
+            for sensorId, dataType, data in dataList:
+                # The storage backend does not store data for sensors without data.
+                if dataType != SensorDataType.NONE:
+                    dataCopy = SensorDataType.get_sensor_data_class(dataType).deepcopy(data)
+                    self._pendingData[sensorId] = (dataType, dataCopy)
+
+            for sensorId, lastStateUpdated in timeList:
+                if sensorId in self._pendingStates:
+                    self._pendingStates[sensorId] = (self._pendingStates[sensorId][0], lastStateUpdated)
+                else:
+                    self._pendingTimes[sensorId] = lastStateUpdated
+
+            self._queued()
+
+        return True
+
+    def getMethodLockStatistics(self) -> Dict[str, Dict[str, float]]:
+        return self._backend.getMethodLockStatistics()
+
+    def getChangeGeneration(self,
+                            logger: logging.Logger = None) -> int:
+        return self._changeGeneration
+
+    def close(self,
+              logger: logging.Logger = None):
+        self._exitFlag = True
+        self._flushEvent.set()
+        self._flushThread.join()
+        self._flush(logger)
+        self._backend.close(logger)
+
+    def update_option(self,
+                      option_type: str,
+                      option_value: int,
+                      logger: logging.Logger = None) -> bool:
+        return self._changed(self._backend.update_option(option_type, option_value, logger))
+
+    def update_option_by_obj(self,
+                             option: Option,
+                             logger: logging.Logger = None) -> bool:
+        return self._changed(self._backend.update_option_by_obj(option, logger))
@@ -10,8 +10,9 @@
 import threading
 import time
 import os
-from typing import List, Optional, Set, Tuple
-from ..localObjects import Sensor
+from typing import Dict, List, Optional, Set, Tuple
+from .sensorDeadlines import SensorDeadlines
+from ..localObjects import Node, Sensor
 from ..globalData import GlobalData
 from ..internalSensors import NodeTimeoutSensor, SensorTimeoutSensor
 
@@ -62,6 +63,15 @@ class ConnectionWatchdog(threading.Thread):
         self.gracePeriodTimeout = self.globalData.gracePeriodTimeout
         self._nodeTimeoutLock = threading.Lock()
 
+        # Times at which the sensors time out (updated with each state/status update of a sensor)
+        # and the configured timeouts of single sensors by (username, clientSensorId).
+        self._sensorDeadlines = SensorDeadlines(int(1.5 * self.gracePeriodTimeout))
+        self._sensorTimeouts = self.globalData.sensorTimeouts  # type: Dict[Tuple[str, int], int]
+
+        # Ids of the tracked sensors by node id (to stop tracking sensors that were deleted).
+        self._nodeSensorIds = dict()  # type: Dict[int, Set[int]]
+        self._nodeSensorIdsLock = threading.Lock()
+
         # Get activated internal sensors.
         for internalSensor in self.internalSensors:
             if isinstance(internalSensor, SensorTimeoutSensor):
@@ -131,29 +141,21 @@ class ConnectionWatchdog(threading.Thread):
         """
         Internal function that processes old occurred node timeouts and raises alarm when they are no longer timed out.
         """
-        # Check all server sessions if a timed out connection reconnected.
-        for serverSession in self.serverSessions:
-
-            # Check if client communication object exists.
-            if serverSession.clientComm is None:
-                continue
-
-            nodeId = serverSession.clientComm.nodeId
-            if nodeId is None or nodeId not in self._timeoutNodeIds:
-                continue
+        # Check if a timed out node reconnected.
+        self._acquireNodeTimeoutLock()
+        reconnectedNodeIds = self._timeoutNodeIds & self.serverSessions.get_connected_node_ids()
+        self._releaseNodeTimeoutLock()
 
+        for nodeId in reconnectedNodeIds:
             self.removeNodeTimeout(nodeId)
 
     def _processNewSensorTimeouts(self,
-                                  sensorsTimeoutList: Optional[List[Sensor]]):
+                                  sensorIds: List[int]):
         """
         Internal function that processes new occurred sensor timeouts and raises alarm.
 
-        :param sensorsTimeoutList:
+        :param sensorIds: ids of the sensors that timed out
         """
-        if sensorsTimeoutList is None:
-            return
-
         # Needed to check if a sensor timeout has occurred when there was
         # no timeout before.
         wasEmpty = True
@@ -162,10 +164,20 @@ class ConnectionWatchdog(threading.Thread):
 
         # Generate an alert for every timed out sensor
         # (self.logger + internal "sensor timeout" sensor).
-        for sensorObj in sensorsTimeoutList:
-            sensorId = sensorObj.sensorId
+        nodes = dict()  # type: Dict[int, Optional[Node]]
+        for sensorId in sensorIds:
+            sensorObj = self.storage.getSensorById(sensorId)
+            # Since sensors are removed when their node is deleted or registers without them,
+            # check if the sensor still exists in the database.
+            if sensorObj is None:
+                self.logger.debug("[%s]: Sensor with id %d does not exist anymore." % (self.fileName, sensorId))
+                self._sensorDeadlines.remove(sensorId)
+                continue
+
             nodeId = sensorObj.nodeId
-            nodeObj = self.storage.getNodeById(nodeId)
+            if nodeId not in nodes:
+                nodes[nodeId] = self.storage.getNodeById(nodeId)
+            nodeObj = nodes[nodeId]
             # Since a user can be deleted during runtime, check if the
             # node still existed in the database.
             if nodeObj is None:
@@ -197,27 +209,18 @@ class ConnectionWatchdog(threading.Thread):
             self.lastSensorTimeoutReminder = utcTimestamp
 
     def _processOldSensorTimeouts(self,
-                                  sensorsTimeoutList: Optional[List[Sensor]]):
+                                  sensorIds: Set[int]):
         """
         Internal function that processes old occurred sensor timeouts
         and raises alarm when they are no longer timed out.
 
-        :param sensorsTimeoutList:
+        :param sensorIds: ids of the timed out sensors that sent an update again
         """
-        if sensorsTimeoutList is None:
-            return
-
         # check if a timed out sensor has reconnected and
         # updated its state and generate a notification
-        for sensorId in set(self._timeoutSensorIds):
-
-            # Skip if an old timed out sensor is still timed out.
-            found = False
-            for sensorObj in sensorsTimeoutList:
-                if sensorId == sensorObj.sensorId:
-                    found = True
-                    break
-            if found:
+        for sensorId in sensorIds:
+
+            if sensorId not in self._timeoutSensorIds:
                 continue
 
             # Sensor is no longer timed out.
@@ -254,6 +257,55 @@ class ConnectionWatchdog(threading.Thread):
         if not self._timeoutSensorIds:
             self.lastSensorTimeoutReminder = 0
 
+    def _loadSensorDeadlines(self) -> bool:
+        """
+        Internal function that sets the deadlines of all sensors in the database
+        (the internal sensors of this server instance do not time out).
+
+        :return: success or failure
+        """
+        sensors = self.storage.getSensorsUpdatedOlderThan(int(time.time()) + 1)
+        if sensors is None:
+            self.logger.error("[%s]: Could not get sensors from database." % self.fileName)
+            return False
+
+        usernames = dict()  # type: Dict[int, Optional[str]]
+        for sensor in sensors:
+            if sensor.nodeId == self.serverNodeId:
+                continue
+
+            if sensor.nodeId not in usernames:
+                nodeObj = self.storage.getNodeById(sensor.nodeId)
+                usernames[sensor.nodeId] = None if nodeObj is None else nodeObj.username
+
+            self._sensorDeadlines.set_timeout(sensor.sensorId,
+                                              self._sensorTimeouts.get((usernames[sensor.nodeId],
+                                                                        sensor.clientSensorId)))
+            self._sensorDeadlines.update(sensor.sensorId, sensor.lastStateUpdated)
+
+            with self._nodeSensorIdsLock:
+                self._nodeSensorIds.setdefault(sensor.nodeId, set()).add(sensor.sensorId)
+
+        return True
+
+    def _processSensorTimeouts(self):
+        """
+        Internal function that processes sensors that timed out since the last check
+        and timed out sensors that sent an update again.
+        """
+        utcTimestamp = int(time.time())
+        timedOutSensorIds = self._sensorDeadlines.pop_expired(utcTimestamp)
+        recoveredSensorIds = self._sensorDeadlines.pop_recovered()
+
+        # Process occurred sensor time outs (and if they newly occurred).
+        self._processNewSensorTimeouts(timedOutSensorIds)
+
+        # Sensors that timed out but were deleted in the meantime are no longer timed out.
+        self._timeoutSensorIds.difference_update(self._sensorDeadlines.pop_removed())
+
+        # Process sensors that timed out but reconnected.
+        self._processOldSensorTimeouts(recoveredSensorIds - set(timedOutSensorIds))
+
     def _processTimeoutReminder(self):
         """
         Internal function that checks if a reminder of a timeout has to be raised.
@@ -350,32 +402,15 @@ class ConnectionWatchdog(threading.Thread):
 
         else:
 
-            # Check if node marked as connected got a connection
-            # to the server.
-            for nodeId in nodeIds:
-                found = False
+            dbNodeIds = set(nodeIds)
+            connectedNodeIds = self.serverSessions.get_connected_node_ids()
 
-                # Skip node id of this server instance.
+            # Nodes marked as connected in the database without an active connection
+            # to this server (except the node of this server instance).
+            for nodeId in dbNodeIds - connectedNodeIds:
                 if nodeId == self.serverNodeId:
                     continue
 
-                # Skip node ids that have an active connection
-                # to this server.
-                for serverSession in self.serverSessions:
-
-                    # Check if client communication object exists and
-                    # client is initialized.
-                    if serverSession.clientComm is None or not serverSession.clientComm.clientInitialized:
-                        continue
-
-                    if serverSession.clientComm.nodeId == nodeId:
-                        found = True
-                        break
-                if found:
-                    continue
-
-                # If no server session was found with the node id
-                # => node is not connected to the server.
                 self.logger.debug("[%s]: Marking node '%d' as not connected." % (self.fileName, nodeId))
 
                 if not self.storage.markNodeAsNotConnected(nodeId):
@@ -383,24 +418,12 @@ class ConnectionWatchdog(threading.Thread):
 
                 sendManagerUpdates = True
 
-            # Check if all connections to the server are marked as connected
-            # in the database.
-            for serverSession in self.serverSessions:
+            # Nodes with an active connection to this server that are not marked as connected in the database.
+            for nodeId in connectedNodeIds - dbNodeIds:
+                self.logger.debug("[%s]: Marking node '%d' as connected." % (self.fileName, nodeId))
 
-                # Check if client communication object exists and
-                # client is initialized.
-                if serverSession.clientComm is None or not serverSession.clientComm.clientInitialized:
-                    continue
-
-                nodeId = serverSession.clientComm.nodeId
-                if nodeId not in nodeIds:
-
-                    # If server session was found but not marked as connected
-                    # in database => mark node as connected in database.
-                    self.logger.debug("[%s]: Marking node '%d' as connected." % (self.fileName, nodeId))
-
-                    if not self.storage.markNodeAsConnected(nodeId):
-                        self.logger.error("[%s]: Could not mark node as connected in database." % self.fileName)
+                if not self.storage.markNodeAsConnected(nodeId):
+                    self.logger.error("[%s]: Could not mark node as connected in database." % self.fileName)
 
         # Wake up manager update executer and force to send an update to
         # all managers.
@@ -525,6 +548,56 @@ class ConnectionWatchdog(threading.Thread):
 
         self._releaseNodeTimeoutLock()
 
+    def addSensorDeadlines(self,
+                           nodeId: int,
+                           username: str,
+                           sensors: List[Sensor]):
+        """
+        Public function that starts the timeout detection for the sensors of a registered node
+        (uses the configured timeouts of the sensors) and stops it for sensors the node does not have anymore.
+
+        :param nodeId: id of the node
+        :param username: username of the node
+        :param sensors: sensor objects with the sensor id, client sensor id and the time of the last update
+        """
+        for sensor in sensors:
+            self._sensorDeadlines.set_timeout(sensor.sensorId,
+                                              self._sensorTimeouts.get((username, sensor.clientSensorId)))
+            self._sensorDeadlines.update(sensor.sensorId, sensor.lastStateUpdated)
+
+        sensorIds = set([sensor.sensorId for sensor in sensors])
+        with self._nodeSensorIdsLock:
+            oldSensorIds = self._nodeSensorIds.get(nodeId, set())
+            self._nodeSensorIds[nodeId] = sensorIds
+
+        for sensorId in oldSensorIds - sensorIds:
+            self._sensorDeadlines.remove(sensorId)
+
+    def removeSensorDeadlines(self,
+                              nodeId: int):
+        """
+        Public function that stops the timeout detection for the sensors of a deleted node.
+
+        :param nodeId: id of the node
+        """
+        with self._nodeSensorIdsLock:
+            sensorIds = self._nodeSensorIds.pop(nodeId, set())
+
+        for sensorId in sensorIds:
+            self._sensorDeadlines.remove(sensorId)
+
+    def updateSensorDeadlines(self,
+                              sensorIds: List[int],
+                              lastStateUpdated: int):
+        """
+        Public function that moves the timeouts of the given sensors after they sent an update.
+
+        :param sensorIds:
+        :param lastStateUpdated: time of the update
+        """
+        for sensorId in sensorIds:
+            self._sensorDeadlines.update(sensorId, lastStateUpdated)
+
     def isInitialized(self) -> bool:
         """
         Returns if the connection watchdog is initialized.
@@ -601,6 +674,10 @@ class ConnectionWatchdog(threading.Thread):
                 continue
             self.addNodePreTimeout(nodeId)
 
+        # Set deadlines of all sensors before the server accepts connections
+        # (afterwards they are updated by the connected nodes).
+        self._loadSensorDeadlines()
+
         # Set connection watchdog as initialized so that the server can
         # start and accept connections.
         self._isInitialized = True
@@ -623,16 +700,8 @@ class ConnectionWatchdog(threading.Thread):
             # Process nodes that timed out but reconnected.
             self._processOldNodeTimeouts()
 
-            # Get list of sensor objects that have timed out.
-            utcTimestamp = int(time.time())
-            sensorsTimeoutList = self.storage.getSensorsUpdatedOlderThan(utcTimestamp
-                                                                         - int(1.5 * self.gracePeriodTimeout))
-
-            # Process occurred sensor time outs (and if they newly occurred).
-            self._processNewSensorTimeouts(sensorsTimeoutList)
-
-            # Process sensors that timed out but reconnected.
-            self._processOldSensorTimeouts(sensorsTimeoutList)
+            # Process sensors that timed out or reconnected.
+            self._processSensorTimeouts()
 
             # Process reminder of timeouts.
             self._processTimeoutReminder()
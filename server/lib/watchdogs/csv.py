@@ -114,6 +114,9 @@ class CSVWatchdog(threading.Thread):
                 if not self.storage.deleteNode(nodeId, self.logger):
                     self.logger.error("[%s]: Not able to delete node with id '%d'." % (self.fileName, nodeId))
 
+                elif self.globalData.connectionWatchdog is not None:
+                    self.globalData.connectionWatchdog.removeSensorDeadlines(nodeId)
+
     def run(self):
 
         # Synchronize database with usernames in backend once in the
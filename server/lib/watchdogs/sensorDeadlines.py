@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: https://h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import heapq
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class SensorDeadlines:
+    """
+    Keeps the times at which sensors time out if they do not send an update until then in a min-heap. An update
+    of a sensor adds a new entry to the heap while the outdated entry is skipped when it is reached. Sensors that
+    timed out are not tracked anymore until they send an update again (which marks them as recovered).
+    """
+
+    def __init__(self, default_timeout: int):
+        self._lock = threading.Lock()
+        self._default_timeout = default_timeout
+
+        # Heap of (deadline, sensor id) and the current deadline of each tracked sensor.
+        self._heap = list()  # type: List[Tuple[int, int]]
+        self._deadlines = dict()  # type: Dict[int, int]
+
+        # Timeouts in seconds of sensors that do not use the default timeout.
+        self._timeouts = dict()  # type: Dict[int, int]
+
+        # Sensors that timed out, sensors that sent an update after they timed out and
+        # sensors that were removed after they timed out.
+        self._expired = set()  # type: Set[int]
+        self._recovered = set()  # type: Set[int]
+        self._removed = set()  # type: Set[int]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._deadlines)
+
+    def get_timeout(self, sensor_id: int) -> int:
+        """
+        :param sensor_id:
+        :return: seconds after the last update a sensor times out
+        """
+        return self._timeouts.get(sensor_id, self._default_timeout)
+
+    def set_timeout(self, sensor_id: int, timeout: Optional[int]):
+        """
+        Sets the timeout of a sensor (applied with its next update).
+        :param sensor_id:
+        :param timeout: seconds after the last update the sensor times out (None for the default timeout)
+        """
+        with self._lock:
+            if timeout is None:
+                self._timeouts.pop(sensor_id, None)
+            else:
+                self._timeouts[sensor_id] = timeout
+
+    def update(self, sensor_id: int, last_state_updated: int):
+        """
+        Sets the deadline of a sensor after it sent an update.
+        :param sensor_id:
+        :param last_state_updated: time of the update
+        """
+        with self._lock:
+            deadline = last_state_updated + self._timeouts.get(sensor_id, self._default_timeout)
+            if self._deadlines.get(sensor_id) == deadline:
+                return
+
+            self._deadlines[sensor_id] = deadline
+            heapq.heappush(self._heap, (deadline, sensor_id))
+
+            if sensor_id in self._expired:
+                self._expired.remove(sensor_id)
+                self._recovered.add(sensor_id)
+
+            # Remove outdated entries once they make up most of the heap.
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(x, y) for y, x in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def remove(self, sensor_id: int):
+        """
+        Stops tracking the given sensor (for example, because it was deleted).
+        :param sensor_id:
+        """
+        with self._lock:
+            self._deadlines.pop(sensor_id, None)
+            self._timeouts.pop(sensor_id, None)
+            if sensor_id in self._expired or sensor_id in self._recovered:
+                self._removed.add(sensor_id)
+            self._expired.discard(sensor_id)
+            self._recovered.discard(sensor_id)
+
+    def pop_expired(self, now: int) -> List[int]:
+        """
+        Gets the sensors that timed out since the last call.
+        :param now:
+        :return: list of sensor ids
+        """
+        expired = list()
+        with self._lock:
+            while self._heap and self._heap[0][0] < now:
+                deadline, sensor_id = heapq.heappop(self._heap)
+
+                # Skip entries replaced by a newer update.
+                if self._deadlines.get(sensor_id) != deadline:
+                    continue
+
+                del self._deadlines[sensor_id]
+                self._expired.add(sensor_id)
+                expired.append(sensor_id)
+
+        return expired
+
+    def pop_recovered(self) -> Set[int]:
+        """
+        Gets the timed out sensors that sent an update since the last call.
+        :return: set of sensor ids
+        """
+        with self._lock:
+            recovered = self._recovered
+            self._recovered = set()
+        return recovered
+
+    def pop_removed(self) -> Set[int]:
+        """
+        Gets the timed out sensors that were removed since the last call.
+        :return: set of sensor ids
+        """
+        with self._lock:
+            removed = self._removed
+            self._removed = set()
+        return removed
@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+
+"""
+Test instrumentation script which outputs the received argument padded to more than the maximum output size.
+"""
+
+import sys
+
+print(sys.argv[1] + " " * 1000000)
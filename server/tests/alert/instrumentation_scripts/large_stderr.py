@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+
+"""
+Test instrumentation script which writes more than the pipe buffer to stderr before it outputs the received argument.
+"""
+
+import sys
+
+sys.stderr.write("x" * 1000000)
+sys.stderr.flush()
+print(sys.argv[1])
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+
+"""
+Test instrumentation script which runs persistently and outputs each received line.
+"""
+
+import sys
+
+for line in sys.stdin:
+    sys.stdout.write(line)
+    sys.stdout.flush()
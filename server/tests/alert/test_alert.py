@@ -354,6 +354,52 @@ class TestAlert(TestCase):
 
             self.assertTrue(sensor_alert_state.instrumentation_processed)
 
+    def test_update_suitable_alert_levels_profile_state(self):
+        """
+        Tests that the update of suitable alert levels uses the profile held in memory and not the storage.
+        """
+        num = 5
+
+        global_data = GlobalData()
+        global_data.logger = logging.getLogger("Alert Test Case")
+        global_data.storage = MockStorage()
+        global_data.storage.profile = 0
+
+        sensor_alert_executer = SensorAlertExecuter(global_data)
+
+        alert_levels, sensor_alerts = self._create_sensor_alerts(num)
+
+        for alert_level in alert_levels:
+            alert_level.triggerAlertTriggered = True
+
+        # First use loads the profile from the storage, afterwards only published changes are used.
+        self.assertEqual(0, global_data.profile_state.get_profile_id())
+        global_data.storage.profile = 99
+
+        sensor_alert_states = list()
+        for sensor_alert in sensor_alerts:
+            sensor_alert_state = SensorAlertState(sensor_alert, alert_levels)
+            sensor_alert_state._init_sensor_alert.state = 1
+            sensor_alert_states.append(sensor_alert_state)
+
+        sensor_alert_executer._update_suitable_alert_levels(sensor_alert_states)
+
+        for sensor_alert_state in sensor_alert_states:
+            self.assertEqual(1, len(sensor_alert_state.suitable_alert_levels))
+
+        global_data.profile_state.set_profile_id(99)
+
+        sensor_alert_states = list()
+        for sensor_alert in sensor_alerts:
+            sensor_alert_state = SensorAlertState(sensor_alert, alert_levels)
+            sensor_alert_state._init_sensor_alert.state = 1
+            sensor_alert_states.append(sensor_alert_state)
+
+        sensor_alert_executer._update_suitable_alert_levels(sensor_alert_states)
+
+        for sensor_alert_state in sensor_alert_states:
+            self.assertEqual(0, len(sensor_alert_state.suitable_alert_levels))
+
     def test_update_suitable_alert_levels_multiple_profiles(self):
         """
         Tests update of suitable alert levels when the alert level has multiple system profiles.
@@ -2095,8 +2141,9 @@ class TestAlert(TestCase):
             self.assertFalse(manager_update_executer._manager_update_event.is_set())
             self.assertEqual(0, len(manager_update_executer._queue_state_change))
 
-        # Change system profile to change trigger condition.
+        # Change system profile to change trigger condition (published like the option executer does).
         global_data.storage.profile = 99
+        global_data.profile_state.set_profile_id(99)
 
         for i in range(int(delay/2) + 1):
             self.assertEqual(0, len(TestAlert._callback_trigger_sensor_alert_arg))
@@ -2291,3 +2338,98 @@ class TestAlert(TestCase):
         self.assertEqual(1, len(storage.sensor_state_updates.keys()))
         self.assertEqual(internal_sensor.clientSensorId, storage.sensor_state_updates[internal_sensor.nodeId][0][0])
         self.assertEqual(internal_sensor.state, storage.sensor_state_updates[internal_sensor.nodeId][0][1])
+
+    def _create_run_executer(self, num: int, delay: int) -> Tuple[SensorAlertExecuter, List[SensorAlert], List[float]]:
+        """
+        Creates a sensor alert executer that records the time sensor alerts are triggered and the sensor alerts
+        (with corresponding sensors) for it.
+        """
+        global_data = GlobalData()
+        global_data.logger = logging.getLogger("Alert Test Case")
+        global_data.storage = MockStorage()
+        global_data.storage.profile = 0
+        global_data.managerUpdateExecuter = MockManagerUpdateExecuter()
+
+        alert_levels, sensor_alerts = self._create_sensor_alerts(num)
+        for alert_level in alert_levels:
+            alert_level.triggerAlertTriggered = True
+        global_data.alertLevels = alert_levels
+
+        for sensor_alert in sensor_alerts:
+            sensor_alert.alertDelay = delay
+
+            sensor = Sensor()
+            sensor.sensorId = sensor_alert.sensorId
+            sensor.nodeId = sensor_alert.nodeId
+            sensor.clientSensorId = 0
+            sensor.lastStateUpdated = 1337
+            sensor.description = sensor_alert.description
+            sensor.alertDelay = sensor_alert.alertDelay
+            sensor.alertLevels = list(sensor_alert.alertLevels)
+            sensor.state = sensor_alert.state
+            sensor.dataType = sensor_alert.dataType
+            sensor.data = sensor_alert.data
+            global_data.storage.add_sensor(sensor)
+
+        trigger_times = list()
+        sensor_alert_executer = SensorAlertExecuter(global_data)
+        sensor_alert_executer._trigger_sensor_alert = lambda _: trigger_times.append(time.time())
+        sensor_alert_executer.daemon = True
+        sensor_alert_executer.start()
+
+        return sensor_alert_executer, sensor_alerts, trigger_times
+
+    def _add_sensor_alert(self, sensor_alert_executer: SensorAlertExecuter, sensor_alert: SensorAlert):
+        self.assertTrue(sensor_alert_executer.add_sensor_alert(sensor_alert.nodeId,
+                                                               sensor_alert.sensorId,
+                                                               sensor_alert.state,
+                                                               sensor_alert.optionalData,
+                                                               sensor_alert.changeState,
+                                                               sensor_alert.hasLatestData,
+                                                               sensor_alert.dataType,
+                                                               sensor_alert.data))
+
+    def test_run_no_delay_immediate(self):
+        """
+        Integration test that checks if sensor alerts without alert delay are triggered immediately
+        (also while other sensor alerts wait for their alert delay).
+        """
+        sensor_alert_executer, sensor_alerts, trigger_times = self._create_run_executer(2, 0)
+
+        # Let one sensor alert wait for its alert delay.
+        sensor_alerts[0].alertDelay = 60
+        sensor_alert_executer._storage.getSensorById(sensor_alerts[0].sensorId).alertDelay = 60
+        self._add_sensor_alert(sensor_alert_executer, sensor_alerts[0])
+        time.sleep(0.2)
+
+        start = time.time()
+        self._add_sensor_alert(sensor_alert_executer, sensor_alerts[1])
+        for _ in range(50):
+            if trigger_times:
+                break
+            time.sleep(0.01)
+
+        sensor_alert_executer.exit()
+
+        self.assertEqual(1, len(trigger_times))
+        self.assertLess(trigger_times[0] - start, 0.2)
+        self.assertEqual(1, len(sensor_alert_executer._delayed_states))
+
+    def test_run_alert_delay_exact(self):
+        """
+        Integration test that checks if sensor alerts are triggered when their alert delay passed
+        (and not only in the next full second or processing round).
+        """
+        sensor_alert_executer, sensor_alerts, trigger_times = self._create_run_executer(1, 1)
+
+        start = time.time()
+        self._add_sensor_alert(sensor_alert_executer, sensor_alerts[0])
+        time.sleep(0.8)
+        self.assertEqual(0, len(trigger_times))
+
+        time.sleep(0.5)
+        sensor_alert_executer.exit()
+
+        self.assertEqual(1, len(trigger_times))
+        self.assertGreaterEqual(trigger_times[0] - start, 1.0)
+        self.assertLess(trigger_times[0] - start, 1.2)
@@ -1,6 +1,8 @@
 import logging
 import json
 import os
+import resource
+import threading
 import time
 from typing import Dict, Any, List
 from unittest import TestCase
@@ -679,6 +681,76 @@ class TestInstrumentation(TestCase):
         self.assertEqual(1, len(internal_sensor.optional_data))
         self.assertEqual(instrumentation._alert_level.level, internal_sensor.optional_data[0]["alert_level"])
 
+    def test_execute_large_stderr(self):
+        """
+        Tests a valid execution of an instrumentation script that writes more than the pipe buffer to stderr.
+        """
+        target_cmd = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "instrumentation_scripts",
+                                  "large_stderr.py")
+        timeout = 5
+
+        # Prepare instrumentation object.
+        instrumentation = self._create_instrumentation_dummy()
+        instrumentation._alert_level.instrumentation_cmd = target_cmd
+        instrumentation._alert_level.instrumentation_timeout = timeout
+
+        promise = instrumentation._execute()
+
+        self.assertTrue(promise.is_finished())
+        self.assertTrue(promise.was_success())
+        self.assertLess(promise.execution_time, timeout)
+
+    def test_execute_high_file_descriptors(self):
+        """
+        Tests a valid execution of an instrumentation script if the file descriptors of its pipes exceed FD_SETSIZE.
+        """
+        if resource.getrlimit(resource.RLIMIT_NOFILE)[0] < 1200:
+            self.skipTest("Limit of open file descriptors too low.")
+
+        target_cmd = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "instrumentation_scripts",
+                                  "mirror.py")
+
+        # Prepare instrumentation object.
+        instrumentation = self._create_instrumentation_dummy()
+        instrumentation._alert_level.instrumentation_cmd = target_cmd
+
+        fds = [os.open(os.devnull, os.O_RDONLY) for _ in range(1100)]
+        try:
+            promise = instrumentation._execute()
+
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+        self.assertTrue(promise.is_finished())
+        self.assertTrue(promise.was_success())
+
+    def test_execute_invalid_output_too_large_internal_sensor(self):
+        """
+        Tests an invalid execution of an instrumentation script (output exceeds maximum size) with internal sensor.
+        """
+        target_cmd = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "instrumentation_scripts",
+                                  "large_output.py")
+        timeout = 5
+
+        # Prepare instrumentation object.
+        instrumentation = self._create_instrumentation_dummy()
+        instrumentation._alert_level.instrumentation_cmd = target_cmd
+        instrumentation._alert_level.instrumentation_timeout = timeout
+        internal_sensor = MockInternalSensor()
+        instrumentation._internal_sensor = internal_sensor
+
+        promise = instrumentation._execute()
+
+        self.assertTrue(promise.is_finished())
+        self.assertFalse(promise.was_success())
+        self.assertLess(promise.execution_time, timeout)
+        self.assertEqual(1, len(internal_sensor.optional_data))
+        self.assertEqual(instrumentation._alert_level.level, internal_sensor.optional_data[0]["alert_level"])
+
     def test_execute_twice(self):
         """
         Tests a valid execution of an instrumentation script and if it is only executed once while called twice.
@@ -718,3 +790,28 @@ class TestInstrumentation(TestCase):
         # to verify that the instrumentation script was only executed once.
         timestamp_second = promise_second.new_sensor_alert.optionalData["timestamp"]
         self.assertEqual(timestamp_first, timestamp_second)
+
+    def test_execute_finished_callback(self):
+        """
+        Tests that the finished callbacks of the promise are called once the instrumentation finished
+        and immediately if it already finished.
+        """
+        target_cmd = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "instrumentation_scripts",
+                                  "mirror.py")
+
+        # Prepare instrumentation object.
+        instrumentation = self._create_instrumentation_dummy()
+        instrumentation._alert_level.instrumentation_cmd = target_cmd
+        instrumentation._alert_level.instrumentation_timeout = 5
+
+        finished_event = threading.Event()
+        promise = instrumentation.execute()
+        promise.add_finished_callback(finished_event.set)
+
+        self.assertTrue(finished_event.wait(5))
+        self.assertTrue(promise.was_success())
+
+        callback_args = list()
+        promise.add_finished_callback(lambda: callback_args.append(promise.is_finished()))
+        self.assertEqual([True], callback_args)
@@ -0,0 +1,324 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from unittest import TestCase
+from lib.alert.instrumentation import Instrumentation
+from lib.alert.instrumentationPool import InstrumentationPool
+from lib.localObjects import AlertLevel, SensorAlert, SensorDataType, SensorDataNone
+from tests.alert.test_instrumentation import MockInternalSensor
+
+
+class MockInstrumentation:
+
+    def __init__(self, tracker: "TestInstrumentationPool", persistent_alert_level: Optional[int] = None):
+        self._tracker = tracker
+        self.persistent_alert_level = persistent_alert_level
+        self.finished_event = threading.Event()
+        self.finished_time = None  # type: Optional[float]
+
+    def _execute(self):
+        with self._tracker.lock:
+            self._tracker.running += 1
+            self._tracker.max_running = max(self._tracker.max_running, self._tracker.running)
+            if self.persistent_alert_level is not None:
+                self._tracker.running_persistent += 1
+                self._tracker.max_running_persistent = max(self._tracker.max_running_persistent,
+                                                           self._tracker.running_persistent)
+
+        time.sleep(0.2)
+
+        with self._tracker.lock:
+            self._tracker.running -= 1
+            if self.persistent_alert_level is not None:
+                self._tracker.running_persistent -= 1
+        self.finished_time = time.time()
+        self.finished_event.set()
+
+
+class TestInstrumentationPool(TestCase):
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.running_persistent = 0
+        self.max_running_persistent = 0
+        self.logger = logging.getLogger("Instrumentation Pool Test Case")
+        self.pool = InstrumentationPool(2, self.logger)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def _create_instrumentation(self,
+                                script: str,
+                                timeout: int = 5,
+                                persistent: bool = False,
+                                cache_ttl: int = 0) -> Instrumentation:
+        target_cmd = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "instrumentation_scripts",
+                                  script)
+
+        alert_level = AlertLevel()
+        alert_level.level = 1
+        alert_level.name = "Instrumentation Alert Level"
+        alert_level.triggerAlertTriggered = True
+        alert_level.triggerAlertNormal = True
+        alert_level.instrumentation_cmd = target_cmd
+        alert_level.instrumentation_timeout = timeout
+        alert_level.instrumentation_persistent = persistent
+        alert_level.instrumentation_cache_ttl = cache_ttl
+        alert_level.instrumentation_cache_keys = ["key1"]
+
+        sensor_alert = SensorAlert()
+        sensor_alert.nodeId = 2
+        sensor_alert.sensorId = 3
+        sensor_alert.description = "Instrumentation Sensor Alert"
+        sensor_alert.timeReceived = 1337
+        sensor_alert.alertDelay = 20
+        sensor_alert.state = 1
+        sensor_alert.hasOptionalData = True
+        sensor_alert.optionalData = {"key1": "value1",
+                                     "key2": "value2"}
+        sensor_alert.changeState = False
+        sensor_alert.alertLevels = [1]
+        sensor_alert.triggeredAlertLevels = [1]
+        sensor_alert.hasLatestData = False
+        sensor_alert.dataType = SensorDataType.NONE
+        sensor_alert.data = SensorDataNone()
+
+        return Instrumentation(alert_level, sensor_alert, self.logger, pool=self.pool)
+
+    def test_max_processes(self):
+        """
+        Tests that not more than the maximum number of instrumentations are executed at the same time
+        and the others are queued.
+        """
+        instrumentations = [MockInstrumentation(self) for _ in range(6)]
+        for instrumentation in instrumentations:
+            # noinspection PyTypeChecker
+            self.pool.submit(instrumentation)
+
+        time.sleep(0.1)
+        self.assertEqual(2, self.pool.running)
+        self.assertEqual(4, self.pool.queued)
+
+        for instrumentation in instrumentations:
+            self.assertTrue(instrumentation.finished_event.wait(5))
+        self.assertEqual(2, self.max_running)
+        self.assertEqual(0, self.pool.queued)
+
+    def test_execution_exception(self):
+        """
+        Tests that an instrumentation whose execution raises an exception is marked as failed.
+        """
+        instrumentation = self._create_instrumentation("mirror.py")
+        internal_sensor = MockInternalSensor()
+        instrumentation._internal_sensor = internal_sensor
+
+        def _raise():
+            raise RuntimeError("Unexpected error.")
+        instrumentation._execute_process = _raise
+
+        promise = instrumentation.execute()
+        self.assertTrue(promise.is_finished(timeout=5))
+        self.assertFalse(promise.was_success())
+        self.assertEqual(1, len(internal_sensor.optional_data))
+
+    def test_persistent_worker_busy(self):
+        """
+        Tests that queued instrumentations of a persistent worker in use do not occupy the worker threads
+        needed by other alert levels.
+        """
+        persistent_instrumentations = [MockInstrumentation(self, 1) for _ in range(4)]
+        for instrumentation in persistent_instrumentations:
+            # noinspection PyTypeChecker
+            self.pool.submit(instrumentation)
+        other_instrumentation = MockInstrumentation(self)
+        # noinspection PyTypeChecker
+        self.pool.submit(other_instrumentation)
+
+        for instrumentation in persistent_instrumentations + [other_instrumentation]:
+            self.assertTrue(instrumentation.finished_event.wait(5))
+        self.assertEqual(1, self.max_running_persistent)
+
+        # The other instrumentation ran next to the first persistent one.
+        self.assertLess(other_instrumentation.finished_time, persistent_instrumentations[1].finished_time)
+
+    def test_persistent_worker(self):
+        """
+        Tests that a persistent instrumentation process handles multiple sensor alerts.
+        """
+        pids = set()
+        for _ in range(3):
+            instrumentation = self._create_instrumentation("mirror_persistent.py", persistent=True)
+            promise = instrumentation.execute()
+            self.assertTrue(promise.is_finished(timeout=5))
+            self.assertTrue(promise.was_success())
+            self.assertEqual(promise.orig_sensor_alert.sensorId, promise.new_sensor_alert.sensorId)
+            self.assertEqual(promise.orig_sensor_alert.optionalData, promise.new_sensor_alert.optionalData)
+
+            pids.add(self.pool.get_persistent_worker(instrumentation._alert_level)._process.pid)
+
+        self.assertEqual(1, len(pids))
+
+    def test_persistent_worker_restart(self):
+        """
+        Tests that a persistent instrumentation process is started again after it exited.
+        """
+        instrumentation = self._create_instrumentation("mirror_persistent.py", persistent=True)
+        self.assertTrue(instrumentation._execute().was_success())
+
+        worker = self.pool.get_persistent_worker(instrumentation._alert_level)
+        worker._process.kill()
+        worker._process.wait()
+
+        instrumentation = self._create_instrumentation("mirror_persistent.py", persistent=True)
+        self.assertTrue(instrumentation._execute().was_success())
+
+    def test_persistent_worker_timeout(self):
+        """
+        Tests that a persistent instrumentation process that does not answer in time is stopped.
+        """
+        # timeout script waits 60 seconds before it reads anything.
+        instrumentation = self._create_instrumentation("timeout.py", timeout=1, persistent=True)
+        internal_sensor = MockInternalSensor()
+        instrumentation._internal_sensor = internal_sensor
+
+        promise = instrumentation._execute()
+
+        self.assertTrue(promise.is_finished())
+        self.assertFalse(promise.was_success())
+        self.assertEqual(1, len(internal_sensor.optional_data))
+        self.assertIsNone(self.pool.get_persistent_worker(instrumentation._alert_level)._process)
+
+    def test_persistent_worker_output_too_large(self):
+        """
+        Tests that the answer of a persistent instrumentation process that exceeds the maximum output size is refused.
+        """
+        self.pool.max_output = 100
+        instrumentation = self._create_instrumentation("mirror_persistent.py", persistent=True)
+        internal_sensor = MockInternalSensor()
+        instrumentation._internal_sensor = internal_sensor
+
+        promise = instrumentation._execute()
+
+        self.assertFalse(promise.was_success())
+        self.assertEqual(1, len(internal_sensor.optional_data))
+
+    def test_statistics(self):
+        """
+        Tests that the execution times of the instrumentations are recorded by alert level.
+        """
+        for script in ["mirror.py", "exit_code_1.py"]:
+            instrumentation = self._create_instrumentation(script)
+            promise = instrumentation.execute()
+            self.assertTrue(promise.is_finished(timeout=10))
+
+        # The execution time is recorded after the promise is finished.
+        time.sleep(0.1)
+
+        statistics = self.pool.get_statistics()
+        self.assertEqual(0, statistics["queued"])
+        self.assertEqual(0, statistics["running"])
+
+        histogram = statistics["alert_levels"][1]
+        self.assertEqual(2, histogram["count"])
+        self.assertEqual(1, histogram["failed"])
+        self.assertGreater(histogram["sum"], 0.0)
+        self.assertGreaterEqual(histogram["sum"], histogram["max"])
+        self.assertEqual(2, histogram["buckets"][-1][1])
+        bucket_counts = [x[1] for x in histogram["buckets"]]
+        self.assertEqual(sorted(bucket_counts), bucket_counts)
+
+    def _execute_and_wait(self, instrumentation: Instrumentation):
+        promise = instrumentation.execute()
+        self.assertTrue(promise.is_finished(timeout=10))
+        self.assertTrue(promise.was_success())
+
+        # The execution time is recorded after the promise is finished.
+        time.sleep(0.1)
+        return promise
+
+    def _get_execution_count(self) -> int:
+        return self.pool.get_statistics()["alert_levels"][1]["count"]
+
+    def test_cache_hit(self):
+        """
+        Tests that the cached result is used for an identical sensor alert without executing the instrumentation.
+        """
+        self._execute_and_wait(self._create_instrumentation("mirror.py", cache_ttl=60))
+
+        instrumentation = self._create_instrumentation("mirror.py", cache_ttl=60)
+        instrumentation._sensor_alert.timeReceived = 1338
+        promise = instrumentation.execute()
+
+        # Cached results are available immediately.
+        self.assertTrue(promise.is_finished())
+        self.assertTrue(promise.was_success())
+        self.assertEqual(1338, promise.new_sensor_alert.timeReceived)
+        self.assertEqual(instrumentation._sensor_alert.optionalData, promise.new_sensor_alert.optionalData)
+        self.assertIsNotNone(promise.execution_time)
+        self.assertEqual(1, self._get_execution_count())
+
+        cache_statistics = self.pool.get_statistics()["cache"]
+        self.assertEqual(1, cache_statistics["entries"])
+        self.assertEqual({"hits": 1, "misses": 1}, cache_statistics["alert_levels"][1])
+
+    def test_cache_key(self):
+        """
+        Tests that sensor alerts with a different state, data or configured optional data are not answered from
+        the cache while other optional data is ignored.
+        """
+        self._execute_and_wait(self._create_instrumentation("mirror.py", cache_ttl=60))
+
+        instrumentation = self._create_instrumentation("mirror.py", cache_ttl=60)
+        instrumentation._sensor_alert.optionalData["key2"] = "other"
+        self._execute_and_wait(instrumentation)
+        self.assertEqual(1, self._get_execution_count())
+
+        instrumentation = self._create_instrumentation("mirror.py", cache_ttl=60)
+        instrumentation._sensor_alert.optionalData["key1"] = "other"
+        self._execute_and_wait(instrumentation)
+        self.assertEqual(2, self._get_execution_count())
+
+        instrumentation = self._create_instrumentation("mirror.py", cache_ttl=60)
+        instrumentation._sensor_alert.state = 0
+        self._execute_and_wait(instrumentation)
+        self.assertEqual(3, self._get_execution_count())
+
+    def test_cache_expired_and_cleared(self):
+        """
+        Tests that expired and cleared results are not used.
+        """
+        self._execute_and_wait(self._create_instrumentation("mirror.py", cache_ttl=1))
+        time.sleep(1.1)
+        self._execute_and_wait(self._create_instrumentation("mirror.py", cache_ttl=1))
+        self.assertEqual(2, self._get_execution_count())
+
+        self.pool.decision_cache.clear()
+        self._execute_and_wait(self._create_instrumentation("mirror.py", cache_ttl=1))
+        self.assertEqual(3, self._get_execution_count())
+
+    def test_cache_disabled(self):
+        """
+        Tests that the results are not cached if the alert level does not use the cache.
+        """
+        self._execute_and_wait(self._create_instrumentation("mirror.py"))
+        self._execute_and_wait(self._create_instrumentation("mirror.py"))
+
+        self.assertEqual(2, self._get_execution_count())
+        self.assertEqual(0, self.pool.get_statistics()["cache"]["entries"])
+
+    def test_cache_suppressed(self):
+        """
+        Tests that a suppressed sensor alert is cached as well.
+        """
+        self._execute_and_wait(self._create_instrumentation("suppress.py", cache_ttl=60))
+
+        promise = self._create_instrumentation("suppress.py", cache_ttl=60).execute()
+        self.assertTrue(promise.is_finished())
+        self.assertTrue(promise.was_success())
+        self.assertIsNone(promise.new_sensor_alert)
+        self.assertEqual(1, self._get_execution_count())
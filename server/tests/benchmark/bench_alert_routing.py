@@ -0,0 +1,121 @@
+"""
+Benchmark of the dispatch of triggered sensor alerts to the alert and manager clients.
+
+Creates the given number of initialized client sessions (each handling one of the alert levels) and measures the
+time to find the recipients of a sensor alert by going through all sessions (the former way) and by the alert
+level routing table. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_alert_routing --sessions 2000 --alert-levels 100
+"""
+
+import argparse
+import logging
+import random
+import time
+from lib.alert.alert import SensorAlertExecuter, SensorAlertState
+from lib.globalData import GlobalData
+from lib.localObjects import AlertLevel
+from tests.benchmark.util import percentile, print_results
+from tests.server.core import create_sensor_alert
+
+
+class _MockClientCommunication:
+
+    def __init__(self, node_type: str, alert_levels: set):
+        self.nodeType = node_type
+        self.clientInitialized = True
+        self.clientAlertLevels = alert_levels
+        self.clientAddress = "127.0.0.1"
+        self.clientPort = 0
+        self.queued = 0
+
+    def queueSensorAlert(self, _) -> bool:
+        self.queued += 1
+        return True
+
+
+class _MockServerSession:
+
+    def __init__(self, client_comm: _MockClientCommunication):
+        self.clientComm = client_comm
+
+
+def _scan_sessions(global_data: GlobalData, sensor_alert_state: SensorAlertState):
+    """
+    Dispatch as done before the routing table (checks each session).
+    """
+    sensor_alert = sensor_alert_state.sensor_alert
+    for server_session in global_data.serverSessions:
+        if server_session.clientComm is None:
+            continue
+        if (server_session.clientComm.nodeType != "manager"
+           and server_session.clientComm.nodeType != "alert"):
+            continue
+        if not server_session.clientComm.clientInitialized:
+            continue
+        client_alert_levels = server_session.clientComm.clientAlertLevels
+        if not any(al in client_alert_levels for al in sensor_alert.triggeredAlertLevels):
+            continue
+        server_session.clientComm.queueSensorAlert(sensor_alert)
+
+
+def run(session_count: int, alert_level_count: int, alert_count: int):
+
+    global_data = GlobalData()
+    global_data.logger = logging.getLogger("server")
+    global_data.logger.setLevel(logging.WARNING)
+
+    for i in range(alert_level_count):
+        alert_level = AlertLevel()
+        alert_level.level = i
+        alert_level.name = "Alert Level %d" % i
+        global_data.alertLevels.append(alert_level)
+
+    comms = list()
+    for i in range(session_count):
+        node_type = random.choice(["alert", "alert", "manager", "sensor"])
+        if node_type == "manager":
+            alert_levels = set(range(alert_level_count))
+        else:
+            alert_levels = {random.randrange(alert_level_count)}
+        comm = _MockClientCommunication(node_type, alert_levels)
+        comms.append(comm)
+        global_data.serverSessions.append(_MockServerSession(comm))
+        if node_type != "sensor":
+            global_data.serverSessions.add_alert_level_routes(comm, alert_levels)
+
+    sensor_alert_executer = SensorAlertExecuter(global_data)
+    sensor_alert_states = list()
+    for i in range(alert_count):
+        sensor_alert = create_sensor_alert(i)
+        sensor_alert.triggeredAlertLevels = [random.randrange(alert_level_count)]
+        sensor_alert.alertLevels = list(sensor_alert.triggeredAlertLevels)
+        sensor_alert.alertDelay = 0
+        sensor_alert_states.append(SensorAlertState(sensor_alert, global_data.alertLevels, time.time()))
+
+    for name, dispatch in [("session scan", lambda x: _scan_sessions(global_data, x)),
+                           ("routing table", sensor_alert_executer._trigger_sensor_alert)]:
+        for comm in comms:
+            comm.queued = 0
+
+        latencies = []
+        for sensor_alert_state in sensor_alert_states:
+            start = time.perf_counter()
+            dispatch(sensor_alert_state)
+            latencies.append(time.perf_counter() - start)
+
+        print_results("%s (%d sessions, %d alert levels)" % (name, session_count, alert_level_count),
+                      [("sensor alerts", "%d" % alert_count),
+                       ("queued messages", "%d" % sum(x.queued for x in comms)),
+                       ("dispatch p50", "%.3f ms" % (percentile(latencies, 50) * 1000)),
+                       ("dispatch p99", "%.3f ms" % (percentile(latencies, 99) * 1000))])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the sensor alert dispatch to the clients.")
+    parser.add_argument("--sessions", type=int, default=2000, help="Number of client sessions.")
+    parser.add_argument("--alert-levels", type=int, default=100, help="Number of alert levels.")
+    parser.add_argument("--alerts", type=int, default=1000, help="Number of dispatched sensor alerts.")
+    args = parser.parse_args()
+
+    run(args.sessions, args.alert_levels, args.alerts)
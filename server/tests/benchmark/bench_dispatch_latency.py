@@ -0,0 +1,87 @@
+"""
+Benchmark of the sensor alert dispatch latency.
+
+Connects alert clients to the server and sends sensor alerts to them. The latency is measured from
+handing the sensor alert over for sending until the client received it. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_dispatch_latency --clients 10 --alerts 50
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List
+from tests.benchmark.util import percentile, print_results
+from tests.server.core import RawClient, create_global_data, create_sensor_alert, start_server, stop_server, \
+    wait_sessions_closed
+
+
+def run_engine(engine: str, client_count: int, alert_count: int):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = create_global_data(temp_dir)
+    server, port = start_server(global_data, engine)
+
+    clients = [RawClient(port, "bench_%d" % i, global_data.version) for i in range(client_count)]
+    for client in clients:
+        if not client.connect_alert():
+            raise ValueError("Connecting client failed.")
+    time.sleep(1)
+
+    send_times = dict()  # type: Dict[int, float]
+    latencies = []  # type: List[float]
+    latencies_lock = threading.Lock()
+
+    def _receive_alerts(client: RawClient):
+        for _ in range(alert_count):
+            request = client.recv_request()
+            recv_time = time.time()
+            with latencies_lock:
+                latencies.append(recv_time - send_times[request["payload"]["sensorId"]])
+
+    receivers = [threading.Thread(target=_receive_alerts, args=(client, ), daemon=True) for client in clients]
+    for receiver in receivers:
+        receiver.start()
+
+    for i in range(alert_count):
+        sensor_alert = create_sensor_alert(i)
+
+        # Send sensor alert the same way the sensor alert executer does.
+        send_times[i] = time.time()
+        for server_session in global_data.serverSessions:
+            if server_session.clientComm is None or not server_session.clientComm.clientInitialized:
+                continue
+            server_session.clientComm.queueSensorAlert(sensor_alert)
+
+        # Do not send sensor alerts in the same rhythm as the server handles the connections.
+        time.sleep(random.uniform(0.05, 0.3))
+
+    for receiver in receivers:
+        receiver.join()
+
+    for client in clients:
+        client.close()
+    wait_sessions_closed(global_data)
+    stop_server(server)
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_results("Engine '%s'" % engine,
+                  [("sensor alerts", "%d" % len(latencies)),
+                   ("latency p50", "%.2f ms" % (percentile(latencies, 50) * 1000)),
+                   ("latency p99", "%.2f ms" % (percentile(latencies, 99) * 1000)),
+                   ("latency max", "%.2f ms" % (max(latencies) * 1000))])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the sensor alert dispatch latency.")
+    parser.add_argument("--engine", choices=["threaded", "selector", "both"], default="both")
+    parser.add_argument("--clients", type=int, default=10, help="Number of connected alert clients.")
+    parser.add_argument("--alerts", type=int, default=50, help="Number of sent sensor alerts.")
+    args = parser.parse_args()
+
+    engines = ["threaded", "selector"] if args.engine == "both" else [args.engine]
+    for engine in engines:
+        run_engine(engine, args.clients, args.alerts)
@@ -0,0 +1,103 @@
+"""
+Benchmark of the instrumentation of sensor alerts during an alarm storm.
+
+Instruments the given number of sensor alerts at once with one process per sensor alert (the former way),
+with the instrumentation pool and with a persistent instrumentation process. Measures the time from starting the
+instrumentation until its result is available. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_instrumentation --alerts 200 --max-processes 8
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+from lib.alert.instrumentation import Instrumentation
+from lib.alert.instrumentationPool import InstrumentationPool
+from lib.localObjects import AlertLevel, SensorAlert, SensorDataType, SensorDataNone
+from tests.benchmark.util import percentile, print_results
+
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "alert",
+                           "instrumentation_scripts")
+
+
+def _create_sensor_alert(sensor_id: int) -> SensorAlert:
+    sensor_alert = SensorAlert()
+    sensor_alert.nodeId = 1
+    sensor_alert.sensorId = sensor_id
+    sensor_alert.description = "Sensor %d" % sensor_id
+    sensor_alert.timeReceived = int(time.time())
+    sensor_alert.alertDelay = 0
+    sensor_alert.state = 1
+    sensor_alert.hasOptionalData = False
+    sensor_alert.optionalData = None
+    sensor_alert.changeState = True
+    sensor_alert.alertLevels = [1]
+    sensor_alert.triggeredAlertLevels = [1]
+    sensor_alert.hasLatestData = False
+    sensor_alert.dataType = SensorDataType.NONE
+    sensor_alert.data = SensorDataNone()
+    return sensor_alert
+
+
+def run_mode(name: str, alert_count: int, pool: Optional[InstrumentationPool], persistent: bool):
+
+    logger = logging.getLogger("server")
+    logger.setLevel(logging.WARNING)
+
+    alert_level = AlertLevel()
+    alert_level.level = 1
+    alert_level.name = "Benchmark"
+    alert_level.instrumentation_active = True
+    alert_level.instrumentation_timeout = 60
+    alert_level.instrumentation_persistent = persistent
+    if persistent:
+        alert_level.instrumentation_cmd = os.path.join(SCRIPTS_DIR, "mirror_persistent.py")
+    else:
+        alert_level.instrumentation_cmd = os.path.join(SCRIPTS_DIR, "mirror.py")
+
+    latencies = []  # type: List[float]
+    latencies_lock = threading.Lock()
+    done_event = threading.Event()
+
+    def _finished(start_time: float):
+        with latencies_lock:
+            latencies.append(time.perf_counter() - start_time)
+            if len(latencies) == alert_count:
+                done_event.set()
+
+    promises = list()
+    start = time.perf_counter()
+    for i in range(alert_count):
+        instrumentation = Instrumentation(alert_level, _create_sensor_alert(i), logger, pool=pool)
+        start_time = time.perf_counter()
+        promise = instrumentation.execute()
+        promise.add_finished_callback(lambda x=start_time: _finished(x))
+        promises.append(promise)
+
+    done_event.wait()
+    duration = time.perf_counter() - start
+
+    print_results("%s (%d sensor alerts)" % (name, alert_count),
+                  [("succeeded", "%d" % sum(1 for x in promises if x.was_success())),
+                   ("duration", "%.2f s (%.0f/s)" % (duration, alert_count / duration)),
+                   ("latency p50", "%.1f ms" % (percentile(latencies, 50) * 1000)),
+                   ("latency p99", "%.1f ms" % (percentile(latencies, 99) * 1000))])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the instrumentation of sensor alerts.")
+    parser.add_argument("--alerts", type=int, default=200, help="Number of instrumented sensor alerts.")
+    parser.add_argument("--max-processes", type=int, default=8, help="Maximum number of instrumentation processes.")
+    args = parser.parse_args()
+
+    run_mode("process per sensor alert", args.alerts, None, False)
+
+    instrumentation_pool = InstrumentationPool(args.max_processes, logging.getLogger("server"))
+    run_mode("instrumentation pool (%d processes)" % args.max_processes, args.alerts, instrumentation_pool, False)
+    run_mode("persistent instrumentation", args.alerts, instrumentation_pool, True)
+    instrumentation_pool.close()
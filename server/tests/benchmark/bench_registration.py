@@ -0,0 +1,96 @@
+"""
+Benchmark of registering a node with many sensors.
+
+Measures how long the server needs to receive and process the registration message of a sensor node
+and how long receiving the registration message alone takes. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_registration --sensors 1000 --rounds 20
+"""
+
+import argparse
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from typing import List
+from lib.server import ClientCommunication
+from tests.benchmark.util import percentile, print_results
+from tests.server.core import RawClient, create_global_data, start_server, stop_server, wait_sessions_closed
+
+
+def run_registration(engine: str, sensor_count: int, rounds: int):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = create_global_data(temp_dir)
+    server, port = start_server(global_data, engine)
+
+    durations = []  # type: List[float]
+    for _ in range(rounds):
+        client = RawClient(port, "bench_0", global_data.version)
+        start = time.time()
+        if not client.connect_sensor(sensor_count):
+            raise ValueError("Registration failed.")
+        durations.append(time.time() - start)
+        client.close()
+        wait_sessions_closed(global_data)
+
+    stop_server(server)
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_results("Registration of %d sensors (engine '%s')" % (sensor_count, engine),
+                  [("rounds", "%d" % rounds),
+                   ("duration p50", "%.2f ms" % (percentile(durations, 50) * 1000)),
+                   ("duration max", "%.2f ms" % (max(durations) * 1000))])
+
+
+def run_receive(sensor_count: int, rounds: int):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = create_global_data(temp_dir)
+    message = RawClient.build_sensor_registration(sensor_count).encode("ascii")
+
+    durations = []  # type: List[float]
+    for _ in range(rounds):
+        server_socket, client_socket = socket.socketpair()
+        client_comm = ClientCommunication(server_socket, "127.0.0.1", 0, global_data)
+
+        # Send in small chunks like a slow link would deliver them.
+        def _send():
+            for i in range(0, len(message), 1024):
+                client_socket.sendall(message[i:i + 1024])
+
+        sender = threading.Thread(target=_send, daemon=True)
+        start = time.time()
+        sender.start()
+        data = client_comm._recvMessage(len(message))
+        durations.append(time.time() - start)
+        sender.join()
+
+        if data is None or len(data) != len(message):
+            raise ValueError("Receiving failed.")
+
+        client_comm.close()
+        server_socket.close()
+        client_socket.close()
+
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_results("Receiving registration of %d sensors (%d bytes)" % (sensor_count, len(message)),
+                  [("rounds", "%d" % rounds),
+                   ("duration p50", "%.2f ms" % (percentile(durations, 50) * 1000)),
+                   ("duration max", "%.2f ms" % (max(durations) * 1000))])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of registering a node with many sensors.")
+    parser.add_argument("--engine", choices=["threaded", "selector", "both"], default="threaded")
+    parser.add_argument("--sensors", type=int, default=1000, help="Number of sensors of the node.")
+    parser.add_argument("--rounds", type=int, default=20, help="Number of registrations.")
+    args = parser.parse_args()
+
+    run_receive(args.sensors, args.rounds)
+
+    engines = ["threaded", "selector"] if args.engine == "both" else [args.engine]
+    for engine in engines:
+        run_registration(engine, args.sensors, args.rounds)
@@ -0,0 +1,103 @@
+"""
+Benchmark of the time the sensor alert executer needs to trigger a sensor alert.
+
+Adds sensor alerts without alert delay at the given rate while other sensor alerts wait for their alert delay
+and measures the time from adding a sensor alert until it is triggered. Sensor alerts with an alert delay
+of one second are measured separately (time after the alert delay passed). Run from the server directory:
+
+    python3 -m tests.benchmark.bench_sensor_alert_executer --rate 50 --seconds 10
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import Dict, List
+from lib.alert.alert import SensorAlertExecuter, SensorAlertState
+from lib.globalData import GlobalData
+from lib.localObjects import AlertLevel, Sensor, SensorDataNone, SensorDataType
+from tests.alert.test_alert import MockStorage
+from tests.benchmark.util import percentile, print_results
+
+
+def _create_sensor(sensor_id: int, alert_delay: int) -> Sensor:
+    sensor = Sensor()
+    sensor.sensorId = sensor_id
+    sensor.nodeId = 1
+    sensor.clientSensorId = sensor_id
+    sensor.lastStateUpdated = 0
+    sensor.description = "Sensor %d" % sensor_id
+    sensor.alertDelay = alert_delay
+    sensor.alertLevels = [1]
+    sensor.state = 0
+    sensor.dataType = SensorDataType.NONE
+    sensor.data = SensorDataNone()
+    return sensor
+
+
+def run(rate: int, seconds: int, waiting: int):
+
+    global_data = GlobalData()
+    global_data.logger = logging.getLogger("server")
+    global_data.logger.setLevel(logging.WARNING)
+    global_data.storage = MockStorage()
+
+    alert_level = AlertLevel()
+    alert_level.level = 1
+    alert_level.name = "Benchmark"
+    alert_level.triggerAlertTriggered = True
+    alert_level.triggerAlertNormal = True
+    alert_level.profiles = [0]
+    global_data.alertLevels = [alert_level]
+
+    # Sensor 0 has no alert delay, sensor 1 one second and sensor 2 one hour (sensor alerts that only wait).
+    global_data.storage.add_sensor(_create_sensor(0, 0))
+    global_data.storage.add_sensor(_create_sensor(1, 1))
+    global_data.storage.add_sensor(_create_sensor(2, 3600))
+
+    add_times = dict()  # type: Dict[int, float]
+    latencies = {0: [], 1: []}  # type: Dict[int, List[float]]
+
+    def _trigger_sensor_alert(sensor_alert_state: SensorAlertState):
+        sensor_alert = sensor_alert_state.sensor_alert
+        latency = time.time() - add_times[sensor_alert.optionalData["index"]] - sensor_alert.alertDelay
+        latencies[sensor_alert.sensorId].append(latency)
+
+    executer = SensorAlertExecuter(global_data)
+    executer._trigger_sensor_alert = _trigger_sensor_alert
+    executer.daemon = True
+    executer.start()
+
+    for i in range(waiting):
+        executer.add_sensor_alert(1, 2, 1, {"index": -1}, False, False, SensorDataType.NONE, SensorDataNone())
+
+    index = 0
+    end = time.time() + seconds
+    while time.time() < end:
+        sensor_id = 1 if index % 10 == 0 else 0
+        add_times[index] = time.time()
+        executer.add_sensor_alert(1, sensor_id, 1, {"index": index}, False, False, SensorDataType.NONE,
+                                  SensorDataNone())
+        index += 1
+        time.sleep(random.expovariate(rate))
+
+    # Wait for the delayed sensor alerts.
+    time.sleep(2)
+    executer.exit()
+
+    for sensor_id, name in [(0, "no alert delay"), (1, "alert delay 1 s")]:
+        print_results("Sensor alerts with %s (%d/s, %d waiting)" % (name, rate, waiting),
+                      [("sensor alerts", "%d" % len(latencies[sensor_id])),
+                       ("latency p50", "%.2f ms" % (percentile(latencies[sensor_id], 50) * 1000)),
+                       ("latency p99", "%.2f ms" % (percentile(latencies[sensor_id], 99) * 1000)),
+                       ("latency max", "%.2f ms" % (max(latencies[sensor_id]) * 1000))])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the sensor alert executer.")
+    parser.add_argument("--rate", type=int, default=50, help="Sensor alerts per second.")
+    parser.add_argument("--seconds", type=int, default=10, help="Duration of the benchmark.")
+    parser.add_argument("--waiting", type=int, default=1000, help="Sensor alerts waiting for their alert delay.")
+    args = parser.parse_args()
+
+    run(args.rate, args.seconds, args.waiting)
@@ -0,0 +1,86 @@
+"""
+Benchmark of the sensor timeout detection of the connection watchdog.
+
+Measures one check for timed out sensors by reading the sensors from the Sqlite storage (as done before) and by the
+sensor deadline heap while no sensor times out, as well as the cost of updating the deadline of a sensor. Run from
+the server directory:
+
+    python3 -m tests.benchmark.bench_sensor_timeouts --sensors 10000 --rounds 10
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from lib.globalData import GlobalData
+from lib.storage import Sqlite
+from lib.watchdogs.sensorDeadlines import SensorDeadlines
+from tests.benchmark.util import percentile, print_results
+from tests.storage.util import create_sensors
+
+
+def run(sensor_count: int, rounds: int):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = GlobalData()
+    global_data.logger = logging.getLogger("server")
+    global_data.logger.setLevel(logging.WARNING)
+    global_data.storageBackendSqliteFile = os.path.join(temp_dir, "database.db")
+    storage = Sqlite(global_data.storageBackendSqliteFile, global_data)
+
+    sensors_per_node = 1000
+    for i in range(0, sensor_count, sensors_per_node):
+        username = "node_%d" % i
+        storage.addNode(username, "host", "sensor", "benchmark", 1.0, 1, 0)
+        storage.addSensors(username, create_sensors(min(sensors_per_node, sensor_count - i)))
+
+    timeout = int(1.5 * global_data.gracePeriodTimeout)
+    sensor_deadlines = SensorDeadlines(timeout)
+    sensors = storage.getSensorsUpdatedOlderThan(int(time.time()) + 1)
+    for sensor in sensors:
+        sensor_deadlines.update(sensor.sensorId, sensor.lastStateUpdated)
+
+    def _check_storage():
+        storage.getSensorsUpdatedOlderThan(int(time.time()) - timeout)
+
+    def _check_deadlines():
+        sensor_deadlines.pop_expired(int(time.time()))
+        sensor_deadlines.pop_recovered()
+
+    for name, func in [("storage scan", _check_storage), ("deadline heap", _check_deadlines)]:
+        check_times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            check_times.append(time.perf_counter() - start)
+
+        print_results("%s (%d sensors)" % (name, sensor_count),
+                      [("rounds", "%d" % rounds),
+                       ("check p50", "%.3f ms" % (percentile(check_times, 50) * 1000)),
+                       ("check max", "%.3f ms" % (max(check_times) * 1000))])
+
+    sensor_ids = [x.sensorId for x in sensors]
+    update_count = 100000
+    start = time.perf_counter()
+    now = int(time.time())
+    for i in range(update_count):
+        sensor_deadlines.update(random.choice(sensor_ids), now + i)
+    duration = time.perf_counter() - start
+    print_results("deadline updates (%d sensors)" % sensor_count,
+                  [("updates", "%d" % update_count),
+                   ("per update", "%.2f us" % (duration / update_count * 1000000))])
+
+    storage.close()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the sensor timeout detection.")
+    parser.add_argument("--sensors", type=int, default=10000, help="Number of sensors in the database.")
+    parser.add_argument("--rounds", type=int, default=10, help="Number of checks.")
+    args = parser.parse_args()
+
+    run(args.sensors, args.rounds)
@@ -0,0 +1,86 @@
+"""
+Load benchmark of the server engines.
+
+Connects a number of idle sensor clients to the server and lets a subset of them send
+ping requests as fast as possible. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_server_engine --clients 1000 --active 50 --messages 100
+"""
+
+import argparse
+import concurrent.futures
+import shutil
+import tempfile
+import threading
+import time
+from typing import List
+from tests.benchmark.util import percentile, print_results
+from tests.server.core import RawClient, create_global_data, start_server, stop_server, wait_sessions_closed
+
+
+def run_engine(engine: str, client_count: int, active_count: int, message_count: int, workers: int):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = create_global_data(temp_dir)
+    threads_before = threading.active_count()
+    server, port = start_server(global_data, engine, workers)
+
+    clients = [RawClient(port, "bench_%d" % i, global_data.version) for i in range(client_count)]
+
+    # Connect all clients.
+    start = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(lambda c: c.connect_sensor(), clients))
+    connect_time = time.time() - start
+    connected = sum(1 for result in results if result)
+
+    # Give the server time to finish the session initialization.
+    time.sleep(1)
+    server_threads = threading.active_count() - threads_before
+
+    # Let the active clients send ping requests.
+    latencies = []  # type: List[float]
+    latencies_lock = threading.Lock()
+
+    def _send_pings(client: RawClient):
+        local_latencies = []
+        for _ in range(message_count):
+            msg_start = time.time()
+            if not client.ping():
+                raise ValueError("Ping failed.")
+            local_latencies.append(time.time() - msg_start)
+        with latencies_lock:
+            latencies.extend(local_latencies)
+
+    start = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=active_count) as pool:
+        list(pool.map(_send_pings, clients[:active_count]))
+    ping_time = time.time() - start
+
+    for client in clients:
+        client.close()
+    wait_sessions_closed(global_data)
+    stop_server(server)
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_results("Engine '%s'" % engine,
+                  [("connected clients", "%d/%d" % (connected, client_count)),
+                   ("connect time", "%.2f s" % connect_time),
+                   ("server threads", "%d" % server_threads),
+                   ("messages per second", "%.1f" % (len(latencies) / ping_time)),
+                   ("latency p50", "%.2f ms" % (percentile(latencies, 50) * 1000)),
+                   ("latency p99", "%.2f ms" % (percentile(latencies, 99) * 1000))])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load benchmark of the server engines.")
+    parser.add_argument("--engine", choices=["threaded", "selector", "both"], default="both")
+    parser.add_argument("--clients", type=int, default=500, help="Number of connected clients.")
+    parser.add_argument("--active", type=int, default=20, help="Number of clients sending requests.")
+    parser.add_argument("--messages", type=int, default=50, help="Number of requests per active client.")
+    parser.add_argument("--workers", type=int, default=16, help="Number of workers of the selector engine.")
+    args = parser.parse_args()
+
+    engines = ["threaded", "selector"] if args.engine == "both" else [args.engine]
+    for engine in engines:
+        run_engine(engine, args.clients, args.active, args.messages, args.workers)
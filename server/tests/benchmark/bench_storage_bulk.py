@@ -0,0 +1,120 @@
+"""
+Benchmark of reading all sensors from the Sqlite storage.
+
+Measures how long the database lock is held by getAlertSystemInformation() (used for the status updates of the
+manager clients) and getSensorsUpdatedOlderThan() (used every 5 seconds by the connection watchdog). Reading
+each sensor with its own queries (as done before) is measured for comparison. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_storage_bulk --sensors 10000 --rounds 10
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import List
+from lib.globalData import GlobalData
+from lib.storage import Sqlite
+from tests.benchmark.util import percentile, print_results
+from tests.storage.util import create_sensors
+
+
+class _TimedLock:
+    """
+    Lock that records how long it was held.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired = 0.0
+        self.hold_times = []  # type: List[float]
+
+    def acquire(self, *args, **kwargs):
+        result = self._lock.acquire(*args, **kwargs)
+        self._acquired = time.perf_counter()
+        return result
+
+    def release(self):
+        self.hold_times.append(time.perf_counter() - self._acquired)
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def _get_sensors_per_sensor_queries(storage: Sqlite, condition: str, args):
+    """
+    Reads the sensors like before the bulk queries (one query for the ids, multiple queries for each sensor).
+    """
+    storage.dbLock.acquire()
+    storage.cursor.execute("SELECT id FROM sensors " + condition, args)
+    sensors = [storage._getSensorById(x[0]) for x in storage.cursor.fetchall()]
+    storage.dbLock.release()
+    return sensors
+
+
+def _measure(storage: Sqlite, func, rounds: int) -> List[float]:
+    lock = _TimedLock()
+    storage.dbLock = lock
+    for _ in range(rounds):
+        func()
+    return lock.hold_times
+
+
+def run(sensor_count: int, rounds: int):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = GlobalData()
+    global_data.logger = logging.getLogger("server")
+    global_data.storageBackendSqliteFile = os.path.join(temp_dir, "database.db")
+    storage = Sqlite(global_data.storageBackendSqliteFile, global_data)
+
+    global_data.logger.setLevel(logging.WARNING)
+    sensors_per_node = 1000
+    for i in range(0, sensor_count, sensors_per_node):
+        username = "node_%d" % i
+        storage.addNode(username, "host", "sensor", "benchmark", 1.0, 1, 0)
+        storage.addSensors(username, create_sensors(min(sensors_per_node, sensor_count - i)))
+
+    # Let half of the sensors time out.
+    oldest_time = int(time.time()) - 100
+    with storage.dbLock:
+        storage.cursor.execute("UPDATE sensors SET lastStateUpdated = ? WHERE id % 2 = 0", (oldest_time - 100, ))
+        storage.conn.commit()
+
+    measurements = [
+        ("all sensors, per sensor queries",
+         lambda: _get_sensors_per_sensor_queries(storage, "", ())),
+        ("all sensors, getAlertSystemInformation",
+         lambda: storage.getAlertSystemInformation()),
+        ("timed out sensors, per sensor queries",
+         lambda: _get_sensors_per_sensor_queries(storage, "WHERE lastStateUpdated < ?", (oldest_time, ))),
+        ("timed out sensors, getSensorsUpdatedOlderThan",
+         lambda: storage.getSensorsUpdatedOlderThan(oldest_time)),
+    ]
+
+    for name, func in measurements:
+        hold_times = _measure(storage, func, rounds)
+        print_results("%s (%d sensors)" % (name, sensor_count),
+                      [("rounds", "%d" % rounds),
+                       ("lock hold p50", "%.2f ms" % (percentile(hold_times, 50) * 1000)),
+                       ("lock hold max", "%.2f ms" % (max(hold_times) * 1000))])
+
+    storage.close()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of reading all sensors from the Sqlite storage.")
+    parser.add_argument("--sensors", type=int, default=10000, help="Number of sensors in the database.")
+    parser.add_argument("--rounds", type=int, default=10, help="Number of reads.")
+    args = parser.parse_args()
+
+    run(args.sensors, args.rounds)
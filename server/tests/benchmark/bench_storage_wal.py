@@ -0,0 +1,91 @@
+"""
+Benchmark of sensor state updates while the complete system information is read concurrently.
+
+Reader threads continuously call getAlertSystemInformation() (as done for the status updates of the manager
+clients) while the main thread writes sensor state updates. The latency of the writes is measured with the
+default journal mode (reads and writes share one connection and lock) and with the WAL journal mode and
+read-only connections. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_storage_wal --sensors 5000 --readers 2 --writes 200
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from lib.globalData import GlobalData
+from lib.storage import Sqlite
+from tests.benchmark.util import percentile, print_results
+from tests.storage.util import create_sensors
+
+
+def run_mode(sensor_count: int, reader_count: int, write_count: int, wal: bool):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = GlobalData()
+    global_data.logger = logging.getLogger("server")
+    global_data.logger.setLevel(logging.WARNING)
+    global_data.storageBackendSqliteFile = os.path.join(temp_dir, "database.db")
+    storage = Sqlite(global_data.storageBackendSqliteFile,
+                     global_data,
+                     wal=wal,
+                     readConnections=reader_count if wal else 0)
+
+    sensors_per_node = 1000
+    for i in range(0, sensor_count, sensors_per_node):
+        username = "node_%d" % i
+        storage.addNode(username, "host", "sensor", "benchmark", 1.0, 1, 0)
+        storage.addSensors(username, create_sensors(min(sensors_per_node, sensor_count - i)))
+    node_id = storage.getNodeId("node_0")
+
+    stop_event = threading.Event()
+    read_counts = [0] * reader_count
+
+    def _reader(index: int):
+        while not stop_event.is_set():
+            storage.getAlertSystemInformation()
+            read_counts[index] += 1
+
+    readers = [threading.Thread(target=_reader, args=(i, ), daemon=True) for i in range(reader_count)]
+    for reader in readers:
+        reader.start()
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(write_count):
+        write_start = time.perf_counter()
+        storage.updateSensorState(node_id, [(i % sensors_per_node, i % 2)])
+        latencies.append(time.perf_counter() - write_start)
+    duration = time.perf_counter() - start
+
+    stop_event.set()
+    for reader in readers:
+        reader.join()
+
+    statistics = storage.getLockStatistics()
+    print_results("%s (%d sensors, %d readers)" % ("WAL, read connections" if wal else "default journal mode",
+                                                     sensor_count,
+                                                     reader_count),
+                  [("writes", "%d" % write_count),
+                   ("write latency p50", "%.2f ms" % (percentile(latencies, 50) * 1000)),
+                   ("write latency p99", "%.2f ms" % (percentile(latencies, 99) * 1000)),
+                   ("write lock wait max", "%.2f ms" % (statistics["write"]["waitMax"] * 1000)),
+                   ("reads during writes", "%d (%.1f/s)" % (sum(read_counts), sum(read_counts) / duration)),
+                   ("read wait max", "%.2f ms" % (statistics["read"]["waitMax"] * 1000))])
+
+    storage.close()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of sensor state updates during concurrent reads.")
+    parser.add_argument("--sensors", type=int, default=5000, help="Number of sensors in the database.")
+    parser.add_argument("--readers", type=int, default=2, help="Number of reading threads.")
+    parser.add_argument("--writes", type=int, default=200, help="Number of sensor state updates.")
+    args = parser.parse_args()
+
+    run_mode(args.sensors, args.readers, args.writes, False)
+    run_mode(args.sensors, args.readers, args.writes, True)
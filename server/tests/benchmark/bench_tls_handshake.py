@@ -0,0 +1,90 @@
+"""
+Benchmark of TLS/SSL handshakes with the server.
+
+Compares building the TLS/SSL context of the server per connection with the cached context (full
+handshakes and resumed sessions). Connections are closed directly after the handshake. Run from the
+server directory (needs the openssl command line tool):
+
+    python3 -m tests.benchmark.bench_tls_handshake --rounds 200
+"""
+
+import argparse
+import logging
+import shutil
+import socket
+import ssl
+import tempfile
+import time
+from typing import List
+from lib.server import SSLContextCache
+from tests.benchmark.util import percentile, print_results
+from tests.server.core import create_certificate, create_client_ssl_context, create_global_data, start_server, \
+    stop_server, wait_sessions_closed
+
+
+class _UncachedContext(SSLContextCache):
+    """
+    Builds the TLS/SSL context per connection like the server did before the context was cached.
+    """
+
+    def getContext(self) -> ssl.SSLContext:
+        self.contextBuilds += 1
+        return self._buildContext()
+
+
+def run_handshakes(name: str, rounds: int, cached: bool, resume: bool):
+
+    temp_dir = tempfile.mkdtemp()
+    cert_file, key_file = create_certificate(temp_dir)
+    global_data = create_global_data(temp_dir)
+    global_data.sslEnabled = True
+    global_data.serverCertFile = cert_file
+    global_data.serverKeyFile = key_file
+    global_data.useClientCertificates = False
+    global_data.logger.setLevel(logging.CRITICAL)
+
+    server, port = start_server(global_data, "threaded")
+    if not cached:
+        server.sslContextCache = _UncachedContext(global_data)
+
+    # TLS 1.2 sessions are usable directly after the handshake (TLS 1.3 tickets arrive with the first data).
+    client_context = create_client_ssl_context(cert_file)
+    client_context.maximum_version = ssl.TLSVersion.TLSv1_2
+
+    session = None
+    reused = 0
+    durations = []  # type: List[float]
+    start_all = time.time()
+    for _ in range(rounds):
+        start = time.time()
+        sock = socket.create_connection(("127.0.0.1", port), timeout=60)
+        ssl_sock = client_context.wrap_socket(sock,
+                                              server_hostname="localhost",
+                                              session=session if resume else None)
+        durations.append(time.time() - start)
+        if ssl_sock.session_reused:
+            reused += 1
+        session = ssl_sock.session
+        ssl_sock.close()
+    duration_all = time.time() - start_all
+
+    wait_sessions_closed(global_data)
+    stop_server(server)
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_results(name,
+                  [("rounds", "%d" % rounds),
+                   ("handshakes per second", "%.1f" % (rounds / duration_all)),
+                   ("handshake p50", "%.2f ms" % (percentile(durations, 50) * 1000)),
+                   ("handshake p99", "%.2f ms" % (percentile(durations, 99) * 1000)),
+                   ("sessions resumed", "%d" % reused)])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of TLS/SSL handshakes with the server.")
+    parser.add_argument("--rounds", type=int, default=200, help="Number of handshakes per run.")
+    args = parser.parse_args()
+
+    run_handshakes("Context per connection", args.rounds, cached=False, resume=False)
+    run_handshakes("Cached context", args.rounds, cached=True, resume=False)
+    run_handshakes("Cached context with session resumption", args.rounds, cached=True, resume=True)
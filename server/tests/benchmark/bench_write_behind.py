@@ -0,0 +1,76 @@
+"""
+Benchmark of sensor state and data updates written directly and through the write-behind queue.
+
+Simulates the updates of the state change handler (one state and one data update per state change) of
+numeric sensors that send a new value every few seconds. Directly written updates need one transaction for each
+update, queued updates are coalesced per sensor and written in one transaction. Run from the server directory:
+
+    python3 -m tests.benchmark.bench_write_behind --sensors 100 --changes 5000
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+from lib.globalData import GlobalData
+from lib.localObjects import SensorDataInt
+from lib.storage import Sqlite, WriteBehindStorage
+from tests.benchmark.util import percentile, print_results
+from tests.storage.util import create_sensors
+
+
+def run_mode(sensor_count: int, change_count: int, write_behind: bool):
+
+    temp_dir = tempfile.mkdtemp()
+    global_data = GlobalData()
+    global_data.logger = logging.getLogger("server")
+    global_data.logger.setLevel(logging.WARNING)
+    global_data.storageBackendSqliteFile = os.path.join(temp_dir, "database.db")
+    storage = Sqlite(global_data.storageBackendSqliteFile, global_data)
+    if write_behind:
+        storage = WriteBehindStorage(storage, global_data)
+
+    # Only sensors with integer data.
+    sensors = [x for x in create_sensors(sensor_count * 4) if x["dataType"] == 1][:sensor_count]
+    storage.addNode("node", "host", "sensor", "benchmark", 1.0, 1, 0)
+    storage.addSensors("node", sensors)
+    node_id = storage.getNodeId("node")
+
+    latencies = []
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i in range(change_count):
+        client_sensor_id = sensors[i % len(sensors)]["clientSensorId"]
+        change_start = time.perf_counter()
+        storage.updateSensorState(node_id, [(client_sensor_id, i % 2)])
+        storage.updateSensorData(node_id, [(client_sensor_id, SensorDataInt(i, "unit"))])
+        latencies.append(time.perf_counter() - change_start)
+
+    # Include writing the remaining queued updates.
+    storage.close()
+    duration = time.perf_counter() - start
+    cpu_duration = time.process_time() - cpu_start
+
+    results = [("state changes", "%d (%.0f/s)" % (change_count, change_count / duration)),
+               ("handler latency p50", "%.3f ms" % (percentile(latencies, 50) * 1000)),
+               ("handler latency p99", "%.3f ms" % (percentile(latencies, 99) * 1000)),
+               ("cpu time", "%.2f s" % cpu_duration)]
+    if write_behind:
+        results.append(("transactions", "%d" % storage.flushCount))
+        results.append(("written updates", "%d" % storage.flushedUpdates))
+    print_results("%s (%d sensors)" % ("write-behind queue" if write_behind else "direct writes", sensor_count),
+                  results)
+
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of direct and queued sensor updates.")
+    parser.add_argument("--sensors", type=int, default=100, help="Number of sensors sending values.")
+    parser.add_argument("--changes", type=int, default=5000, help="Number of state changes.")
+    args = parser.parse_args()
+
+    run_mode(args.sensors, args.changes, False)
+    run_mode(args.sensors, args.changes, True)
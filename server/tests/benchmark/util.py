@@ -0,0 +1,18 @@
+from typing import List, Tuple
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Returns the given percentile of the values (nearest rank).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def print_results(title: str, results: List[Tuple[str, str]]):
+    print(title)
+    for name, value in results:
+        print("    %-24s %s" % (name + ":", value))
@@ -0,0 +1,88 @@
+import urllib.error
+import urllib.request
+from unittest import TestCase
+from lib.alert import SensorAlertExecuter
+from lib.metrics import Histogram, Metrics, MetricsExporter, export_metrics
+from tests.server.core import TestServerCore
+
+
+class TestMetrics(TestCase):
+
+    def test_histogram(self):
+        """
+        Tests that the bucket counts are cumulative and values above the last bucket are only counted.
+        """
+        histogram = Histogram((1.0, 2.0, 5.0))
+        for value in [0.5, 1.0, 1.5, 3.0, 10.0]:
+            histogram.observe(value)
+
+        statistics = histogram.get_statistics()
+        self.assertEqual(5, statistics["count"])
+        self.assertEqual(16.0, statistics["sum"])
+        self.assertEqual([(1.0, 2), (2.0, 3), (5.0, 4)], statistics["buckets"])
+
+    def test_messages(self):
+        """
+        Tests that messages are counted by type and unknown received types are combined.
+        """
+        metrics = Metrics()
+        metrics.message_received("ping")
+        metrics.message_received("ping")
+        metrics.message_received("something")
+        metrics.message_sent("status", 2000)
+
+        statistics = metrics.get_statistics()
+        self.assertEqual({"ping": 2, "other": 1}, statistics["received"])
+        self.assertEqual({"status": 1}, statistics["sent"])
+        self.assertEqual(1, statistics["payload_sizes"]["status"]["count"])
+        self.assertEqual((4096, 1), statistics["payload_sizes"]["status"]["buckets"][2])
+
+
+class TestMetricsExporter(TestServerCore):
+
+    def test_export(self):
+        """
+        Tests that the metrics of the sessions, messages and storage are exported.
+        """
+        self._create_server("threaded", metrics=True)
+        self.global_data.sensorAlertExecuter = SensorAlertExecuter(self.global_data)
+        self.addCleanup(self.global_data.sensorAlertExecuter.exit)
+
+        sensor_client = self._create_client("sensor_0", protocol=2)
+        self.assertTrue(sensor_client.connect_sensor(1))
+        self.assertTrue(sensor_client.ping())
+        manager_client = self._create_client("manager_0")
+        self.assertTrue(manager_client.connect_manager())
+        self.assertEqual("status", manager_client.recv_request()["message"])
+        self.assertEqual(2, self._wait_sessions(2))
+
+        lines = export_metrics(self.global_data).splitlines()
+        self.assertIn("alertr_sessions{node_type=\"sensor\"} 1", lines)
+        self.assertIn("alertr_sessions{node_type=\"manager\"} 1", lines)
+        self.assertIn("alertr_messages_received_total{type=\"ping\"} 1", lines)
+        self.assertIn("alertr_messages_sent_total{type=\"status\"} 1", lines)
+        self.assertIn("alertr_transaction_handshake_seconds_count 1", lines)
+        self.assertIn("alertr_message_payload_bytes_count{type=\"status\"} 1", lines)
+        self.assertIn("alertr_sensor_alert_queue_depth{state=\"queued\"} 0", lines)
+        self.assertTrue(any(x.startswith("alertr_storage_lock_acquisitions_total{method=\"addNode\"}")
+                            for x in lines))
+
+    def test_http(self):
+        """
+        Tests that the metrics are served under /metrics.
+        """
+        self._create_server("threaded", metrics=True)
+        self.global_data.metricsPort = 0
+        exporter = MetricsExporter(self.global_data)
+        exporter.daemon = True
+        exporter.start()
+        self.addCleanup(exporter.exit)
+
+        url = "http://127.0.0.1:%d" % exporter.port
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+            self.assertIn("# TYPE alertr_messages_received_total counter", response.read().decode("utf-8"))
+
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(url + "/other", timeout=5)
+        self.assertEqual(404, context.exception.code)
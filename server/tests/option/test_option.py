@@ -220,6 +220,47 @@ class TestOption(TestCase):
         self.assertEqual(options[0].type, "profile")
         self.assertEqual(options[0].value, 2)
 
+    def test_profile_state_published(self):
+        """
+        Tests that a stored profile option is published to the in-memory profile state.
+        """
+        option_executer, global_data = self._create_option_executer()
+        global_data.profile_state.set_profile_id(0)
+
+        changed_profiles = list()
+        global_data.profile_state.add_change_callback(changed_profiles.append)
+
+        option_executer.add_option("profile",
+                                   2,
+                                   0)
+
+        time.sleep(1)
+
+        self.assertEqual(2, global_data.profile_state.get_profile_id())
+        self.assertEqual([2], changed_profiles)
+
+        # Setting the same profile again does not notify.
+        global_data.profile_state.set_profile_id(2)
+        self.assertEqual([2], changed_profiles)
+
+    def test_profile_state_storage_failure(self):
+        """
+        Tests that a profile option that could not be stored is not published to the in-memory profile state.
+        """
+        option_executer, global_data = self._create_option_executer()
+        global_data.profile_state.set_profile_id(0)
+
+        # Set storage to not work.
+        global_data.storage.is_working = False
+
+        option_executer.add_option("profile",
+                                   2,
+                                   0)
+
+        time.sleep(1)
+
+        self.assertEqual(0, global_data.profile_state.get_profile_id())
+
     def test_send_profile_change(self):
         """
         Tests sending of profile change messages.
@@ -0,0 +1,445 @@
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from typing import Any, Dict, List, Optional, Tuple, Union
+from lib.globalData import GlobalData
+from lib.localObjects import AlertLevel, Profile, SensorAlert, SensorDataNone, SensorDataType
+from lib.manager import ManagerUpdateExecuter
+from lib.metrics import Metrics
+from lib.server import ServerSession, ThreadedTCPServer, SelectorTCPServer
+from lib.storage.sqlite import Sqlite
+# noinspection PyProtectedMember
+from lib.users.core import _userBackend
+from lib.watchdogs import ConnectionWatchdog
+
+
+# noinspection PyAbstractClass
+class MockUserBackend(_userBackend):
+
+    def areUserCredentialsValid(self, username: str, password: str) -> bool:
+        return True
+
+    def checkNodeTypeAndInstance(self, username: str, nodeType: str, instance: str) -> bool:
+        return True
+
+
+class RawClient:
+    """
+    Minimal client that speaks the AlertR protocol directly on a socket.
+    """
+
+    def __init__(self,
+                 port: int,
+                 username: str,
+                 version: float,
+                 protocol: int = 1):
+        self._port = port
+        self._username = username
+        self._version = version
+        self._socket = None  # type: Optional[socket.socket]
+
+        # TLS/SSL context and session used to connect (no TLS/SSL if context is None).
+        self.ssl_context = None  # type: Optional[ssl.SSLContext]
+        self.ssl_session = None  # type: Optional[ssl.SSLSession]
+        self._buffer = bytearray()
+        self._next_frame_id = 1
+
+        # Requested protocol version (replaced by the negotiated one after connecting).
+        self.protocol = protocol
+
+    def _recv_data(self):
+        data = self._socket.recv(4096)
+        if not data:
+            raise ConnectionError("Connection closed.")
+        self._buffer.extend(data)
+
+    def _recv_exactly(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            self._recv_data()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _recv_msg(self) -> Dict[str, Any]:
+        while True:
+            if self._buffer:
+                try:
+                    message, end = json.JSONDecoder().raw_decode(self._buffer.decode("ascii"))
+                    del self._buffer[:end]
+                    return message
+                except ValueError:
+                    pass
+            self._recv_data()
+
+    def _send_msg(self, message: Union[str, Dict[str, Any]]):
+        if isinstance(message, dict):
+            message = json.dumps(message)
+        self._socket.sendall(message.encode("ascii"))
+
+    def recv_frame(self) -> Tuple[str, int, Dict[str, Any]]:
+        """
+        Receives a frame of protocol version 2.
+        """
+        header = self._recv_exactly(17).decode("ascii")
+        data = self._recv_exactly(int(header[0:8], 16))
+        return header[16], int(header[8:16], 16), json.loads(data.decode("ascii"))
+
+    def send_frame(self, frame_type: str, frame_id: int, message: Union[str, Dict[str, Any]]):
+        """
+        Sends a frame of protocol version 2.
+        """
+        if isinstance(message, dict):
+            message = json.dumps(message)
+        self._send_msg("%08x%08x%s%s" % (len(message), frame_id, frame_type, message))
+
+    @staticmethod
+    def build_sensor_registration(sensor_count: int) -> str:
+        sensors = list()
+        for i in range(sensor_count):
+            sensors.append({"clientSensorId": i,
+                            "alertDelay": 0,
+                            "alertLevels": [1],
+                            "description": "Sensor %d" % i,
+                            "state": 0,
+                            "dataType": SensorDataType.NONE,
+                            "data": {}})
+
+        payload = {"type": "request",
+                   "hostname": "localhost",
+                   "nodeType": "sensor",
+                   "instance": "benchmark",
+                   "persistent": 0,
+                   "sensors": sensors}
+        return json.dumps({"msgTime": int(time.time()),
+                           "message": "initialization",
+                           "payload": payload})
+
+    @staticmethod
+    def build_alert_registration(alert_count: int) -> str:
+        alerts = list()
+        for i in range(alert_count):
+            alerts.append({"clientAlertId": i,
+                           "description": "Alert %d" % i,
+                           "alertLevels": [1]})
+
+        payload = {"type": "request",
+                   "hostname": "localhost",
+                   "nodeType": "alert",
+                   "instance": "benchmark",
+                   "persistent": 0,
+                   "alerts": alerts}
+        return json.dumps({"msgTime": int(time.time()),
+                           "message": "initialization",
+                           "payload": payload})
+
+    @staticmethod
+    def build_manager_registration(status_delta: bool = False) -> str:
+        payload = {"type": "request",
+                   "hostname": "localhost",
+                   "nodeType": "manager",
+                   "instance": "benchmark",
+                   "persistent": 0,
+                   "manager": {"description": "Manager",
+                               "statusDelta": status_delta}}
+        return json.dumps({"msgTime": int(time.time()),
+                           "message": "initialization",
+                           "payload": payload})
+
+    def attach(self, sock: socket.socket):
+        """
+        Uses an already connected socket (e.g., one end of a socket pair).
+        """
+        self._socket = sock
+        self._socket.settimeout(60)
+
+    def close(self):
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except Exception:
+                pass
+
+    def connect(self, reg_message: str) -> bool:
+        """
+        Connects, authenticates and registers the client with the given registration message.
+        """
+        self._socket = socket.create_connection(("127.0.0.1", self._port), timeout=60)
+        if self.ssl_context is not None:
+            self._socket = self.ssl_context.wrap_socket(self._socket,
+                                                        server_hostname="localhost",
+                                                        session=self.ssl_session)
+
+        payload = {"type": "request",
+                   "version": self._version,
+                   "rev": 0,
+                   "username": self._username,
+                   "password": "password"}
+        if self.protocol > 1:
+            payload["protocol"] = self.protocol
+        self._send_msg({"msgTime": int(time.time()),
+                        "size": len(reg_message),
+                        "message": "initialization",
+                        "payload": payload})
+        message = self._recv_msg()
+        if "error" in message.keys():
+            return False
+        self.protocol = message["payload"].get("protocol", 1)
+
+        # Session tickets of TLS 1.3 are received after the handshake.
+        if self.ssl_context is not None:
+            self.ssl_session = self._socket.session
+
+        self._send_msg(reg_message)
+        message = self._recv_msg()
+        return "error" not in message.keys() and message["payload"]["result"] == "ok"
+
+    def connect_alert(self, alert_count: int = 1) -> bool:
+        return self.connect(RawClient.build_alert_registration(alert_count))
+
+    def connect_sensor(self, sensor_count: int = 1) -> bool:
+        return self.connect(RawClient.build_sensor_registration(sensor_count))
+
+    def connect_manager(self, status_delta: bool = False) -> bool:
+        return self.connect(RawClient.build_manager_registration(status_delta))
+
+    def recv_request(self) -> Dict[str, Any]:
+        """
+        Receives a request initiated by the server and acknowledges it.
+        """
+        if self.protocol >= 2:
+            frame_type, frame_id, request = self.recv_frame()
+            if frame_type != "Q":
+                raise ValueError("Request expected.")
+            self.send_frame("R", frame_id, {"message": request["message"],
+                                            "payload": {"type": "response",
+                                                        "result": "ok"}})
+            return request
+
+        message = self._recv_msg()
+        if message["payload"]["type"] != "rts":
+            raise ValueError("RTS expected.")
+        size = message["size"]
+        self._send_msg({"message": message["message"],
+                        "payload": {"type": "cts",
+                                    "id": message["payload"]["id"]}})
+
+        request = json.loads(self._recv_exactly(size).decode("ascii"))
+
+        self._send_msg({"message": request["message"],
+                        "payload": {"type": "response",
+                                    "result": "ok"}})
+        return request
+
+    def ping(self) -> bool:
+        """
+        Sends a ping request and waits for the response.
+        """
+        msg = json.dumps({"msgTime": int(time.time()),
+                          "message": "ping",
+                          "payload": {"type": "request"}})
+        if self.protocol >= 2:
+            return self.ping_pipelined(1, 1)
+
+        transaction_id = random.randint(0, 0xffffffff)
+        self._send_msg({"size": len(msg),
+                        "message": "ping",
+                        "payload": {"type": "rts",
+                                    "id": transaction_id}})
+        message = self._recv_msg()
+        if message["payload"]["type"] != "cts" or message["payload"]["id"] != transaction_id:
+            return False
+
+        self._send_msg(msg)
+        message = self._recv_msg()
+        return message["message"] == "ping" and message["payload"]["result"] == "ok"
+
+    def send_request(self, message: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Sends a request with protocol version 2 (or newer) and returns the response of the server.
+        """
+        msg = {"msgTime": int(time.time()),
+               "message": message,
+               "payload": payload}
+        frame_id = self._next_frame_id
+        self._next_frame_id += 1
+        self.send_frame("Q", frame_id, msg)
+
+        frame_type, response_id, response = self.recv_frame()
+        if frame_type != "R" or response_id != frame_id:
+            raise ValueError("Response expected.")
+        return response
+
+    def ping_pipelined(self, count: int, window: int) -> bool:
+        """
+        Sends ping requests with protocol version 2 while at most the given number of requests
+        wait for their response.
+        """
+        pending = set()
+        sent = 0
+        while sent < count or pending:
+            while sent < count and len(pending) < window:
+                msg = {"msgTime": int(time.time()),
+                       "message": "ping",
+                       "payload": {"type": "request"}}
+                self.send_frame("Q", self._next_frame_id, msg)
+                pending.add(self._next_frame_id)
+                self._next_frame_id += 1
+                sent += 1
+
+            frame_type, frame_id, message = self.recv_frame()
+            if (frame_type != "R"
+                    or frame_id not in pending
+                    or message["message"] != "ping"
+                    or message["payload"]["result"] != "ok"):
+                return False
+            pending.remove(frame_id)
+        return True
+
+
+def create_certificate(directory: str, name: str = "server") -> Tuple[str, str]:
+    """
+    Creates a self-signed certificate for localhost with the openssl command line tool.
+
+    :return: tuple of certificate file and key file
+    """
+    cert_file = os.path.join(directory, name + ".crt")
+    key_file = os.path.join(directory, name + ".key")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-keyout", key_file, "-out", cert_file],
+                   check=True,
+                   stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+    return cert_file, key_file
+
+
+def create_client_ssl_context(ca_file: str) -> ssl.SSLContext:
+    ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ssl_context.load_verify_locations(cafile=ca_file)
+    return ssl_context
+
+
+def create_sensor_alert(sensor_id: int) -> SensorAlert:
+    """
+    Creates a sensor alert without data for the given sensor.
+    """
+    sensor_alert = SensorAlert()
+    sensor_alert.sensorId = sensor_id
+    sensor_alert.state = 1
+    sensor_alert.description = "Sensor %d" % sensor_id
+    sensor_alert.triggeredAlertLevels = [1]
+    sensor_alert.hasOptionalData = False
+    sensor_alert.changeState = True
+    sensor_alert.hasLatestData = False
+    sensor_alert.dataType = SensorDataType.NONE
+    sensor_alert.data = SensorDataNone()
+    return sensor_alert
+
+
+def create_global_data(temp_dir: str, metrics: bool = False) -> GlobalData:
+    """
+    Creates the global data of a server that uses a temporary storage and accepts all clients.
+    """
+    global_data = GlobalData()
+    if metrics:
+        global_data.metrics = Metrics()
+    global_data.logger = logging.getLogger("server")
+    global_data.logdir = temp_dir
+    global_data.loglevel = logging.WARNING
+    global_data.sslEnabled = False
+    global_data.storageBackendSqliteFile = os.path.join(temp_dir, "database.db")
+    global_data.storage = Sqlite(global_data.storageBackendSqliteFile, global_data)
+    global_data.userBackend = MockUserBackend()
+
+    profile = Profile()
+    profile.profileId = 0
+    profile.name = "Profile 0"
+    global_data.profiles.append(profile)
+
+    alert_level = AlertLevel()
+    alert_level.level = 1
+    alert_level.name = "Alert Level 1"
+    alert_level.triggerAlertTriggered = True
+    alert_level.triggerAlertNormal = True
+    alert_level.instrumentation_active = False
+    alert_level.profiles = [0]
+    global_data.alertLevels.append(alert_level)
+
+    global_data.managerUpdateExecuter = ManagerUpdateExecuter(global_data)
+    global_data.connectionWatchdog = ConnectionWatchdog(global_data, global_data.connectionTimeout)
+    return global_data
+
+
+def start_server(global_data: GlobalData,
+                 engine: str,
+                 workers: int = 16) -> Tuple[Union[ThreadedTCPServer, SelectorTCPServer], int]:
+    """
+    Starts a server with the given engine on a free local port.
+    """
+    if engine == "selector":
+        server = SelectorTCPServer(global_data, ("127.0.0.1", 0), ServerSession, workers)
+    else:
+        server = ThreadedTCPServer(global_data, ("127.0.0.1", 0), ServerSession)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, server.server_address[1]
+
+
+def wait_sessions_closed(global_data: GlobalData, timeout: float = 10.0):
+    """
+    Waits until all sessions of the server are closed.
+    """
+    start = time.time()
+    while list(global_data.serverSessions) and (time.time() - start) < timeout:
+        time.sleep(0.05)
+
+
+def stop_server(server: Union[ThreadedTCPServer, SelectorTCPServer]):
+    server.shutdown()
+    server.server_close()
+
+
+class TestServerCore(TestCase):
+
+    def _clean_up(self):
+        for client in self.clients:
+            client.close()
+        wait_sessions_closed(self.global_data)
+        stop_server(self.server)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_server(self, engine: str, workers: int = 4, metrics: bool = False):
+        self.temp_dir = tempfile.mkdtemp()
+        self.global_data = create_global_data(self.temp_dir, metrics)
+        self.server, self.port = start_server(self.global_data, engine, workers)
+        self.clients = []  # type: List[RawClient]
+        self.addCleanup(self._clean_up)
+
+    def _create_client(self, username: str, protocol: int = 1) -> RawClient:
+        client = RawClient(self.port, username, self.global_data.version, protocol)
+        self.clients.append(client)
+        return client
+
+    def _wait_sessions(self, count: int, timeout: float = 5.0) -> int:
+        """
+        Waits until the given number of initialized sessions exist.
+        """
+        start = time.time()
+        while True:
+            initialized = 0
+            for server_session in self.global_data.serverSessions:
+                if server_session.clientComm is not None and server_session.clientComm.clientInitialized:
+                    initialized += 1
+            if initialized == count or (time.time() - start) > timeout:
+                return initialized
+            time.sleep(0.05)
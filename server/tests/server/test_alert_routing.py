@@ -0,0 +1,101 @@
+import time
+from unittest import TestCase
+from lib.alert.alert import SensorAlertExecuter, SensorAlertState
+from lib.globalData import ServerSessions
+from tests.server.core import TestServerCore, create_sensor_alert
+
+
+class _MockClientComm:
+
+    def __init__(self):
+        self.nodeId = None
+
+
+class _MockServerSession:
+
+    def __init__(self, client_comm):
+        self.clientComm = client_comm
+
+
+class TestAlertLevelRoutes(TestCase):
+
+    def test_routes(self):
+        """
+        Tests that each client handling at least one of the alert levels is returned exactly once.
+        """
+        server_sessions = ServerSessions()
+        comms = [object() for _ in range(3)]
+        server_sessions.add_alert_level_routes(comms[0], [1, 2])
+        server_sessions.add_alert_level_routes(comms[1], [2])
+        server_sessions.add_alert_level_routes(comms[2], [3])
+
+        self.assertEqual([comms[0]], server_sessions.get_alert_level_routes([1]))
+        self.assertEqual([comms[0], comms[1]], server_sessions.get_alert_level_routes([1, 2]))
+        self.assertEqual([comms[2]], server_sessions.get_alert_level_routes([3, 4]))
+        self.assertEqual([], server_sessions.get_alert_level_routes([4]))
+
+        # Adding routes again replaces the former ones.
+        server_sessions.add_alert_level_routes(comms[0], [3])
+        self.assertEqual([], server_sessions.get_alert_level_routes([1]))
+        self.assertEqual([comms[2], comms[0]], server_sessions.get_alert_level_routes([3]))
+
+        server_sessions.remove_alert_level_routes(comms[2])
+        self.assertEqual([comms[0]], server_sessions.get_alert_level_routes([3]))
+
+    def test_remove_session(self):
+        """
+        Tests that removing a server session removes the routes of its client.
+        """
+        server_sessions = ServerSessions()
+        server_session = _MockServerSession(_MockClientComm())
+        server_sessions.append(server_session)
+        server_sessions.add_alert_level_routes(server_session.clientComm, [1])
+
+        server_sessions.remove(server_session)
+        self.assertEqual([], server_sessions.get_alert_level_routes([1]))
+        self.assertEqual({}, server_sessions._routed_alert_levels)
+
+
+class TestAlertRouting(TestServerCore):
+
+    def _wait_routes(self, count: int, timeout: float = 5.0) -> int:
+        start = time.time()
+        while True:
+            routes = len(self.global_data.serverSessions.get_alert_level_routes([1]))
+            if routes == count or (time.time() - start) > timeout:
+                return routes
+            time.sleep(0.05)
+
+    def test_trigger_sensor_alert(self):
+        """
+        Tests that sensor alerts are only sent to the routed alert and manager clients and closed
+        sessions are removed from the routes.
+        """
+        self._create_server("threaded")
+
+        sensor_client = self._create_client("sensor_0")
+        self.assertTrue(sensor_client.connect_sensor(1))
+        alert_client = self._create_client("alert_0")
+        self.assertTrue(alert_client.connect_alert())
+        manager_client = self._create_client("manager_0")
+        self.assertTrue(manager_client.connect_manager())
+        self.assertEqual("status", manager_client.recv_request()["message"])
+        self.assertEqual(3, self._wait_sessions(3))
+
+        # Sensor clients do not receive sensor alerts.
+        self.assertEqual(2, self._wait_routes(2))
+
+        sensor_alert_executer = SensorAlertExecuter(self.global_data)
+        sensor_alert = create_sensor_alert(5)
+        sensor_alert.alertLevels = [1]
+        sensor_alert.alertDelay = 0
+        sensor_alert_state = SensorAlertState(sensor_alert, self.global_data.alertLevels, time.time())
+        sensor_alert_executer._trigger_sensor_alert(sensor_alert_state)
+
+        for client in [alert_client, manager_client]:
+            request = client.recv_request()
+            self.assertEqual("sensoralert", request["message"])
+            self.assertEqual(5, request["payload"]["sensorId"])
+
+        alert_client.close()
+        self.assertEqual(1, self._wait_routes(1))
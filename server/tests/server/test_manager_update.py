@@ -0,0 +1,254 @@
+import json
+from lib.localObjects import SensorData, SensorDataNone, SensorDataType
+from tests.server.core import TestServerCore
+
+
+def _create_sensor_data() -> SensorData:
+    sensor_data = SensorData()
+    sensor_data.dataType = SensorDataType.NONE
+    sensor_data.data = SensorDataNone()
+    return sensor_data
+
+
+class TestManagerUpdate(TestServerCore):
+
+    def test_status_shared(self):
+        """
+        Tests that the status message is built once and shared by all manager clients.
+        """
+        self._create_server("threaded")
+
+        sensor_client = self._create_client("sensor_0")
+        self.assertTrue(sensor_client.connect_sensor(3))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        clients = [self._create_client("manager_%d" % i) for i in range(3)]
+        for client in clients:
+            self.assertTrue(client.connect_manager())
+            request = client.recv_request()
+            self.assertEqual("status", request["message"])
+        self.assertEqual(4, self._wait_sessions(4))
+
+        manager_update_executer = self.global_data.managerUpdateExecuter
+        builds = manager_update_executer.status_payload_builds
+        for server_session in self.global_data.serverSessions:
+            if server_session.clientComm.nodeType == "manager":
+                self.assertTrue(server_session.clientComm.queueManagerUpdate())
+
+        payloads = list()
+        for client in clients:
+            request = client.recv_request()
+            self.assertEqual("status", request["message"])
+            self.assertEqual(3, len(request["payload"]["sensors"]))
+            payloads.append(request["payload"])
+
+        # Nothing changed in the database => payload was reused.
+        self.assertEqual(builds, manager_update_executer.status_payload_builds)
+        self.assertEqual(payloads[0], payloads[1])
+        self.assertEqual(payloads[0], payloads[2])
+
+    def test_status_rebuilt_after_change(self):
+        """
+        Tests that the status payload is built again after the data in the database changed.
+        """
+        self._create_server("threaded")
+
+        sensor_client = self._create_client("sensor_0")
+        self.assertTrue(sensor_client.connect_sensor(1))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        manager_update_executer = self.global_data.managerUpdateExecuter
+        payload, revision = manager_update_executer.get_status_payload()
+        builds = manager_update_executer.status_payload_builds
+        self.assertIs(payload, manager_update_executer.get_status_payload()[0])
+        self.assertEqual(builds, manager_update_executer.status_payload_builds)
+
+        node_id = self.global_data.storage.getNodeId("sensor_0")
+        self.assertTrue(self.global_data.storage.markNodeAsNotConnected(node_id))
+
+        new_payload, new_revision = manager_update_executer.get_status_payload()
+        self.assertNotEqual(payload, new_payload)
+        self.assertEqual(revision + 1, new_revision)
+        self.assertEqual(builds + 1, manager_update_executer.status_payload_builds)
+
+    def _connect_delta_manager(self):
+        self._create_server("threaded")
+
+        sensor_client = self._create_client("sensor_0")
+        self.assertTrue(sensor_client.connect_sensor(3))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        manager_client = self._create_client("manager_0")
+        self.assertTrue(manager_client.connect_manager(status_delta=True))
+        request = manager_client.recv_request()
+        self.assertEqual("status", request["message"])
+        self.assertNotIn("delta", request["payload"])
+        self.assertEqual(3, len(request["payload"]["sensors"]))
+        self.assertEqual(2, self._wait_sessions(2))
+
+        for server_session in self.global_data.serverSessions:
+            if server_session.clientComm.nodeType == "manager":
+                return manager_client, server_session.clientComm, request["payload"]["revision"]
+
+    def test_status_delta(self):
+        """
+        Tests that manager clients supporting it only get the objects changed since the last status update.
+        """
+        manager_client, client_comm, revision = self._connect_delta_manager()
+
+        # Nothing changed => empty delta.
+        self.assertTrue(client_comm.queueManagerUpdate())
+        request = manager_client.recv_request()
+        self.assertTrue(request["payload"]["delta"])
+        self.assertEqual(revision, request["payload"]["baseRevision"])
+        self.assertEqual(revision, request["payload"]["revision"])
+        for object_list in ["options", "nodes", "sensors", "managers", "alerts"]:
+            self.assertEqual([], request["payload"][object_list])
+            self.assertEqual([], request["payload"]["deleted"][object_list])
+
+        # Change a single sensor.
+        node_id = self.global_data.storage.getNodeId("sensor_0")
+        sensor_id = self.global_data.storage.getSensorId(node_id, 1)
+        self.assertTrue(self.global_data.storage.updateSensorState(node_id, [(1, 1)]))
+
+        self.assertTrue(client_comm.queueManagerUpdate())
+        request = manager_client.recv_request()
+        self.assertTrue(request["payload"]["delta"])
+        self.assertEqual(revision, request["payload"]["baseRevision"])
+        self.assertEqual(revision + 1, request["payload"]["revision"])
+        self.assertEqual([sensor_id], [sensor["sensorId"] for sensor in request["payload"]["sensors"]])
+        self.assertEqual(1, request["payload"]["sensors"][0]["state"])
+        self.assertEqual([], request["payload"]["nodes"])
+
+    def test_status_delta_deleted(self):
+        """
+        Tests that deleted objects are part of the delta status update.
+        """
+        manager_client, client_comm, revision = self._connect_delta_manager()
+
+        node_id = self.global_data.storage.getNodeId("sensor_0")
+        sensor_ids = [self.global_data.storage.getSensorId(node_id, i) for i in range(3)]
+        self.assertTrue(self.global_data.storage.deleteNode(node_id))
+
+        self.assertTrue(client_comm.queueManagerUpdate())
+        request = manager_client.recv_request()
+        self.assertTrue(request["payload"]["delta"])
+        self.assertEqual([node_id], request["payload"]["deleted"]["nodes"])
+        self.assertEqual(sorted(sensor_ids), sorted(request["payload"]["deleted"]["sensors"]))
+
+    def test_status_delta_fallback(self):
+        """
+        Tests that a full status update is sent if the manager client did not process the last one.
+        """
+        manager_client, client_comm, revision = self._connect_delta_manager()
+
+        self.assertTrue(client_comm.queueManagerUpdate())
+        frame = manager_client._recv_msg()
+        self.assertEqual("rts", frame["payload"]["type"])
+        manager_client._send_msg({"message": "status",
+                                  "payload": {"type": "cts",
+                                              "id": frame["payload"]["id"]}})
+        request = json.loads(manager_client._recv_exactly(frame["size"]).decode("ascii"))
+        self.assertTrue(request["payload"]["delta"])
+        manager_client._send_msg({"message": "status",
+                                  "payload": {"type": "response",
+                                              "result": "expired"}})
+
+        self.assertTrue(client_comm.queueManagerUpdate())
+        request = manager_client.recv_request()
+        self.assertNotIn("delta", request["payload"])
+        self.assertEqual(3, len(request["payload"]["sensors"]))
+
+    def test_status_full_without_support(self):
+        """
+        Tests that manager clients without support for delta status updates always get full status updates.
+        """
+        self._create_server("threaded")
+
+        manager_client = self._create_client("manager_0")
+        self.assertTrue(manager_client.connect_manager())
+        manager_client.recv_request()
+        self.assertEqual(1, self._wait_sessions(1))
+
+        client_comm = list(self.global_data.serverSessions)[0].clientComm
+        self.assertTrue(client_comm.queueManagerUpdate())
+        request = manager_client.recv_request()
+        self.assertNotIn("delta", request["payload"])
+        self.assertEqual(1, len(request["payload"]["nodes"]))
+
+    def test_state_change_coalesced(self):
+        """
+        Tests that only the last state change of a sensor within a time window is sent to the manager clients.
+        """
+        self._create_server("threaded")
+
+        manager_client = self._create_client("manager_0")
+        self.assertTrue(manager_client.connect_manager())
+        manager_client.recv_request()
+        self.assertEqual(1, self._wait_sessions(1))
+
+        manager_update_executer = self.global_data.managerUpdateExecuter
+        for state in [1, 0, 1]:
+            manager_update_executer.queue_state_change(3, state, _create_sensor_data())
+        manager_update_executer.queue_state_change(4, 0, _create_sensor_data())
+        manager_update_executer._send_state_changes()
+
+        for sensor_id, state in [(3, 1), (4, 0)]:
+            request = manager_client.recv_request()
+            self.assertEqual("statechange", request["message"])
+            self.assertEqual(sensor_id, request["payload"]["sensorId"])
+            self.assertEqual(state, request["payload"]["state"])
+
+        self.assertEqual(4, manager_update_executer.state_changes_queued)
+        self.assertEqual(2, manager_update_executer.state_changes_coalesced)
+        self.assertEqual(2, manager_update_executer.state_changes_sent)
+
+    def test_state_change_queue_full(self):
+        """
+        Tests that a full status update is sent instead of the state changes if the queue is full.
+        """
+        self._create_server("threaded")
+
+        manager_update_executer = self.global_data.managerUpdateExecuter
+        manager_update_executer._state_change_queue_size = 2
+        for sensor_id in range(2):
+            manager_update_executer.queue_state_change(sensor_id, 1, _create_sensor_data())
+        self.assertFalse(manager_update_executer._force_status_update)
+
+        # State changes of already queued sensors do not fill the queue.
+        manager_update_executer.queue_state_change(1, 0, _create_sensor_data())
+        self.assertFalse(manager_update_executer._force_status_update)
+
+        manager_update_executer.queue_state_change(2, 1, _create_sensor_data())
+        self.assertTrue(manager_update_executer._force_status_update)
+        self.assertEqual(1, manager_update_executer.state_change_overflows)
+        self.assertEqual([2], list(manager_update_executer._queue_state_change.keys()))
+
+    def test_state_changes_batched(self):
+        """
+        Tests that manager clients with protocol version 3 get all state changes of a time window in one message
+        and older manager clients one message per state change.
+        """
+        self._create_server("threaded")
+
+        clients = list()
+        for i, protocol in enumerate([3, 2]):
+            manager_client = self._create_client("manager_%d" % i, protocol=protocol)
+            self.assertTrue(manager_client.connect_manager())
+            manager_client.recv_request()
+            clients.append(manager_client)
+        self.assertEqual(2, self._wait_sessions(2))
+
+        manager_update_executer = self.global_data.managerUpdateExecuter
+        manager_update_executer.queue_state_change(3, 1, _create_sensor_data())
+        manager_update_executer.queue_state_change(4, 0, _create_sensor_data())
+        manager_update_executer._send_state_changes()
+
+        request = clients[0].recv_request()
+        self.assertEqual("statechanges", request["message"])
+        self.assertEqual([(3, 1), (4, 0)], [(x["sensorId"], x["state"]) for x in request["payload"]["stateChanges"]])
+
+        for sensor_id in [3, 4]:
+            request = clients[1].recv_request()
+            self.assertEqual("statechange", request["message"])
+            self.assertEqual(sensor_id, request["payload"]["sensorId"])
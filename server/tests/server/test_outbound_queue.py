@@ -0,0 +1,175 @@
+import shutil
+import socket
+import tempfile
+import time
+from unittest import TestCase
+from lib.localObjects import Profile
+from lib.server import ClientCommunication
+from tests.server.core import RawClient, create_global_data, create_sensor_alert
+
+
+class TestOutboundQueue(TestCase):
+
+    def _clean_up(self):
+        self.client_comm.close()
+        self.client.close()
+        self.server_socket.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_client_comm(self, queue_size: int, queue_policy: str):
+        self.temp_dir = tempfile.mkdtemp()
+        self.global_data = create_global_data(self.temp_dir)
+        self.global_data.outboundQueueSize = queue_size
+        self.global_data.outboundQueuePolicy = queue_policy
+
+        self.server_socket, client_socket = socket.socketpair()
+        self.client_comm = ClientCommunication(self.server_socket, "127.0.0.1", 0, self.global_data)
+        self.client_comm.nodeType = "alert"
+        self.client_comm.clientInitialized = True
+
+        self.client = RawClient(0, "client_0", self.global_data.version)
+        self.client.attach(client_socket)
+        self.addCleanup(self._clean_up)
+
+    def _block_writer(self):
+        """
+        Lets the writer take the first queued message and wait for the connection lock.
+        """
+        self.client_comm.connectionLock.acquire()
+        self.assertTrue(self.client_comm.queueSensorAlert(create_sensor_alert(0)))
+
+        start = time.time()
+        while self.client_comm.outboundQueueDepth != 0 and (time.time() - start) < 5:
+            time.sleep(0.01)
+        time.sleep(0.1)
+
+    def _unblock_writer(self):
+        self.client_comm.connectionLock.release()
+
+    @staticmethod
+    def _create_profile(profile_id: int) -> Profile:
+        profile = Profile()
+        profile.profileId = profile_id
+        profile.name = "Profile %d" % profile_id
+        return profile
+
+    def test_order(self):
+        """
+        Tests that queued messages are sent in the order they were queued.
+        """
+        self._create_client_comm(100, "coalesce")
+        self._block_writer()
+
+        for i in range(1, 6):
+            self.assertTrue(self.client_comm.queueSensorAlert(create_sensor_alert(i)))
+        self.assertEqual(5, self.client_comm.outboundQueueDepth)
+
+        self._unblock_writer()
+        for i in range(6):
+            request = self.client.recv_request()
+            self.assertEqual("sensoralert", request["message"])
+            self.assertEqual(i, request["payload"]["sensorId"])
+
+    def test_coalesce(self):
+        """
+        Tests that a queued profile change is replaced by a newer one while sensor alerts are kept.
+        """
+        self._create_client_comm(100, "coalesce")
+        self._block_writer()
+
+        self.assertTrue(self.client_comm.queue_profile_change(self._create_profile(1)))
+        self.assertTrue(self.client_comm.queueSensorAlert(create_sensor_alert(1)))
+        self.assertTrue(self.client_comm.queue_profile_change(self._create_profile(2)))
+        self.assertEqual(2, self.client_comm.outboundQueueDepth)
+        self.assertEqual(1, self.client_comm.outboundCoalesced)
+
+        self._unblock_writer()
+        request = self.client.recv_request()
+        self.assertEqual("sensoralert", request["message"])
+        self.assertEqual(0, request["payload"]["sensorId"])
+
+        request = self.client.recv_request()
+        self.assertEqual("sensoralert", request["message"])
+        self.assertEqual(1, request["payload"]["sensorId"])
+
+        request = self.client.recv_request()
+        self.assertEqual("profilechange", request["message"])
+        self.assertEqual(2, request["payload"]["profileId"])
+
+    def test_drop(self):
+        """
+        Tests that messages are dropped if the queue of a slow client is full.
+        """
+        self._create_client_comm(2, "drop")
+        self._block_writer()
+
+        self.assertTrue(self.client_comm.queue_profile_change(self._create_profile(1)))
+        self.assertTrue(self.client_comm.queue_profile_change(self._create_profile(2)))
+        self.assertFalse(self.client_comm.queue_profile_change(self._create_profile(3)))
+        self.assertEqual(2, self.client_comm.outboundQueueDepth)
+        self.assertEqual(0, self.client_comm.outboundCoalesced)
+        self.assertEqual(1, self.client_comm.outboundDropped)
+
+        self._unblock_writer()
+        request = self.client.recv_request()
+        self.assertEqual("sensoralert", request["message"])
+
+        for profile_id in [1, 2]:
+            request = self.client.recv_request()
+            self.assertEqual("profilechange", request["message"])
+            self.assertEqual(profile_id, request["payload"]["profileId"])
+
+        start = time.time()
+        while self.client_comm.outboundSent != 3 and (time.time() - start) < 5:
+            time.sleep(0.01)
+        self.assertEqual(3, self.client_comm.outboundSent)
+
+    def test_coalesce_full(self):
+        """
+        Tests that a message replacing a queued one is not dropped if the queue is full.
+        """
+        self._create_client_comm(2, "coalesce")
+        self._block_writer()
+
+        self.assertTrue(self.client_comm.queue_profile_change(self._create_profile(1)))
+        for i in range(1, 4):
+            self.assertTrue(self.client_comm.queueSensorAlert(create_sensor_alert(i)))
+        self.assertTrue(self.client_comm.queue_profile_change(self._create_profile(2)))
+        self.assertEqual(4, self.client_comm.outboundQueueDepth)
+        self.assertEqual(0, self.client_comm.outboundDropped)
+
+        self._unblock_writer()
+        for _ in range(4):
+            self.assertEqual("sensoralert", self.client.recv_request()["message"])
+
+        request = self.client.recv_request()
+        self.assertEqual("profilechange", request["message"])
+        self.assertEqual(2, request["payload"]["profileId"])
+
+    def _run_sensor_alerts_not_dropped(self, queue_policy: str):
+        self._create_client_comm(2, queue_policy)
+        self._block_writer()
+
+        for i in range(1, 6):
+            self.assertTrue(self.client_comm.queueSensorAlert(create_sensor_alert(i)))
+        self.assertFalse(self.client_comm.queue_profile_change(self._create_profile(1)))
+        self.assertEqual(5, self.client_comm.outboundQueueDepth)
+        self.assertEqual(1, self.client_comm.outboundDropped)
+
+        self._unblock_writer()
+        for i in range(6):
+            request = self.client.recv_request()
+            self.assertEqual("sensoralert", request["message"])
+            self.assertEqual(i, request["payload"]["sensorId"])
+
+    def test_coalesce_sensor_alerts_not_dropped(self):
+        """
+        Tests that sensor alerts are queued even if the queue of a slow client is full with the coalesce policy.
+        """
+        self._run_sensor_alerts_not_dropped("coalesce")
+
+    def test_drop_sensor_alerts_not_dropped(self):
+        """
+        Tests that sensor alerts are queued even if the queue of a slow client is full with the drop policy.
+        """
+        self._run_sensor_alerts_not_dropped("drop")
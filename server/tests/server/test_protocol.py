@@ -0,0 +1,169 @@
+import time
+from typing import List
+from lib.localObjects import SensorDataType
+from tests.server.core import TestServerCore, create_sensor_alert
+
+
+class TestProtocol(TestServerCore):
+
+    def _run_pipelined_ping(self, engine: str):
+        self._create_server(engine)
+
+        clients = [self._create_client("client_%d" % i, protocol=2) for i in range(3)]
+        for client in clients:
+            self.assertTrue(client.connect_sensor())
+            self.assertEqual(2, client.protocol)
+
+        self.assertEqual(3, self._wait_sessions(3))
+
+        for client in clients:
+            self.assertTrue(client.ping_pipelined(50, 16))
+
+    def _run_server_requests(self, engine: str):
+        self._create_server(engine)
+
+        client = self._create_client("client_0", protocol=2)
+        self.assertTrue(client.connect_alert())
+        self.assertEqual(1, self._wait_sessions(1))
+
+        client_comm = list(self.global_data.serverSessions)[0].clientComm
+        for i in range(5):
+            self.assertTrue(client_comm.queueSensorAlert(create_sensor_alert(i)))
+
+        for i in range(5):
+            request = client.recv_request()
+            self.assertEqual("sensoralert", request["message"])
+            self.assertEqual(i, request["payload"]["sensorId"])
+
+        # The client is still served after the responses were handled.
+        self.assertTrue(client.ping())
+
+        self.assertEqual(5, client_comm.outboundSent)
+        self.assertEqual(0, client_comm.outboundFailed)
+        self.assertEqual(0, len(client_comm._pendingResponses))
+
+    def test_negotiate_version_1(self):
+        """
+        Tests that clients without protocol version use protocol version 1.
+        """
+        self._create_server("threaded")
+
+        client = self._create_client("client_0")
+        self.assertTrue(client.connect_sensor())
+        self.assertEqual(1, self._wait_sessions(1))
+
+        self.assertEqual(1, client.protocol)
+        self.assertEqual(1, list(self.global_data.serverSessions)[0].clientComm.protocolVersion)
+        self.assertTrue(client.ping())
+
+    def test_negotiate_newer_version(self):
+        """
+        Tests that clients supporting a newer protocol version fall back to the version of the server.
+        """
+        self._create_server("threaded")
+
+        client = self._create_client("client_0", protocol=4)
+        self.assertTrue(client.connect_sensor())
+        self.assertEqual(1, self._wait_sessions(1))
+
+        self.assertEqual(3, client.protocol)
+        self.assertEqual(3, list(self.global_data.serverSessions)[0].clientComm.protocolVersion)
+        self.assertTrue(client.ping())
+
+    def test_threaded_pipelined_ping(self):
+        """
+        Tests pipelined requests of protocol version 2 with the threaded engine.
+        """
+        self._run_pipelined_ping("threaded")
+
+    def test_selector_pipelined_ping(self):
+        """
+        Tests pipelined requests of protocol version 2 with the selector engine.
+        """
+        self._run_pipelined_ping("selector")
+
+    def test_threaded_server_requests(self):
+        """
+        Tests requests of the server with protocol version 2 with the threaded engine.
+        """
+        self._run_server_requests("threaded")
+
+    def test_selector_server_requests(self):
+        """
+        Tests requests of the server with protocol version 2 with the selector engine.
+        """
+        self._run_server_requests("selector")
+
+    def test_response_out_of_order(self):
+        """
+        Tests that responses of the client are matched to the requests of the server in any order.
+        """
+        self._create_server("threaded")
+
+        client = self._create_client("client_0", protocol=2)
+        self.assertTrue(client.connect_alert())
+        self.assertEqual(1, self._wait_sessions(1))
+
+        client_comm = list(self.global_data.serverSessions)[0].clientComm
+        for i in range(3):
+            self.assertTrue(client_comm.queueSensorAlert(create_sensor_alert(i)))
+
+        requests = [client.recv_frame() for _ in range(3)]
+        for frame_type, frame_id, request in reversed(requests):
+            self.assertEqual("Q", frame_type)
+            client.send_frame("R", frame_id, {"message": request["message"],
+                                              "payload": {"type": "response",
+                                                          "result": "ok"}})
+
+        start = time.time()
+        while client_comm._pendingResponses and (time.time() - start) < 5:
+            time.sleep(0.05)
+        self.assertEqual(0, len(client_comm._pendingResponses))
+        self.assertEqual(0, client_comm.outboundFailed)
+        self.assertTrue(client.ping())
+
+    def _get_sensor_states(self, client_sensor_ids: List[int]) -> List[int]:
+        node_id = self.global_data.storage.getNodeId("client_0")
+        return [self.global_data.storage.getSensorState(self.global_data.storage.getSensorId(node_id, x))
+                for x in client_sensor_ids]
+
+    def test_state_changes(self):
+        """
+        Tests that the state changes of multiple sensors are received in one message with protocol version 3.
+        """
+        self._create_server("threaded")
+
+        client = self._create_client("client_0", protocol=3)
+        self.assertTrue(client.connect_sensor(3))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        state_changes = [{"clientSensorId": i,
+                          "state": 1,
+                          "dataType": SensorDataType.NONE,
+                          "data": {}} for i in [0, 2]]
+        response = client.send_request("statechanges", {"type": "request",
+                                                        "stateChanges": state_changes})
+        self.assertEqual("statechanges", response["message"])
+        self.assertEqual("ok", response["payload"]["result"])
+
+        self.assertEqual([1, 0, 1], self._get_sensor_states([0, 1, 2]))
+        self.assertEqual(2, self.global_data.managerUpdateExecuter.state_changes_queued)
+
+    def test_state_changes_invalid(self):
+        """
+        Tests that no state of a message with state changes is stored if one of them is invalid.
+        """
+        self._create_server("threaded")
+
+        client = self._create_client("client_0", protocol=3)
+        self.assertTrue(client.connect_sensor(2))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        state_changes = [{"clientSensorId": i,
+                          "state": 1,
+                          "dataType": SensorDataType.NONE,
+                          "data": {}} for i in [0, 5]]
+        response = client.send_request("statechanges", {"type": "request",
+                                                        "stateChanges": state_changes})
+        self.assertEqual("unknown client sensor id", response["error"])
+        self.assertEqual([0, 0], self._get_sensor_states([0, 1]))
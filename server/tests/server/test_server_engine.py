@@ -0,0 +1,203 @@
+import socket
+import threading
+import time
+from lib.server import ClientCommunication, MAX_RECV_BUFFER_SIZE
+from tests.server.core import TestServerCore, create_sensor_alert
+
+
+class TestServerEngine(TestServerCore):
+
+    def _run_ping(self, engine: str):
+        self._create_server(engine)
+
+        clients = [self._create_client("client_%d" % i) for i in range(5)]
+        for client in clients:
+            self.assertTrue(client.connect_sensor())
+
+        self.assertEqual(5, self._wait_sessions(5))
+
+        for _ in range(3):
+            for client in clients:
+                self.assertTrue(client.ping())
+
+    def _run_disconnect(self, engine: str):
+        self._create_server(engine)
+
+        client = self._create_client("client_0")
+        self.assertTrue(client.connect_sensor())
+        self.assertEqual(1, self._wait_sessions(1))
+
+        client.close()
+        self.assertEqual(0, self._wait_sessions(0))
+
+        # Node is no longer marked as connected after the disconnect.
+        node_id = self.global_data.storage.getNodeId("client_0")
+        self.assertEqual(0, self.global_data.storage.getNodeById(node_id).connected)
+
+    def _run_close_connection(self, engine: str):
+        self._create_server(engine)
+
+        client = self._create_client("client_0")
+        self.assertTrue(client.connect_sensor())
+        self.assertEqual(1, self._wait_sessions(1))
+
+        for server_session in self.global_data.serverSessions:
+            server_session.closeConnection()
+
+        self.assertRaises(Exception, client.ping)
+
+    def _run_server_request(self, engine: str):
+        self._create_server(engine)
+
+        client = self._create_client("client_0")
+        self.assertTrue(client.connect_alert())
+        self.assertEqual(1, self._wait_sessions(1))
+
+        # Let the session wait for requests of the client before sending.
+        time.sleep(0.2)
+
+        server_session = list(self.global_data.serverSessions)[0]
+        for _ in range(3):
+            start = time.time()
+            self.assertTrue(server_session.clientComm.queueSensorAlert(create_sensor_alert(1)))
+
+            request = client.recv_request()
+            self.assertEqual("sensoralert", request["message"])
+
+            # The waiting session has to hand over the connection immediately.
+            self.assertLess(time.time() - start, 0.4)
+
+            # The client is still served afterwards.
+            self.assertTrue(client.ping())
+
+    def _run_idle_connections(self, engine: str):
+        self._create_server(engine, workers=2)
+
+        # As many connections as workers that never send any data.
+        idle_sockets = [socket.create_connection(("127.0.0.1", self.port)) for _ in range(2)]
+        try:
+            start = time.time()
+            client = self._create_client("client_0")
+            self.assertTrue(client.connect_sensor())
+            self.assertTrue(client.ping())
+            self.assertLess(time.time() - start, 5.0)
+
+        finally:
+            for idle_socket in idle_sockets:
+                idle_socket.close()
+
+    def test_threaded_ping(self):
+        """
+        Tests handling of requests by the threaded engine.
+        """
+        self._run_ping("threaded")
+
+    def test_selector_ping(self):
+        """
+        Tests handling of requests by the selector engine.
+        """
+        self._run_ping("selector")
+
+    def test_threaded_idle_connections(self):
+        """
+        Tests that connections of clients that do not send any data do not block other clients
+        with the threaded engine.
+        """
+        self._run_idle_connections("threaded")
+
+    def test_selector_idle_connections(self):
+        """
+        Tests that connections of clients that do not send any data do not block the workers
+        of the selector engine.
+        """
+        self._run_idle_connections("selector")
+
+    def test_selector_idle_connection_closed(self):
+        """
+        Tests that the selector engine closes a new connection whose client does not send any data.
+        """
+        self._create_server("selector")
+        self.global_data.serverReceiveTimeout = 1
+
+        idle_socket = socket.create_connection(("127.0.0.1", self.port), timeout=10)
+        try:
+            start = time.time()
+            self.assertEqual(b"", idle_socket.recv(1))
+            self.assertLess(time.time() - start, 5.0)
+
+        finally:
+            idle_socket.close()
+
+    def test_threaded_disconnect(self):
+        """
+        Tests clean up of the session after the client disconnected with the threaded engine.
+        """
+        self._run_disconnect("threaded")
+
+    def test_selector_disconnect(self):
+        """
+        Tests clean up of the session after the client disconnected with the selector engine.
+        """
+        self._run_disconnect("selector")
+
+    def test_threaded_server_request(self):
+        """
+        Tests sending a request initiated by the server with the threaded engine.
+        """
+        self._run_server_request("threaded")
+
+    def test_selector_server_request(self):
+        """
+        Tests sending a request initiated by the server with the selector engine.
+        """
+        self._run_server_request("selector")
+
+    def test_threaded_close_connection(self):
+        """
+        Tests closing a connection from another thread with the threaded engine.
+        """
+        self._run_close_connection("threaded")
+
+    def test_selector_close_connection(self):
+        """
+        Tests closing a watched connection from another thread with the selector engine.
+        """
+        self._run_close_connection("selector")
+
+    def test_register_many_sensors(self):
+        """
+        Tests registering a node with a registration message larger than the reused receive buffer.
+        """
+        self._create_server("threaded")
+
+        client = self._create_client("client_0")
+        self.assertTrue(client.connect_sensor(1000))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        node_id = self.global_data.storage.getNodeId("client_0")
+        self.assertEqual(1000, self.global_data.storage.getSensorCount(node_id))
+        self.assertTrue(client.ping())
+
+    def test_recv_message_large(self):
+        """
+        Tests receiving a message larger than the reused receive buffer and a message that is smaller
+        than the stated size (the stated size is not allocated in advance).
+        """
+        self._create_server("threaded")
+
+        server_socket, client_socket = socket.socketpair()
+        client_comm = ClientCommunication(server_socket, "127.0.0.1", 0, self.global_data)
+
+        message = ("x" * (3 * MAX_RECV_BUFFER_SIZE + 17)).encode("ascii")
+        sender = threading.Thread(target=client_socket.sendall, args=(message,), daemon=True)
+        sender.start()
+        self.assertEqual(message.decode("ascii"), client_comm._recvMessage(len(message)))
+        sender.join()
+        self.assertEqual(MAX_RECV_BUFFER_SIZE, len(client_comm._recvIntoBuffer))
+
+        client_socket.sendall(b"x" * 100)
+        client_socket.close()
+        self.assertIsNone(client_comm._recvMessage(2 ** 40))
+
+        client_comm.close()
+        server_socket.close()
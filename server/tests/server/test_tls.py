@@ -0,0 +1,108 @@
+import os
+import shutil
+import socket
+import time
+import unittest
+from tests.server.core import TestServerCore, create_certificate, create_client_ssl_context
+
+
+@unittest.skipIf(shutil.which("openssl") is None, "openssl command line tool not available")
+class TestTLS(TestServerCore):
+
+    def _create_tls_server(self, engine: str, workers: int = 4):
+        self._create_server(engine, workers)
+        self.cert_file, self.key_file = create_certificate(self.temp_dir)
+
+        self.global_data.sslEnabled = True
+        self.global_data.serverCertFile = self.cert_file
+        self.global_data.serverKeyFile = self.key_file
+        self.global_data.useClientCertificates = False
+
+    def _create_tls_client(self, username: str):
+        client = self._create_client(username)
+        client.ssl_context = create_client_ssl_context(self.cert_file)
+        return client
+
+    def _run_context_cached(self, engine: str):
+        self._create_tls_server(engine)
+
+        for i in range(3):
+            client = self._create_tls_client("client_%d" % i)
+            self.assertTrue(client.connect_sensor())
+            self.assertTrue(client.ping())
+
+        self.assertEqual(1, self.server.sslContextCache.contextBuilds)
+
+    def test_threaded_context_cached(self):
+        """
+        Tests that the TLS/SSL context is built once for all connections with the threaded engine.
+        """
+        self._run_context_cached("threaded")
+
+    def test_selector_context_cached(self):
+        """
+        Tests that the TLS/SSL context is built once for all connections with the selector engine.
+        """
+        self._run_context_cached("selector")
+
+    def test_selector_idle_connections(self):
+        """
+        Tests that connections of clients that do not start the TLS handshake do not block the workers
+        of the selector engine.
+        """
+        self._create_tls_server("selector", workers=2)
+
+        idle_sockets = [socket.create_connection(("127.0.0.1", self.port)) for _ in range(2)]
+        try:
+            start = time.time()
+            client = self._create_tls_client("client_0")
+            self.assertTrue(client.connect_sensor())
+            self.assertTrue(client.ping())
+            self.assertLess(time.time() - start, 5.0)
+
+        finally:
+            for idle_socket in idle_sockets:
+                idle_socket.close()
+
+    def test_context_reloaded(self):
+        """
+        Tests that the TLS/SSL context is built anew after the certificate files changed.
+        """
+        self._create_tls_server("threaded")
+
+        client = self._create_tls_client("client_0")
+        self.assertTrue(client.connect_sensor())
+        self.assertEqual(1, self.server.sslContextCache.contextBuilds)
+
+        # Replace certificate with a new one.
+        new_dir = os.path.join(self.temp_dir, "new")
+        os.mkdir(new_dir)
+        new_cert_file, new_key_file = create_certificate(new_dir)
+        shutil.copyfile(new_cert_file, self.cert_file)
+        shutil.copyfile(new_key_file, self.key_file)
+        stat = os.stat(self.cert_file)
+        os.utime(self.cert_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        client = self._create_tls_client("client_1")
+        client.ssl_context = create_client_ssl_context(new_cert_file)
+        self.assertTrue(client.connect_sensor())
+        self.assertEqual(2, self.server.sslContextCache.contextBuilds)
+
+    def test_session_resumed(self):
+        """
+        Tests that a reconnecting client resumes its TLS session.
+        """
+        self._create_tls_server("threaded")
+
+        client = self._create_tls_client("client_0")
+        self.assertTrue(client.connect_sensor())
+        self.assertFalse(client._socket.session_reused)
+        self.assertIsNotNone(client.ssl_session)
+
+        # Connect with the TLS/SSL context and session of the first connection.
+        other_client = self._create_client("client_1")
+        other_client.ssl_context = client.ssl_context
+        other_client.ssl_session = client.ssl_session
+        self.assertTrue(other_client.connect_sensor())
+        self.assertTrue(other_client._socket.session_reused)
+        self.assertTrue(other_client.ping())
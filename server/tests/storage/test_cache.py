@@ -0,0 +1,227 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from lib.globalData import GlobalData
+from lib.localObjects import Option, SensorDataInt, SensorDataFloat, SensorDataGPS
+from lib.storage import Sqlite, CachedStorage
+from tests.storage.util import obj_to_dict, to_sorted_dicts, create_sensors, create_alerts
+
+
+class TestCachedStorage(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.global_data = GlobalData()
+        self.global_data.storageBackendSqliteFile = os.path.join(self.temp_dir, "database.db")
+        self.global_data.logger = logging.getLogger("server")
+
+        self.backend = Sqlite(self.global_data.storageBackendSqliteFile, self.global_data)
+        self.storage = CachedStorage(self.backend, self.global_data)
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _assert_consistent(self):
+        """
+        Compares all data the cache returns with the data of the wrapped Sqlite storage.
+        """
+        storage = self.storage
+        backend = self.backend
+
+        cache_info = storage.getAlertSystemInformation()
+        backend_info = backend.getAlertSystemInformation()
+        self.assertIsNotNone(cache_info)
+        for cache_list, backend_list in zip(cache_info, backend_info):
+            self.assertEqual(to_sorted_dicts(backend_list), to_sorted_dicts(cache_list))
+
+        self.assertEqual(to_sorted_dicts(backend.getNodes()), to_sorted_dicts(storage.getNodes()))
+        self.assertEqual(to_sorted_dicts(backend.get_options_list()), to_sorted_dicts(storage.get_options_list()))
+        self.assertEqual(sorted(backend.getNodeIds()), sorted(storage.getNodeIds()))
+        self.assertEqual(sorted(backend.getSurveyData()), sorted(storage.getSurveyData()))
+        self.assertEqual(sorted(backend.getAllConnectedNodeIds()), sorted(storage.getAllConnectedNodeIds()))
+        self.assertEqual(sorted(backend.getAllPersistentNodeIds()), sorted(storage.getAllPersistentNodeIds()))
+        self.assertEqual(sorted(backend.getAllAlertsAlertLevels()), sorted(storage.getAllAlertsAlertLevels()))
+        self.assertEqual(sorted(backend.getAllSensorsAlertLevels()), sorted(storage.getAllSensorsAlertLevels()))
+
+        oldest = int(time.time()) + 1
+        self.assertEqual(to_sorted_dicts(backend.getSensorsUpdatedOlderThan(oldest)),
+                         to_sorted_dicts(storage.getSensorsUpdatedOlderThan(oldest)))
+
+        _, nodes, sensors, managers, alerts = backend_info
+        for node in nodes:
+            self.assertEqual(obj_to_dict(node), obj_to_dict(storage.getNodeById(node.id)))
+            self.assertEqual(node.id, storage.getNodeId(node.username))
+            self.assertEqual(backend.getSensorCount(node.id), storage.getSensorCount(node.id))
+
+        for sensor in sensors:
+            self.assertEqual(obj_to_dict(sensor), obj_to_dict(storage.getSensorById(sensor.sensorId)))
+            self.assertEqual(sensor.sensorId, storage.getSensorId(sensor.nodeId, sensor.clientSensorId))
+            self.assertEqual(backend.getSensorState(sensor.sensorId), storage.getSensorState(sensor.sensorId))
+            self.assertEqual(obj_to_dict(backend.getSensorData(sensor.sensorId)),
+                             obj_to_dict(storage.getSensorData(sensor.sensorId)))
+            self.assertEqual(backend.getSensorAlertLevels(sensor.sensorId),
+                             storage.getSensorAlertLevels(sensor.sensorId))
+
+        for alert in alerts:
+            self.assertEqual(obj_to_dict(alert), obj_to_dict(storage.getAlertById(alert.alertId)))
+            self.assertEqual(alert.alertId, storage.getAlertId(alert.nodeId, alert.clientAlertId))
+            self.assertEqual(backend.getAlertAlertLevels(alert.alertId), storage.getAlertAlertLevels(alert.alertId))
+
+        for manager in managers:
+            self.assertEqual(obj_to_dict(manager), obj_to_dict(storage.getManagerById(manager.managerId)))
+
+    def _add_node(self, username: str, node_type: str, persistent: int = 0) -> int:
+        self.assertTrue(self.storage.addNode(username, "host_" + username, node_type, "instance", 1.0, 1, persistent))
+        node_id = self.storage.getNodeId(username)
+        self.assertIsNotNone(node_id)
+        return node_id
+
+    def _add_system(self):
+        sensor_node_id = self._add_node("sensor_node", "sensor", persistent=1)
+        self.assertTrue(self.storage.addSensors("sensor_node", create_sensors(8)))
+        self.assertTrue(self.storage.markNodeAsConnected(sensor_node_id))
+
+        alert_node_id = self._add_node("alert_node", "alert")
+        self.assertTrue(self.storage.addAlerts("alert_node", create_alerts(3)))
+
+        manager_node_id = self._add_node("manager_node", "manager")
+        self.assertTrue(self.storage.addManager("manager_node", {"description": "Manager"}))
+        return sensor_node_id, alert_node_id, manager_node_id
+
+    def test_registration(self):
+        """
+        Tests that registering nodes keeps cache and database consistent.
+        """
+        self._add_system()
+        self._assert_consistent()
+
+        # Register again with changed sensors (removes, changes and adds sensors).
+        sensors = create_sensors(6, start=4)
+        sensors[0]["description"] = "Changed description"
+        sensors[1]["alertLevels"] = [3]
+        self.assertTrue(self.storage.addSensors("sensor_node", sensors))
+        self._assert_consistent()
+
+        self.assertTrue(self.storage.addAlerts("alert_node", create_alerts(1)))
+        self.assertTrue(self.storage.addManager("manager_node", {"description": "Changed manager"}))
+        self._assert_consistent()
+
+        # Register again with changed node information.
+        self.assertTrue(self.storage.addNode("sensor_node", "other_host", "sensor", "other", 2.0, 3, 0))
+        self._assert_consistent()
+
+    def test_node_type_change(self):
+        """
+        Tests that changing the type of a node removes its old objects from the cache.
+        """
+        sensor_node_id, alert_node_id, manager_node_id = self._add_system()
+
+        self.assertTrue(self.storage.addNode("sensor_node", "host", "alert", "instance", 1.0, 1, 0))
+        self.assertEqual(0, self.storage.getSensorCount(sensor_node_id))
+        self.assertTrue(self.storage.addNode("alert_node", "host", "manager", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addNode("manager_node", "host", "sensor", "instance", 1.0, 1, 0))
+        self._assert_consistent()
+
+    def test_updates(self):
+        """
+        Tests that state, data and time updates keep cache and database consistent.
+        """
+        sensor_node_id, _, _ = self._add_system()
+
+        self.assertTrue(self.storage.updateSensorState(sensor_node_id, [(0, 1), (3, 1), (5, 1)]))
+        self.assertTrue(self.storage.updateSensorData(sensor_node_id, [(0, None),
+                                                                       (1, SensorDataInt(42, "new unit")),
+                                                                       (2, SensorDataFloat(4.2, "new unit")),
+                                                                       (3, SensorDataGPS(5.5, 6.5, 7))]))
+        sensor_id = self.storage.getSensorId(sensor_node_id, 4)
+        self.assertTrue(self.storage.updateSensorTime(sensor_id))
+        self._assert_consistent()
+
+        self.assertEqual(1, self.storage.getSensorState(self.storage.getSensorId(sensor_node_id, 3)))
+        self.assertEqual(42, self.storage.getSensorData(self.storage.getSensorId(sensor_node_id, 1)).data.value)
+
+        self.assertTrue(self.storage.markNodeAsNotConnected(sensor_node_id))
+        self.assertEqual([], [x for x in self.storage.getAllConnectedNodeIds() if x == sensor_node_id])
+        self._assert_consistent()
+
+    def test_failed_update(self):
+        """
+        Tests that a failed update does not change the cache.
+        """
+        sensor_node_id, _, _ = self._add_system()
+
+        # Sensor with client id 100 does not exist, but the first state update is executed by the database.
+        self.assertFalse(self.storage.updateSensorState(sensor_node_id, [(1, 1), (100, 1)]))
+        self._assert_consistent()
+
+    def test_options(self):
+        """
+        Tests that option changes keep cache and database consistent.
+        """
+        self.assertTrue(self.storage.update_option("profile", 2))
+        self.assertTrue(self.storage.update_option("type_1", 1))
+
+        option = Option()
+        option.type = "type_2"
+        option.value = 5
+        self.assertTrue(self.storage.update_option_by_obj(option))
+        self._assert_consistent()
+        self.assertEqual(2, self.storage.get_option_by_type("profile").value)
+
+        self.assertTrue(self.storage.delete_option_by_type("type_1"))
+        self.assertIsNone(self.storage.get_option_by_type("type_1"))
+        self._assert_consistent()
+
+    def test_delete_node(self):
+        """
+        Tests that deleting nodes removes them and their objects from the cache.
+        """
+        sensor_node_id, alert_node_id, manager_node_id = self._add_system()
+
+        for node_id in [sensor_node_id, alert_node_id, manager_node_id]:
+            self.assertTrue(self.storage.deleteNode(node_id))
+            self.assertIsNone(self.storage.getNodeById(node_id))
+            self._assert_consistent()
+
+    def test_reload(self):
+        """
+        Tests that a new cache loads the same data from the database.
+        """
+        self._add_system()
+
+        other_storage = CachedStorage(self.backend, self.global_data)
+        for cache_list, other_list in zip(self.storage.getAlertSystemInformation(),
+                                          other_storage.getAlertSystemInformation()):
+            self.assertEqual(to_sorted_dicts(cache_list), to_sorted_dicts(other_list))
+
+    def test_returned_copies(self):
+        """
+        Tests that changing returned objects does not change the cached data.
+        """
+        sensor_node_id, _, _ = self._add_system()
+        sensor_id = self.storage.getSensorId(sensor_node_id, 1)
+
+        sensor = self.storage.getSensorById(sensor_id)
+        sensor.state = 1
+        sensor.alertLevels.append(99)
+        node = self.storage.getNodeById(sensor_node_id)
+        node.connected = 0
+
+        self.assertEqual(0, self.storage.getSensorState(sensor_id))
+        self.assertNotIn(99, self.storage.getSensorAlertLevels(sensor_id))
+        self.assertEqual(1, self.storage.getNodeById(sensor_node_id).connected)
+        self._assert_consistent()
+
+    def test_change_generation(self):
+        """
+        Tests that each change increases the change generation of the cache.
+        """
+        sensor_node_id, _, _ = self._add_system()
+
+        generation = self.storage.getChangeGeneration()
+        self.assertTrue(self.storage.updateSensorState(sensor_node_id, [(0, 1)]))
+        self.assertGreater(self.storage.getChangeGeneration(), generation)
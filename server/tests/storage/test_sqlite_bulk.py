@@ -0,0 +1,92 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from lib.globalData import GlobalData
+from lib.storage import Sqlite
+from tests.storage.util import obj_to_dict, create_sensors, create_alerts
+
+
+class TestSqliteBulk(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.global_data = GlobalData()
+        self.global_data.storageBackendSqliteFile = os.path.join(self.temp_dir, "database.db")
+        self.global_data.logger = logging.getLogger("server")
+
+        self.storage = Sqlite(self.global_data.storageBackendSqliteFile, self.global_data)
+
+        for i in range(2):
+            username = "sensor_node_%d" % i
+            self.assertTrue(self.storage.addNode(username, "host", "sensor", "instance", 1.0, 1, 0))
+            self.assertTrue(self.storage.addSensors(username, create_sensors(10)))
+
+        self.assertTrue(self.storage.addNode("alert_node", "host", "alert", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addAlerts("alert_node", create_alerts(4)))
+        self.assertTrue(self.storage.addNode("manager_node", "host", "manager", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addManager("manager_node", {"description": "Manager"}))
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _set_sensor_time(self, sensor_id: int, last_state_updated: int):
+        with self.storage.dbLock:
+            self.storage.cursor.execute("UPDATE sensors SET lastStateUpdated = ? WHERE id = ?",
+                                        (last_state_updated, sensor_id))
+            self.storage.conn.commit()
+
+    def test_alert_system_information(self):
+        """
+        Tests that the objects of the complete system information equal the objects read one by one.
+        """
+        _, _, sensors, managers, alerts = self.storage.getAlertSystemInformation()
+        self.assertEqual(20, len(sensors))
+        self.assertEqual(1, len(managers))
+        self.assertEqual(4, len(alerts))
+
+        for sensor in sensors:
+            self.assertEqual(obj_to_dict(self.storage.getSensorById(sensor.sensorId)), obj_to_dict(sensor))
+
+        for manager in managers:
+            self.assertEqual(obj_to_dict(self.storage.getManagerById(manager.managerId)), obj_to_dict(manager))
+
+        for alert in alerts:
+            self.assertEqual(obj_to_dict(self.storage.getAlertById(alert.alertId)), obj_to_dict(alert))
+
+    def test_sensors_updated_older_than(self):
+        """
+        Tests that only sensors with an older update are returned and equal the objects read one by one.
+        """
+        now = int(time.time())
+        _, _, sensors, _, _ = self.storage.getAlertSystemInformation()
+        old_sensor_ids = [x.sensorId for x in sensors[::3]]
+        for sensor_id in old_sensor_ids:
+            self._set_sensor_time(sensor_id, now - 100)
+
+        old_sensors = self.storage.getSensorsUpdatedOlderThan(now - 50)
+        self.assertEqual(sorted(old_sensor_ids), sorted([x.sensorId for x in old_sensors]))
+        for sensor in old_sensors:
+            self.assertEqual(obj_to_dict(self.storage.getSensorById(sensor.sensorId)), obj_to_dict(sensor))
+
+        self.assertEqual([], self.storage.getSensorsUpdatedOlderThan(now - 200))
+
+    def test_missing_sensor_data(self):
+        """
+        Tests that sensors without stored data are skipped by the timeout check, but fail the system information.
+        """
+        _, _, sensors, _, _ = self.storage.getAlertSystemInformation()
+        broken_sensor = [x for x in sensors if x.dataType != 0][0]
+        with self.storage.dbLock:
+            for table in ["sensorsDataInt", "sensorsDataFloat", "sensorsDataGPS"]:
+                self.storage.cursor.execute("DELETE FROM %s WHERE sensorId = ?" % table, (broken_sensor.sensorId, ))
+            self.storage.conn.commit()
+
+        old_sensors = self.storage.getSensorsUpdatedOlderThan(int(time.time()) + 1)
+        self.assertEqual(len(sensors) - 1, len(old_sensors))
+        self.assertNotIn(broken_sensor.sensorId, [x.sensorId for x in old_sensors])
+
+        self.assertIsNone(self.storage.getAlertSystemInformation())
@@ -0,0 +1,107 @@
+import logging
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from lib.globalData import GlobalData
+from lib.storage import Sqlite
+from tests.storage.util import create_sensors, create_alerts
+
+
+class TestSqliteSchema(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.global_data = GlobalData()
+        self.global_data.storageBackendSqliteFile = os.path.join(self.temp_dir, "database.db")
+        self.global_data.logger = logging.getLogger("server")
+
+        self.storage = Sqlite(self.global_data.storageBackendSqliteFile, self.global_data)
+        self.assertTrue(self.storage.addNode("sensor_node", "host", "sensor", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addSensors("sensor_node", create_sensors(10)))
+        self.assertTrue(self.storage.addNode("alert_node", "host", "alert", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addAlerts("alert_node", create_alerts(3)))
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _get_query_plan(self, query: str, args) -> str:
+        self.storage.cursor.execute("EXPLAIN QUERY PLAN " + query, args)
+        return " | ".join(row[3] for row in self.storage.cursor.fetchall())
+
+    def _get_db_version(self) -> int:
+        self.storage.cursor.execute("SELECT value FROM internals WHERE type = ?", ("dbversion", ))
+        return int(self.storage.cursor.fetchall()[0][0])
+
+    def _reopen_with_db_version(self, db_version: int, drop_indexes: bool):
+        self.storage.cursor.execute("UPDATE internals SET value = ? WHERE type = ?", (db_version, "dbversion"))
+        if drop_indexes:
+            for index in ["sensorsNodeIdClientSensorId", "sensorsLastStateUpdated",
+                          "alertsNodeIdClientAlertId", "managersNodeId"]:
+                self.storage.cursor.execute("DROP INDEX %s" % index)
+        self.storage.conn.commit()
+        self.storage.close()
+
+        self.storage = Sqlite(self.global_data.storageBackendSqliteFile, self.global_data)
+
+    def test_query_plans(self):
+        """
+        Tests that the frequent lookups use an index instead of scanning the table.
+        """
+        queries = [("SELECT id FROM sensors WHERE nodeId = ? AND clientSensorId = ?", (1, 1),
+                    "sensorsNodeIdClientSensorId"),
+                   ("UPDATE sensors SET state = ?, lastStateUpdated = ? WHERE nodeId = ? AND clientSensorId = ?",
+                    (1, 0, 1, 1),
+                    "sensorsNodeIdClientSensorId"),
+                   ("SELECT id, dataType FROM sensors WHERE nodeId = ? AND clientSensorId = ?", (1, 1),
+                    "sensorsNodeIdClientSensorId"),
+                   ("SELECT id FROM sensors WHERE lastStateUpdated < ?", (0, ),
+                    "sensorsLastStateUpdated"),
+                   ("SELECT id FROM alerts WHERE nodeId = ?", (1, ),
+                    "alertsNodeIdClientAlertId"),
+                   ("SELECT id FROM alerts WHERE nodeId = ? AND clientAlertId = ?", (1, 1),
+                    "alertsNodeIdClientAlertId"),
+                   ("SELECT id FROM managers WHERE nodeId = ?", (1, ),
+                    "managersNodeId"),
+                   ("SELECT id FROM nodes WHERE username = ?", ("sensor_node", ),
+                    "sqlite_autoindex_nodes_1")]
+
+        for query, args, index in queries:
+            plan = self._get_query_plan(query, args)
+            self.assertIn(index, plan, query)
+            self.assertNotIn("SCAN", plan, query)
+
+    def test_migration(self):
+        """
+        Tests that the database layout of the former version is updated without losing the stored data.
+        """
+        self._reopen_with_db_version(5, drop_indexes=True)
+
+        self.assertEqual(self.global_data.dbVersion, self._get_db_version())
+        self.assertIsNotNone(self.storage.getNodeId("sensor_node"))
+        self.assertEqual(10, self.storage.getSensorCount(self.storage.getNodeId("sensor_node")))
+        self.assertIn("sensorsLastStateUpdated",
+                      self._get_query_plan("SELECT id FROM sensors WHERE lastStateUpdated < ?", (0, )))
+
+    def test_unknown_version(self):
+        """
+        Tests that the database of a version without migration is created anew and keeps its unique id.
+        """
+        unique_id = self.storage.getUniqueID()
+        self._reopen_with_db_version(3, drop_indexes=False)
+
+        self.assertEqual(self.global_data.dbVersion, self._get_db_version())
+        self.assertEqual(unique_id, self.storage.getUniqueID())
+        self.assertEqual([], self.storage.getNodeIds())
+
+    def test_newer_version(self):
+        """
+        Tests that a database of a newer version is refused.
+        """
+        self.storage.cursor.execute("UPDATE internals SET value = ? WHERE type = ?",
+                                    (self.global_data.dbVersion + 1, "dbversion"))
+        self.storage.conn.commit()
+
+        with self.assertRaises(ValueError):
+            Sqlite(self.global_data.storageBackendSqliteFile, self.global_data)
@@ -0,0 +1,146 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from lib.globalData import GlobalData
+from lib.storage import Sqlite
+from tests.storage.util import to_sorted_dicts, create_sensors, create_alerts
+
+
+class _InterleavingCursor:
+    """
+    Cursor of a read connection that lets another thread run a function before the first query
+    starting with the given statement.
+    """
+
+    def __init__(self, cursor, statement, func):
+        self._cursor = cursor
+        self._statement = statement
+        self._func = func
+
+    def execute(self, sql, *args):
+        if self._func is not None and sql.startswith(self._statement):
+            thread = threading.Thread(target=self._func, daemon=True)
+            self._func = None
+            thread.start()
+            thread.join(5.0)
+        return self._cursor.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TestSqliteWal(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.global_data = GlobalData()
+        self.global_data.storageBackendSqliteFile = os.path.join(self.temp_dir, "database.db")
+        self.global_data.logger = logging.getLogger("server")
+
+        self.storage = Sqlite(self.global_data.storageBackendSqliteFile,
+                              self.global_data,
+                              wal=True,
+                              readConnections=2)
+
+        self.assertTrue(self.storage.addNode("sensor_node", "host", "sensor", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addSensors("sensor_node", create_sensors(10)))
+        self.assertTrue(self.storage.addNode("alert_node", "host", "alert", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addAlerts("alert_node", create_alerts(2)))
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_wal_mode(self):
+        """
+        Tests that the database uses the WAL journal mode.
+        """
+        self.storage.cursor.execute("PRAGMA journal_mode")
+        self.assertEqual("wal", self.storage.cursor.fetchall()[0][0].lower())
+
+    def test_read_without_pool_needs_wal(self):
+        """
+        Tests that read connections are refused without WAL journal mode.
+        """
+        with self.assertRaises(ValueError):
+            Sqlite(self.global_data.storageBackendSqliteFile, self.global_data, readConnections=2)
+
+    def test_read_while_writing(self):
+        """
+        Tests that reads do not wait for the lock held by a write and do not see its uncommitted changes.
+        """
+        node_id = self.storage.getNodeId("sensor_node")
+        sensor_id = self.storage.getSensorId(node_id, 0)
+
+        with self.storage.dbLock:
+            self.storage.cursor.execute("UPDATE sensors SET state = 1 WHERE id = ?", (sensor_id, ))
+
+            result = list()
+            reader = threading.Thread(target=lambda: result.append(self.storage.getSensorState(sensor_id)),
+                                      daemon=True)
+            reader.start()
+            reader.join(5.0)
+            self.assertFalse(reader.is_alive())
+            self.assertEqual([0], result)
+
+            self.storage.conn.commit()
+
+        self.assertEqual(1, self.storage.getSensorState(sensor_id))
+
+    def test_consistency(self):
+        """
+        Tests that the read connections return the same data as the writing connection.
+        """
+        node_id = self.storage.getNodeId("sensor_node")
+        self.assertTrue(self.storage.updateSensorState(node_id, [(1, 1), (2, 1)]))
+
+        pool_info = self.storage.getAlertSystemInformation()
+        self.assertIsNotNone(pool_info)
+
+        # Read with the writing connection.
+        self.storage._readPool = None
+        write_info = self.storage.getAlertSystemInformation()
+        for pool_list, write_list in zip(pool_info, write_info):
+            self.assertEqual(to_sorted_dicts(write_list), to_sorted_dicts(pool_list))
+
+    def test_snapshot(self):
+        """
+        Tests that all queries of a reading function see the same state of the database even if a write
+        is committed between them.
+        """
+        result = list()
+
+        def _add_sensors():
+            result.append(self.storage.addSensors("sensor_node", create_sensors(5)))
+
+        # Sensors 5 to 9 (and their data) are deleted after the sensors were read.
+        cursors = [self.storage._readPool.get() for _ in range(2)]
+        for cursor in cursors:
+            self.storage._readPool.put(_InterleavingCursor(cursor, "SELECT sensorId, alertLevel", _add_sensors))
+
+        alert_system_information = self.storage.getAlertSystemInformation()
+        self.assertEqual([True], result)
+        self.assertIsNotNone(alert_system_information)
+        self.assertEqual(10, len(alert_system_information[2]))
+
+        self.assertEqual(5, len(self.storage.getAlertSystemInformation()[2]))
+
+    def test_lock_statistics(self):
+        """
+        Tests that reads and writes are counted separately.
+        """
+        statistics = self.storage.getLockStatistics()
+        write_count = statistics["write"]["count"]
+        read_count = statistics["read"]["count"]
+
+        self.storage.getNodeIds()
+        self.storage.getNodeIds()
+        self.assertTrue(self.storage.markNodeAsConnected(self.storage.getNodeId("alert_node")))
+
+        statistics = self.storage.getLockStatistics()
+        self.assertEqual(write_count + 1, statistics["write"]["count"])
+        self.assertEqual(read_count + 3, statistics["read"]["count"])
+        self.assertGreaterEqual(statistics["read"]["holdTotal"], statistics["read"]["holdMax"])
@@ -0,0 +1,194 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from lib.globalData import GlobalData
+from lib.localObjects import SensorDataInt, SensorDataFloat, SensorDataGPS, SensorDataType
+from lib.storage import Sqlite, CachedStorage, WriteBehindStorage
+from tests.storage.util import obj_to_dict, to_sorted_dicts, create_sensors
+
+
+class _FailingSqlite(Sqlite):
+    """
+    Sqlite storage whose bulk sensor updates fail as long as the flag is set.
+    """
+
+    fail_updates = False
+
+    def updateSensorValues(self, stateList, dataList, timeList, logger=None):
+        if self.fail_updates:
+            return False
+        return super().updateSensorValues(stateList, dataList, timeList, logger)
+
+
+class TestWriteBehindStorage(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.global_data = GlobalData()
+        self.global_data.storageBackendSqliteFile = os.path.join(self.temp_dir, "database.db")
+        self.global_data.logger = logging.getLogger("server")
+
+        self.backend = _FailingSqlite(self.global_data.storageBackendSqliteFile, self.global_data)
+
+        # Interval long enough that only the tests write the queued updates.
+        self.storage = WriteBehindStorage(self.backend, self.global_data, flushInterval=60.0, maxPendingUpdates=100)
+
+        self.assertTrue(self.storage.addNode("sensor_node", "host", "sensor", "instance", 1.0, 1, 0))
+        self.assertTrue(self.storage.addSensors("sensor_node", create_sensors(8)))
+        self.node_id = self.storage.getNodeId("sensor_node")
+        self.sensor_ids = [self.storage.getSensorId(self.node_id, i) for i in range(8)]
+
+        # Sensors with client id 1, 5 hold integer data, 2, 6 float data and 3, 7 GPS data.
+        self.assertIsInstance(self.backend.getSensorData(self.sensor_ids[1]).data, SensorDataInt)
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_coalesced_updates(self):
+        """
+        Tests that queued updates are not written before flushing and only the last value of a sensor is written.
+        """
+        for state in [1, 0, 1]:
+            self.assertTrue(self.storage.updateSensorState(self.node_id, [(0, state), (1, state)]))
+        for value in [10, 20, 30]:
+            self.assertTrue(self.storage.updateSensorData(self.node_id, [(1, SensorDataInt(value, "unit"))]))
+        self.assertTrue(self.storage.updateSensorData(self.node_id, [(2, SensorDataFloat(1.5, "unit")),
+                                                                     (3, SensorDataGPS(1.0, 2.0, 3))]))
+
+        self.assertEqual(0, self.backend.getSensorState(self.sensor_ids[0]))
+        self.assertEqual(0, self.storage.flushCount)
+
+        self.assertTrue(self.storage._flush())
+        self.assertEqual(1, self.storage.flushCount)
+        self.assertEqual(5, self.storage.flushedUpdates)
+
+        self.assertEqual(1, self.backend.getSensorState(self.sensor_ids[0]))
+        self.assertEqual(1, self.backend.getSensorState(self.sensor_ids[1]))
+        self.assertEqual(30, self.backend.getSensorData(self.sensor_ids[1]).data.value)
+        self.assertEqual(1.5, self.backend.getSensorData(self.sensor_ids[2]).data.value)
+        self.assertEqual(2.0, self.backend.getSensorData(self.sensor_ids[3]).data.lon)
+
+    def test_read_flushes(self):
+        """
+        Tests that reading sensors returns the queued updates.
+        """
+        self.assertTrue(self.storage.updateSensorState(self.node_id, [(4, 1)]))
+        self.assertTrue(self.storage.updateSensorData(self.node_id, [(5, SensorDataInt(42, "unit"))]))
+
+        self.assertEqual(1, self.storage.getSensorState(self.sensor_ids[4]))
+        self.assertEqual(42, self.storage.getSensorById(self.sensor_ids[5]).data.value)
+
+        sensors = self.storage.getAlertSystemInformation()[2]
+        self.assertEqual(1, [x for x in sensors if x.sensorId == self.sensor_ids[4]][0].state)
+
+    def test_sensor_time(self):
+        """
+        Tests that queued time updates are written and a state update is not overwritten by a time update.
+        """
+        self.backend.cursor.execute("UPDATE sensors SET lastStateUpdated = 0")
+        self.backend.conn.commit()
+
+        self.assertTrue(self.storage.updateSensorState(self.node_id, [(0, 1)]))
+        self.assertTrue(self.storage.updateSensorTime(self.sensor_ids[0]))
+        self.assertTrue(self.storage.updateSensorTime(self.sensor_ids[1]))
+
+        now = int(time.time())
+        old_sensors = self.storage.getSensorsUpdatedOlderThan(now - 10)
+        self.assertNotIn(self.sensor_ids[0], [x.sensorId for x in old_sensors])
+        self.assertNotIn(self.sensor_ids[1], [x.sensorId for x in old_sensors])
+        self.assertEqual(1, self.storage.getSensorState(self.sensor_ids[0]))
+
+    def test_sensor_values(self):
+        """
+        Tests that bulk updates of sensor values are queued and coalesced with the other queued updates.
+        """
+        now = int(time.time())
+        self.assertTrue(self.storage.updateSensorTime(self.sensor_ids[0]))
+        self.assertTrue(self.storage.updateSensorData(self.node_id, [(1, SensorDataInt(10, "unit"))]))
+        self.assertTrue(self.storage.updateSensorValues([(self.sensor_ids[0], 1, now),
+                                                         (self.sensor_ids[1], 1, now)],
+                                                        [(self.sensor_ids[1], SensorDataType.INT,
+                                                          SensorDataInt(20, "unit"))],
+                                                        [(self.sensor_ids[0], now + 5)]))
+
+        self.assertEqual(0, self.backend.getSensorState(self.sensor_ids[0]))
+        self.assertEqual(0, self.storage.flushCount)
+
+        self.assertTrue(self.storage._flush())
+        self.assertEqual(1, self.storage.flushCount)
+        self.assertEqual(3, self.storage.flushedUpdates)
+
+        self.assertEqual(1, self.backend.getSensorState(self.sensor_ids[0]))
+        self.assertEqual(now + 5, self.backend.getSensorById(self.sensor_ids[0]).lastStateUpdated)
+        self.assertEqual(1, self.backend.getSensorState(self.sensor_ids[1]))
+        self.assertEqual(20, self.backend.getSensorData(self.sensor_ids[1]).data.value)
+
+    def test_unknown_sensor(self):
+        """
+        Tests that updates containing an unknown sensor are refused completely.
+        """
+        generation = self.storage.getChangeGeneration()
+        self.assertFalse(self.storage.updateSensorState(self.node_id, [(0, 1), (100, 1)]))
+        self.assertFalse(self.storage.updateSensorData(self.node_id, [(100, SensorDataInt(1, "unit"))]))
+        self.assertEqual(generation, self.storage.getChangeGeneration())
+
+        self.assertEqual(0, self.storage.getSensorState(self.sensor_ids[0]))
+
+    def test_max_pending_updates(self):
+        """
+        Tests that the queued updates are written as soon as the maximal number is reached.
+        """
+        self.assertTrue(self.storage.addSensors("sensor_node", create_sensors(120)))
+        self.storage.updateSensorState(self.node_id, [(i, 1) for i in range(120)])
+
+        for _ in range(50):
+            if self.storage.flushCount > 0:
+                break
+            time.sleep(0.1)
+        self.assertEqual(1, self.storage.flushCount)
+        self.assertEqual(1, self.backend.getSensorState(self.storage.getSensorId(self.node_id, 119)))
+
+    def test_failed_flush(self):
+        """
+        Tests that updates are queued again if writing them fails and newer updates are kept.
+        """
+        self.assertTrue(self.storage.updateSensorState(self.node_id, [(0, 1), (1, 1)]))
+
+        self.backend.fail_updates = True
+        self.assertFalse(self.storage._flush())
+        self.assertTrue(self.storage.updateSensorState(self.node_id, [(1, 0)]))
+        self.backend.fail_updates = False
+
+        self.assertTrue(self.storage._flush())
+        self.assertEqual(1, self.backend.getSensorState(self.sensor_ids[0]))
+        self.assertEqual(0, self.backend.getSensorState(self.sensor_ids[1]))
+
+    def test_close_flushes(self):
+        """
+        Tests that closing the storage writes the queued updates.
+        """
+        self.assertTrue(self.storage.updateSensorState(self.node_id, [(0, 1)]))
+        self.storage.close()
+
+        self.storage = Sqlite(self.global_data.storageBackendSqliteFile, self.global_data)
+        self.assertEqual(1, self.storage.getSensorState(self.sensor_ids[0]))
+
+    def test_cached_storage(self):
+        """
+        Tests that the cache on top of the queue returns the queued updates and stays consistent.
+        """
+        cache = CachedStorage(self.storage, self.global_data)
+        self.assertTrue(cache.updateSensorState(self.node_id, [(0, 1)]))
+        self.assertTrue(cache.updateSensorData(self.node_id, [(1, SensorDataInt(7, "unit"))]))
+        self.assertEqual(0, self.backend.getSensorState(self.sensor_ids[0]))
+        self.assertEqual(1, cache.getSensorState(self.sensor_ids[0]))
+
+        for cache_list, backend_list in zip(cache.getAlertSystemInformation(),
+                                            self.storage.getAlertSystemInformation()):
+            self.assertEqual(to_sorted_dicts(backend_list), to_sorted_dicts(cache_list))
+        self.assertEqual(obj_to_dict(self.backend.getSensorById(self.sensor_ids[1])),
+                         obj_to_dict(cache.getSensorById(self.sensor_ids[1])))
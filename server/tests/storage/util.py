@@ -1,6 +1,6 @@
 from unittest import TestCase
-from typing import List
-from lib.localObjects import Option
+from typing import Any, Dict, List
+from lib.localObjects import Option, SensorDataType
 
 
 def compare_options_content(context: TestCase, gt_options: List[Option], new_options: List[Option]):
@@ -37,3 +37,44 @@ def compare_options_content(context: TestCase, gt_options: List[Option], new_opt
 
         if not found:
             context.fail("Not able to find modified Option object.")
+
+
+def obj_to_dict(obj: Any) -> Dict[str, Any]:
+    obj_dict = dict(vars(obj))
+    if obj_dict.get("data") is not None:
+        obj_dict["data"] = obj_dict["data"].copy_to_dict()
+    return obj_dict
+
+
+def to_sorted_dicts(objs: List[Any]) -> List[Dict[str, Any]]:
+    # The order of database results without "ORDER BY" is not defined.
+    return sorted([obj_to_dict(x) for x in objs], key=lambda x: repr(sorted(x.items())))
+
+
+def create_sensors(count: int, start: int = 0) -> List[Dict[str, Any]]:
+    sensors = list()
+    for i in range(start, start + count):
+        sensor = {"clientSensorId": i,
+                  "alertDelay": i % 3,
+                  "alertLevels": [1, 10 + i % 4],
+                  "description": "Sensor %d" % i,
+                  "state": 0}
+
+        if i % 4 == 0:
+            sensor["dataType"] = SensorDataType.NONE
+            sensor["data"] = {}
+        elif i % 4 == 1:
+            sensor["dataType"] = SensorDataType.INT
+            sensor["data"] = {"value": i, "unit": "int unit"}
+        elif i % 4 == 2:
+            sensor["dataType"] = SensorDataType.FLOAT
+            sensor["data"] = {"value": float(i), "unit": "float unit"}
+        else:
+            sensor["dataType"] = SensorDataType.GPS
+            sensor["data"] = {"lat": 1.5, "lon": 2.5, "utctime": i}
+        sensors.append(sensor)
+    return sensors
+
+
+def create_alerts(count: int) -> List[Dict[str, Any]]:
+    return [{"clientAlertId": i, "description": "Alert %d" % i, "alertLevels": [i % 2, 2]} for i in range(count)]
@@ -0,0 +1,236 @@
+import time
+from unittest import TestCase
+from lib.globalData import ServerSessions
+from lib.localObjects import SensorDataType
+from lib.watchdogs.sensorDeadlines import SensorDeadlines
+from tests.server.core import TestServerCore
+
+
+class _MockClientComm:
+
+    def __init__(self, node_id: int):
+        self.nodeId = node_id
+
+
+class _MockServerSession:
+
+    def __init__(self, node_id: int):
+        self.clientComm = _MockClientComm(node_id)
+
+
+class TestNodeSessions(TestCase):
+
+    def test_node_index(self):
+        """
+        Tests that the node index contains the initialized clients until they are closed or their session is removed.
+        """
+        server_sessions = ServerSessions()
+        sessions = [_MockServerSession(i) for i in range(3)]
+        for server_session in sessions:
+            server_sessions.append(server_session)
+        server_sessions.add_node_session(sessions[0].clientComm)
+        server_sessions.add_node_session(sessions[1].clientComm)
+
+        self.assertEqual({0, 1}, server_sessions.get_connected_node_ids())
+        self.assertIs(sessions[1], server_sessions.get_node_session(1))
+        self.assertIsNone(server_sessions.get_node_session(2))
+
+        server_sessions.remove_node_session(sessions[0].clientComm)
+        server_sessions.remove(sessions[1])
+        self.assertEqual(set(), server_sessions.get_connected_node_ids())
+        self.assertEqual([sessions[0], sessions[2]], list(server_sessions))
+
+    def test_iterate_snapshot(self):
+        """
+        Tests that sessions added or removed while iterating do not change the iteration.
+        """
+        server_sessions = ServerSessions()
+        sessions = [_MockServerSession(i) for i in range(3)]
+        for server_session in sessions[:2]:
+            server_sessions.append(server_session)
+
+        iterated = list()
+        for server_session in server_sessions:
+            server_sessions.remove(server_session)
+            server_sessions.append(sessions[2])
+            iterated.append(server_session)
+
+        self.assertEqual(sessions[:2], iterated)
+
+
+class TestSensorDeadlines(TestCase):
+
+    def test_expired(self):
+        """
+        Tests that only sensors whose deadline passed are returned and that updated deadlines are used.
+        """
+        sensor_deadlines = SensorDeadlines(10)
+        sensor_deadlines.set_timeout(3, 100)
+        for sensor_id in range(4):
+            sensor_deadlines.update(sensor_id, 1000)
+        sensor_deadlines.update(1, 1005)
+
+        self.assertEqual([], sensor_deadlines.pop_expired(1010))
+        self.assertEqual([0, 2], sorted(sensor_deadlines.pop_expired(1011)))
+        self.assertEqual([1], sensor_deadlines.pop_expired(1016))
+        self.assertEqual([], sensor_deadlines.pop_expired(1016))
+        self.assertEqual(1, len(sensor_deadlines))
+        self.assertEqual([3], sensor_deadlines.pop_expired(1101))
+
+    def test_recovered(self):
+        """
+        Tests that timed out sensors are returned as recovered after an update.
+        """
+        sensor_deadlines = SensorDeadlines(10)
+        sensor_deadlines.update(1, 1000)
+        sensor_deadlines.update(2, 1000)
+        self.assertEqual([1, 2], sorted(sensor_deadlines.pop_expired(1011)))
+
+        sensor_deadlines.update(1, 1012)
+        self.assertEqual({1}, sensor_deadlines.pop_recovered())
+        self.assertEqual(set(), sensor_deadlines.pop_recovered())
+        self.assertEqual([], sensor_deadlines.pop_expired(1020))
+
+    def test_removed(self):
+        """
+        Tests that only timed out sensors are returned as removed after they were removed.
+        """
+        sensor_deadlines = SensorDeadlines(10)
+        sensor_deadlines.update(1, 1000)
+        sensor_deadlines.update(2, 1000)
+        sensor_deadlines.update(3, 1020)
+        self.assertEqual([1, 2], sorted(sensor_deadlines.pop_expired(1011)))
+
+        sensor_deadlines.update(2, 1012)
+        for sensor_id in range(1, 4):
+            sensor_deadlines.remove(sensor_id)
+        self.assertEqual({1, 2}, sensor_deadlines.pop_removed())
+        self.assertEqual(set(), sensor_deadlines.pop_removed())
+        self.assertEqual(set(), sensor_deadlines.pop_recovered())
+        self.assertEqual(0, len(sensor_deadlines))
+
+    def test_outdated_entries_removed(self):
+        """
+        Tests that the heap does not grow with the number of updates.
+        """
+        sensor_deadlines = SensorDeadlines(10)
+        for i in range(1000):
+            sensor_deadlines.update(i % 5, i)
+
+        self.assertLessEqual(len(sensor_deadlines._heap), 2 * 5 + 64 + 1)
+        self.assertEqual([], sensor_deadlines.pop_expired(1000))
+        self.assertEqual(5, len(sensor_deadlines.pop_expired(1010)))
+
+
+class TestSensorTimeouts(TestServerCore):
+
+    def test_sensor_timeout(self):
+        """
+        Tests that a sensor with a configured timeout times out and is no longer timed out after an update.
+        """
+        self._create_server("threaded")
+        self.global_data.sensorTimeouts[("sensor_0", 0)] = 1
+        connection_watchdog = self.global_data.connectionWatchdog
+
+        client = self._create_client("sensor_0", protocol=3)
+        self.assertTrue(client.connect_sensor(2))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        node_id = self.global_data.storage.getNodeId("sensor_0")
+        sensor_ids = [self.global_data.storage.getSensorId(node_id, i) for i in range(2)]
+
+        time.sleep(2.1)
+        connection_watchdog._processSensorTimeouts()
+        self.assertEqual({sensor_ids[0]}, connection_watchdog._timeoutSensorIds)
+
+        response = client.send_request("statechanges", {"type": "request",
+                                                        "stateChanges": [{"clientSensorId": 0,
+                                                                          "state": 1,
+                                                                          "dataType": SensorDataType.NONE,
+                                                                          "data": {}}]})
+        self.assertEqual("ok", response["payload"]["result"])
+
+        connection_watchdog._processSensorTimeouts()
+        self.assertEqual(set(), connection_watchdog._timeoutSensorIds)
+
+    def test_removed_sensor_timeout(self):
+        """
+        Tests that a timed out sensor is no longer timed out after its node registered again without it.
+        """
+        self._create_server("threaded")
+        self.global_data.sensorTimeouts[("sensor_0", 1)] = 1
+        connection_watchdog = self.global_data.connectionWatchdog
+
+        client = self._create_client("sensor_0")
+        self.assertTrue(client.connect_sensor(2))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        node_id = self.global_data.storage.getNodeId("sensor_0")
+        sensor_id = self.global_data.storage.getSensorId(node_id, 1)
+
+        time.sleep(2.1)
+        connection_watchdog._processSensorTimeouts()
+        self.assertEqual({sensor_id}, connection_watchdog._timeoutSensorIds)
+
+        client.close()
+        self.assertEqual(0, self._wait_sessions(0))
+        client = self._create_client("sensor_0")
+        self.assertTrue(client.connect_sensor(1))
+        self.assertEqual(1, self._wait_sessions(1))
+        self.assertIsNone(self.global_data.storage.getSensorId(node_id, 1))
+
+        connection_watchdog._processSensorTimeouts()
+        self.assertEqual(set(), connection_watchdog._timeoutSensorIds)
+
+    def test_load_sensor_deadlines(self):
+        """
+        Tests that the deadlines of all sensors in the database are set on start.
+        """
+        self._create_server("threaded")
+
+        client = self._create_client("sensor_0")
+        self.assertTrue(client.connect_sensor(3))
+        self.assertEqual(1, self._wait_sessions(1))
+
+        connection_watchdog = self.global_data.connectionWatchdog
+        connection_watchdog._sensorDeadlines = SensorDeadlines(1)
+        self.assertTrue(connection_watchdog._loadSensorDeadlines())
+        self.assertEqual(3, len(connection_watchdog._sensorDeadlines))
+
+
+class TestNodeConnections(TestServerCore):
+
+    def _wait_connected(self, count: int, timeout: float = 5.0) -> int:
+        start = time.time()
+        while True:
+            connected = len(self.global_data.serverSessions.get_connected_node_ids())
+            if connected == count or (time.time() - start) > timeout:
+                return connected
+            time.sleep(0.05)
+
+    def test_sync_db_and_connections(self):
+        """
+        Tests that the connected nodes in the database are synchronized with the connected clients.
+        """
+        self._create_server("threaded")
+        storage = self.global_data.storage
+
+        client = self._create_client("sensor_0")
+        self.assertTrue(client.connect_sensor(1))
+        self.assertEqual(1, self._wait_connected(1))
+        node_id = storage.getNodeId("sensor_0")
+        self.assertEqual({node_id}, self.global_data.serverSessions.get_connected_node_ids())
+
+        # Node without a connection marked as connected and connected node marked as not connected.
+        self.assertTrue(storage.addNode("sensor_1", "host", "sensor", "test", 1.0, 1, 0))
+        other_node_id = storage.getNodeId("sensor_1")
+        self.assertTrue(storage.markNodeAsConnected(other_node_id))
+        self.assertTrue(storage.markNodeAsNotConnected(node_id))
+
+        self.global_data.connectionWatchdog._syncDbAndConnections()
+        connected_node_ids = set(storage.getAllConnectedNodeIds())
+        self.assertIn(node_id, connected_node_ids)
+        self.assertNotIn(other_node_id, connected_node_ids)
+
+        client.close()
+        self.assertEqual(0, self._wait_connected(0))
@@ -13,8 +13,8 @@ import logging
 import random
 import json
 import os
-from typing import Optional, Dict, Any
-from .core import BUFSIZE, RecvTimeout, Connection
+from typing import Optional, Dict, Any, Tuple
+from .core import BUFSIZE, RecvTimeout, Connection, FRAME_HEADER_SIZE, FRAME_REQUEST, FRAME_RESPONSE
 from .util import MsgChecker
 
 
@@ -159,6 +159,20 @@ class Communication:
 
         self._is_server = is_server
 
+        # Protocol version used on the current communication channel (negotiated during the initialization).
+        self._protocol_version = 1
+
+        # Maximum number of requests that wait for their response (protocol version 2).
+        self._max_in_flight = 16
+
+        # Requests sent with protocol version 2 that wait for their response (frame id -> promise).
+        self._pending_promises = dict()  # type: Dict[int, Promise]
+        self._pending_cond = threading.Condition()
+        self._next_frame_id = random.randint(0, 0xffffffff)
+
+        # Received data of protocol version 2 that does not form a complete frame yet.
+        self._recv_buffer = bytearray()
+
         # Start request sender thread.
         self._thread_request_sender = threading.Thread(target=self._request_sender,
                                                        daemon=True)
@@ -172,6 +186,217 @@ class Communication:
     def last_communication(self):
         return self._last_communication
 
+    @property
+    def protocol_version(self) -> int:
+        return self._protocol_version
+
+    @staticmethod
+    def _build_frame(frame_type: str,
+                     frame_id: int,
+                     msg: str) -> str:
+        """
+        Builds a frame of protocol version 2.
+
+        :param frame_type:
+        :param frame_id:
+        :param msg:
+        :return:
+        """
+        return "%08x%08x%s%s" % (len(msg), frame_id, frame_type, msg)
+
+    def _has_buffered_frame(self) -> bool:
+        """
+        Checks if a complete frame of protocol version 2 was already received.
+
+        :return:
+        """
+        if len(self._recv_buffer) < FRAME_HEADER_SIZE:
+            return False
+
+        return len(self._recv_buffer) >= FRAME_HEADER_SIZE + int(self._recv_buffer[0:8], 16)
+
+    def _recv_frame(self) -> Tuple[str, int, str]:
+        """
+        Receives a frame of protocol version 2.
+
+        :return: tuple of frame type, frame id and payload
+        """
+        while not self._has_buffered_frame():
+            data = self._connection.recv(BUFSIZE)
+            if not data:
+                raise ConnectionError("Connection closed.")
+            self._recv_buffer.extend(data)
+
+        frame_size = FRAME_HEADER_SIZE + int(self._recv_buffer[0:8], 16)
+        frame_id = int(self._recv_buffer[8:16], 16)
+        frame_type = chr(self._recv_buffer[16])
+        data = self._recv_buffer[FRAME_HEADER_SIZE:frame_size].decode("ascii")
+        del self._recv_buffer[:frame_size]
+
+        if frame_type not in [FRAME_REQUEST, FRAME_RESPONSE]:
+            raise ValueError("Unknown frame type '%s'." % frame_type)
+
+        return frame_type, frame_id, data
+
+    def _requeue_pending_promises(self):
+        """
+        Puts requests that did not get a response back at the front of the message queue
+        (used when the communication channel is lost).
+        """
+        with self._pending_cond:
+            pending_promises = list(self._pending_promises.values())
+            self._pending_promises.clear()
+            self._pending_cond.notify_all()
+
+        with self._msg_queue_lock:
+            for promise in reversed(pending_promises):
+                promise.clear_transaction_id()
+                self._msg_queue.insert(0, promise)
+
+    # noinspection PyBroadException
+    def _send_frames(self):
+        """
+        Sends the queued requests with protocol version 2 without waiting for their responses
+        (responses are processed by the receiving side in recv_request()).
+        """
+        while self._msg_queue:
+
+            if self._exit_flag or not self._has_channel:
+                return
+
+            # Wait until a response was received if too many requests are in flight.
+            with self._pending_cond:
+                if len(self._pending_promises) >= self._max_in_flight:
+                    self._pending_cond.wait(0.5)
+                    continue
+
+            with self._msg_queue_lock:
+                promise = self._msg_queue.pop(0)
+
+            with self._connection_lock:
+
+                # Only send message if we have a working communication channel.
+                if not self._has_channel:
+                    with self._msg_queue_lock:
+                        self._msg_queue.insert(0, promise)
+                    return
+
+                frame_id = self._next_frame_id
+                self._next_frame_id = (frame_id + 1) & 0xffffffff
+                promise.set_transaction_id(frame_id)
+                with self._pending_cond:
+                    self._pending_promises[frame_id] = promise
+
+                try:
+                    logging.debug("[%s]: Sending message of type '%s' with id %d."
+                                  % (self._log_tag, promise.msg_type, frame_id))
+                    self._connection.send(self._build_frame(FRAME_REQUEST, frame_id, promise.msg))
+
+                except OSError:
+                    logging.exception("[%s]: Sending message of type '%s' failed (retrying)."
+                                      % (self._log_tag, promise.msg_type))
+                    with self._pending_cond:
+                        del self._pending_promises[frame_id]
+                    with self._msg_queue_lock:
+                        promise.clear_transaction_id()
+                        self._msg_queue.insert(0, promise)
+                    self._has_channel = False
+                    return
+
+                except Exception:
+                    logging.exception("[%s]: Sending message of type '%s' failed (giving up)."
+                                      % (self._log_tag, promise.msg_type))
+                    with self._pending_cond:
+                        del self._pending_promises[frame_id]
+                    self._has_channel = False
+                    promise.set_failed()
+                    return
+
+            self._last_communication = int(time.time())
+
+    # noinspection PyBroadException
+    def _process_response(self,
+                          frame_id: int,
+                          data: str):
+        """
+        Processes a response of protocol version 2 and finishes the promise of the corresponding request.
+
+        :param frame_id:
+        :param data:
+        """
+        with self._pending_cond:
+            promise = self._pending_promises.pop(frame_id, None)
+            self._pending_cond.notify_all()
+
+        if promise is None:
+            logging.error("[%s]: Received response for unknown request with id %d." % (self._log_tag, frame_id))
+            return
+
+        try:
+            message = json.loads(data)
+
+            # check if an error was received
+            if "error" in message.keys():
+                logging.error("[%s]: Error received for message of type '%s': %s"
+                              % (self._log_tag, promise.msg_type, message["error"]))
+                promise.set_failed()
+                return
+
+            # Check if we received an answer to our sent request.
+            if str(message["message"]).lower() != promise.msg_type:
+                logging.error("[%s]: Wrong message type for message of type '%s' received: %s"
+                              % (self._log_tag, promise.msg_type, message["message"]))
+                promise.set_failed()
+                return
+
+            # Check if the received type (request/response) is the correct one.
+            if str(message["payload"]["type"]).lower() != "response":
+                logging.error("[%s]: Response expected for message of type '%s'."
+                              % (self._log_tag, promise.msg_type))
+                promise.set_failed()
+                return
+
+            msg_result = str(message["payload"]["result"]).lower()
+
+        except Exception:
+            logging.exception("[%s]: Received response for message of type '%s' not valid."
+                              % (self._log_tag, promise.msg_type))
+            promise.set_failed()
+            return
+
+        # Check if result of message was ok.
+        if msg_result == "ok":
+            logging.debug("[%s]: Received valid response for message of type '%s'."
+                          % (self._log_tag, promise.msg_type))
+            promise.set_success()
+
+        # Check if result of message was expired
+        # (too long in queue that other side does not process it).
+        elif msg_result == "expired":
+            logging.warning("[%s]: Other side said message of type '%s' is expired (too old)."
+                            % (self._log_tag, promise.msg_type))
+            promise.set_failed()
+
+        else:
+            logging.error("[%s]: Wrong result for message of type '%s' received: %s"
+                          % (self._log_tag, promise.msg_type, msg_result))
+            promise.set_failed()
+
+    def _send_response(self,
+                       transaction_id: Optional[int],
+                       msg: str):
+        """
+        Sends the response to a received request (the connection lock has to be held).
+
+        :param transaction_id:
+        :param msg:
+        """
+        if self._protocol_version >= 2:
+            self._connection.send(self._build_frame(FRAME_RESPONSE, transaction_id, msg))
+
+        else:
+            self._connection.send(msg)
+
     # noinspection PyBroadException
     def _initiate_transaction(self, promise: Promise) -> bool:
         """
@@ -269,6 +494,13 @@ class Communication:
             if not self._has_channel:
                 continue
 
+            # Protocol version 2 does not need a transaction initiation and sends requests without
+            # waiting for the responses.
+            if self._protocol_version >= 2:
+                self._new_msg_event.clear()
+                self._send_frames()
+                continue
+
             backoff = False
             while self._msg_queue:
 
@@ -417,6 +649,9 @@ class Communication:
             except Exception:
                 pass
 
+            self._recv_buffer = bytearray()
+            self._protocol_version = 1
+
             try:
                 self._connection.connect()
 
@@ -453,6 +688,9 @@ class Communication:
         except Exception:
             pass
 
+        # Requests that did not get a response are sent again over the next communication channel.
+        self._requeue_pending_promises()
+
     # noinspection PyBroadException
     def recv_raw(self) -> Optional[str]:
         """
@@ -474,6 +712,159 @@ class Communication:
         self._last_communication = int(time.time())
         return data.decode("ascii")
 
+    # noinspection PyBroadException
+    def _process_request(self,
+                         data: str,
+                         transaction_id: Optional[int]) -> Optional[MsgRequest]:
+        """
+        Processes a received request and sends the response (the connection lock has to be held).
+
+        :param data: received request
+        :param transaction_id: id of the transaction/frame of the request
+        :return: processed request or None if the communication channel has to be closed
+        """
+        recv_message = {}
+        try:
+            recv_message = json.loads(data)
+            # check if an error was received
+            if "error" in recv_message.keys():
+                logging.error("[%s]: Error received: '%s'."
+                              % (self._log_tag, recv_message["error"]))
+                self._has_channel = False
+                return None
+
+        except Exception:
+            logging.exception("[%s]: Received data not valid: '%s'." % (self._log_tag, data))
+            self._has_channel = False
+            return None
+
+        error_msg = MsgChecker.check_received_message(recv_message)
+        if error_msg is not None:
+
+            request_type = "unknown"
+            if "message" in recv_message.keys() and type(recv_message["message"]) != str:
+                request_type = recv_message["message"]
+
+            # send error message back
+            try:
+                message = {"message": request_type,
+                           "error": error_msg}
+                self._send_response(transaction_id, json.dumps(message))
+            except Exception:
+                pass
+
+            self._has_channel = False
+            return None
+
+        request_type = recv_message["message"]
+        logging.debug("[%s]: Received request message of type '%s'." % (self._log_tag, request_type))
+        time_received = int(time.time())
+
+        # Sending response.
+        msg_request = None
+        msg_time = recv_message["msgTime"]
+        time_diff = int(time.time()) - msg_time
+        # Consider time differences in both directions:
+        # 1) if message is too old, it was either hold too long in the queue because of a disconnect or
+        # the time of both hosts are too far out of sync
+        # 2) if message lies in the future, the time of both hosts are too far out of sync
+        if time_diff > self._msg_expiration or time_diff < (-1 * self._msg_expiration):
+
+            logging.warning("[%s]: Received request message of type '%s' is expired "
+                            % (self._log_tag, request_type)
+                            + "(%d seconds difference, allowed (+/-)%d seconds)."
+                            % (time_diff, self._msg_expiration))
+
+            logging.debug("[%s]: Sending 'expired' response message of type '%s'."
+                          % (self._log_tag, request_type))
+            try:
+                payload = {"type": "response",
+                           "result": "expired"}
+                message = {"message": request_type,
+                           "payload": payload}
+                self._send_response(transaction_id, json.dumps(message))
+
+            except Exception:
+                logging.exception("[%s]: Sending 'expired' response message of type '%s' failed."
+                                  % (self._log_tag, request_type))
+                self._has_channel = False
+                return None
+
+            msg_request = MsgRequest(recv_message,
+                                     transaction_id,
+                                     time_received,
+                                     MsgState.EXPIRED)
+
+        else:
+            logging.debug("[%s]: Sending 'ok' response message of type '%s'." % (self._log_tag, request_type))
+            try:
+                payload = {"type": "response",
+                           "result": "ok"}
+                message = {"message": request_type,
+                           "payload": payload}
+                self._send_response(transaction_id, json.dumps(message))
+
+            except Exception:
+                logging.exception("[%s]: Sending 'ok' response message of type '%s' failed."
+                                  % (self._log_tag, request_type))
+                self._has_channel = False
+                return None
+
+            msg_request = MsgRequest(recv_message,
+                                     transaction_id,
+                                     time_received,
+                                     MsgState.OK)
+
+        self._last_communication = int(time.time())
+        return msg_request
+
+    # noinspection PyBroadException
+    def _recv_request_frame(self) -> Optional[MsgRequest]:
+        """
+        Receives frames of protocol version 2 until a request is received. Received responses are processed
+        in between.
+
+        :return: Data of the received request.
+        """
+        while True:
+
+            # Only try to receive requests if we are connected.
+            if not self._has_channel:
+                return None
+
+            # Exit if requested.
+            if self._exit_flag:
+                return None
+
+            # Wait for data without holding the connection lock to not block the request sender.
+            if not self._has_buffered_frame():
+                try:
+                    if not self._connection.wait_readable(0.5):
+                        continue
+
+                except Exception:
+                    logging.exception("[%s]: Waiting for data failed." % self._log_tag)
+                    self._has_channel = False
+                    return None
+
+            with self._connection_lock:
+
+                try:
+                    frame_type, frame_id, data = self._recv_frame()
+
+                except Exception:
+                    logging.exception("[%s]: Receiving failed." % self._log_tag)
+                    self._has_channel = False
+                    return None
+
+                self._last_communication = int(time.time())
+
+                if frame_type == FRAME_RESPONSE:
+                    self._process_response(frame_id, data)
+                    continue
+
+                return self._process_request(data, frame_id)
+
     # noinspection PyBroadException
     def recv_request(self) -> Optional[MsgRequest]:
         """
@@ -482,6 +873,9 @@ class Communication:
 
         :return: Data of the received request.
         """
+        if self._protocol_version >= 2:
+            return self._recv_request_frame()
+
         is_timeout_exception = False
 
         while True:
@@ -578,100 +972,7 @@ class Communication:
                     self._has_channel = False
                     return None
 
-                recv_message = {}
-                try:
-                    recv_message = json.loads(data)
-                    # check if an error was received
-                    if "error" in recv_message.keys():
-                        logging.error("[%s]: Error received: '%s'."
-                                      % (self._log_tag, recv_message["error"]))
-                        self._has_channel = False
-                        return None
-
-                except Exception:
-                    logging.exception("[%s]: Received data not valid: '%s'." % (self._log_tag, data))
-                    self._has_channel = False
-                    return None
-
-                error_msg = MsgChecker.check_received_message(recv_message)
-                if error_msg is not None:
-
-                    request_type = "unknown"
-                    if "message" in recv_message.keys() and type(recv_message["message"]) != str:
-                        request_type = recv_message["message"]
-
-                    # send error message back
-                    try:
-                        message = {"message": request_type,
-                                   "error": error_msg}
-                        self._connection.send(json.dumps(message))
-                    except Exception:
-                        pass
-
-                    self._has_channel = False
-                    return None
-
-                request_type = recv_message["message"]
-                logging.debug("[%s]: Received request message of type '%s'." % (self._log_tag, request_type))
-                time_received = int(time.time())
-
-                # Sending response.
-                msg_request = None
-                msg_time = recv_message["msgTime"]
-                time_diff = int(time.time()) - msg_time
-                # Consider time differences in both directions:
-                # 1) if message is too old, it was either hold too long in the queue because of a disconnect or
-                # the time of both hosts are too far out of sync
-                # 2) if message lies in the future, the time of both hosts are too far out of sync
-                if time_diff > self._msg_expiration or time_diff < (-1 * self._msg_expiration):
-
-                    logging.warning("[%s]: Received request message of type '%s' is expired "
-                                    % (self._log_tag, request_type)
-                                    + "(%d seconds difference, allowed (+/-)%d seconds)."
-                                    % (time_diff, self._msg_expiration))
-
-                    logging.debug("[%s]: Sending 'expired' response message of type '%s'."
-                                  % (self._log_tag, request_type))
-                    try:
-                        payload = {"type": "response",
-                                   "result": "expired"}
-                        message = {"message": request_type,
-                                   "payload": payload}
-                        self._connection.send(json.dumps(message))
-
-                    except Exception:
-                        logging.exception("[%s]: Sending 'expired' response message of type '%s' failed."
-                                          % (self._log_tag, request_type))
-                        self._has_channel = False
-                        return None
-
-                    msg_request = MsgRequest(recv_message,
-                                             received_transaction_id,
-                                             time_received,
-                                             MsgState.EXPIRED)
-
-                else:
-                    logging.debug("[%s]: Sending 'ok' response message of type '%s'." % (self._log_tag, request_type))
-                    try:
-                        payload = {"type": "response",
-                                   "result": "ok"}
-                        message = {"message": request_type,
-                                   "payload": payload}
-                        self._connection.send(json.dumps(message))
-
-                    except Exception:
-                        logging.exception("[%s]: Sending 'ok' response message of type '%s' failed."
-                                          % (self._log_tag, request_type))
-                        self._has_channel = False
-                        return None
-
-                    msg_request = MsgRequest(recv_message,
-                                             received_transaction_id,
-                                             time_received,
-                                             MsgState.OK)
-
-                self._last_communication = int(time.time())
-                return msg_request
+                return self._process_request(data, received_transaction_id)
 
     def send_request(self,
                      msg_type: str,
@@ -708,5 +1009,12 @@ class Communication:
             except Exception:
                 self._has_channel = False
 
-    def set_connected(self):
+    def set_connected(self, protocol_version: int = 1):
+        """
+        Marks the communication channel as established.
+
+        :param protocol_version: protocol version negotiated for the communication channel
+        """
+        self._requeue_pending_promises()
+        self._protocol_version = protocol_version
         self._has_channel = True
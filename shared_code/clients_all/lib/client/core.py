@@ -7,12 +7,25 @@
 #
 # Licensed under the GNU Affero General Public License, version 3.
 
+import select
 import socket
 import ssl
+import time
 from typing import Optional
 
 BUFSIZE = 4096
 
+# Highest protocol version supported by the client
+# (1: RTS/CTS handshake for each message, 2: pipelined length-prefixed frames,
+# 3: state changes of multiple sensors in one "statechanges" message).
+PROTOCOL_VERSION = 3
+
+# A frame of protocol version 2 starts with a header of the payload length (8 hex digits), the request id
+# (8 hex digits) and the frame type followed by the payload.
+FRAME_HEADER_SIZE = 17
+FRAME_REQUEST = "Q"
+FRAME_RESPONSE = "R"
+
 
 class RecvTimeout(Exception):
     pass
@@ -44,6 +57,15 @@ class Connection:
         """
         raise NotImplementedError("Abstract class.")
 
+    def wait_readable(self,
+                      timeout: float) -> bool:
+        """
+        Waits until data can be received on the connection.
+        :param timeout: maximum time in seconds to wait
+        :return: True if data can be received
+        """
+        raise NotImplementedError("Abstract class.")
+
     def close(self):
         """
         Closes connection.
@@ -66,24 +88,67 @@ class Client(Connection):
         self._client_key_file = client_key_file
         self._socket = None  # type: Optional[socket.socket]
 
+        # TLS context is created once and used for all connections, the TLS session of the last connection
+        # is used to resume the session when reconnecting.
+        self._ssl_context = None  # type: Optional[ssl.SSLContext]
+        self._ssl_session = None  # type: Optional[ssl.SSLSession]
+        self.ssl_context_builds = 0
+
+        # Timings of the last connect.
+        self.tcp_connect_duration = None  # type: Optional[float]
+        self.tls_handshake_duration = None  # type: Optional[float]
+        self.tls_session_reused = None  # type: Optional[bool]
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        """
+        Returns the TLS context used for the connections (and creates it if it does not exist yet).
+        :return: TLS context
+        """
+        if self._ssl_context is None:
+            ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+
+            # The server certificate is verified against the CA file, but not against the host name.
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_REQUIRED
+            ssl_context.load_verify_locations(cafile=self._server_ca_file)
+
+            # Check if a client certificate is required.
+            if self._client_cert_file is not None and self._client_key_file is not None:
+                ssl_context.load_cert_chain(certfile=self._client_cert_file,
+                                            keyfile=self._client_key_file)
+
+            self._ssl_context = ssl_context
+            self.ssl_context_builds += 1
+
+        return self._ssl_context
+
     def connect(self):
+        self.tcp_connect_duration = None
+        self.tls_handshake_duration = None
+        self.tls_session_reused = None
+
+        start = time.time()
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.connect((self._host, self._port))
+        self.tcp_connect_duration = time.time() - start
 
         # Check if TLS is enabled.
         if self._server_ca_file is not None:
-            # Check if a client certificate is required.
-            if self._client_cert_file is None or self._client_key_file is None:
-                self._socket = ssl.wrap_socket(self._socket,
-                                               ca_certs=self._server_ca_file,
-                                               cert_reqs=ssl.CERT_REQUIRED)
-            else:
-                self._socket = ssl.wrap_socket(self._socket,
-                                               ca_certs=self._server_ca_file,
-                                               cert_reqs=ssl.CERT_REQUIRED,
-                                               certfile=self._client_cert_file,
-                                               keyfile=self._client_key_file)
+            ssl_context = self._get_ssl_context()
 
-        self._socket.connect((self._host, self._port))
+            start = time.time()
+            try:
+                self._socket = ssl_context.wrap_socket(self._socket,
+                                                       server_hostname=self._host,
+                                                       session=self._ssl_session)
+
+            except Exception:
+                # Do not try to resume the session again if the handshake failed.
+                self._ssl_session = None
+                raise
+
+            self.tls_handshake_duration = time.time() - start
+            self.tls_session_reused = self._socket.session_reused
 
     def send(self,
              data: str):
@@ -103,6 +168,21 @@ class Client(Connection):
         self._socket.settimeout(None)
         return data
 
+    def wait_readable(self,
+                      timeout: float) -> bool:
+        # Data already decrypted by the TLS layer is not signaled by the socket.
+        if isinstance(self._socket, ssl.SSLSocket) and self._socket.pending() > 0:
+            return True
+
+        readable, _, _ = select.select([self._socket], [], [], timeout)
+        return bool(readable)
+
     def close(self):
         if self._socket is not None:
+
+            # Keep TLS session to resume it on the next connect (with TLS 1.3 the session is
+            # only resumable after the session ticket of the server was received).
+            if isinstance(self._socket, ssl.SSLSocket) and self._socket.session is not None:
+                self._ssl_session = self._socket.session
+
             self._socket.close()
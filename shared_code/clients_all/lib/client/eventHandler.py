@@ -7,7 +7,7 @@
 #
 # Licensed under the GNU Affero General Public License, version 3.
 
-from typing import List, Any
+from typing import List, Any, Dict
 from ..globalData import ManagerObjOption, ManagerObjNode, ManagerObjSensor, ManagerObjManager, ManagerObjAlert, \
     ManagerObjAlertLevel, ManagerObjSensorAlert, ManagerObjProfile, SensorDataType
 
@@ -15,7 +15,9 @@ from ..globalData import ManagerObjOption, ManagerObjNode, ManagerObjSensor, Man
 class EventHandler:
 
     def __init__(self):
-        pass
+        # Flag that indicates if status updates that only contain the changes since the last one
+        # are handled (status_update_delta()).
+        self.status_delta_supported = False
 
     def close_connection(self):
         """
@@ -94,3 +96,26 @@ class EventHandler:
         :return Success or Failure
         """
         raise NotImplementedError("Abstract class.")
+
+    def status_update_delta(self,
+                            msg_time: int,
+                            options: List[ManagerObjOption],
+                            nodes: List[ManagerObjNode],
+                            sensors: List[ManagerObjSensor],
+                            managers: List[ManagerObjManager],
+                            alerts: List[ManagerObjAlert],
+                            deleted: Dict[str, List[Any]]) -> bool:
+        """
+        Is called when a status update message was received that only contains the objects added, changed or
+        deleted since the last status update (only if status_delta_supported is set).
+
+        :param msg_time:
+        :param options: added or changed options
+        :param nodes: added or changed nodes
+        :param sensors: added or changed sensors
+        :param managers: added or changed managers
+        :param alerts: added or changed alerts
+        :param deleted: keys of deleted objects ("options": types, "nodes"/"sensors"/"managers"/"alerts": ids)
+        :return Success or Failure
+        """
+        raise NotImplementedError("Abstract class.")
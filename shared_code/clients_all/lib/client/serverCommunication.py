@@ -12,8 +12,8 @@ import logging
 import os
 import json
 import threading
-from typing import Dict, Any
-from .core import Client
+from typing import Dict, Any, List, Optional
+from .core import Client, PROTOCOL_VERSION
 from .util import MsgBuilder
 from .communication import Communication, Promise, MsgState
 from .eventHandler import EventHandler
@@ -45,12 +45,12 @@ class ServerCommunication(Communication):
         self._client_cert_file = client_cert_file
         self._client_key_file = client_key_file
 
-        client = Client(self._host,
-                        self._port,
-                        self._server_ca_file,
-                        self._client_cert_file,
-                        self._client_key_file)
-        super().__init__(client)
+        self._client = Client(self._host,
+                              self._port,
+                              self._server_ca_file,
+                              self._client_cert_file,
+                              self._client_key_file)
+        super().__init__(self._client)
 
         # get global configured data
         self._global_data = global_data
@@ -81,6 +81,16 @@ class ServerCommunication(Communication):
 
         self._initialization_lock = threading.Lock()
 
+        # Protocol version the server agreed on during the authentication.
+        self._negotiated_protocol_version = 1
+
+        # Revision of the last status update received (None if the server does not send revisions).
+        self._status_revision = None  # type: Optional[int]
+
+    @property
+    def client(self) -> Client:
+        return self._client
+
     @property
     def event_handler(self) -> EventHandler:
         return self._event_handler
@@ -199,6 +209,45 @@ class ServerCommunication(Communication):
 
         return False
 
+    def _handler_state_changes(self,
+                               incomingMessage: Dict[str, Any]) -> bool:
+        """
+        Internal function that handles received state changes of multiple sensors (for nodes of type manager).
+
+        :param incomingMessage:
+        :return: success or failure
+        """
+        logging.debug("[%s]: Received %d state changes."
+                      % (self._log_tag, len(incomingMessage["payload"]["stateChanges"])))
+
+        # extract state change values
+        state_changes = list()
+        try:
+            msg_time = incomingMessage["msgTime"]
+
+            for state_change in incomingMessage["payload"]["stateChanges"]:
+                sensor_data_cls = SensorDataType.get_sensor_data_class(state_change["dataType"])
+                sensor_data = sensor_data_cls.copy_from_dict(state_change["data"])
+                state_changes.append((state_change["sensorId"],
+                                      state_change["state"],
+                                      state_change["dataType"],
+                                      sensor_data))
+
+        except Exception:
+            logging.exception("[%s]: Received state changes invalid." % self._log_tag)
+            return False
+
+        # handle received state changes
+        for sensorId, state, dataType, sensor_data in state_changes:
+            if not self._event_handler.state_change(msg_time,
+                                                    sensorId,
+                                                    state,
+                                                    dataType,
+                                                    sensor_data):
+                return False
+
+        return True
+
     def _handler_status_update(self,
                                incomingMessage: Dict[str, Any]):
         """
@@ -221,18 +270,45 @@ class ServerCommunication(Communication):
         try:
             msg_time = incomingMessage["msgTime"]
 
+            # A delta status update only contains the objects changed since the given base revision.
+            is_delta = incomingMessage["payload"].get("delta", False)
+            revision = incomingMessage["payload"].get("revision", None)
+
             options_raw = incomingMessage["payload"]["options"]
-            profiles_raw = incomingMessage["payload"]["profiles"]
             nodes_raw = incomingMessage["payload"]["nodes"]
             sensors_raw = incomingMessage["payload"]["sensors"]
             managers_raw = incomingMessage["payload"]["managers"]
             alerts_raw = incomingMessage["payload"]["alerts"]
-            alert_levels_raw = incomingMessage["payload"]["alertLevels"]
+
+            if is_delta:
+                base_revision = incomingMessage["payload"]["baseRevision"]
+                deleted = dict()
+                for object_list in ["options", "nodes", "sensors", "managers", "alerts"]:
+                    deleted[object_list] = list(incomingMessage["payload"]["deleted"][object_list])
+                profiles_raw = list()
+                alert_levels_raw = list()
+
+            else:
+                profiles_raw = incomingMessage["payload"]["profiles"]
+                alert_levels_raw = incomingMessage["payload"]["alertLevels"]
 
         except Exception:
             logging.exception("[%s]: Received status invalid." % self._log_tag)
             return False
 
+        if is_delta:
+            # We missed changes if we do not have the state the delta is based on
+            # (closing the connection gets us a full status update after reconnecting).
+            if (not self._event_handler.status_delta_supported
+                    or self._status_revision is None
+                    or base_revision > self._status_revision):
+                logging.error("[%s]: Received status update based on revision %s but having revision %s."
+                              % (self._log_tag, str(base_revision), str(self._status_revision)))
+                return False
+
+            logging.debug("[%s]: Received status update from revision %d to %d."
+                          % (self._log_tag, base_revision, revision))
+
         logging.debug("[%s]: Received option count: %d." % (self._log_tag, len(options_raw)))
 
         # process received options
@@ -435,16 +511,28 @@ class ServerCommunication(Communication):
             alertLevels.append(alertLevel)
 
         # handle received status update
-        if not self._event_handler.status_update(msg_time,
-                                                 options,
-                                                 profiles,
-                                                 nodes,
-                                                 sensors,
-                                                 managers,
-                                                 alerts,
-                                                 alertLevels):
+        if is_delta:
+            if not self._event_handler.status_update_delta(msg_time,
+                                                           options,
+                                                           nodes,
+                                                           sensors,
+                                                           managers,
+                                                           alerts,
+                                                           deleted):
+                return False
+
+        elif not self._event_handler.status_update(msg_time,
+                                                   options,
+                                                   profiles,
+                                                   nodes,
+                                                   sensors,
+                                                   managers,
+                                                   alerts,
+                                                   alertLevels):
             return False
 
+        self._status_revision = revision
+
         return True
 
     def _register_node(self,
@@ -467,7 +555,12 @@ class ServerCommunication(Communication):
         # get registration response from server
         try:
             data = self.recv_raw()
-            message = json.loads(data)
+
+            # With protocol version 2 the server can send its first request directly after the
+            # registration response => keep the remaining data for receiving it.
+            message, end = json.JSONDecoder().raw_decode(data)
+            self._recv_buffer.extend(data[end:].encode("ascii"))
+
             # check if an error was received
             if "error" in message.keys():
                 logging.error("[%s]: Error received: '%s'." % (self._log_tag, message["error"]))
@@ -524,7 +617,8 @@ class ServerCommunication(Communication):
                                                 self._password,
                                                 self._version,
                                                 self._rev,
-                                                regMessageSize)
+                                                regMessageSize,
+                                                PROTOCOL_VERSION)
 
         # send user credentials and version
         try:
@@ -631,6 +725,33 @@ class ServerCommunication(Communication):
 
             return False
 
+        # Get protocol version used after the initialization
+        # (servers that do not send a protocol version only support version 1).
+        try:
+            self._negotiated_protocol_version = 1
+            if "protocol" in message["payload"].keys():
+                self._negotiated_protocol_version = int(message["payload"]["protocol"])
+
+            if self._negotiated_protocol_version < 1 or self._negotiated_protocol_version > PROTOCOL_VERSION:
+                raise ValueError("Protocol version %d not supported." % self._negotiated_protocol_version)
+
+            logging.debug("[%s]: Using protocol version %d."
+                          % (self._log_tag, self._negotiated_protocol_version))
+
+        except Exception:
+
+            logging.exception("[%s]: Protocol version not valid." % self._log_tag)
+
+            # send error message back
+            try:
+                message = {"message": message["message"],
+                           "error": "protocol version not valid"}
+                self.send_raw(json.dumps(message))
+            except Exception:
+                pass
+
+            return False
+
         return True
 
     def close(self):
@@ -727,6 +848,16 @@ class ServerCommunication(Communication):
                     self.close()
                     return
 
+            # Handle STATECHANGES request.
+            elif request.lower() == "statechanges":
+                if not self._handler_state_changes(msg_request.msg_dict):
+                    logging.error("[%s]: Receiving state changes failed."
+                                  % self._log_tag)
+
+                    # clean up session before exiting
+                    self.close()
+                    return
+
             # Unkown request.
             else:
                 logging.error("[%s]: Received unknown request. Server sent: %s"
@@ -755,13 +886,17 @@ class ServerCommunication(Communication):
                 # Do not close the connection since it was not established yet.
                 return False
 
+            # A new connection always starts with a full status update.
+            self._status_revision = None
+
             # Build registration message.
             reg_message = ""
             if self._nodeType == "manager":
                 reg_message = MsgBuilder.build_reg_msg_manager(self._description,
                                                                self._nodeType,
                                                                self._instance,
-                                                               self._persistent)
+                                                               self._persistent,
+                                                               self._event_handler.status_delta_supported)
 
             elif self._nodeType == "sensor":
                 reg_message = MsgBuilder.build_reg_msg_sensor(self._polling_sensors,
@@ -788,7 +923,7 @@ class ServerCommunication(Communication):
                 return False
 
             # Set communication channel as established.
-            self.set_connected()
+            self.set_connected(self._negotiated_protocol_version)
 
             # Nodes of type "manager" receive an initial status update when connecting to the server.
             if self._nodeType == "manager":
@@ -900,6 +1035,20 @@ class ServerCommunication(Communication):
 
         return self.send_request("statechange", state_change_message)
 
+    def send_state_change_batch(self,
+                                state_changes: List[SensorObjStateChange]) -> Promise:
+        """
+        This function sends the state changes of multiple sensors to the server in one message
+        (needs protocol version 3).
+
+        :param state_changes:
+        :return: Promise that the request will be sent and that contains the state of the send request
+        """
+
+        state_changes_message = MsgBuilder.build_state_changes_msg_sensor(state_changes)
+
+        return self.send_request("statechanges", state_changes_message)
+
     def send_sensors_status_update(self) -> Promise:
         """
         This function sends a status update of all sensors to the server.
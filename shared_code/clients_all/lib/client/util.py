@@ -227,6 +227,26 @@ class MsgChecker:
                 logging.error("[%s]: Received data invalid." % MsgChecker._log_tag)
                 return error_msg
 
+        # Check "STATECHANGES" message.
+        elif request == "statechanges":
+            if "msgTime" not in message.keys():
+                logging.error("[%s]: msgTime missing." % MsgChecker._log_tag)
+                return "msgTime expected"
+
+            error_msg = MsgChecker.check_msg_time(message["msgTime"])
+            if error_msg is not None:
+                logging.error("[%s]: Received msgTime invalid." % MsgChecker._log_tag)
+                return error_msg
+
+            if "stateChanges" not in message["payload"].keys():
+                logging.error("[%s]: stateChanges missing." % MsgChecker._log_tag)
+                return "stateChanges expected"
+
+            error_msg = MsgChecker.check_state_changes_list(message["payload"]["stateChanges"])
+            if error_msg is not None:
+                logging.error("[%s]: Received stateChanges invalid." % MsgChecker._log_tag)
+                return error_msg
+
         # Check "STATUS" message.
         elif request == "status":
             if "msgTime" not in message.keys():
@@ -238,6 +258,13 @@ class MsgChecker:
                 logging.error("[%s]: Received msgTime invalid." % MsgChecker._log_tag)
                 return error_msg
 
+            # A delta status update only contains changed objects (without profiles and alertLevels).
+            is_delta = message["payload"].get("delta", False)
+            error_msg = MsgChecker.check_status_delta(message["payload"])
+            if error_msg is not None:
+                logging.error("[%s]: Received delta information invalid." % MsgChecker._log_tag)
+                return error_msg
+
             if "options" not in message["payload"].keys():
                 logging.error("[%s]: options missing." % MsgChecker._log_tag)
                 return "options expected"
@@ -247,14 +274,15 @@ class MsgChecker:
                 logging.error("[%s]: Received options invalid." % MsgChecker._log_tag)
                 return error_msg
 
-            if "profiles" not in message["payload"].keys():
+            if not is_delta and "profiles" not in message["payload"].keys():
                 logging.error("[%s]: profiles missing." % MsgChecker._log_tag)
                 return "profiles expected"
 
-            error_msg = MsgChecker.check_status_profiles_list(message["payload"]["profiles"])
-            if error_msg is not None:
-                logging.error("[%s]: Received profiles invalid." % MsgChecker._log_tag)
-                return error_msg
+            if not is_delta:
+                error_msg = MsgChecker.check_status_profiles_list(message["payload"]["profiles"])
+                if error_msg is not None:
+                    logging.error("[%s]: Received profiles invalid." % MsgChecker._log_tag)
+                    return error_msg
 
             if "nodes" not in message["payload"].keys():
                 logging.error("[%s]: nodes missing." % MsgChecker._log_tag)
@@ -292,14 +320,15 @@ class MsgChecker:
                 logging.error("[%s]: Received alerts invalid." % MsgChecker._log_tag)
                 return error_msg
 
-            if "alertLevels" not in message["payload"].keys():
+            if not is_delta and "alertLevels" not in message["payload"].keys():
                 logging.error("[%s]: alertLevels missing." % MsgChecker._log_tag)
                 return "alertLevels expected"
 
-            error_msg = MsgChecker.check_status_alert_levels_list(message["payload"]["alertLevels"])
-            if error_msg is not None:
-                logging.error("[%s]: Received alertLevels invalid." % MsgChecker._log_tag)
-                return error_msg
+            if not is_delta:
+                error_msg = MsgChecker.check_status_alert_levels_list(message["payload"]["alertLevels"])
+                if error_msg is not None:
+                    logging.error("[%s]: Received alertLevels invalid." % MsgChecker._log_tag)
+                    return error_msg
 
         else:
             logging.error("[%s]: Unknown request/message type." % MsgChecker._log_tag)
@@ -1084,6 +1113,48 @@ class MsgChecker:
 
         return None
 
+    @staticmethod
+    def check_status_delta(payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Internal function to check sanity of the revision information of a status update.
+
+        :param payload:
+        :return:
+        """
+        is_correct = True
+        if "revision" in payload.keys() and not isinstance(payload["revision"], int):
+            is_correct = False
+
+        elif not isinstance(payload.get("delta", False), bool):
+            is_correct = False
+
+        elif payload.get("delta", False):
+
+            if not isinstance(payload.get("revision", None), int):
+                is_correct = False
+
+            elif not isinstance(payload.get("baseRevision", None), int):
+                is_correct = False
+
+            elif not isinstance(payload.get("deleted", None), dict):
+                is_correct = False
+
+            else:
+                for object_list in ["options", "nodes", "sensors", "managers", "alerts"]:
+                    if not isinstance(payload["deleted"].get(object_list, None), list):
+                        is_correct = False
+                        break
+
+                    object_key_type = str if object_list == "options" else int
+                    if any(not isinstance(obj_key, object_key_type) for obj_key in payload["deleted"][object_list]):
+                        is_correct = False
+                        break
+
+        if not is_correct:
+            return "delta information not valid"
+
+        return None
+
     # Internal function to check sanity of the status options list.
     @staticmethod
     def check_status_options_list(options: List[Dict[str, Any]]) -> Optional[str]:
@@ -1266,6 +1337,59 @@ class MsgChecker:
 
         return None
 
+    # Internal function to check sanity of the state changes list.
+    @staticmethod
+    def check_state_changes_list(state_changes: List[Dict[str, Any]]) -> Optional[str]:
+
+        is_correct = True
+        if not isinstance(state_changes, list) or not state_changes:
+            is_correct = False
+
+        # Check each state change if correct.
+        else:
+            for state_change in state_changes:
+
+                if not isinstance(state_change, dict):
+                    is_correct = False
+                    break
+
+                if "sensorId" not in state_change.keys():
+                    is_correct = False
+                    break
+
+                elif MsgChecker.check_sensor_id(state_change["sensorId"]) is not None:
+                    is_correct = False
+                    break
+
+                if "state" not in state_change.keys():
+                    is_correct = False
+                    break
+
+                elif MsgChecker.check_state(state_change["state"]) is not None:
+                    is_correct = False
+                    break
+
+                if "dataType" not in state_change.keys():
+                    is_correct = False
+                    break
+
+                elif MsgChecker.check_sensor_data_type(state_change["dataType"]) is not None:
+                    is_correct = False
+                    break
+
+                if "data" not in state_change.keys():
+                    is_correct = False
+                    break
+
+                elif MsgChecker.check_sensor_data(state_change["data"], state_change["dataType"]) is not None:
+                    is_correct = False
+                    break
+
+        if not is_correct:
+            return "stateChanges list not valid"
+
+        return None
+
     # Internal function to check sanity of the username.
     @staticmethod
     def check_username(username: str) -> Optional[str]:
@@ -1300,7 +1424,8 @@ class MsgBuilder:
                        password: str,
                        version: float,
                        rev: int,
-                       regMessageSize: int) -> str:
+                       regMessageSize: int,
+                       protocol: int = 1) -> str:
         """
         Internal function that builds the client authentication message.
 
@@ -1309,13 +1434,15 @@ class MsgBuilder:
         :param version:
         :param rev:
         :param regMessageSize:
+        :param protocol: highest supported protocol version
         :return:
         """
         payload = {"type": "request",
                    "version": version,
                    "rev": rev,
                    "username": username,
-                   "password": password}
+                   "password": password,
+                   "protocol": protocol}
         utc_timestamp = int(time.time())
         message = {"msgTime": utc_timestamp,
                    "size": regMessageSize,
@@ -1399,7 +1526,8 @@ class MsgBuilder:
     def build_reg_msg_manager(description: str,
                               node_type: str,
                               instance: str,
-                              persistent: int) -> str:
+                              persistent: int,
+                              status_delta: bool = False) -> str:
         """
         Internal function that builds the client registration message for manager nodes.
 
@@ -1407,11 +1535,14 @@ class MsgBuilder:
         :param node_type:
         :param instance:
         :param persistent:
+        :param status_delta: status updates that only contain the changes since the last one are supported
         :return:
         """
         # build manager dict for the message
         manager = dict()
         manager["description"] = description
+        if status_delta:
+            manager["statusDelta"] = True
 
         payload = {"type": "request",
                    "hostname": socket.gethostname(),
@@ -1513,6 +1644,29 @@ class MsgBuilder:
                    "payload": payload}
         return json.dumps(message)
 
+    @staticmethod
+    def build_state_changes_msg_sensor(state_changes: List[SensorObjStateChange]) -> str:
+        """
+        Internal function that builds a message with multiple state changes for sensor nodes (protocol version 3).
+
+        :param state_changes:
+        """
+        state_changes_list = list()
+        for state_change in state_changes:
+            state_changes_list.append({"clientSensorId": state_change.clientSensorId,
+                                       "state": state_change.state,
+                                       "dataType": state_change.dataType,
+                                       "data": state_change.data.copy_to_dict()})
+
+        payload = {"type": "request",
+                   "stateChanges": state_changes_list}
+
+        utc_timestamp = int(time.time())
+        message = {"msgTime": utc_timestamp,
+                   "message": "statechanges",
+                   "payload": payload}
+        return json.dumps(message)
+
     @staticmethod
     def build_status_update_msg_sensor(polling_sensors) -> str:
         """
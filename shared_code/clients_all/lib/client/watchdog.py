@@ -84,14 +84,19 @@ class ConnectionWatchdog(threading.Thread):
                         self._smtp_alert.sendCommunicationAlert(self._connection_retries)
 
                     # try to connect to the server
+                    reconnect_start = time.time()
                     if self._connection.reconnect():
+                        reconnect_duration = time.time() - reconnect_start
+
                         # if smtp alert is activated
                         # => send email that communication problems are solved
                         if self._smtp_alert is not None:
                             self._smtp_alert.sendCommunicationAlertClear()
 
-                        logging.info("[%s] Reconnecting successful after %d attempts."
-                                     % (self._log_tag, self._connection_retries))
+                        logging.info("[%s] Reconnecting successful after %d attempts (%s)."
+                                     % (self._log_tag,
+                                        self._connection_retries,
+                                        self._get_connect_timings(reconnect_duration)))
 
                         self._connection_retries = 1
                         break
@@ -126,6 +131,26 @@ class ConnectionWatchdog(threading.Thread):
                     logging.warning("[%s]: Stopped waiting for ping response after %d seconds."
                                     % (self._log_tag, self._ping_delay_warning))
 
+    def _get_connect_timings(self,
+                             reconnect_duration: float) -> str:
+        """
+        Returns the timings of the last connect for logging.
+        :param reconnect_duration: duration of the complete reconnect in seconds
+        :return: timings as string
+        """
+        client = self._connection.client
+        timings = "total %.1f ms" % (reconnect_duration * 1000)
+
+        if client.tcp_connect_duration is not None:
+            timings += ", tcp connect %.1f ms" % (client.tcp_connect_duration * 1000)
+
+        if client.tls_handshake_duration is not None:
+            timings += ", tls handshake %.1f ms (%s)" % (client.tls_handshake_duration * 1000,
+                                                        "resumed session" if client.tls_session_reused
+                                                        else "full handshake")
+
+        return timings
+
     def exit(self):
         """
         Sets the exit flag to shut down the thread.
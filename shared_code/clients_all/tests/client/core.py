@@ -29,6 +29,10 @@ class BasicConnection(Connection):
              timeout: float = 20.0) -> bytes:
         raise NotImplementedError("Abstract class.")
 
+    def wait_readable(self,
+                      timeout: float) -> bool:
+        raise NotImplementedError("Abstract class.")
+
     def close(self):
         raise NotImplementedError("Abstract class.")
 
@@ -77,6 +81,17 @@ class SimulatedConnection(Connection):
                     return data.encode("ascii")
             time.sleep(0.2)
 
+    def wait_readable(self,
+                      timeout: float) -> bool:
+
+        start_time = time.time()
+        while (time.time() - start_time) < timeout:
+            with self._recv_lock:
+                if self._recv_msg_queue:
+                    return True
+            time.sleep(0.01)
+        return False
+
     def close(self):
         raise NotImplementedError("Abstract class.")
 
@@ -157,7 +172,7 @@ def create_basic_communication() -> Communication:
     return comm
 
 
-def create_simulated_communication() -> Tuple[Communication, Communication]:
+def create_simulated_communication(protocol_version: int = 1) -> Tuple[Communication, Communication]:
     lock_send_client = threading.Lock()
     lock_send_server = threading.Lock()
     msg_queue_send_client = []
@@ -181,8 +196,8 @@ def create_simulated_communication() -> Tuple[Communication, Communication]:
     comm_client._log_tag = "client"
     comm_server._log_tag = "server"
 
-    comm_client.set_connected()
-    comm_server.set_connected()
+    comm_client.set_connected(protocol_version)
+    comm_server.set_connected(protocol_version)
 
     return comm_client, comm_server
 
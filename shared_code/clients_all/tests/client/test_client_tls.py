@@ -0,0 +1,103 @@
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+from unittest import TestCase, skipIf
+from lib.client.core import Client
+
+
+@skipIf(shutil.which("openssl") is None, "openssl command line tool not available")
+class TestClientTls(TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._cert_file = os.path.join(self._temp_dir, "server.crt")
+        key_file = os.path.join(self._temp_dir, "server.key")
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=localhost", "-keyout", key_file, "-out", self._cert_file],
+                       check=True,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+        self._server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self._server_context.load_cert_chain(certfile=self._cert_file, keyfile=key_file)
+
+        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_socket.bind(("127.0.0.1", 0))
+        self._server_socket.listen(5)
+        self._port = self._server_socket.getsockname()[1]
+
+        self._server_thread = threading.Thread(target=self._echo_server, daemon=True)
+        self._server_thread.start()
+
+    def tearDown(self):
+        self._server_socket.close()
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+    def _echo_server(self):
+        while True:
+            try:
+                conn, _ = self._server_socket.accept()
+            except OSError:
+                return
+
+            try:
+                with self._server_context.wrap_socket(conn, server_side=True) as ssl_conn:
+                    while True:
+                        data = ssl_conn.recv(4096)
+                        if not data:
+                            break
+                        ssl_conn.sendall(data)
+
+            except (OSError, ssl.SSLError):
+                pass
+
+    def _echo(self, client: Client):
+        client.send("test msg")
+        self.assertEqual(b"test msg", client.recv(4096, timeout=5.0))
+
+    def test_session_resumed(self):
+        """
+        Tests that the client uses one TLS context and resumes the TLS session when reconnecting.
+        """
+        client = Client("127.0.0.1", self._port, self._cert_file, None, None)
+
+        client.connect()
+        self.assertFalse(client.tls_session_reused)
+        self.assertIsNotNone(client.tcp_connect_duration)
+        self.assertIsNotNone(client.tls_handshake_duration)
+        self._echo(client)
+        client.close()
+
+        for _ in range(3):
+            client.connect()
+            self.assertTrue(client.tls_session_reused)
+            self._echo(client)
+            client.close()
+
+        self.assertEqual(1, client.ssl_context_builds)
+
+    def test_unknown_ca(self):
+        """
+        Tests that the client rejects a server certificate not signed by the configured CA.
+        """
+        other_dir = tempfile.mkdtemp()
+        try:
+            other_cert_file = os.path.join(other_dir, "other.crt")
+            subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                            "-subj", "/CN=localhost", "-keyout", os.path.join(other_dir, "other.key"),
+                            "-out", other_cert_file],
+                           check=True,
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+
+            client = Client("127.0.0.1", self._port, other_cert_file, None, None)
+            with self.assertRaises(ssl.SSLError):
+                client.connect()
+            client.close()
+
+        finally:
+            shutil.rmtree(other_dir, ignore_errors=True)
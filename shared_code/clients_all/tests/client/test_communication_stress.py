@@ -11,18 +11,13 @@ from lib.client.communication import MsgState
 
 class TestCommunicationStress(TestCase):
 
-    def test_stress_communication(self):
-        """
-        Stress tests communication by letting client and server trying to send
-        X messages to each other at the same time. Checks order of the send/received messages
-        as well as not to take too long to send messages.
-        """
+    def _stress_communication(self, protocol_version: int):
 
         count = 30
 
         config_logging(logging.CRITICAL)
 
-        comm_client, comm_server = create_simulated_communication()
+        comm_client, comm_server = create_simulated_communication(protocol_version)
 
         receiving_sync = threading.Event()
         receiving_sync.clear()
@@ -125,6 +120,22 @@ class TestCommunicationStress(TestCase):
         time_elapsed = time.time() - start_timer
         logging.info("Needed %.2f seconds to send/receive messages." % time_elapsed)
 
+    def test_stress_communication(self):
+        """
+        Stress tests communication by letting client and server trying to send
+        X messages to each other at the same time. Checks order of the send/received messages
+        as well as not to take too long to send messages.
+        """
+        self._stress_communication(1)
+
+    def test_stress_communication_pipelined(self):
+        """
+        Stress tests communication with protocol version 2 (pipelined frames) by letting client and server
+        trying to send X messages to each other at the same time. Checks order of the send/received messages
+        as well as not to take too long to send messages.
+        """
+        self._stress_communication(2)
+
     def test_stress_communication_error(self):
         """
         Stress tests communication error handling by letting the client send a ping request to the server
@@ -503,3 +503,115 @@ class TestCommunicationBasic(TestCase):
             self.assertTrue(promise.is_finished(timeout=5.0))
             self.assertTrue(promise.was_successful())
         Timer.stop_timer("receive_msgs")
+
+    def test_single_communication_pipelined(self):
+        """
+        Tests single request sending with protocol version 2 from the client to the server.
+        """
+        config_logging(logging.CRITICAL)
+
+        comm_client, comm_server = create_simulated_communication(2)
+
+        ping_msg = MsgBuilder.build_ping_msg()
+        promise = comm_client.send_request("ping", ping_msg)
+
+        msg_request = comm_server.recv_request()
+        self.assertIsNotNone(msg_request)
+        self.assertEqual(msg_request.state, MsgState.OK)
+        self.assertEqual(msg_request.msg_dict["message"], "ping")
+
+        # The response is processed by the receiving side of the client.
+        receiving_sync = threading.Event()
+        receiving_sync.set()
+        kwargs = {"count": 1,
+                  "comm": comm_client,
+                  "msg_requests": [],
+                  "sync": receiving_sync}
+        threading.Thread(target=msg_receiver, kwargs=kwargs, daemon=True).start()
+
+        self.assertTrue(promise.is_finished(timeout=5.0))
+        self.assertTrue(promise.was_successful())
+
+    def test_pipelined_requests_in_flight(self):
+        """
+        Tests that requests are sent with protocol version 2 without waiting for their responses
+        (up to the maximum number of requests in flight).
+        """
+        config_logging(logging.CRITICAL)
+        num_msgs = 20
+
+        comm_client, comm_server = create_simulated_communication(2)
+
+        promises = list()
+        for i in range(num_msgs):
+            ping_msg = MsgBuilder.build_ping_msg()
+            ping_dict = json.loads(ping_msg)
+            ping_dict["num_msg"] = i
+            promises.append(comm_client.send_request("ping", json.dumps(ping_dict)))
+
+        # Nobody processes the responses of the client => only the allowed number of requests are sent.
+        time.sleep(2.0)
+        # noinspection PyUnresolvedReferences
+        self.assertEqual(comm_client._max_in_flight, len(comm_client._connection._send_msg_queue))
+        for promise in promises:
+            self.assertFalse(promise.is_finished())
+
+        receiving_sync = threading.Event()
+        receiving_sync.set()
+        kwargs = {"count": 1,
+                  "comm": comm_client,
+                  "msg_requests": [],
+                  "sync": receiving_sync}
+        threading.Thread(target=msg_receiver, kwargs=kwargs, daemon=True).start()
+
+        Timer.start_timer(self, "receive_msgs", 30)
+        for i in range(num_msgs):
+            msg_request = comm_server.recv_request()
+            self.assertIsNotNone(msg_request)
+            self.assertEqual(msg_request.state, MsgState.OK)
+            self.assertEqual(msg_request.msg_dict["num_msg"], i)
+
+        for promise in promises:
+            self.assertTrue(promise.is_finished(timeout=5.0))
+            self.assertTrue(promise.was_successful())
+        Timer.stop_timer("receive_msgs")
+
+    def test_disconnect_pending_requests(self):
+        """
+        Tests that requests sent with protocol version 2 that did not get a response are sent again
+        after the communication channel was established anew.
+        """
+        config_logging(logging.CRITICAL)
+        num_msgs = 3
+
+        comm_client, comm_server = create_simulated_communication(2)
+
+        promises = list()
+        for i in range(num_msgs):
+            ping_msg = MsgBuilder.build_ping_msg()
+            ping_dict = json.loads(ping_msg)
+            ping_dict["num_msg"] = i
+            promises.append(comm_client.send_request("ping", json.dumps(ping_dict)))
+
+        # Wait until the requests are sent and drop them (connection lost before the server received them).
+        # noinspection PyUnresolvedReferences
+        send_queue = comm_client._connection._send_msg_queue
+        for _ in range(50):
+            if len(send_queue) == num_msgs:
+                break
+            time.sleep(0.1)
+        self.assertEqual(num_msgs, len(send_queue))
+        send_queue.clear()
+        comm_client._has_channel = False
+
+        # Connect client.
+        self.assertTrue(comm_client.connect())
+        comm_client.set_connected(2)
+
+        Timer.start_timer(self, "receive_msgs", 10)
+        for i in range(num_msgs):
+            msg_request = comm_server.recv_request()
+            self.assertIsNotNone(msg_request)
+            self.assertEqual(msg_request.state, MsgState.OK)
+            self.assertEqual(msg_request.msg_dict["num_msg"], i)
+        Timer.stop_timer("receive_msgs")
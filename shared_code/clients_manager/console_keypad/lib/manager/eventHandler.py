@@ -7,7 +7,7 @@
 #
 # Licensed under the GNU Affero General Public License, version 3.
 
-from typing import List
+from typing import List, Any, Dict
 from .screenUpdater import ScreenUpdater
 from .core import BaseManagerEventHandler
 from ..globalData import ManagerObjOption, ManagerObjNode, ManagerObjSensor, ManagerObjManager, ManagerObjAlert, \
@@ -53,6 +53,28 @@ class ManagerEventHandler(BaseManagerEventHandler):
 
         return result
 
+    # is called when a status update event with only the changes was received from the server
+    def status_update_delta(self,
+                            server_time: int,
+                            options: List[ManagerObjOption],
+                            nodes: List[ManagerObjNode],
+                            sensors: List[ManagerObjSensor],
+                            managers: List[ManagerObjManager],
+                            alerts: List[ManagerObjAlert],
+                            deleted: Dict[str, List[Any]]) -> bool:
+
+        result = super().status_update_delta(server_time,
+                                             options,
+                                             nodes,
+                                             sensors,
+                                             managers,
+                                             alerts,
+                                             deleted)
+
+        self.screen_updater.update_status()
+
+        return result
+
     # is called when a sensor alert event was received from the server
     def sensor_alert(self, server_time: int, sensor_alert: ManagerObjSensorAlert) -> bool:
 
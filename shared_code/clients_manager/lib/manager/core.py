@@ -9,7 +9,7 @@
 
 import os
 import logging
-from typing import List
+from typing import List, Dict, Any
 from ..globalData import ManagerObjOption, ManagerObjNode, ManagerObjSensor, ManagerObjManager, ManagerObjAlert, \
     ManagerObjAlertLevel, ManagerObjSensorAlert, ManagerObjProfile
 from ..client import EventHandler
@@ -33,6 +33,9 @@ class BaseManagerEventHandler(EventHandler):
         # Keep track of the last time a message was sent by the other side.
         self.msg_time = 0.0
 
+        # The system data storage can be updated with the changes since the last status update.
+        self.status_delta_supported = True
+
     def status_update(self,
                       msg_time: int,
                       options: List[ManagerObjOption],
@@ -147,6 +150,77 @@ class BaseManagerEventHandler(EventHandler):
 
         return True
 
+    def status_update_delta(self,
+                            msg_time: int,
+                            options: List[ManagerObjOption],
+                            nodes: List[ManagerObjNode],
+                            sensors: List[ManagerObjSensor],
+                            managers: List[ManagerObjManager],
+                            alerts: List[ManagerObjAlert],
+                            deleted: Dict[str, List[Any]]) -> bool:
+
+        self.msg_time = msg_time
+
+        # Remove deleted objects from system data storage
+        # (linked objects first since deleting a node also deletes its linked objects).
+        for sensor_id in deleted["sensors"]:
+            self._system_data.delete_sensor_by_id(sensor_id)
+
+        for alert_id in deleted["alerts"]:
+            self._system_data.delete_alert_by_id(alert_id)
+
+        for manager_id in deleted["managers"]:
+            self._system_data.delete_manager_by_id(manager_id)
+
+        for node_id in deleted["nodes"]:
+            self._system_data.delete_node_by_id(node_id)
+
+        for option_type in deleted["options"]:
+            self._system_data.delete_option_by_type(option_type)
+
+        # Update system data storage with added or changed objects.
+        for option in options:
+            try:
+                self._system_data.update_option(option)
+
+            except ValueError:
+                logging.exception("[%s]: Updating Option '%s' failed." % (self._log_tag, option.type))
+                return False
+
+        for node in nodes:
+            try:
+                self._system_data.update_node(node)
+
+            except ValueError:
+                logging.exception("[%s]: Updating Node %d failed." % (self._log_tag, node.nodeId))
+                return False
+
+        for alert in alerts:
+            try:
+                self._system_data.update_alert(alert)
+
+            except ValueError:
+                logging.exception("[%s]: Updating Alert %d failed." % (self._log_tag, alert.alertId))
+                return False
+
+        for manager in managers:
+            try:
+                self._system_data.update_manager(manager)
+
+            except ValueError:
+                logging.exception("[%s]: Updating Manager %d failed." % (self._log_tag, manager.managerId))
+                return False
+
+        for sensor in sensors:
+            try:
+                self._system_data.update_sensor(sensor)
+
+            except ValueError:
+                logging.exception("[%s]: Updating Sensor %d failed." % (self._log_tag, sensor.sensorId))
+                return False
+
+        return True
+
     def sensor_alert(self,
                      msg_time: int,
                      sensor_alert: ManagerObjSensorAlert) -> bool:
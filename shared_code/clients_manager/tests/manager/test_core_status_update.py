@@ -499,3 +499,75 @@ class TestManagerCoreStatusUpdate(TestSystemDataCore):
 
             if not found:
                 self.fail("Stored Alert Level object not found in local objects.")
+
+    def test_delta_update(self):
+        """
+        Tests status update that only contains changed and deleted objects.
+        """
+        global_data = GlobalData()
+        global_data.system_data = self._create_system_data()
+        event_handler = BaseManagerEventHandler(global_data)
+
+        # Change single local object and remove others.
+        sensor_to_change = self.sensors[0]
+        sensor_to_change.description += "_new"
+
+        alert_to_remove = self.alerts[1]
+        self.alerts.remove(alert_to_remove)
+
+        option_to_remove = self.options[0]
+        self.options.remove(option_to_remove)
+
+        deleted = {"options": [option_to_remove.type],
+                   "nodes": [],
+                   "sensors": [],
+                   "managers": [],
+                   "alerts": [alert_to_remove.alertId]}
+
+        if not event_handler.status_update_delta(0,
+                                                 [],
+                                                 [],
+                                                 [sensor_to_change],
+                                                 [],
+                                                 [],
+                                                 deleted):
+            self.fail("Status update failed.")
+
+        compare_options_content(self, self.options, global_data.system_data.get_options_list())
+        compare_profiles_content(self, self.profiles, global_data.system_data.get_profiles_list())
+        compare_alert_levels_content(self, self.alert_levels, global_data.system_data.get_alert_levels_list())
+        compare_nodes_content(self, self.nodes, global_data.system_data.get_nodes_list())
+        compare_alerts_content(self, self.alerts, global_data.system_data.get_alerts_list())
+        compare_managers_content(self, self.managers, global_data.system_data.get_managers_list())
+        compare_sensors_content(self, self.sensors, global_data.system_data.get_sensors_list())
+
+    def test_delta_node_deletion(self):
+        """
+        Tests status update that deletes a node together with its linked objects.
+        """
+        global_data = GlobalData()
+        global_data.system_data = self._create_system_data()
+        event_handler = BaseManagerEventHandler(global_data)
+
+        node_to_remove = None
+        for node in self.nodes:
+            if node.nodeType == "sensor":
+                node_to_remove = node
+                break
+        self.nodes.remove(node_to_remove)
+        sensors_to_remove = [sensor for sensor in self.sensors if sensor.nodeId == node_to_remove.nodeId]
+        for sensor in sensors_to_remove:
+            self.sensors.remove(sensor)
+
+        deleted = {"options": [],
+                   "nodes": [node_to_remove.nodeId],
+                   "sensors": [sensor.sensorId for sensor in sensors_to_remove],
+                   "managers": [],
+                   "alerts": []}
+
+        if not event_handler.status_update_delta(0, [], [], [], [], [], deleted):
+            self.fail("Status update failed.")
+
+        compare_nodes_content(self, self.nodes, global_data.system_data.get_nodes_list())
+        compare_sensors_content(self, self.sensors, global_data.system_data.get_sensors_list())
+        compare_alerts_content(self, self.alerts, global_data.system_data.get_alerts_list())
@@ -336,6 +336,22 @@ class SensorExecuter(threading.Thread):
     def is_initialized(self) -> bool:
         return self._is_initialized
 
+    def _send_state_changes(self, state_changes: List[SensorObjStateChange]):
+        """
+        Internal function that sends the pending state changes to the server (in one message if the server
+        supports it) and empties the given list.
+
+        :param state_changes:
+        """
+        if len(state_changes) > 1 and self._connection.protocol_version >= 3:
+            self._connection.send_state_change_batch(list(state_changes))
+
+        else:
+            for state_change in state_changes:
+                self._connection.send_state_change(state_change)
+
+        del state_changes[:]
+
     def execute(self):
 
         # Time on which the last full sensor states were sent to the server.
@@ -359,18 +375,23 @@ class SensorExecuter(threading.Thread):
                 time.sleep(0.5)
                 continue
 
-            # Poll all sensors and send their alerts/states.
+            # Poll all sensors and send their alerts/states. The state changes are collected and sent together
+            # (pending state changes are sent before a sensor alert to keep the order of the events).
+            state_changes = list()  # type: List[SensorObjStateChange]
             for sensor in self._sensors:
                 for event in sensor.get_events():
                     if type(event) == SensorObjSensorAlert:
                         logging.info("[%s]: Sensor alert triggered by '%s' with state %d."
                                      % (self._log_tag, sensor.description, event.state))
+                        self._send_state_changes(state_changes)
                         self._connection.send_sensor_alert(event)
 
                     elif type(event) == SensorObjStateChange:
                         logging.debug("[%s]: State changed by '%s' to state %d."
                                       % (self._log_tag, sensor.description, event.state))
-                        self._connection.send_state_change(event)
+                        state_changes.append(event)
+
+            self._send_state_changes(state_changes)
 
             # Check if the last state that was sent to the server is older than 60 seconds => send state update
             utc_timestamp = int(time.time())
@@ -9,14 +9,20 @@ class MockServerCommunication:
 
     def __init__(self):
         self._is_connected = True
+        self._protocol_version = 1
         self._send_sensor_alerts = []  # type: List[Tuple[float, SensorObjSensorAlert]]
         self._send_state_changes = []  # type: List[Tuple[float, SensorObjStateChange]]
         self._send_sensors_status_updates = []  # type: List[int]
+        self._send_state_change_batches = []  # type: List[Tuple[float, List[SensorObjStateChange]]]
 
     @property
     def is_connected(self) -> bool:
         return self._is_connected
 
+    @property
+    def protocol_version(self) -> int:
+        return self._protocol_version
+
     @property
     def send_sensor_alerts(self) -> List[Tuple[float, SensorObjSensorAlert]]:
         return self._send_sensor_alerts
@@ -39,6 +45,18 @@ class MockServerCommunication:
         self._send_state_changes.append((time.time(), state_change))
         return Promise("statechange", "place holder statechange msg")
 
+    @property
+    def send_state_change_batches(self) -> List[Tuple[float, List[SensorObjStateChange]]]:
+        return self._send_state_change_batches
+
+    def send_state_change_batch(self,
+                                state_changes: List[SensorObjStateChange]) -> Promise:
+        utc_timestamp = time.time()
+        self._send_state_change_batches.append((utc_timestamp, state_changes))
+        for state_change in state_changes:
+            self._send_state_changes.append((utc_timestamp, state_change))
+        return Promise("statechanges", "place holder statechanges msg")
+
     def send_sensors_status_update(self):
         self._send_sensors_status_updates.append(int(time.time()))
         return Promise("status", "place holder status msg")
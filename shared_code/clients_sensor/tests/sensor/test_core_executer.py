@@ -144,3 +144,44 @@ class TestSensorExecuter(TestCase):
         time.sleep(self._sensor_executer._full_state_interval + 2)
 
         self.assertEqual(2, len(self._communication.send_sensors_status_updates))
+
+    def test_state_changes_batched(self):
+        """
+        Tests that the pending state changes are sent in one message if the server supports it and that
+        they are sent before a following sensor alert.
+        """
+        self._communication._protocol_version = 3
+
+        sensor = self._sensors[0]
+        for i in range(5):
+            if i == 2:
+                sensor_alert = SensorObjSensorAlert()
+                sensor_alert.clientSensorId = i
+                sensor_alert.state = 1
+                sensor_alert.hasOptionalData = False
+                sensor_alert.changeState = False
+                sensor_alert.hasLatestData = False
+                sensor_alert.dataType = SensorDataType.NONE
+                sensor_alert.data = SensorDataNone()
+                sensor.add_sensor_alert(sensor_alert)
+
+            else:
+                state_change = SensorObjStateChange()
+                state_change.clientSensorId = i
+                state_change.state = 1
+                state_change.dataType = SensorDataType.NONE
+                state_change.data = SensorDataNone()
+                sensor.add_state_change(state_change)
+
+        self._sensor_executer.start()
+        time.sleep(1)
+
+        batches = self._communication.send_state_change_batches
+        self.assertEqual(2, len(batches))
+        self.assertEqual([0, 1], [x.clientSensorId for x in batches[0][1]])
+        self.assertEqual([3, 4], [x.clientSensorId for x in batches[1][1]])
+
+        self.assertEqual(1, len(self._communication.send_sensor_alerts))
+        alert_time = self._communication.send_sensor_alerts[0][0]
+        self.assertLessEqual(batches[0][0], alert_time)
+        self.assertLessEqual(alert_time, batches[1][0])